@@ -9,9 +9,12 @@ import pandas as pd
 from datetime import datetime, date, timedelta
 from typing import List, Dict
 
+from db_pool import get_connection
+from reservations import release_slot
+
 def init_admin_database():
     """Initialize database connection for admin operations"""
-    return sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+    return get_connection()
 
 def add_slot_management_to_main_app():
     """Add slot management functions to the main admin interface"""
@@ -323,28 +326,7 @@ def add_slot_management_to_main_app():
     
     def delete_booking(booking_id: int):
         """Delete a booking and update slot availability"""
-        conn = init_admin_database()
-        
-        # Get slot_id before deleting booking
-        cursor = conn.execute('SELECT slot_id FROM customer_bookings WHERE id = ?', (booking_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            slot_id = result[0]
-            
-            # Delete booking
-            conn.execute('DELETE FROM customer_bookings WHERE id = ?', (booking_id,))
-            
-            # Update slot booking count
-            conn.execute('''
-                UPDATE time_slots 
-                SET current_bookings = current_bookings - 1
-                WHERE id = ? AND current_bookings > 0
-            ''', (slot_id,))
-            
-            conn.commit()
-        
-        conn.close()
+        release_slot(booking_id, delete=True)
     
     def show_service_management():
         """Show service management interface"""
@@ -4,7 +4,6 @@ Production-ready version with internationalization support
 """
 
 import streamlit as st
-import sqlite3
 import bcrypt
 import pandas as pd
 from datetime import datetime, date, timedelta
@@ -12,6 +11,13 @@ from typing import List, Dict, Optional
 import plotly.express as px
 import plotly.graph_objects as go
 
+from db_pool import get_connection
+from migrations import ensure_schema, ADMIN_BACKEND_MIGRATIONS
+from bulk_jobs import bulk_assign, bulk_reschedule, bulk_set_status, describe
+from interval_index import find_conflicts
+from analytics_replica import get_replica_connection, replica_status
+from typed_frames import read_sql_typed
+
 # Import translation system
 from translations import t, init_language_selector, get_current_language, format_currency, format_date
 
@@ -20,7 +26,7 @@ DB_PATH = 'cleaning-service-app/backend/data/cleaning_service.db'
 
 def get_db_connection():
     """Get a database connection with consistent configuration"""
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    return get_connection(DB_PATH)
 
 # Page configuration
 st.set_page_config(
@@ -64,197 +70,8 @@ st.markdown("""
 
 def init_database():
     """Initialize the database with all required tables"""
-    conn = get_db_connection()
-    
-    # Admin users table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS admin_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT DEFAULT 'admin',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Customers table (admin-created)
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            address TEXT,
-            preferences TEXT,
-            rating REAL DEFAULT 0,
-            total_jobs INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Customer portal users table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            verified BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    # Employees table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            hourly_rate REAL,
-            specialties TEXT,
-            availability TEXT,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Add missing columns for backward compatibility
-    try:
-        conn.execute('ALTER TABLE employees ADD COLUMN status TEXT DEFAULT "active"')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    try:
-        conn.execute('ALTER TABLE employees ADD COLUMN specialties TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    # Update NULL status values to 'active'
-    conn.execute('UPDATE employees SET status = "active" WHERE status IS NULL OR status = ""')
-    conn.commit()
-    
-    # Jobs table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            employee_id INTEGER,
-            title TEXT NOT NULL,
-            description TEXT,
-            scheduled_date DATE,
-            scheduled_time TEXT,
-            duration INTEGER,
-            status TEXT DEFAULT 'pending',
-            service_type TEXT,
-            location TEXT,
-            price REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers (id),
-            FOREIGN KEY (employee_id) REFERENCES employees (id)
-        )
-    ''')
-    
-    # Note: service_types table already exists from React backend
-    # The React backend uses: id, name, description, base_price, duration_minutes, category, features, is_active, created_at
-    # No need to create a separate admin service_types table
-    
-    # Create a view to map React backend's bookings table to admin portal's jobs table format
-    # This allows the admin portal to view bookings made through the React frontend
-    try:
-        conn.execute('''
-            CREATE VIEW IF NOT EXISTS jobs AS
-            SELECT 
-                b.id,
-                b.user_id as customer_id,
-                b.cleaner_id as employee_id,
-                st.name as title,
-                b.special_instructions as description,
-                b.service_date as scheduled_date,
-                b.service_time as scheduled_time,
-                b.estimated_duration as duration,
-                b.status,
-                st.name as service_type,
-                b.address as location,
-                b.total_price as price,
-                b.created_at
-            FROM bookings b
-            LEFT JOIN service_types st ON b.service_type_id = st.id
-            LEFT JOIN users u ON b.user_id = u.id
-        ''')
-        
-        # Create a view to map React users to admin portal customers format
-        conn.execute('''
-            CREATE VIEW IF NOT EXISTS customers AS
-            SELECT 
-                u.id,
-                (u.first_name || ' ' || u.last_name) as name,
-                u.email,
-                u.phone,
-                u.address,
-                '' as preferences,
-                0 as rating,
-                (SELECT COUNT(*) FROM bookings WHERE user_id = u.id) as total_jobs,
-                u.created_at
-            FROM users u
-            WHERE u.role = 'customer'
-        ''')
-    except sqlite3.OperationalError as e:
-        # If React backend tables don't exist yet, create fallback tables
-        print(f"React backend tables not found, using fallback: {e}")
-        
-        # Create fallback jobs table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER,
-                employee_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT,
-                scheduled_date DATE,
-                scheduled_time TEXT,
-                duration INTEGER,
-                status TEXT DEFAULT 'pending',
-                service_type TEXT,
-                location TEXT,
-                price REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create fallback customers table  
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                address TEXT,
-                preferences TEXT,
-                rating REAL DEFAULT 0,
-                total_jobs INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-    
-    
-    # Insert default admin user
-    try:
-        password_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt())
-        conn.execute('INSERT OR IGNORE INTO admin_users (username, password_hash) VALUES (?, ?)', 
-                    ('admin', password_hash))
-        conn.commit()
-    except:
-        pass
-    
-    # Note: Service types are managed by the React backend
-    # Default service types already exist in the React backend database
-    
-    conn.commit()
-    return conn
+    ensure_schema(DB_PATH, ADMIN_BACKEND_MIGRATIONS)
+    return get_db_connection()
 
 def initialize_database_schema():
     """Initialize database schema (called once on startup)"""
@@ -338,7 +155,7 @@ def show_dashboard():
     
     with col1:
         st.subheader(t("recent_bookings", current_lang))
-        recent_jobs = pd.read_sql_query("""
+        recent_jobs = read_sql_typed("""
             SELECT j.*, c.name as customer_name 
             FROM jobs j 
             LEFT JOIN customers c ON j.customer_id = c.id 
@@ -352,8 +169,8 @@ def show_dashboard():
                 <div class="metric-card">
                     <strong>{job['customer_name'] or 'Unknown Customer'}</strong><br>
                     <span class="{status_class}">● {t(job['status'], current_lang)}</span> - {job['service_type']}<br>
-                    📅 {format_date(datetime.strptime(job['scheduled_date'], '%Y-%m-%d').date(), current_lang) if job['scheduled_date'] else 'No date'} 
-                    🕐 {job['scheduled_time'] if job['scheduled_time'] else 'No time'}
+                    📅 {format_date(job['scheduled_date'], current_lang) if pd.notna(job['scheduled_date']) else 'No date'} 
+                    🕐 {job['scheduled_time'] if pd.notna(job['scheduled_time']) else 'No time'}
                 </div>
                 """, unsafe_allow_html=True)
         else:
@@ -361,7 +178,7 @@ def show_dashboard():
     
     with col2:
         st.subheader(t("upcoming_jobs", current_lang))
-        upcoming_jobs = pd.read_sql_query("""
+        upcoming_jobs = read_sql_typed("""
             SELECT j.*, c.name as customer_name, e.name as employee_name
             FROM jobs j 
             LEFT JOIN customers c ON j.customer_id = c.id 
@@ -376,8 +193,8 @@ def show_dashboard():
                 <div class="metric-card">
                     <strong>{job['customer_name'] or 'Unknown Customer'}</strong><br>
                     👨‍🔧 {job['employee_name'] or t('not_assigned', current_lang) if 'not_assigned' in st.session_state.get('translations', {}) else 'Not assigned'}<br>
-                    📅 {format_date(datetime.strptime(job['scheduled_date'], '%Y-%m-%d').date(), current_lang) if job['scheduled_date'] else 'No date'} 
-                    🕐 {job['scheduled_time'] if job['scheduled_time'] else 'No time'}
+                    📅 {format_date(job['scheduled_date'], current_lang) if pd.notna(job['scheduled_date']) else 'No date'} 
+                    🕐 {job['scheduled_time'] if pd.notna(job['scheduled_time']) else 'No time'}
                 </div>
                 """, unsafe_allow_html=True)
         else:
@@ -426,7 +243,7 @@ def manage_customers():
         ORDER BY created_at DESC
         """
         
-        customers = pd.read_sql_query(customers_query, conn)
+        customers = read_sql_typed(customers_query, conn)
         
         if not customers.empty:
             # Search functionality
@@ -451,7 +268,7 @@ def manage_customers():
                         st.write(f"**{t('total_jobs', current_lang)}:** {customer['total_jobs']}")
                     with col2:
                         st.write(f"**{t('customer_rating', current_lang)}:** ⭐ {customer['rating']:.1f}")
-                        st.write(f"**{t('joined_date', current_lang)}:** {format_date(datetime.strptime(customer['created_at'], '%Y-%m-%d %H:%M:%S').date(), current_lang)}")
+                        st.write(f"**{t('joined_date', current_lang)}:** {format_date(customer['created_at'], current_lang) if pd.notna(customer['created_at']) else t('not_provided', current_lang)}")
                         st.write(f"**{t('source', current_lang)}:** {customer['source']}")
         else:
             st.info(t("no_customers_found", current_lang))
@@ -491,7 +308,7 @@ def manage_employees():
     
     with tab1:
         # Query with flexible column handling for backward compatibility
-        employees = pd.read_sql_query("""
+        employees = read_sql_typed("""
             SELECT id, name, email, phone, hourly_rate, 
                    COALESCE(specialties, '') as specialties,
                    availability, 
@@ -527,7 +344,7 @@ def manage_employees():
                     with col2:
                         st.write(f"**{t('availability', current_lang)}:** {employee['availability'] if employee['availability'] else t('not_provided', current_lang)}")
                         st.write(f"**{t('employee_status', current_lang)}:** {t(employee_status, current_lang)}")
-                        st.write(f"**{t('hire_date', current_lang)}:** {format_date(datetime.strptime(employee['created_at'], '%Y-%m-%d %H:%M:%S').date(), current_lang)}")
+                        st.write(f"**{t('hire_date', current_lang)}:** {format_date(employee['created_at'], current_lang) if pd.notna(employee['created_at']) else t('not_provided', current_lang)}")
                     
                     # Employee performance metrics
                     job_count = conn.execute("SELECT COUNT(*) FROM jobs WHERE employee_id = ?", (employee['id'],)).fetchone()[0]
@@ -610,7 +427,7 @@ def manage_jobs():
         show_bulk_operations(conn, current_lang)
         
     with tab5:
-        show_assignment_analytics(conn, current_lang)
+        show_assignment_analytics(current_lang)
     
     conn.close()
 
@@ -823,12 +640,11 @@ def show_employee_assignment(conn, current_lang):
                         emp_name = selected_employee.split(" - ")[0]
                         employee_id = available_employees[available_employees['name'] == emp_name]['id'].iloc[0]
                         
-                        # Assign employee to job
-                        conn.execute("UPDATE jobs SET employee_id = ?, status = 'confirmed' WHERE id = ?", 
-                                   (employee_id, job['id']))
-                        conn.commit()
-                        st.success(f"{t('job_assigned_successfully', current_lang)}")
-                        st.rerun()
+                        # Assign employee to job, unless it would double-book them
+                        result = bulk_assign([job['id']], int(employee_id), set_status='confirmed',
+                                             performed_by=st.session_state.get('admin_username'),
+                                             db_path=DB_PATH)
+                        show_bulk_result(result, 'job_assigned_successfully', current_lang)
         
         with col2:
             st.write(f"**{t('available_employees', current_lang)} ({len(available_employees)}):**")
@@ -878,12 +694,10 @@ def show_employee_assignment(conn, current_lang):
                 
                 if st.form_submit_button(f"👥 {t('assign_selected_jobs', current_lang)}"):
                     if selected_jobs and bulk_employee:
-                        for job_id in selected_jobs:
-                            conn.execute("UPDATE jobs SET employee_id = ?, status = 'confirmed' WHERE id = ?", 
-                                       (bulk_employee, job_id))
-                        conn.commit()
-                        st.success(f"{t('jobs_assigned_successfully', current_lang)}: {len(selected_jobs)}")
-                        st.rerun()
+                        result = bulk_assign(selected_jobs, int(bulk_employee), set_status='confirmed',
+                                             performed_by=st.session_state.get('admin_username'),
+                                             db_path=DB_PATH)
+                        show_bulk_result(result, 'jobs_assigned_successfully', current_lang)
 
 def show_job_board(conn, current_lang):
     """Visual job board with drag-and-drop style interface"""
@@ -1015,10 +829,10 @@ def show_bulk_operations(conn, current_lang):
                 )
                 
                 if st.button(f"🔄 {t('update_status', current_lang)}"):
-                    for job_id in selected_job_ids:
-                        update_job_status(conn, job_id, new_status)
-                    st.success(f"{t('status_updated_successfully', current_lang)}: {len(selected_job_ids)} {t('jobs', current_lang)}")
-                    st.rerun()
+                    result = bulk_set_status(selected_job_ids, new_status,
+                                             performed_by=st.session_state.get('admin_username'),
+                                             db_path=DB_PATH)
+                    show_bulk_result(result, 'status_updated_successfully', current_lang)
             
             # Bulk Employee Assignment
             elif bulk_op == t("bulk_employee_assignment", current_lang):
@@ -1032,11 +846,10 @@ def show_bulk_operations(conn, current_lang):
                     )
                     
                     if st.button(f"👥 {t('assign_employee', current_lang)}"):
-                        for job_id in selected_job_ids:
-                            conn.execute("UPDATE jobs SET employee_id = ? WHERE id = ?", (selected_employee, job_id))
-                        conn.commit()
-                        st.success(f"{t('employee_assigned_successfully', current_lang)}: {len(selected_job_ids)} {t('jobs', current_lang)}")
-                        st.rerun()
+                        result = bulk_assign(selected_job_ids, selected_employee, set_status=None,
+                                             performed_by=st.session_state.get('admin_username'),
+                                             db_path=DB_PATH)
+                        show_bulk_result(result, 'employee_assigned_successfully', current_lang)
                 else:
                     st.warning(t("no_available_employees", current_lang))
             
@@ -1062,12 +875,10 @@ def show_bulk_operations(conn, current_lang):
                     new_time = st.time_input(t("new_time", current_lang))
                 
                 if st.button(f"📅 {t('reschedule_jobs', current_lang)}"):
-                    for job_id in selected_job_ids:
-                        conn.execute("UPDATE jobs SET scheduled_date = ?, scheduled_time = ? WHERE id = ?", 
-                                   (new_date.isoformat(), new_time.strftime("%H:%M"), job_id))
-                    conn.commit()
-                    st.success(f"{t('jobs_rescheduled_successfully', current_lang)}: {len(selected_job_ids)}")
-                    st.rerun()
+                    result = bulk_reschedule(selected_job_ids, new_date.isoformat(), new_time.strftime("%H:%M"),
+                                             performed_by=st.session_state.get('admin_username'),
+                                             db_path=DB_PATH)
+                    show_bulk_result(result, 'jobs_rescheduled_successfully', current_lang)
             
             # Bulk Price Update
             elif bulk_op == t("bulk_price_update", current_lang):
@@ -1102,9 +913,20 @@ def show_bulk_operations(conn, current_lang):
     else:
         st.info(t("no_jobs_available_for_bulk_operations", current_lang))
 
-def show_assignment_analytics(conn, current_lang):
+def show_bulk_result(result, success_key, current_lang):
+    """Report a bulk operation; skipped jobs stay on screen instead of rerunning"""
+    message = f"{t(success_key, current_lang)}: {len(result.updated)} {t('jobs', current_lang)}"
+    if result.rejected:
+        st.warning(f"⚠️ {message}. {t('some_jobs_skipped', current_lang)}: {describe(result)}")
+    else:
+        st.success(message)
+        st.rerun()
+
+def show_assignment_analytics(current_lang):
     """Advanced analytics for job assignments and employee performance"""
     st.subheader("📈 " + t("assignment_analytics", current_lang))
+    conn = get_replica_connection(DB_PATH)
+    st.caption(replica_status(DB_PATH).describe())
     
     # Date range selector
     col1, col2 = st.columns(2)
@@ -1249,6 +1071,8 @@ def show_assignment_analytics(conn, current_lang):
         for idx, emp in workload_stats.iterrows():
             workload_level = "🔴" if emp['total_workload'] > 5 else "🟡" if emp['total_workload'] > 2 else "🟢"
             st.write(f"{workload_level} **{emp['employee_name']}**: {emp['pending_jobs']} {t('pending', current_lang)}, {emp['active_jobs']} {t('active', current_lang)}, {emp['completed_jobs']} {t('completed', current_lang)}")
+    
+    conn.close()
 
 # Helper functions for job management
 def update_job_status(conn, job_id, new_status):
@@ -1277,17 +1101,21 @@ def show_edit_job_form(conn, job, current_lang):
         col1_btn, col2_btn = st.columns(2)
         with col1_btn:
             if st.form_submit_button(t("save_changes", current_lang)):
-                conn.execute("""
-                    UPDATE jobs 
-                    SET title = ?, description = ?, price = ?, scheduled_date = ?, 
-                        scheduled_time = ?, location = ?
-                    WHERE id = ?
-                """, (new_title, new_description, new_price, new_date.isoformat(), 
-                      new_time.strftime("%H:%M"), new_location, job['id']))
-                conn.commit()
-                st.success(t("job_updated_successfully", current_lang))
-                del st.session_state[f'show_edit_job_{job["id"]}']
-                st.rerun()
+                # The move goes through the schedule check; a double booking keeps the job where it was
+                result = bulk_reschedule([job['id']], new_date.isoformat(), new_time.strftime("%H:%M"),
+                                         performed_by=st.session_state.get('admin_username'), db_path=DB_PATH)
+                if result.rejected:
+                    st.error(f"{t('employee_double_booked', current_lang)}: {describe(result)}")
+                else:
+                    conn.execute("""
+                        UPDATE jobs
+                        SET title = ?, description = ?, price = ?, location = ?
+                        WHERE id = ?
+                    """, (new_title, new_description, new_price, new_location, job['id']))
+                    conn.commit()
+                    st.success(t("job_updated_successfully", current_lang))
+                    del st.session_state[f'show_edit_job_{job["id"]}']
+                    st.rerun()
         
         with col2_btn:
             if st.form_submit_button(t("cancel", current_lang)):
@@ -1315,12 +1143,12 @@ def show_assignment_form(conn, job, current_lang):
             col1_btn, col2_btn = st.columns(2)
             with col1_btn:
                 if st.form_submit_button(t("assign_employee", current_lang)):
-                    conn.execute("UPDATE jobs SET employee_id = ?, status = 'confirmed' WHERE id = ?", 
-                               (selected_employee, job['id']))
-                    conn.commit()
-                    st.success(t("employee_assigned_successfully", current_lang))
-                    del st.session_state[f'show_assign_job_{job["id"]}']
-                    st.rerun()
+                    result = bulk_assign([job['id']], int(selected_employee), set_status='confirmed',
+                                         performed_by=st.session_state.get('admin_username'),
+                                         db_path=DB_PATH)
+                    if not result.rejected:
+                        del st.session_state[f'show_assign_job_{job["id"]}']
+                    show_bulk_result(result, 'employee_assigned_successfully', current_lang)
             
             with col2_btn:
                 if st.form_submit_button(t("cancel", current_lang)):
@@ -1385,12 +1213,19 @@ def show_add_job_form(conn, current_lang):
                 if selected_employee:
                     employee_id = int(selected_employee.split("ID: ")[1].split(")")[0])
                 
+                # The form asks for hours; jobs.duration and the schedule index are in minutes
+                duration_minutes = int(duration * 60)
+                if employee_id and find_conflicts(employee_id, scheduled_date, scheduled_time.strftime("%H:%M"),
+                                                  duration_minutes, db_path=DB_PATH):
+                    st.error(t("employee_double_booked", current_lang))
+                    return
+                
                 conn.execute('''
                     INSERT INTO jobs (customer_id, employee_id, title, description, scheduled_date, 
                                     scheduled_time, duration, service_type, location, price, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
                 ''', (customer_id, employee_id, title, description, scheduled_date, 
-                      scheduled_time.strftime("%H:%M"), duration, service_type, location, price))
+                      scheduled_time.strftime("%H:%M"), duration_minutes, service_type, location, price))
                 conn.commit()
                 st.success(t("job_created_successfully", current_lang))
                 st.rerun()
@@ -1400,9 +1235,11 @@ def show_add_job_form(conn, current_lang):
 def show_analytics():
     """Analytics dashboard with multilingual support"""
     current_lang = get_current_language()
-    conn = get_db_connection()
+    # Reports read the analytics snapshot, never the live booking database
+    conn = get_replica_connection(DB_PATH)
     
     st.title("📈 " + t("analytics", current_lang))
+    st.caption(replica_status(DB_PATH).describe())
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
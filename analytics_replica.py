@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Analytics snapshot replica for Aufraumenbee
+Copies the live database to a read-only file with the backup API so reports never touch the booking path
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import analytics_store
+from config import Config
+from db_pool import get_connection
+from query_metrics import InstrumentedConnection, instrument
+
+REPLICA_INFO_TABLE = '''
+    CREATE TABLE IF NOT EXISTS analytics_replica_info (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        source_path TEXT NOT NULL,
+        refreshed_at TEXT NOT NULL,
+        duration_ms REAL NOT NULL
+    )
+'''
+
+
+@dataclass
+class ReplicaStatus:
+    """Where a replica lives and how old it is"""
+    path: str
+    refreshed_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+
+    @property
+    def exists(self) -> bool:
+        return self.refreshed_at is not None
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.refreshed_at).total_seconds()
+
+    @property
+    def stale(self) -> bool:
+        """Older than two refresh intervals: the refresher is probably not running"""
+        age = self.age_seconds
+        return age is None or age > 2 * Config.ANALYTICS_REPLICA_INTERVAL_MINUTES * 60
+
+    def describe(self) -> str:
+        """Short caption for report pages, e.g. 'Snapshot from 14:05 (3 min old)'"""
+        if self.refreshed_at is None:
+            return "Live data (no analytics snapshot yet)"
+        minutes = int(self.age_seconds // 60)
+        local = self.refreshed_at.astimezone().strftime('%Y-%m-%d %H:%M')
+        age = "just now" if minutes < 1 else f"{minutes} min old"
+        return f"{'⚠️' if self.stale else '📸'} Snapshot from {local} ({age})"
+
+
+def replica_path(db_path: str = None) -> str:
+    """Replica file for a database: ANALYTICS_REPLICA_DIR or next to the source"""
+    db_path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    directory = Config.ANALYTICS_REPLICA_DIR or os.path.dirname(db_path)
+    name, _ = os.path.splitext(os.path.basename(db_path))
+    return os.path.join(directory, f"{name}.analytics.db")
+
+
+def refresh_replica(db_path: str = None, pages: int = None) -> ReplicaStatus:
+    """Copy the live database into a fresh replica file and swap it in atomically.
+
+    The backup API reads the source under an ordinary read transaction; in
+    WAL mode writers carry on while it runs. ``pages`` > 0 copies that many
+    pages per step and releases the source between steps (incremental mode),
+    for rollback-journal databases where a long read would block writers;
+    any write from another connection restarts an incremental copy, so on a
+    busy WAL database the default single step finishes far sooner.
+    The copy goes to a temporary file first, so readers either see the
+    previous snapshot or the new one, never a half-written file.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    pages = Config.ANALYTICS_BACKUP_PAGES if pages is None else pages
+    target_path = replica_path(db_path)
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    started = time.perf_counter()
+    fd, temp_path = tempfile.mkstemp(prefix='.analytics-', suffix='.db', dir=os.path.dirname(target_path))
+    os.close(fd)
+    try:
+        source = sqlite3.connect(db_path)
+        source.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target, pages=pages if pages > 0 else -1,
+                          sleep=Config.ANALYTICS_BACKUP_SLEEP_MS / 1000)
+        finally:
+            source.close()
+
+        # A single-file replica: readers open it read-only and need no -wal/-shm
+        target.execute("PRAGMA journal_mode = DELETE")
+        refreshed_at = datetime.now(timezone.utc)
+        duration_ms = (time.perf_counter() - started) * 1000
+        target.execute(REPLICA_INFO_TABLE)
+        target.execute(
+            "INSERT OR REPLACE INTO analytics_replica_info (id, source_path, refreshed_at, duration_ms) "
+            "VALUES (1, ?, ?, ?)",
+            (os.path.abspath(db_path), refreshed_at.isoformat(), duration_ms)
+        )
+        target.commit()
+        target.close()
+        os.replace(temp_path, target_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return ReplicaStatus(target_path, refreshed_at, duration_ms)
+
+
+def replica_status(db_path: str = None) -> ReplicaStatus:
+    """Age of the current replica, without touching the live database"""
+    path = replica_path(db_path)
+    if not os.path.exists(path):
+        return ReplicaStatus(path)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT refreshed_at, duration_ms FROM analytics_replica_info WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        return ReplicaStatus(path)
+    return ReplicaStatus(path, datetime.fromisoformat(row[0]), row[1])
+
+
+def get_replica_connection(db_path: str = None) -> sqlite3.Connection:
+    """Read-only connection for reports; close() it when done.
+
+    Opened per page render rather than pooled: after a refresh swaps the
+    file, a long-lived handle would keep reading the old snapshot. With
+    snapshots disabled, or before the first one exists, this is a pooled
+    connection to the live database instead.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    if not Config.ANALYTICS_REPLICA_ENABLED:
+        return get_connection(db_path)
+    path = replica_path(db_path)
+    if not os.path.exists(path):
+        start_replica_refresher(db_path)
+        return get_connection(db_path)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False,
+                           factory=InstrumentedConnection)
+    # configure_connection's WAL switch would need write access; reports
+    # only want the read-side settings
+    conn.execute(f"PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size = -{int(Config.DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA query_only = ON")
+    instrument(conn)
+    return conn
+
+
+# One refresher thread per source database
+_refreshers: Dict[str, threading.Thread] = {}
+_refreshers_lock = threading.Lock()
+
+
+def _refresh_loop(db_path: str, interval: float):
+    while True:
+        try:
+            status = refresh_replica(db_path)
+            # Feed the columnar store from the fresh snapshot, off the live database
+            if analytics_store.PYARROW_AVAILABLE and Config.ANALYTICS_STORE_ENABLED:
+                analytics_store.export_changes(status.path, db_path)
+        except Exception as e:
+            print(f"⚠️ Analytics replica refresh failed for {db_path}: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def start_replica_refresher(db_path: str = None, interval_minutes: float = None) -> bool:
+    """Start the background refresher for a database once per process.
+
+    Safe to call on every Streamlit rerun; returns False when snapshots are
+    disabled or the refresher is already running.
+    """
+    if not Config.ANALYTICS_REPLICA_ENABLED:
+        return False
+    db_path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    interval = (interval_minutes or Config.ANALYTICS_REPLICA_INTERVAL_MINUTES) * 60
+    with _refreshers_lock:
+        thread = _refreshers.get(db_path)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=_refresh_loop, args=(db_path, interval),
+                                  name='aufraumenbee-analytics-replica', daemon=True)
+        _refreshers[db_path] = thread
+        thread.start()
+    return True
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'refresh'
+    target = sys.argv[2] if len(sys.argv) > 2 else Config.DATABASE_NAME
+
+    if command == 'refresh':
+        status = refresh_replica(target)
+        print(f"✅ Replica {status.path} refreshed in {status.duration_ms:.0f} ms")
+    elif command == 'watch':
+        # Standalone refresher, e.g. for a worker process or systemd unit
+        print(f"🔄 Refreshing {replica_path(target)} every "
+              f"{Config.ANALYTICS_REPLICA_INTERVAL_MINUTES} min (Ctrl+C to stop)")
+        _refresh_loop(target, Config.ANALYTICS_REPLICA_INTERVAL_MINUTES * 60)
+    elif command == 'status':
+        print(replica_status(target).describe())
+    else:
+        print("Usage: python analytics_replica.py refresh|watch|status [db_path]")
+        sys.exit(2)
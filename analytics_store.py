@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Columnar analytics store for Aufraumenbee
+Incrementally exports jobs, invoices and bookings to month-partitioned Parquet for vectorized reports
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+@dataclass
+class StoreTable:
+    """How one source table is exported"""
+    columns: List[str]
+    month_expr: str
+    categories: List[str] = field(default_factory=list)
+    dates: List[str] = field(default_factory=list)
+
+
+# Partition month is the business date, so "last 12 months" reads 12 files
+STORE_TABLES: Dict[str, StoreTable] = {
+    'jobs': StoreTable(
+        ['id', 'customer_id', 'employee_id', 'scheduled_date', 'scheduled_time', 'duration',
+         'status', 'service_type', 'price', 'created_at', 'completed_at'],
+        "substr(COALESCE(scheduled_date, created_at), 1, 7)",
+        categories=['status', 'service_type'],
+        dates=['scheduled_date', 'created_at', 'completed_at'],
+    ),
+    'invoices': StoreTable(
+        ['id', 'job_id', 'customer_id', 'amount', 'tax_amount', 'discount', 'total_amount',
+         'status', 'due_date', 'paid_date', 'issued_date', 'created_at'],
+        "substr(COALESCE(issued_date, created_at), 1, 7)",
+        categories=['status'],
+        dates=['due_date', 'paid_date', 'issued_date', 'created_at'],
+    ),
+    'customer_bookings': StoreTable(
+        ['id', 'customer_user_id', 'service_type_id', 'slot_id', 'date', 'start_time',
+         'status', 'total_price', 'created_at'],
+        "substr(date, 1, 7)",
+        categories=['status', 'start_time'],
+        dates=['date', 'created_at'],
+    ),
+}
+
+CHANGE_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS analytics_deletions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        deleted_at TEXT NOT NULL
+    )
+'''
+
+# Millisecond resolution; CURRENT_TIMESTAMP would tie every update in a second
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def install_change_tracking(conn: sqlite3.Connection):
+    """updated_at stamps and a deletion log for every exported table.
+
+    New rows are found by id, so inserts cost nothing extra; only updates
+    stamp updated_at, and deletes leave a row in analytics_deletions.
+    """
+    conn.execute(CHANGE_LOG_TABLE)
+    for table in STORE_TABLES:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        if 'updated_at' not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table} (updated_at)")
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_touch")
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_deletion_log")
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_touch AFTER UPDATE ON {table}
+            WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE {table} SET updated_at = {_NOW} WHERE id = NEW.id;
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_deletion_log AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO analytics_deletions (table_name, row_id, deleted_at)
+                VALUES ('{table}', OLD.id, {_NOW});
+            END
+        ''')
+
+
+def store_dir(db_path: str = None) -> str:
+    """ANALYTICS_STORE_DIR, or <name>_analytics next to the database"""
+    if Config.ANALYTICS_STORE_DIR:
+        return Config.ANALYTICS_STORE_DIR
+    db_path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    name, _ = os.path.splitext(os.path.basename(db_path))
+    return os.path.join(os.path.dirname(db_path), f"{name}_analytics")
+
+
+def available(db_path: str = None) -> bool:
+    """True when reports can be served from the store"""
+    return (PYARROW_AVAILABLE and Config.ANALYTICS_STORE_ENABLED
+            and os.path.exists(os.path.join(store_dir(db_path), 'manifest.json')))
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def _load_manifest(directory: str) -> Dict:
+    path = os.path.join(directory, 'manifest.json')
+    if not os.path.exists(path):
+        return {'generation': 0, 'tables': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(directory: str, manifest: Dict):
+    temp = os.path.join(directory, '.manifest.json.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp, os.path.join(directory, 'manifest.json'))
+
+
+def _typed(df: pd.DataFrame, spec: StoreTable) -> pd.DataFrame:
+    """Columnar dtypes: categoricals for low-cardinality text, datetime64 for dates"""
+    for column in spec.dates:
+        if column in df:
+            df[column] = pd.to_datetime(df[column], errors='coerce', format='ISO8601')
+    for column in spec.categories:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def _arrow_schema(conn: sqlite3.Connection, table: str) -> 'pa.Schema':
+    """One fixed schema per table, from the declared SQLite types.
+
+    Inferring per partition would give an all-NULL column a null type in
+    one file and int64 in the next, which the dataset reader rejects.
+    """
+    spec = STORE_TABLES[table]
+    declared = {row[1]: (row[2] or '').upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+    fields = []
+    for column in spec.columns:
+        kind = declared.get(column, '')
+        if column in spec.dates:
+            arrow_type = pa.timestamp('ms')
+        elif column in spec.categories:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif 'INT' in kind or 'BOOL' in kind:
+            arrow_type = pa.int64()
+        elif 'REAL' in kind or 'FLOA' in kind or 'DOUB' in kind:
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+def _partition_path(directory: str, table: str, month: str) -> str:
+    return os.path.join(directory, table, f"month={month}", 'part.parquet')
+
+
+def _write_partition(path: str, table: 'pa.Table'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if table.num_rows == 0:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    temp = path + '.tmp'
+    pq.write_table(table.sort_by('id'), temp, compression=Config.ANALYTICS_STORE_COMPRESSION)
+    os.replace(temp, path)
+
+
+def _partitions_holding(directory: str, table: str, ids: np.ndarray) -> List[str]:
+    """Months whose partition contains any of ``ids`` (reads only the id column)"""
+    root = os.path.join(directory, table)
+    if not os.path.isdir(root) or len(ids) == 0:
+        return []
+    months = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry, 'part.parquet')
+        if entry.startswith('month=') and os.path.exists(path):
+            stored = pq.read_table(path, columns=['id'], memory_map=True).column('id').to_numpy()
+            if np.isin(stored, ids, assume_unique=True).any():
+                months.append(entry[len('month='):])
+    return months
+
+
+def _export_table(conn: sqlite3.Connection, directory: str, table: str, state: Dict) -> int:
+    spec = STORE_TABLES[table]
+    select = f"SELECT {', '.join(spec.columns)}, updated_at, IFNULL({spec.month_expr}, 'unknown') AS month FROM {table}"
+    last_id = state.get('last_id', 0)
+    last_updated = state.get('last_updated_at') or ''
+    last_deletion = state.get('last_deletion_id', 0)
+
+    # Inserts by id range, updates by the updated_at index, deletes from the log
+    inserted = pd.read_sql_query(f"{select} WHERE id > ?", conn, params=(last_id,))
+    updated = pd.read_sql_query(f"{select} WHERE updated_at >= ? AND id <= ?", conn,
+                                params=(last_updated, last_id))
+    # Rows stamped exactly at the watermark were exported last time; the
+    # inclusive bound only exists for rows committed later in the same millisecond
+    seen = set(state.get('ids_at_watermark', []))
+    updated = updated[~((updated['updated_at'] == last_updated) & updated['id'].isin(seen)).to_numpy()]
+    deleted = pd.read_sql_query(
+        "SELECT id, row_id FROM analytics_deletions WHERE table_name = ? AND id > ?",
+        conn, params=(table, last_deletion)
+    )
+    if not deleted.empty:
+        # Deleting the highest id lets SQLite hand it out again, below the id watermark
+        reused = deleted['row_id'][deleted['row_id'] <= last_id].unique().tolist()
+        if reused:
+            marks = ','.join('?' * len(reused))
+            updated = pd.concat([updated, pd.read_sql_query(f"{select} WHERE id IN ({marks})", conn,
+                                                            params=reused)], ignore_index=True)
+    changed = pd.concat([inserted, updated], ignore_index=True).drop_duplicates('id', keep='last')
+    if changed.empty and deleted.empty:
+        return 0
+
+    schema = _arrow_schema(conn, table)
+    touched_ids = np.union1d(changed['id'].to_numpy(dtype=np.int64), deleted['row_id'].to_numpy(dtype=np.int64))
+    months = set(_partitions_holding(directory, table, touched_ids)) | set(changed['month'])
+    fresh = _typed(changed.drop(columns=['updated_at']), spec)
+    by_month = {month: rows for month, rows in fresh.groupby('month', sort=False)}
+    touched = pa.array(touched_ids)
+    for month in sorted(months):
+        path = _partition_path(directory, table, month)
+        rows = by_month.get(month, fresh.iloc[0:0])[schema.names]
+        merged = pa.Table.from_pandas(rows, schema=schema, preserve_index=False)
+        if os.path.exists(path):
+            # Merge in Arrow: untouched rows are copied column-wise, never through pandas
+            existing = pq.read_table(path, schema=schema)
+            existing = existing.filter(pc.invert(pc.is_in(existing.column('id'), value_set=touched)))
+            merged = pa.concat_tables([existing, merged])
+        _write_partition(path, merged)
+
+    if not inserted.empty:
+        state['last_id'] = max(last_id, int(inserted['id'].max()))
+    stamps = changed['updated_at'].dropna()
+    if not stamps.empty and stamps.max() >= last_updated:
+        newest = stamps.max()
+        at_newest = changed.loc[(changed['updated_at'] == newest).to_numpy(), 'id'].astype(int).tolist()
+        state['ids_at_watermark'] = sorted(set(at_newest) | (seen if newest == last_updated else set()))
+        state['last_updated_at'] = newest
+    if not deleted.empty:
+        state['last_deletion_id'] = int(deleted['id'].max())
+    return len(changed) + len(deleted)
+
+
+_export_lock = threading.Lock()
+
+
+def export_changes(source_path: str = None, db_path: str = None) -> Dict[str, int]:
+    """Append new, changed and deleted rows since the last run; returns rows touched per table.
+
+    ``source_path`` is the file to read from (the analytics replica when
+    called by its refresher) and ``db_path`` names the store, defaulting to
+    the source. Rewrites only the month partitions that changed; watermarks
+    are saved after every partition write so an interrupted run resumes.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("The analytics store needs pyarrow (pip install pyarrow)")
+    source_path = source_path or Config.DATABASE_NAME
+    directory = store_dir(db_path or source_path)
+    os.makedirs(directory, exist_ok=True)
+
+    with _export_lock:
+        manifest = _load_manifest(directory)
+        conn = sqlite3.connect(f"file:{os.path.abspath(source_path)}?mode=ro", uri=True)
+        counts = {}
+        try:
+            for table in STORE_TABLES:
+                state = manifest['tables'].setdefault(table, {})
+                counts[table] = _export_table(conn, directory, table, state)
+                if counts[table]:
+                    manifest['generation'] += 1
+                    _save_manifest(directory, manifest)
+        finally:
+            conn.close()
+        if not os.path.exists(os.path.join(directory, 'manifest.json')):
+            _save_manifest(directory, manifest)
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+_frames: Dict[tuple, pd.DataFrame] = {}
+_frames_lock = threading.Lock()
+
+
+def load(table: str, columns: List[str] = None, month_from: str = None, month_to: str = None,
+         db_path: str = None) -> pd.DataFrame:
+    """Memory-mapped read of a table, pruned to the given columns and months.
+
+    Results are kept per store generation, so repeated report renders only
+    touch disk after the next export.
+    """
+    directory = store_dir(db_path)
+    generation = _load_manifest(directory)['generation']
+    key = (directory, table, tuple(columns or ()), month_from, month_to)
+    with _frames_lock:
+        cached = _frames.get(key)
+        if cached is not None and cached.attrs.get('generation') == generation:
+            return cached
+
+    spec = STORE_TABLES[table]
+    root = os.path.join(directory, table)
+    if not os.path.isdir(root):
+        frame = _typed(pd.DataFrame(columns=columns or spec.columns), spec)
+    else:
+        dataset = ds.dataset(root, format='parquet', partitioning='hive',
+                             filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+        condition = None
+        if month_from:
+            condition = ds.field('month') >= month_from
+        if month_to:
+            upper = ds.field('month') <= month_to
+            condition = upper if condition is None else condition & upper
+        frame = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    frame.attrs['generation'] = generation
+    with _frames_lock:
+        _frames[key] = frame
+    return frame
+
+
+def monthly_revenue(db_path: str = None) -> pd.DataFrame:
+    """Completed job revenue per creation month (the Analytics page chart)"""
+    jobs = load('jobs', ['status', 'price', 'created_at'], db_path=db_path)
+    done = jobs[(jobs['status'] == 'completed').to_numpy()]
+    return _sum_by_month(done['created_at'], done['price'])
+
+
+def job_status_counts(date_from: date = None, date_to: date = None, db_path: str = None) -> pd.DataFrame:
+    """Jobs per status, optionally limited to a scheduled_date window"""
+    jobs = load('jobs', ['status', 'scheduled_date'], _month(date_from), _month(date_to), db_path)
+    if date_from or date_to:
+        scheduled = jobs['scheduled_date']
+        mask = np.ones(len(jobs), dtype=bool)
+        if date_from:
+            mask &= (scheduled >= pd.Timestamp(date_from)).to_numpy()
+        if date_to:
+            mask &= (scheduled <= pd.Timestamp(date_to)).to_numpy()
+        jobs = jobs[mask]
+    counts = jobs['status'].value_counts(sort=True)
+    return counts[counts > 0].rename_axis('status').reset_index(name='count')
+
+
+def jobs_by_service(db_path: str = None) -> pd.DataFrame:
+    """Job count per service type (the Reports page chart)"""
+    jobs = load('jobs', ['service_type'], db_path=db_path)
+    counts = jobs['service_type'].value_counts(sort=True)
+    return counts[counts > 0].rename_axis('service_type').reset_index(name='count')
+
+
+def paid_revenue_by_month(months: int = 12, db_path: str = None) -> pd.DataFrame:
+    """Paid invoice totals per payment month over the last ``months`` months"""
+    invoices = load('invoices', ['status', 'total_amount', 'paid_date'], db_path=db_path)
+    since = pd.Timestamp(date.today()) - pd.DateOffset(months=months)
+    paid = invoices[((invoices['status'] == 'paid') & (invoices['paid_date'] >= since)).to_numpy()]
+    return _sum_by_month(paid['paid_date'], paid['total_amount'])
+
+
+def _sum_by_month(stamps: pd.Series, values: pd.Series) -> pd.DataFrame:
+    """Sum per calendar month; buckets with datetime64[M] instead of formatting every row"""
+    months = stamps.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    valid = ~np.isnat(months)
+    totals = pd.Series(values.to_numpy(dtype=float)[valid]).groupby(months[valid]).sum()
+    return pd.DataFrame({'month': np.datetime_as_string(totals.index.to_numpy(dtype='datetime64[M]')),
+                         'revenue': totals.to_numpy()})
+
+
+def _month(value: Optional[date]) -> Optional[str]:
+    return value.strftime('%Y-%m') if value else None
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_NAME
+    started = time.perf_counter()
+    counts = export_changes(target)
+    print(f"✅ Exported to {store_dir(target)} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for table, count in counts.items():
+        print(f"   {table:<18} {count:>9,} rows")
@@ -4,11 +4,27 @@ import sqlite3
 import hashlib
 import uuid
 from datetime import datetime, timedelta, date
+from typing import Optional
 import plotly.express as px
 import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
 import bcrypt
 
+from db_pool import get_connection
+from migrations import ensure_schema
+from query_cache import read_sql_cached
+from dashboard_counters import get_dashboard_counters
+from listings import list_customers, list_jobs
+from reservations import release_slot
+from bulk_jobs import bulk_assign, bulk_set_status, describe
+from analytics_replica import get_replica_connection, replica_status
+from availability_model import compile_employees, get_availability_model
+from assignment_scoring import score_assignments
+from auto_assign import apply_plan, plan_assignments
+from interval_index import scan_conflicts
+from routing import plan_routes
+import analytics_store
+
 # Import real-time logging system
 try:
     from realtime_logger import get_realtime_logger, log_user_action, log_error, log_database_operation
@@ -36,189 +52,33 @@ if LOGGING_ENABLED:
 # Database setup
 @st.cache_resource
 def init_database():
-    """Initialize SQLite database with all required tables"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
-    
-    # Create tables
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            full_name TEXT,
-            email TEXT,
-            phone TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            address TEXT,
-            preferences TEXT,
-            rating REAL DEFAULT 0,
-            total_jobs INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            skills TEXT,
-            hourly_rate REAL,
-            employment_type TEXT, -- 'permanent' or 'contract'
-            availability TEXT,
-            background_check BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            employee_id INTEGER,
-            title TEXT NOT NULL,
-            description TEXT,
-            scheduled_date DATE,
-            scheduled_time TEXT,
-            duration INTEGER, -- in minutes
-            status TEXT DEFAULT 'pending', -- pending, approved, assigned, in_progress, completed, cancelled
-            service_type TEXT,
-            location TEXT,
-            price REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers (id),
-            FOREIGN KEY (employee_id) REFERENCES employees (id)
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS invoices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_id INTEGER,
-            customer_id INTEGER,
-            amount REAL,
-            tax_amount REAL,
-            discount REAL DEFAULT 0,
-            status TEXT DEFAULT 'pending', -- pending, paid, overdue
-            due_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (job_id) REFERENCES jobs (id),
-            FOREIGN KEY (customer_id) REFERENCES customers (id)
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS inventory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            item_name TEXT NOT NULL,
-            quantity INTEGER,
-            unit_price REAL,
-            minimum_stock INTEGER DEFAULT 10,
-            supplier TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Customer portal tables
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            verified BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS service_types (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            base_price REAL NOT NULL,
-            duration_minutes INTEGER NOT NULL,
-            category TEXT,
-            active BOOLEAN DEFAULT TRUE
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS time_slots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date DATE NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL,
-            available BOOLEAN DEFAULT TRUE,
-            employee_id INTEGER,
-            max_bookings INTEGER DEFAULT 1,
-            current_bookings INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_user_id INTEGER NOT NULL,
-            service_type_id INTEGER NOT NULL,
-            slot_id INTEGER NOT NULL,
-            date DATE NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL,
-            address TEXT NOT NULL,
-            special_instructions TEXT,
-            total_price REAL NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_user_id) REFERENCES customer_users (id),
-            FOREIGN KEY (service_type_id) REFERENCES service_types (id),
-            FOREIGN KEY (slot_id) REFERENCES time_slots (id)
-        )
-    ''')
-    
-    # Create default admin user if not exists
-    admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
-    conn.execute('''
-        INSERT OR IGNORE INTO users (username, password_hash, role, full_name, email)
-        VALUES (?, ?, ?, ?, ?)
-    ''', ("admin", admin_password.decode('utf-8'), "admin", "System Administrator", "admin@aufraumenbee.com"))
-    
-    # Insert default service types if table is empty
-    cursor = conn.execute("SELECT COUNT(*) FROM service_types")
-    if cursor.fetchone()[0] == 0:
-        default_services = [
-            ("Regular Cleaning", "Standard house cleaning including dusting, vacuuming, mopping, and bathroom cleaning", 80.0, 120, "Residential"),
-            ("Deep Cleaning", "Thorough cleaning including inside appliances, baseboards, and detailed cleaning", 150.0, 240, "Residential"), 
-            ("Move-in/Move-out Cleaning", "Complete cleaning for moving situations including inside cabinets and appliances", 200.0, 300, "Residential"),
-            ("Office Cleaning", "Professional office space cleaning including desks, meeting rooms, and common areas", 100.0, 180, "Commercial"),
-            ("Post-Construction Cleaning", "Specialized cleaning after construction or renovation work", 250.0, 360, "Specialty"),
-            ("Carpet Cleaning", "Professional carpet cleaning and stain removal", 120.0, 150, "Specialty"),
-            ("Window Cleaning", "Interior and exterior window cleaning service", 80.0, 90, "Specialty")
-        ]
-        
-        for service in default_services:
-            conn.execute('''
-                INSERT INTO service_types (name, description, base_price, duration_minutes, category)
-                VALUES (?, ?, ?, ?, ?)
-            ''', service)
-    
-    conn.commit()
-    return conn
+    """Bring the schema up to date and return the shared connection"""
+    ensure_schema()
+    return get_connection()
+
+# Keyset pagination helpers
+def keyset_page_cursor(key: str, filters) -> Optional[str]:
+    """Cursor of the page being shown; resets to page 1 when the filters change"""
+    state = st.session_state.setdefault(f'{key}_pager', {'filters': None, 'cursors': [None]})
+    if state['filters'] != filters:
+        state['filters'] = filters
+        state['cursors'] = [None]
+    return state['cursors'][-1]
+
+def keyset_page_controls(key: str, page):
+    """Previous/next buttons driven by the cursor stack in session state"""
+    state = st.session_state[f'{key}_pager']
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(state['cursors']) > 1 and st.button("⬅️ Previous", key=f"{key}_prev_page"):
+            state['cursors'].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(state['cursors'])} of {page.page_count}")
+    with col3:
+        if page.next_cursor and st.button("Next ➡️", key=f"{key}_next_page"):
+            state['cursors'].append(page.next_cursor)
+            st.rerun()
 
 # Authentication functions
 def hash_password(password):
@@ -357,36 +217,31 @@ def show_dashboard():
     st.title("📊 Dashboard")
     
     conn = init_database()
+    counters = get_dashboard_counters(conn)
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         # Count customers from both tables
-        manual_customers = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
-        portal_customers = conn.execute("SELECT COUNT(*) FROM customer_users").fetchone()[0]
-        total_customers = manual_customers + portal_customers
-        st.metric("Total Customers", total_customers, help=f"Manual: {manual_customers}, Portal: {portal_customers}")
+        total_customers = counters['total_customers']
+        portal_customers = counters['portal_customers']
+        st.metric("Total Customers", total_customers, help=f"Portal accounts: {portal_customers}")
     
     with col2:
-        total_employees = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
-        st.metric("Total Employees", total_employees)
+        st.metric("Total Employees", counters['total_employees'])
     
     with col3:
-        pending_jobs = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
-        st.metric("Pending Bookings", pending_jobs)
+        st.metric("Pending Bookings", counters['pending_jobs'])
     
     with col4:
-        today_jobs = conn.execute(
-            "SELECT COUNT(*) FROM jobs WHERE scheduled_date = date('now') AND status IN ('approved', 'assigned', 'in_progress')"
-        ).fetchone()[0]
-        st.metric("Today's Jobs", today_jobs)
+        st.metric("Today's Jobs", counters['today_jobs'])
     
     # Recent activity
     st.subheader("Recent Activity")
     
     # Get recent jobs
-    recent_jobs = pd.read_sql_query('''
+    recent_jobs = read_sql_cached('''
         SELECT j.title, c.name as customer, j.status, j.scheduled_date, j.created_at
         FROM jobs j
         JOIN customers c ON j.customer_id = c.id
@@ -408,52 +263,17 @@ def show_customer_management():
     conn = init_database()
     
     with tab1:
-        # Get customers from both tables using UNION
-        customers_query = """
-        SELECT 
-            id,
-            name,
-            email,
-            phone,
-            address,
-            preferences,
-            rating,
-            total_jobs,
-            created_at,
-            'Manual' as source
-        FROM customers
-        UNION ALL
-        SELECT 
-            id,
-            first_name || ' ' || last_name as name,
-            email,
-            phone,
-            address,
-            'Registered via customer portal' as preferences,
-            0 as rating,
-            0 as total_jobs,
-            created_at,
-            'Portal Registration' as source
-        FROM customer_users
-        ORDER BY created_at DESC
-        """
-        
-        customers = pd.read_sql_query(customers_query, conn)
+        # Search and paging happen in SQL; only the current page is fetched
+        search_term = st.text_input("Search customers by name, email, phone or address...")
+        page = list_customers(conn, search=search_term,
+                              cursor=keyset_page_cursor('customers', search_term))
         
-        if not customers.empty:
-            # Search functionality
-            search_term = st.text_input("Search customers by name or email...")
-            if search_term:
-                customers = customers[
-                    (customers['name'].str.contains(search_term, case=False, na=False)) |
-                    (customers['email'].str.contains(search_term, case=False, na=False))
-                ]
-            
+        if page.total:
             # Display total count
-            st.info(f"📊 Total customers: {len(customers)} (from both admin and portal registrations)")
+            st.info(f"📊 Total customers: {page.total} (from both admin and portal registrations)")
             
             # Display customers
-            for _, customer in customers.iterrows():
+            for _, customer in page.rows.iterrows():
                 # Add source indicator in the title
                 source_icon = "🌐" if customer['source'] == 'Portal Registration' else "👤"
                 with st.expander(f"{source_icon} {customer['name']} - {customer['email']} ({customer['source']})"):
@@ -470,6 +290,8 @@ def show_customer_management():
                         
                         if st.button(f"View Details", key=f"customer_{customer['source']}_{customer['id']}"):
                             st.session_state.selected_customer = customer['id']
+            
+            keyset_page_controls('customers', page)
         else:
             st.info("No customers found")
     
@@ -504,7 +326,7 @@ def show_employee_management():
     conn = init_database()
     
     with tab1:
-        employees = pd.read_sql_query("SELECT * FROM employees ORDER BY created_at DESC", conn)
+        employees = read_sql_cached("SELECT * FROM employees ORDER BY created_at DESC", conn)
         
         if not employees.empty:
             for _, employee in employees.iterrows():
@@ -542,10 +364,11 @@ def show_employee_management():
             
             if st.form_submit_button("Add Employee"):
                 if name:
-                    conn.execute('''
+                    cursor = conn.execute('''
                         INSERT INTO employees (name, email, phone, skills, hourly_rate, employment_type, availability, background_check)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (name, email, phone, skills, hourly_rate, employment_type, availability, background_check))
+                    compile_employees(conn, [cursor.lastrowid])
                     conn.commit()
                     st.success("Employee added successfully!")
                     st.rerun()
@@ -562,7 +385,7 @@ def show_booking_requests():
     
     with tab1:
         # Show pending booking requests
-        pending_jobs = pd.read_sql_query('''
+        pending_jobs = read_sql_cached('''
             SELECT j.*, c.name as customer_name, c.phone as customer_phone
             FROM jobs j
             JOIN customers c ON j.customer_id = c.id
@@ -611,7 +434,7 @@ def show_booking_requests():
         st.info("This form simulates a customer booking request")
         
         # Get customers for dropdown
-        customers = pd.read_sql_query("SELECT id, name FROM customers", conn)
+        customers = read_sql_cached("SELECT id, name FROM customers", conn)
         
         if not customers.empty:
             with st.form("booking_request"):
@@ -682,7 +505,7 @@ def show_job_management():
         show_bulk_operations(conn)
     
     with tab5:
-        show_assignment_analytics(conn)
+        show_assignment_analytics()
 
 def show_all_jobs_dashboard(conn):
     """Enhanced dashboard showing all jobs with filters and quick actions"""
@@ -709,48 +532,33 @@ def show_all_jobs_dashboard(conn):
             ["All"] + [emp[1] for emp in conn.execute("SELECT id, name FROM employees").fetchall()]
         )
     
-    # Build query with filters
-    base_query = '''
-        SELECT j.*, c.name as customer_name, c.phone as customer_phone,
-               e.name as employee_name, e.hourly_rate as employee_rate
-        FROM jobs j
-        JOIN customers c ON j.customer_id = c.id
-        LEFT JOIN employees e ON j.employee_id = e.id
-        WHERE j.scheduled_date BETWEEN ? AND ?
-    '''
-    
-    params = [date_filter.strftime('%Y-%m-%d'), end_date_filter.strftime('%Y-%m-%d')]
-    
-    if status_filter != "All":
-        base_query += " AND j.status = ?"
-        params.append(status_filter)
-    
-    if employee_filter != "All":
-        base_query += " AND e.name = ?"
-        params.append(employee_filter)
-    
-    base_query += " ORDER BY j.scheduled_date, j.scheduled_time"
-    
-    jobs = pd.read_sql_query(base_query, conn, params=params)
+    # Server-side filters; only the current page of jobs is fetched
+    filters = dict(
+        date_from=date_filter,
+        date_to=end_date_filter,
+        status=None if status_filter == "All" else status_filter,
+        employee_name=None if employee_filter == "All" else employee_filter,
+    )
+    page = list_jobs(conn, cursor=keyset_page_cursor('jobs', filters), **filters)
+    jobs = page.rows
     
     if not jobs.empty:
+        summary = page.summary
+        
         # Summary metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Jobs", len(jobs))
+            st.metric("Total Jobs", summary['total'])
         
         with col2:
-            unassigned = len(jobs[jobs['employee_id'].isna()])
-            st.metric("Unassigned", unassigned)
+            st.metric("Unassigned", summary['unassigned'])
         
         with col3:
-            in_progress = len(jobs[jobs['status'] == 'in_progress'])
-            st.metric("In Progress", in_progress)
+            st.metric("In Progress", summary['in_progress'])
         
         with col4:
-            total_value = jobs['price'].sum()
-            st.metric("Total Value", f"${total_value:.2f}")
+            st.metric("Total Value", f"${summary['total_value']:.2f}")
         
         st.divider()
         
@@ -828,7 +636,7 @@ def show_all_jobs_dashboard(conn):
                 # Reassignment interface
                 if st.session_state.get(f'reassign_mode_{job["id"]}', False):
                     st.write("**🔄 Reassign Employee**")
-                    employees = pd.read_sql_query("SELECT id, name, employment_type FROM employees", conn)
+                    employees = read_sql_cached("SELECT id, name, employment_type FROM employees", conn, typed=True)
                     
                     if not employees.empty:
                         new_employee_id = st.selectbox(
@@ -842,20 +650,27 @@ def show_all_jobs_dashboard(conn):
                         with reassign_col1:
                             if st.button("✅ Confirm Reassign", key=f"confirm_reassign_{job['id']}"):
                                 if new_employee_id:
-                                    conn.execute("UPDATE jobs SET employee_id = ?, status = 'assigned' WHERE id = ?", 
-                                               (new_employee_id, job['id']))
+                                    # Same checks as bulk assignment, so nobody gets double-booked
+                                    result = bulk_assign([job['id']], new_employee_id,
+                                                         performed_by=st.session_state.user['username'])
                                 else:
+                                    result = None
                                     conn.execute("UPDATE jobs SET employee_id = NULL, status = 'approved' WHERE id = ?", 
                                                (job['id'],))
-                                conn.commit()
-                                st.session_state[f'reassign_mode_{job["id"]}'] = False
-                                st.success("Employee reassigned!")
-                                st.rerun()
+                                    conn.commit()
+                                if result is not None and result.rejected:
+                                    st.error(f"❌ Not reassigned: {describe(result)}")
+                                else:
+                                    st.session_state[f'reassign_mode_{job["id"]}'] = False
+                                    st.success("Employee reassigned!")
+                                    st.rerun()
                         
                         with reassign_col2:
                             if st.button("❌ Cancel", key=f"cancel_reassign_{job['id']}"):
                                 st.session_state[f'reassign_mode_{job["id"]}'] = False
                                 st.rerun()
+        
+        keyset_page_controls('jobs', page)
     else:
         st.info("No jobs found with the selected filters")
 
@@ -864,7 +679,7 @@ def show_employee_assignment_interface(conn):
     st.subheader("👥 Employee Assignment")
     
     # Get unassigned approved jobs
-    unassigned_jobs = pd.read_sql_query('''
+    unassigned_jobs = read_sql_cached('''
         SELECT j.*, c.name as customer_name, c.phone as customer_phone
         FROM jobs j
         JOIN customers c ON j.customer_id = c.id
@@ -873,17 +688,31 @@ def show_employee_assignment_interface(conn):
     ''', conn)
     
     # Get all employees with their current workload
-    employees_workload = pd.read_sql_query('''
-        SELECT e.id, e.name, e.employment_type, e.hourly_rate, e.skills,
+    employees_workload = read_sql_cached('''
+        SELECT e.id, e.name, e.employment_type, e.hourly_rate, e.skills, e.home_latitude, e.home_longitude,
                COUNT(j.id) as current_jobs,
                COALESCE(SUM(j.duration), 0) as total_minutes
         FROM employees e
         LEFT JOIN jobs j ON e.id = j.employee_id AND j.status IN ('assigned', 'in_progress')
-        GROUP BY e.id, e.name, e.employment_type, e.hourly_rate, e.skills
+        GROUP BY e.id, e.name, e.employment_type, e.hourly_rate, e.skills, e.home_latitude, e.home_longitude
         ORDER BY current_jobs, e.name
     ''', conn)
     
     if not unassigned_jobs.empty:
+        if not employees_workload.empty:
+            # Every job against every employee in one pass: skills, load, rate, availability, travel
+            assigned_jobs = read_sql_cached('''
+                SELECT employee_id, scheduled_date, scheduled_time, location, latitude, longitude
+                FROM jobs
+                WHERE employee_id IS NOT NULL AND status IN ('assigned', 'in_progress')
+                  AND scheduled_date >= date('now')
+            ''', conn)
+            score_matrix = score_assignments(unassigned_jobs, employees_workload,
+                                             model=get_availability_model(), assigned=assigned_jobs)
+            suggestions = score_matrix.suggestions()
+            employee_names = dict(zip(employees_workload['id'].tolist(), employees_workload['name']))
+            employee_jobs = dict(zip(employees_workload['id'].tolist(), employees_workload['current_jobs']))
+        
         col1, col2 = st.columns([2, 1])
         
         with col1:
@@ -907,37 +736,22 @@ def show_employee_assignment_interface(conn):
                             # Smart assignment suggestions
                             st.write("**🤖 Smart Suggestions:**")
                             
-                            # Find employees with matching skills
-                            job_skills = job['service_type'].lower() if job['service_type'] else ""
-                            suitable_employees = []
-                            
-                            for _, emp in employees_workload.iterrows():
-                                emp_skills = emp['skills'].lower() if emp['skills'] else ""
-                                skill_match = any(skill in emp_skills for skill in job_skills.split())
-                                workload_score = max(0, 10 - emp['current_jobs'])
-                                
-                                suitable_employees.append({
-                                    'id': emp['id'],
-                                    'name': emp['name'],
-                                    'score': (5 if skill_match else 0) + workload_score,
-                                    'workload': emp['current_jobs'],
-                                    'hours': emp['total_minutes'] / 60
-                                })
-                            
-                            # Sort by suitability score
-                            suitable_employees.sort(key=lambda x: x['score'], reverse=True)
-                            
-                            # Show top 3 suggestions
-                            for i, emp in enumerate(suitable_employees[:3]):
-                                icon = "🥇" if i == 0 else "🥈" if i == 1 else "🥉"
-                                st.write(f"{icon} {emp['name']} (Score: {emp['score']}, Jobs: {emp['workload']})")
+                            # Top suggestions from the scoring matrix built once above
+                            job_suggestions = suggestions[int(job['id'])]
+                            for i, (suggested_id, score) in enumerate(job_suggestions):
+                                icon = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else "▫️"
+                                st.write(f"{icon} {employee_names[suggested_id]} (Score: {score:.1f}, "
+                                         f"Jobs: {employee_jobs[suggested_id]})")
+                            if not job_suggestions:
+                                st.write("⚠️ Nobody's availability covers this time")
                             
                             # Assignment interface
                             st.write("**👤 Assign Employee:**")
                             employee_id = st.selectbox(
                                 "Select Employee",
                                 employees_workload['id'].tolist(),
-                                format_func=lambda x: f"{employees_workload[employees_workload['id'] == x]['name'].iloc[0]} ({employees_workload[employees_workload['id'] == x]['current_jobs'].iloc[0]} jobs)",
+                                format_func=lambda x: f"{employees_workload[employees_workload['id'] == x]['name'].iloc[0]} ({employees_workload[employees_workload['id'] == x]['current_jobs'].iloc[0]} jobs)"
+                                                      + ("" if score_matrix.is_available(job['id'], x) else " 🚫 not available"),
                                 key=f"assign_emp_{job['id']}"
                             )
                             
@@ -949,20 +763,21 @@ def show_employee_assignment_interface(conn):
                             st.write(f"**⏱️ Employee Rate:** ${selected_emp['hourly_rate']:.2f}/hour")
                             
                             if st.button("🎯 Assign Employee", key=f"assign_{job['id']}"):
-                                conn.execute("UPDATE jobs SET employee_id = ?, status = 'assigned' WHERE id = ?", 
-                                           (employee_id, job['id']))
-                                conn.commit()
-                                
-                                # Log the assignment
-                                if LOGGING_ENABLED:
-                                    log_user_action('job_management', 'employee_assigned', {
-                                        'job_id': job['id'],
-                                        'employee_id': employee_id,
-                                        'assigned_by': st.session_state.get('username', 'Unknown')
-                                    })
-                                
-                                st.success(f"✅ {selected_emp['name']} assigned to job!")
-                                st.rerun()
+                                result = bulk_assign([job['id']], employee_id,
+                                                     performed_by=st.session_state.user['username'])
+                                if result.rejected:
+                                    st.error(f"❌ {selected_emp['name']} was not assigned: {describe(result)}")
+                                else:
+                                    # Log the assignment
+                                    if LOGGING_ENABLED:
+                                        log_user_action('job_management', 'employee_assigned', {
+                                            'job_id': job['id'],
+                                            'employee_id': employee_id,
+                                            'assigned_by': st.session_state.get('username', 'Unknown')
+                                        })
+                                    
+                                    st.success(f"✅ {selected_emp['name']} assigned to job!")
+                                    st.rerun()
                         else:
                             st.warning("❌ No employees available. Please add employees first.")
         
@@ -988,7 +803,7 @@ def show_employee_assignment_interface(conn):
         st.info("✅ All approved jobs have been assigned!")
         
         # Show recently assigned jobs
-        recent_assignments = pd.read_sql_query('''
+        recent_assignments = read_sql_cached('''
             SELECT j.*, c.name as customer_name, e.name as employee_name
             FROM jobs j
             JOIN customers c ON j.customer_id = c.id
@@ -1012,7 +827,7 @@ def show_job_board_view(conn):
     statuses = ['approved', 'assigned', 'in_progress', 'completed']
     
     for status in statuses:
-        jobs = pd.read_sql_query('''
+        jobs = read_sql_cached('''
             SELECT j.*, c.name as customer_name, e.name as employee_name
             FROM jobs j
             JOIN customers c ON j.customer_id = c.id
@@ -1067,7 +882,7 @@ def show_bulk_operations(conn):
     st.write("### 🎯 Bulk Assignment")
     
     # Get unassigned jobs
-    unassigned_jobs = pd.read_sql_query('''
+    unassigned_jobs = read_sql_cached('''
         SELECT j.id, j.title, j.scheduled_date, j.scheduled_time, c.name as customer_name
         FROM jobs j
         JOIN customers c ON j.customer_id = c.id
@@ -1085,7 +900,7 @@ def show_bulk_operations(conn):
         
         if selected_jobs:
             # Select employee for bulk assignment
-            employees = pd.read_sql_query("SELECT id, name, employment_type FROM employees", conn)
+            employees = read_sql_cached("SELECT id, name, employment_type FROM employees", conn, typed=True)
             
             if not employees.empty:
                 bulk_employee_id = st.selectbox(
@@ -1095,23 +910,83 @@ def show_bulk_operations(conn):
                 )
                 
                 if st.button("🎯 Bulk Assign Selected Jobs"):
-                    for job_id in selected_jobs:
-                        conn.execute("UPDATE jobs SET employee_id = ?, status = 'assigned' WHERE id = ?", 
-                                   (bulk_employee_id, job_id))
-                    conn.commit()
+                    result = bulk_assign(selected_jobs, bulk_employee_id,
+                                         performed_by=st.session_state.user['username'])
                     
                     employee_name = employees[employees['id'] == bulk_employee_id]['name'].iloc[0]
-                    st.success(f"✅ {len(selected_jobs)} jobs assigned to {employee_name}!")
-                    st.rerun()
+                    if result.rejected:
+                        st.warning(f"⚠️ {len(result.updated)} jobs assigned to {employee_name} "
+                                   f"({describe(result)})")
+                    else:
+                        st.success(f"✅ {len(result.updated)} jobs assigned to {employee_name}!")
+                        st.rerun()
     else:
         st.info("No unassigned jobs available for bulk operations")
     
     st.divider()
     
+    # Auto-assignment of every approved job in a date range
+    st.write("### 🤖 Auto-Assign")
+    col1, col2 = st.columns(2)
+    with col1:
+        auto_from = st.date_input("From", value=date.today(), key="auto_assign_from")
+    with col2:
+        auto_to = st.date_input("To", value=date.today() + timedelta(days=6), key="auto_assign_to")
+    
+    if st.button("🔍 Preview Plan"):
+        st.session_state.auto_assign_plan = plan_assignments(auto_from, auto_to)
+    
+    plan = st.session_state.get('auto_assign_plan')
+    if plan is not None and (plan.date_from, plan.date_to) == (auto_from, auto_to):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Jobs Assigned", len(plan.assignments))
+        col2.metric("Left Unassigned", len(plan.unassigned))
+        col3.metric("Labor Cost", f"${plan.total_cost:,.2f}")
+        col4.metric("Utilization", f"{plan.overall_utilization:.0%}")
+        st.caption(f"Solved with {plan.solver} in {plan.seconds:.2f} s")
+        
+        if plan.assignments:
+            st.dataframe(plan.to_frame(), use_container_width=True, hide_index=True)
+            utilization = pd.DataFrame([
+                {'employee': plan.employee_names.get(employee_id, employee_id), 'utilization': share}
+                for employee_id, share in sorted(plan.utilization.items(), key=lambda item: -item[1])
+            ])
+            st.bar_chart(utilization.set_index('employee'))
+        if plan.unassigned:
+            with st.expander(f"⚠️ {len(plan.unassigned)} jobs left unassigned"):
+                for job_id, reason in sorted(plan.unassigned.items()):
+                    st.write(f"• Job {job_id}: {reason}")
+        
+        if plan.assignments and st.button("✅ Commit Plan"):
+            result = apply_plan(plan, performed_by=st.session_state.user['username'])
+            del st.session_state.auto_assign_plan
+            if result.rejected:
+                st.warning(f"⚠️ {len(result.updated)} jobs assigned ({describe(result)})")
+            else:
+                st.success(f"✅ {len(result.updated)} jobs assigned!")
+                st.rerun()
+    
+    st.divider()
+    
+    # Overlapping open jobs of one employee, e.g. from edits made before the checks existed
+    st.write("### 🔁 Double-Booking Check")
+    check_month = st.date_input("Month", value=date.today().replace(day=1), key="double_booking_month")
+    if st.button("🔍 Scan Month"):
+        month_start = check_month.replace(day=1)
+        month_end = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        conflicts = scan_conflicts(month_start, month_end)
+        if conflicts:
+            st.warning(f"⚠️ {len(conflicts)} double bookings between {month_start} and {month_end}")
+            st.dataframe(pd.DataFrame([vars(c) for c in conflicts]), use_container_width=True, hide_index=True)
+        else:
+            st.success(f"✅ No double bookings between {month_start} and {month_end}")
+    
+    st.divider()
+    
     # Bulk status update
     st.write("### 📋 Bulk Status Update")
     
-    status_jobs = pd.read_sql_query('''
+    status_jobs = read_sql_cached('''
         SELECT j.id, j.title, j.status, j.scheduled_date, c.name as customer_name, e.name as employee_name
         FROM jobs j
         JOIN customers c ON j.customer_id = c.id
@@ -1134,16 +1009,21 @@ def show_bulk_operations(conn):
             )
             
             if st.button("📋 Update Status for Selected Jobs"):
-                for job_id in selected_status_jobs:
-                    conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (new_status, job_id))
-                conn.commit()
+                result = bulk_set_status(selected_status_jobs, new_status,
+                                         performed_by=st.session_state.user['username'])
                 
-                st.success(f"✅ {len(selected_status_jobs)} jobs updated to '{new_status}' status!")
-                st.rerun()
+                if result.rejected:
+                    st.warning(f"⚠️ {len(result.updated)} jobs updated to '{new_status}' status "
+                               f"({describe(result)})")
+                else:
+                    st.success(f"✅ {len(result.updated)} jobs updated to '{new_status}' status!")
+                    st.rerun()
 
-def show_assignment_analytics(conn):
+def show_assignment_analytics():
     """Analytics dashboard for job assignments"""
     st.subheader("📈 Assignment Analytics")
+    conn = get_replica_connection()
+    st.caption(replica_status().describe())
     
     # Time period selector
     col1, col2 = st.columns(2)
@@ -1153,7 +1033,7 @@ def show_assignment_analytics(conn):
         end_date = st.date_input("To Date", value=date.today())
     
     # Employee performance metrics
-    employee_metrics = pd.read_sql_query('''
+    employee_metrics = read_sql_cached('''
         SELECT e.name, e.employment_type,
                COUNT(j.id) as total_jobs,
                SUM(CASE WHEN j.status = 'completed' THEN 1 ELSE 0 END) as completed_jobs,
@@ -1239,7 +1119,7 @@ def show_assignment_analytics(conn):
     # Job status overview
     st.write("### 📋 Job Status Overview")
     
-    status_metrics = pd.read_sql_query('''
+    status_metrics = read_sql_cached('''
         SELECT status, COUNT(*) as count
         FROM jobs
         WHERE scheduled_date BETWEEN ? AND ?
@@ -1255,6 +1135,8 @@ def show_assignment_analytics(conn):
             title='Jobs by Status'
         )
         st.plotly_chart(fig_status, use_container_width=True)
+    
+    conn.close()
 
 def show_scheduling():
     """Scheduling and calendar view"""
@@ -1266,7 +1148,7 @@ def show_scheduling():
     st.subheader("Today's Schedule")
     
     today = datetime.now().strftime('%Y-%m-%d')
-    today_jobs = pd.read_sql_query('''
+    today_jobs = read_sql_cached('''
         SELECT j.*, c.name as customer_name, e.name as employee_name
         FROM jobs j
         JOIN customers c ON j.customer_id = c.id
@@ -1291,6 +1173,29 @@ def show_scheduling():
                 st.divider()
     else:
         st.info("No jobs scheduled for today")
+    
+    # Driving order per employee from job coordinates
+    st.subheader("🗺️ Daily Routes")
+    route_day = st.date_input("Route date", value=date.today(), key="route_day")
+    routes = plan_routes(route_day)
+    if routes:
+        employee_names = dict(conn.execute("SELECT id, name FROM employees").fetchall())
+        summary = pd.DataFrame([{
+            'Employee': employee_names.get(r.employee_id, r.employee_id),
+            'Stops': len(r.job_ids),
+            'Travel (km)': round(r.km, 1),
+            'Driving (min)': round(r.minutes),
+            'Late (min)': round(r.late_minutes),
+            'No coordinates': len(r.unlocated),
+        } for r in routes.values()])
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        for route in routes.values():
+            if route.job_ids:
+                with st.expander(f"🚗 {employee_names.get(route.employee_id, route.employee_id)}"):
+                    for arrival, job_id in zip(route.arrivals, route.job_ids):
+                        st.write(f"• {arrival} – Job {job_id}")
+    else:
+        st.info("No open jobs on this date")
 
 def show_invoicing():
     """Invoicing and billing"""
@@ -1301,7 +1206,7 @@ def show_invoicing():
     conn = init_database()
     
     with tab1:
-        invoices = pd.read_sql_query('''
+        invoices = read_sql_cached('''
             SELECT i.*, c.name as customer_name, j.title as job_title
             FROM invoices i
             JOIN customers c ON i.customer_id = c.id
@@ -1318,7 +1223,7 @@ def show_invoicing():
         st.subheader("Create New Invoice")
         
         # Get completed jobs without invoices
-        completed_jobs = pd.read_sql_query('''
+        completed_jobs = read_sql_cached('''
             SELECT j.*, c.name as customer_name
             FROM jobs j
             JOIN customers c ON j.customer_id = c.id
@@ -1369,7 +1274,7 @@ def show_inventory():
     conn = init_database()
     
     with tab1:
-        inventory = pd.read_sql_query("SELECT * FROM inventory ORDER BY item_name", conn)
+        inventory = read_sql_cached("SELECT * FROM inventory ORDER BY item_name", conn)
         
         if not inventory.empty:
             for _, item in inventory.iterrows():
@@ -1426,7 +1331,11 @@ def show_analytics():
     """Analytics and reporting"""
     st.title("📈 Analytics & Reporting")
     
-    conn = init_database()
+    init_database()
+    # Reports read the analytics snapshot, never the live booking database
+    conn = get_replica_connection()
+    st.caption(replica_status().describe())
+    use_store = analytics_store.available()
     
     # Revenue analytics
     col1, col2 = st.columns(2)
@@ -1434,14 +1343,17 @@ def show_analytics():
     with col1:
         st.subheader("Revenue Overview")
         
-        # Monthly revenue
-        monthly_revenue = pd.read_sql_query('''
-            SELECT strftime('%Y-%m', j.created_at) as month, SUM(j.price) as revenue
-            FROM jobs j
-            WHERE j.status = 'completed'
-            GROUP BY strftime('%Y-%m', j.created_at)
-            ORDER BY month
-        ''', conn)
+        # Monthly revenue, from the columnar store once it has been exported
+        if use_store:
+            monthly_revenue = analytics_store.monthly_revenue()
+        else:
+            monthly_revenue = read_sql_cached('''
+                SELECT strftime('%Y-%m', j.created_at) as month, SUM(j.price) as revenue
+                FROM jobs j
+                WHERE j.status = 'completed'
+                GROUP BY strftime('%Y-%m', j.created_at)
+                ORDER BY month
+            ''', conn)
         
         if not monthly_revenue.empty:
             fig = px.line(monthly_revenue, x='month', y='revenue', title='Monthly Revenue')
@@ -1452,17 +1364,22 @@ def show_analytics():
     with col2:
         st.subheader("Job Status Distribution")
         
-        job_status = pd.read_sql_query('''
-            SELECT status, COUNT(*) as count
-            FROM jobs
-            GROUP BY status
-        ''', conn)
+        if use_store:
+            job_status = analytics_store.job_status_counts()
+        else:
+            job_status = read_sql_cached('''
+                SELECT status, COUNT(*) as count
+                FROM jobs
+                GROUP BY status
+            ''', conn)
         
         if not job_status.empty:
             fig = px.pie(job_status, values='count', names='status', title='Job Status Distribution')
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No job data available")
+    
+    conn.close()
 
 def show_settings():
     """Settings and configuration"""
@@ -1506,7 +1423,7 @@ def show_settings():
         
         # List existing users
         st.subheader("Existing Users")
-        users = pd.read_sql_query("SELECT username, role, full_name, email FROM users", conn)
+        users = read_sql_cached("SELECT username, role, full_name, email FROM users", conn)
         if not users.empty:
             st.dataframe(users, use_container_width=True)
     
@@ -1583,7 +1500,7 @@ def show_slot_management_tab(conn):
         end_date = st.date_input("To", value=date.today() + timedelta(days=7))
         
         if start_date <= end_date:
-            slots_df = pd.read_sql_query('''
+            slots_df = read_sql_cached('''
                 SELECT id, date, start_time, end_time, current_bookings, max_bookings, available
                 FROM time_slots
                 WHERE date BETWEEN ? AND ?
@@ -1636,7 +1553,7 @@ def show_service_management_tab(conn):
         st.markdown("### Add/Edit Service")
         
         # Get existing services for editing
-        services_df = pd.read_sql_query("SELECT id, name FROM service_types ORDER BY name", conn)
+        services_df = read_sql_cached("SELECT id, name FROM service_types ORDER BY name", conn)
         
         edit_service = st.selectbox("Edit existing service (optional)", 
                                   ["Create New"] + services_df['name'].tolist() if not services_df.empty else ["Create New"])
@@ -1690,7 +1607,7 @@ def show_service_management_tab(conn):
     with col2:
         st.markdown("### Current Services")
         
-        services = pd.read_sql_query('''
+        services = read_sql_cached('''
             SELECT id, name, description, base_price, duration_minutes, category, active
             FROM service_types ORDER BY category, name
         ''', conn)
@@ -1736,7 +1653,7 @@ def show_customer_bookings_tab(conn):
     st.subheader("📋 Customer Bookings")
     
     # Get customer bookings from customer portal
-    bookings = pd.read_sql_query('''
+    bookings = read_sql_cached('''
         SELECT cb.id, cu.first_name, cu.last_name, cu.email, cu.phone,
                st.name as service_name, cb.date, cb.start_time, cb.end_time,
                cb.address, cb.total_price, cb.status, cb.special_instructions,
@@ -1826,30 +1743,14 @@ def show_customer_bookings_tab(conn):
                     if booking['status'] not in ['completed', 'cancelled']:
                         if st.button("Cancel", key=f"cancel_{unique_id}"):
                             # Free up the time slot
-                            conn.execute('''
-                                UPDATE time_slots 
-                                SET current_bookings = current_bookings - 1
-                                WHERE id = (SELECT slot_id FROM customer_bookings WHERE id = ?)
-                                AND current_bookings > 0
-                            ''', (booking['id'],))
-                            
-                            conn.execute("UPDATE customer_bookings SET status = 'cancelled' WHERE id = ?", (booking['id'],))
-                            conn.commit()
+                            release_slot(int(booking['id']))
                             st.warning("Booking cancelled!")
                             st.rerun()
                 
                 with col4:
                     if st.button("Delete", key=f"delete_{unique_id}"):
                         # Free up the time slot and delete booking
-                        conn.execute('''
-                            UPDATE time_slots 
-                            SET current_bookings = current_bookings - 1
-                            WHERE id = (SELECT slot_id FROM customer_bookings WHERE id = ?)
-                            AND current_bookings > 0
-                        ''', (booking['id'],))
-                        
-                        conn.execute("DELETE FROM customer_bookings WHERE id = ?", (booking['id'],))
-                        conn.commit()
+                        release_slot(int(booking['id']), delete=True)
                         st.error("Booking deleted!")
                         st.rerun()
     else:
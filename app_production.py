@@ -19,6 +19,14 @@ from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 import re
 
+from db_pool import get_connection
+from migrations import ensure_schema
+from dashboard_counters import get_dashboard_counters
+from listings import list_customers
+from interval_index import find_conflicts
+from analytics_replica import get_replica_connection, replica_status
+import analytics_store
+
 # Page configuration
 st.set_page_config(
     page_title="Aufraumenbee Admin Portal",
@@ -32,136 +40,11 @@ DATABASE_PATH = "aufraumenbee.db"
 
 def init_database():
     """Initialize the SQLite database with all required tables"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Users table (admin, manager, employee access)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL CHECK (role IN ('admin', 'manager', 'employee')),
-            email TEXT UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Customers table (unified customer data)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            phone TEXT,
-            address TEXT,
-            registration_source TEXT DEFAULT 'admin',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            notes TEXT
-        )
-    ''')
-    
-    # Customer users table (for customer portal login)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customer_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Employees table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            email TEXT UNIQUE,
-            phone TEXT,
-            position TEXT,
-            hourly_rate REAL,
-            hire_date DATE,
-            status TEXT DEFAULT 'active' CHECK (status IN ('active', 'inactive')),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Jobs table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            employee_id INTEGER,
-            service_type TEXT NOT NULL,
-            scheduled_date DATE NOT NULL,
-            scheduled_time TEXT NOT NULL,
-            duration_hours INTEGER DEFAULT 2,
-            hourly_rate REAL DEFAULT 25.0,
-            total_amount REAL,
-            status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'confirmed', 'in_progress', 'completed', 'cancelled')),
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers (id),
-            FOREIGN KEY (employee_id) REFERENCES employees (id)
-        )
-    ''')
-    
-    # Invoices table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS invoices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            job_id INTEGER,
-            invoice_number TEXT UNIQUE,
-            amount REAL NOT NULL,
-            tax_amount REAL DEFAULT 0,
-            total_amount REAL NOT NULL,
-            status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'paid', 'overdue', 'cancelled')),
-            issued_date DATE DEFAULT CURRENT_DATE,
-            due_date DATE,
-            paid_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers (id),
-            FOREIGN KEY (job_id) REFERENCES jobs (id)
-        )
-    ''')
-    
-    # Inventory table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS inventory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            item_name TEXT NOT NULL,
-            category TEXT,
-            quantity INTEGER DEFAULT 0,
-            unit_price REAL,
-            supplier TEXT,
-            last_restocked DATE,
-            minimum_stock INTEGER DEFAULT 10,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create default admin user if not exists
-    cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
-    if cursor.fetchone()[0] == 0:
-        admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
-        cursor.execute('''
-            INSERT INTO users (username, password_hash, role, email)
-            VALUES (?, ?, ?, ?)
-        ''', ("admin", admin_password, "admin", "admin@aufraumenbee.com"))
-    
-    conn.commit()
-    conn.close()
+    ensure_schema(DATABASE_PATH)
 
 def authenticate_user(username: str, password: str) -> Optional[Dict]:
     """Authenticate admin users"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
     cursor.execute("SELECT id, username, password_hash, role, email FROM users WHERE username = ?", (username,))
@@ -179,32 +62,15 @@ def authenticate_user(username: str, password: str) -> Optional[Dict]:
 
 def get_dashboard_metrics() -> Dict:
     """Get key business metrics for the dashboard"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection(DATABASE_PATH)
     cursor = conn.cursor()
     
-    # Total customers (from both tables)
-    cursor.execute("SELECT COUNT(*) FROM customers")
-    admin_customers = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM customer_users")
-    portal_customers = cursor.fetchone()[0]
-    total_customers = admin_customers + portal_customers
-    
-    # Total employees
-    cursor.execute("SELECT COUNT(*) FROM employees WHERE status = 'active'")
-    total_employees = cursor.fetchone()[0]
-    
-    # Pending jobs
-    cursor.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'")
-    pending_jobs = cursor.fetchone()[0]
-    
-    # Monthly revenue
-    cursor.execute('''
-        SELECT COALESCE(SUM(total_amount), 0) 
-        FROM invoices 
-        WHERE status = 'paid' 
-        AND strftime('%Y-%m', paid_date) = strftime('%Y-%m', 'now')
-    ''')
-    monthly_revenue = cursor.fetchone()[0]
+    # Customer, employee, pending and revenue totals are trigger-maintained
+    counters = get_dashboard_counters(conn)
+    total_customers = counters['total_customers']
+    total_employees = counters['active_employees']
+    pending_jobs = counters['pending_jobs']
+    monthly_revenue = counters['monthly_paid_revenue']
     
     # Recent jobs
     cursor.execute('''
@@ -280,36 +146,21 @@ def show_customer_management():
     tab1, tab2 = st.tabs(["📋 Customer List", "➕ Add New Customer"])
     
     with tab1:
-        conn = sqlite3.connect(DATABASE_PATH)
-        
-        # Get customers from both tables
-        query = '''
-            SELECT id, first_name, last_name, email, phone, address, 'Admin' as source, created_at
-            FROM customers
-            UNION ALL
-            SELECT id, first_name, last_name, email, phone, address, 'Portal' as source, created_at
-            FROM customer_users
-            ORDER BY created_at DESC
-        '''
-        
-        df = pd.read_sql_query(query, conn)
+        # Portal accounts are linked rows in customers, so one indexed table serves search, paging and count
+        search_term = st.text_input("🔍 Search customers by name, email, phone or address:")
+        pager = st.session_state.setdefault('customer_pager', {'search': None, 'cursors': [None]})
+        if pager['search'] != search_term:
+            pager['search'], pager['cursors'] = search_term, [None]
+        conn = get_connection(DATABASE_PATH)
+        page = list_customers(conn, search=search_term, cursor=pager['cursors'][-1])
         conn.close()
         
-        if not df.empty:
-            # Search functionality
-            search_term = st.text_input("🔍 Search customers by name or email:")
-            if search_term:
-                df = df[
-                    df['first_name'].str.contains(search_term, case=False, na=False) |
-                    df['last_name'].str.contains(search_term, case=False, na=False) |
-                    df['email'].str.contains(search_term, case=False, na=False)
-                ]
-            
+        if page.total:
+            st.caption(f"{page.total} customers")
             st.dataframe(
-                df[['first_name', 'last_name', 'email', 'phone', 'source', 'created_at']],
+                page.rows[['name', 'email', 'phone', 'source', 'created_at']],
                 column_config={
-                    'first_name': 'First Name',
-                    'last_name': 'Last Name',
+                    'name': 'Name',
                     'email': 'Email',
                     'phone': 'Phone',
                     'source': 'Registration Source',
@@ -317,6 +168,18 @@ def show_customer_management():
                 },
                 use_container_width=True
             )
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if len(pager['cursors']) > 1 and st.button("⬅️ Previous", key="customers_prev_page"):
+                    pager['cursors'].pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {len(pager['cursors'])} of {page.page_count}")
+            with col3:
+                if page.next_cursor and st.button("Next ➡️", key="customers_next_page"):
+                    pager['cursors'].append(page.next_cursor)
+                    st.rerun()
         else:
             st.info("No customers found")
     
@@ -336,14 +199,14 @@ def show_customer_management():
             
             if st.form_submit_button("Add Customer", type="primary"):
                 if first_name and last_name and email:
-                    conn = sqlite3.connect(DATABASE_PATH)
+                    conn = get_connection(DATABASE_PATH)
                     cursor = conn.cursor()
                     
                     try:
                         cursor.execute('''
-                            INSERT INTO customers (first_name, last_name, email, phone, address, notes, registration_source)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (first_name, last_name, email, phone, address, notes, 'admin'))
+                            INSERT INTO customers (name, first_name, last_name, email, phone, address, notes, registration_source)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (f"{first_name} {last_name}", first_name, last_name, email, phone, address, notes, 'admin'))
                         
                         conn.commit()
                         st.success(f"✅ Customer {first_name} {last_name} added successfully!")
@@ -363,7 +226,7 @@ def show_job_management():
     tab1, tab2 = st.tabs(["📋 All Jobs", "➕ Create New Job"])
     
     with tab1:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         
         query = '''
             SELECT j.id, c.first_name || ' ' || c.last_name as customer_name,
@@ -393,7 +256,7 @@ def show_job_management():
     
     with tab2:
         # Get customers and employees for dropdowns
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         
         customers_df = pd.read_sql_query("SELECT id, first_name || ' ' || last_name as name FROM customers", conn)
         employees_df = pd.read_sql_query("SELECT id, first_name || ' ' || last_name as name FROM employees WHERE status = 'active'", conn)
@@ -435,21 +298,29 @@ def show_job_management():
                 if customer_id and service_type and scheduled_date:
                     total_amount = duration_hours * hourly_rate
                     
-                    conn = sqlite3.connect(DATABASE_PATH)
-                    cursor = conn.cursor()
-                    
-                    cursor.execute('''
-                        INSERT INTO jobs (customer_id, employee_id, service_type, scheduled_date, 
-                                        scheduled_time, duration_hours, hourly_rate, total_amount, notes)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (customer_id, employee_id, service_type, scheduled_date, 
-                         str(scheduled_time), duration_hours, hourly_rate, total_amount, notes))
-                    
-                    conn.commit()
-                    conn.close()
-                    
-                    st.success("✅ Job created successfully!")
-                    st.rerun()
+                    # jobs.duration is in minutes; the schedule index reads it to find overlaps
+                    conflicts = find_conflicts(employee_id, scheduled_date, scheduled_time.strftime("%H:%M"),
+                                               duration_hours * 60, db_path=DATABASE_PATH) if employee_id else []
+                    if conflicts:
+                        st.error(f"❌ {selected_employee} is already booked at that time "
+                                 f"(jobs {', '.join(f'#{job_id}' for job_id in conflicts)})")
+                    else:
+                        conn = get_connection(DATABASE_PATH)
+                        cursor = conn.cursor()
+                        
+                        cursor.execute('''
+                            INSERT INTO jobs (customer_id, employee_id, title, service_type, scheduled_date, 
+                                            scheduled_time, duration, duration_hours, hourly_rate, total_amount, notes)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (customer_id, employee_id, service_type, service_type, scheduled_date, 
+                             scheduled_time.strftime("%H:%M"), duration_hours * 60, duration_hours, hourly_rate,
+                             total_amount, notes))
+                        
+                        conn.commit()
+                        conn.close()
+                        
+                        st.success("✅ Job created successfully!")
+                        st.rerun()
                 else:
                     st.error("❌ Please fill in all required fields!")
         
@@ -462,7 +333,7 @@ def show_employee_management():
     tab1, tab2 = st.tabs(["📋 Employee List", "➕ Add New Employee"])
     
     with tab1:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         df = pd.read_sql_query("SELECT * FROM employees ORDER BY created_at DESC", conn)
         conn.close()
         
@@ -489,14 +360,14 @@ def show_employee_management():
             
             if st.form_submit_button("Add Employee", type="primary"):
                 if first_name and last_name:
-                    conn = sqlite3.connect(DATABASE_PATH)
+                    conn = get_connection(DATABASE_PATH)
                     cursor = conn.cursor()
                     
                     cursor.execute('''
-                        INSERT INTO employees (first_name, last_name, email, phone, position, 
+                        INSERT INTO employees (name, first_name, last_name, email, phone, position, 
                                              hourly_rate, hire_date, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (first_name, last_name, email, phone, position, hourly_rate, hire_date, status))
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (f"{first_name} {last_name}", first_name, last_name, email, phone, position, hourly_rate, hire_date, status))
                     
                     conn.commit()
                     conn.close()
@@ -513,7 +384,7 @@ def show_invoicing():
     tab1, tab2 = st.tabs(["📋 Invoice List", "➕ Create Invoice"])
     
     with tab1:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         
         query = '''
             SELECT i.id, i.invoice_number, c.first_name || ' ' || c.last_name as customer_name,
@@ -545,7 +416,7 @@ def show_invoicing():
     
     with tab2:
         # Create new invoice form
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         customers_df = pd.read_sql_query("SELECT id, first_name || ' ' || last_name as name FROM customers", conn)
         
         if not customers_df.empty:
@@ -593,7 +464,7 @@ def show_inventory():
     tab1, tab2 = st.tabs(["📋 Inventory List", "➕ Add Item"])
     
     with tab1:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_connection(DATABASE_PATH)
         df = pd.read_sql_query("SELECT * FROM inventory ORDER BY item_name", conn)
         conn.close()
         
@@ -626,7 +497,7 @@ def show_inventory():
             
             if st.form_submit_button("Add Item", type="primary"):
                 if item_name:
-                    conn = sqlite3.connect(DATABASE_PATH)
+                    conn = get_connection(DATABASE_PATH)
                     cursor = conn.cursor()
                     
                     cursor.execute('''
@@ -647,7 +518,10 @@ def show_reports():
     """Reports and analytics interface"""
     st.header("📈 Reports & Analytics")
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    # Reports read the analytics snapshot, never the live booking database
+    conn = get_replica_connection(DATABASE_PATH)
+    st.caption(replica_status(DATABASE_PATH).describe())
+    use_store = analytics_store.available(DATABASE_PATH)
     
     # Revenue analytics
     col1, col2 = st.columns(2)
@@ -656,13 +530,16 @@ def show_reports():
         st.subheader("💰 Revenue Overview")
         
         # Monthly revenue
-        monthly_revenue = pd.read_sql_query('''
-            SELECT strftime('%Y-%m', paid_date) as month, SUM(total_amount) as revenue
-            FROM invoices 
-            WHERE status = 'paid' AND paid_date >= date('now', '-12 months')
-            GROUP BY strftime('%Y-%m', paid_date)
-            ORDER BY month
-        ''', conn)
+        if use_store:
+            monthly_revenue = analytics_store.paid_revenue_by_month(12, DATABASE_PATH)
+        else:
+            monthly_revenue = pd.read_sql_query('''
+                SELECT strftime('%Y-%m', paid_date) as month, SUM(total_amount) as revenue
+                FROM invoices 
+                WHERE status = 'paid' AND paid_date >= date('now', '-12 months')
+                GROUP BY strftime('%Y-%m', paid_date)
+                ORDER BY month
+            ''', conn)
         
         if not monthly_revenue.empty:
             st.line_chart(monthly_revenue.set_index('month'))
@@ -673,12 +550,15 @@ def show_reports():
         st.subheader("📊 Service Analytics")
         
         # Service type popularity
-        service_stats = pd.read_sql_query('''
-            SELECT service_type, COUNT(*) as count
-            FROM jobs
-            GROUP BY service_type
-            ORDER BY count DESC
-        ''', conn)
+        if use_store:
+            service_stats = analytics_store.jobs_by_service(DATABASE_PATH)
+        else:
+            service_stats = pd.read_sql_query('''
+                SELECT service_type, COUNT(*) as count
+                FROM jobs
+                GROUP BY service_type
+                ORDER BY count DESC
+            ''', conn)
         
         if not service_stats.empty:
             st.bar_chart(service_stats.set_index('service_type'))
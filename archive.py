@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Time-partitioned archival for Aufraumenbee
+Moves old jobs, bookings, slots and log rows into monthly archive databases and serves history through UNION views
+"""
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from config import Config
+from db_pool import configure_connection
+from query_metrics import InstrumentedConnection
+
+
+@dataclass
+class ArchiveGroup:
+    """A table archived together with the rows that reference it.
+
+    ``eligible`` selects (id, month) of archivable parent rows and takes the
+    cutoff date as its only parameter; ``children`` are (table, column)
+    pairs whose rows pointing at an archived parent move into the same file.
+    """
+    table: str
+    eligible: str
+    retention: str
+    children: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _log_group(table: str) -> ArchiveGroup:
+    return ArchiveGroup(table, f'''
+        SELECT id, substr(timestamp, 1, 7) AS month FROM {table}
+        WHERE timestamp < ?
+    ''', 'ARCHIVE_LOG_RETENTION_DAYS')
+
+
+# Order matters: bookings go before the slots they reference
+ARCHIVE_GROUPS: List[ArchiveGroup] = [
+    # Jobs only once finished and with nothing left to collect; their
+    # invoices and feedback travel with them so no foreign key dangles
+    ArchiveGroup('jobs', '''
+        SELECT j.id, substr(COALESCE(j.scheduled_date, j.created_at), 1, 7) AS month FROM jobs j
+        WHERE j.status IN ('completed', 'cancelled')
+          AND COALESCE(j.scheduled_date, j.created_at) < ?
+          AND NOT EXISTS (SELECT 1 FROM invoices i
+                          WHERE i.job_id = j.id AND IFNULL(i.status, 'pending') NOT IN ('paid', 'cancelled'))
+    ''', 'ARCHIVE_RETENTION_DAYS', children=[('invoices', 'job_id'), ('job_feedback', 'job_id')]),
+    ArchiveGroup('customer_bookings', '''
+        SELECT id, substr(date, 1, 7) AS month FROM customer_bookings
+        WHERE date < ?
+    ''', 'ARCHIVE_RETENTION_DAYS', children=[('booking_slots', 'booking_id')]),
+    ArchiveGroup('time_slots', '''
+        SELECT ts.id, substr(ts.date, 1, 7) AS month FROM time_slots ts
+        WHERE ts.date < ?
+          AND NOT EXISTS (SELECT 1 FROM customer_bookings cb WHERE cb.slot_id = ts.id)
+          AND NOT EXISTS (SELECT 1 FROM booking_slots bs WHERE bs.slot_id = ts.id)
+    ''', 'ARCHIVE_RETENTION_DAYS'),
+    _log_group('activity_logs'),
+    _log_group('error_logs'),
+    _log_group('db_operation_logs'),
+    _log_group('api_logs'),
+]
+
+ARCHIVED_TABLES = [name for group in ARCHIVE_GROUPS
+                   for name in [group.table] + [child for child, _ in group.children]]
+
+_MONTH = re.compile(r'_(\d{4})-(\d{2})\.db$')
+
+
+@dataclass
+class ArchiveResult:
+    """What one archive run moved and reclaimed"""
+    moved: Dict[str, int] = field(default_factory=dict)
+    months: List[str] = field(default_factory=list)
+    freed_bytes: int = 0
+    duration_ms: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.moved.values())
+
+
+def archive_dir(db_path: str = None) -> str:
+    """ARCHIVE_DIR, or an archive/ folder next to the database"""
+    if Config.ARCHIVE_DIR:
+        return Config.ARCHIVE_DIR
+    return os.path.join(os.path.dirname(os.path.abspath(db_path or Config.DATABASE_NAME)), 'archive')
+
+
+def archive_path(month: str, db_path: str = None) -> str:
+    """Archive file for one month, e.g. archive/aufraumenbee_2025-03.db"""
+    name, _ = os.path.splitext(os.path.basename(db_path or Config.DATABASE_NAME))
+    return os.path.join(archive_dir(db_path), f"{name}_{month}.db")
+
+
+def archive_months(db_path: str = None) -> List[str]:
+    """Months that have an archive file, oldest first"""
+    name, _ = os.path.splitext(os.path.basename(db_path or Config.DATABASE_NAME))
+    months = []
+    for path in glob.glob(os.path.join(archive_dir(db_path), f"{glob.escape(name)}_*.db")):
+        match = _MONTH.search(path)
+        if match:
+            months.append(f"{match.group(1)}-{match.group(2)}")
+    return sorted(months)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """A private connection: ATTACH state must never leak into the shared pool"""
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False,
+                           factory=InstrumentedConnection)
+    return configure_connection(conn)
+
+
+def _alias(month: str) -> str:
+    return f"archive_{month.replace('-', '_')}"
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _attach(conn: sqlite3.Connection, month: str, db_path: str) -> str:
+    """Attach (creating if needed) the archive file for ``month``; returns its schema name"""
+    alias = _alias(month)
+    attached = {row[1] for row in conn.execute("PRAGMA database_list").fetchall()}
+    if alias in attached:
+        return alias
+    others = attached - {'main', 'temp'}
+    if len(others) >= conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED):
+        # Out of ATTACH slots: drop every other archive, we only write one at a time
+        for other in others:
+            conn.execute(f"DETACH DATABASE {other}")
+    path = archive_path(month, db_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS " + alias, (path,))
+    for table in ARCHIVED_TABLES:
+        main_columns = _columns(conn, 'main', table)
+        if not main_columns:
+            continue
+        archived = _columns(conn, alias, table)
+        if not archived:
+            # Plain copy of the columns: archives carry no constraints or triggers
+            conn.execute(f"CREATE TABLE {alias}.{table} AS SELECT * FROM main.{table} WHERE 0")
+            conn.execute(f"CREATE UNIQUE INDEX {alias}.idx_{table}_id ON {table} (id)")
+        else:
+            for column in main_columns:
+                if column not in archived:
+                    conn.execute(f"ALTER TABLE {alias}.{table} ADD COLUMN {column}")
+    return alias
+
+
+def _move_chunk(conn: sqlite3.Connection, group: ArchiveGroup, month: str, alias: str, ids: List[int],
+                track_deletions: bool) -> Dict[str, int]:
+    """Copy one batch into the archive, then delete what the archive now holds.
+
+    Two transactions, because a commit spanning WAL databases is atomic per
+    file only: if the process dies in between, the rows exist in both places
+    and the next run's INSERT OR IGNORE + DELETE finishes the move.
+    """
+    id_list = json.dumps(ids)
+    tables = [(child, column) for child, column in group.children] + [(group.table, 'id')]
+
+    conn.execute("BEGIN")
+    try:
+        for table, column in tables:
+            columns = ', '.join(_columns(conn, 'main', table))
+            conn.execute(f'''
+                INSERT OR IGNORE INTO {alias}.{table} ({columns})
+                SELECT {columns} FROM main.{table}
+                WHERE {column} IN (SELECT value FROM json_each(?))
+            ''', (id_list,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    moved = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        last_deletion = 0
+        if track_deletions:
+            last_deletion = conn.execute("SELECT IFNULL(MAX(id), 0) FROM main.analytics_deletions").fetchone()[0]
+        for table, column in tables:
+            # Children first; a parent that gained a new child in between stays behind
+            guard = ''.join(f" AND NOT EXISTS (SELECT 1 FROM main.{child} c WHERE c.{fk} = main.{table}.id)"
+                            for child, fk in group.children) if table == group.table else ''
+            moved[table] = conn.execute(f'''
+                DELETE FROM main.{table}
+                WHERE {column} IN (SELECT value FROM json_each(?))
+                  AND id IN (SELECT id FROM {alias}.{table}){guard}
+            ''', (id_list,)).rowcount
+        if track_deletions:
+            # Archiving is not deleting: keep these rows in the columnar analytics store
+            conn.execute("DELETE FROM main.analytics_deletions WHERE id > ?", (last_deletion,))
+        conn.executemany('''
+            INSERT INTO main.archive_catalog (month, table_name, row_count) VALUES (?, ?, ?)
+            ON CONFLICT(month, table_name) DO UPDATE SET row_count = row_count + excluded.row_count
+        ''', [(month, table, count) for table, count in moved.items() if count])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return moved
+
+
+def _cutoff(group: ArchiveGroup, today: date = None) -> str:
+    return ((today or date.today()) - timedelta(days=getattr(Config, group.retention))).isoformat()
+
+
+def plan_archive(db_path: str = None, today: date = None) -> Dict[str, Dict[str, int]]:
+    """Rows each group would move, per month, without touching anything"""
+    db_path = db_path or Config.DATABASE_NAME
+    conn = _connect(db_path)
+    try:
+        return {
+            group.table: dict(conn.execute(
+                f"SELECT month, COUNT(*) FROM ({group.eligible}) GROUP BY month ORDER BY month",
+                (_cutoff(group, today),)
+            ).fetchall())
+            for group in ARCHIVE_GROUPS if _columns(conn, 'main', group.table)
+        }
+    finally:
+        conn.close()
+
+
+def run_archive(db_path: str = None, chunk_size: int = None, vacuum: str = None,
+                today: date = None, verbose: bool = False) -> ArchiveResult:
+    """Move every row past its retention window into its monthly archive file.
+
+    Works in batches of ``chunk_size`` parents, each in short transactions,
+    so portals keep writing while it runs and an interrupted run simply
+    continues where it stopped. ``vacuum`` ('incremental', 'full' or 'none',
+    default ARCHIVE_VACUUM) decides how the freed pages are returned.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    chunk_size = chunk_size or Config.ARCHIVE_CHUNK_SIZE
+    vacuum = vacuum or Config.ARCHIVE_VACUUM
+    result = ArchiveResult()
+    started = time.perf_counter()
+
+    conn = _connect(db_path)
+    try:
+        track_deletions = bool(_columns(conn, 'main', 'analytics_deletions'))
+        months = set()
+        for group in ARCHIVE_GROUPS:
+            if not _columns(conn, 'main', group.table):
+                continue
+            cutoff = _cutoff(group, today)
+            after_id = 0
+            while True:
+                rows = conn.execute(
+                    f"SELECT id, month FROM ({group.eligible}) WHERE id > ? ORDER BY id LIMIT ?",
+                    (cutoff, after_id, chunk_size)
+                ).fetchall()
+                if not rows:
+                    break
+                after_id = rows[-1][0]
+                by_month: Dict[str, List[int]] = {}
+                for row_id, month in rows:
+                    by_month.setdefault(month, []).append(row_id)
+                for month, ids in sorted(by_month.items()):
+                    alias = _attach(conn, month, db_path)
+                    for table, count in _move_chunk(conn, group, month, alias, ids, track_deletions).items():
+                        result.moved[table] = result.moved.get(table, 0) + count
+                    months.add(month)
+                if verbose:
+                    print(f"   {group.table}: {result.moved.get(group.table, 0):,} rows archived")
+        result.months = sorted(months)
+
+        for alias in [row[1] for row in conn.execute("PRAGMA database_list").fetchall()]:
+            if alias not in ('main', 'temp'):
+                conn.execute(f"DETACH DATABASE {alias}")
+        if result.total and vacuum != 'none':
+            result.freed_bytes = _vacuum(conn, vacuum)
+    finally:
+        conn.close()
+    result.duration_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+def _file_bytes(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def _vacuum(conn: sqlite3.Connection, mode: str) -> int:
+    """Return freed pages to the filesystem; the first incremental run converts the file"""
+    before = _file_bytes(conn)
+    if mode == 'incremental':
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # auto_vacuum only changes with a full VACUUM; after that every
+            # run just truncates the free pages
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum")
+    elif mode == 'full':
+        conn.execute("VACUUM")
+    else:
+        raise ValueError(f"Unknown ARCHIVE_VACUUM mode {mode!r}")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return before - _file_bytes(conn)
+
+
+# ---------------------------------------------------------------------------
+# History views
+# ---------------------------------------------------------------------------
+
+def attach_history(conn: sqlite3.Connection, tables: List[str] = None, month_from: str = None,
+                   month_to: str = None, db_path: str = None, only: List[str] = None) -> List[str]:
+    """ATTACH the archives in a month range and create TEMP views ``<table>_history``.
+
+    Each view is the hot table UNION ALL its archived copies, with columns
+    the archive predates filled with NULL. Archived rows that are still in
+    the hot table (an interrupted move) appear once. Use a connection from
+    history_connection(), not a pooled one. SQLite allows only a handful of
+    attached files per connection, so a range wider than that raises
+    ValueError; ``only`` restricts the range to specific months.
+    """
+    tables = tables or ARCHIVED_TABLES
+    db_path = db_path or Config.DATABASE_NAME
+    months = [month for month in archive_months(db_path)
+              if (month_from is None or month >= month_from) and (month_to is None or month <= month_to)
+              and (only is None or month in only)]
+    attached = {row[1] for row in conn.execute("PRAGMA database_list").fetchall()} - {'main', 'temp'}
+    needed = [month for month in months if _alias(month) not in attached]
+    free = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - len(attached)
+    if len(needed) > free:
+        raise ValueError(f"{len(months)} archive months requested but only {free} more can be attached; "
+                         f"narrow the range with month_from/month_to")
+    for month in needed:
+        conn.execute("ATTACH DATABASE ? AS " + _alias(month), (archive_path(month, db_path),))
+
+    for table in tables:
+        columns = _columns(conn, 'main', table)
+        parts = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+        for month in months:
+            alias = _alias(month)
+            archived = set(_columns(conn, alias, table))
+            if not archived:
+                continue
+            select = ', '.join(column if column in archived else f"NULL AS {column}" for column in columns)
+            parts.append(f"SELECT {select} FROM {alias}.{table} "
+                         f"WHERE id NOT IN (SELECT id FROM main.{table})")
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_history")
+        conn.execute(f"CREATE TEMP VIEW {table}_history AS " + "\nUNION ALL ".join(parts))
+    return months
+
+
+def history_connection(db_path: str = None, tables: List[str] = None, months: int = None) -> sqlite3.Connection:
+    """Private connection with ``<table>_history`` views; close() it when done.
+
+    Attaches the newest ``months`` (default ARCHIVE_HISTORY_MONTHS) archive
+    files that hold rows of ``tables``, found through archive_catalog, so a
+    view over bookings is not crowded out by months that only hold logs.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    tables = tables or ARCHIVED_TABLES
+    months = Config.ARCHIVE_HISTORY_MONTHS if months is None else months
+    conn = _connect(db_path)
+    try:
+        placeholders = ', '.join('?' for _ in tables)
+        wanted = [row[0] for row in conn.execute(f'''
+            SELECT DISTINCT month FROM archive_catalog
+            WHERE table_name IN ({placeholders}) AND row_count > 0
+            ORDER BY month DESC LIMIT ?
+        ''', (*tables, months)).fetchall()]
+        attach_history(conn, tables, db_path=db_path, only=wanted)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'plan'
+    target = sys.argv[2] if len(sys.argv) > 2 else Config.DATABASE_NAME
+
+    if command == 'plan':
+        for table, months in plan_archive(target).items():
+            total = sum(months.values())
+            print(f"📦 {table:<18} {total:>9,} rows" + (f" ({min(months)} … {max(months)})" if months else ""))
+    elif command == 'run':
+        print(f"🗄️ Archiving into {archive_dir(target)}")
+        result = run_archive(target, verbose=True)
+        print(f"✅ Moved {result.total:,} rows across {len(result.months)} months in "
+              f"{result.duration_ms / 1000:.1f} s, freed {result.freed_bytes / 1024 / 1024:.1f} MB")
+    elif command == 'status':
+        for month in archive_months(target):
+            size = os.path.getsize(archive_path(month, target)) / 1024 / 1024
+            print(f"📁 {month}: {size:.1f} MB")
+    else:
+        print("Usage: python archive.py plan|run|status [db_path]")
+        sys.exit(2)
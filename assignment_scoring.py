@@ -0,0 +1,285 @@
+"""
+Assignment scoring for Aufraumenbee
+Scores every unassigned job against every employee as one NumPy matrix and picks the top suggestions
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from routing import insertion_km
+
+_TOKEN = re.compile(r'[^\W\d_]{3,}')
+_POSTCODE = re.compile(r'\b(\d{5})\b')
+
+
+@dataclass
+class ScoringWeights:
+    """How much each component adds to a score; availability is subtracted when someone is off"""
+    skill: float = 5.0
+    load: float = 3.0
+    cost: float = 1.0
+    travel: float = 2.0
+    availability: float = float('inf')
+
+    @classmethod
+    def from_config(cls) -> 'ScoringWeights':
+        return cls(Config.ASSIGNMENT_WEIGHT_SKILL, Config.ASSIGNMENT_WEIGHT_LOAD, Config.ASSIGNMENT_WEIGHT_COST,
+                   Config.ASSIGNMENT_WEIGHT_TRAVEL, Config.ASSIGNMENT_WEIGHT_AVAILABILITY)
+
+
+def tokenize(text) -> List[str]:
+    """Lowercase words of three letters or more; digits and punctuation split words"""
+    return _TOKEN.findall(text.lower()) if isinstance(text, str) else []
+
+
+def skill_incidence(texts: pd.Series, vocabulary: Dict[str, int]) -> np.ndarray:
+    """(len(texts), len(vocabulary)) bools; each distinct text is tokenized once"""
+    codes, uniques = pd.factorize(texts, use_na_sentinel=True)
+    distinct = np.zeros((len(uniques) + 1, len(vocabulary)), dtype=bool)  # last row: missing text
+    for row, text in enumerate(uniques):
+        for token in tokenize(text):
+            column = vocabulary.get(token)
+            if column is not None:
+                distinct[row, column] = True
+    return distinct[codes]
+
+
+def _vocabulary(*columns: pd.Series) -> Dict[str, int]:
+    vocabulary: Dict[str, int] = {}
+    for column in columns:
+        for text in column.dropna().unique():
+            for token in tokenize(text):
+                vocabulary.setdefault(token, len(vocabulary))
+    return vocabulary
+
+
+def skill_matrix(job_services: pd.Series, employee_skills: pd.Series) -> np.ndarray:
+    """jobs × employees share (0..1) of each job's service words found in the employee's skills.
+
+    Words are weighted by inverse document frequency over the employees, so
+    "cleaning", which everyone lists, counts for almost nothing next to
+    "window" or "carpet"; words nobody lists are ignored.
+    """
+    vocabulary = _vocabulary(job_services, employee_skills)
+    jobs = skill_incidence(job_services, vocabulary).astype(np.float32)
+    employees = skill_incidence(employee_skills, vocabulary).astype(np.float32)
+    df = employees.sum(axis=0)
+    # Words no employee lists can never match, so they do not dilute the share either
+    idf = np.where(df > 0, np.log((len(employees) + 1) / (df + 1)), 0).astype(np.float32)
+    weighted = jobs * idf
+    total = weighted.sum(axis=1, keepdims=True)
+    return np.divide(weighted @ employees.T, total, out=np.zeros((len(jobs), len(employees)), np.float32),
+                     where=total > 0)
+
+
+def _normalized(values: pd.Series) -> np.ndarray:
+    """0..1 by the column maximum; missing values become the median"""
+    values = pd.to_numeric(values, errors='coerce').astype(np.float64)
+    values = values.fillna(values.median() if values.notna().any() else 0).to_numpy(np.float32)
+    top = values.max(initial=0)
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def _by_distinct(values: pd.Series, parse, missing):
+    """Apply ``parse`` to each distinct value only; jobs repeat a few dates and times many times"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    table = np.array([parse(value) for value in uniques.tolist()] + [missing], dtype=np.int64)
+    return table[codes]
+
+
+def _ordinal(value) -> int:
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return -1
+
+
+def _minute(value) -> int:
+    try:
+        hours, minutes = str(value).split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return -1
+
+
+def job_intervals(jobs: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Date ordinals, start and end minutes per job, plus which rows have a usable date and time"""
+    ordinals = _by_distinct(jobs['scheduled_date'], _ordinal, -1)
+    starts = _by_distinct(jobs['scheduled_time'], _minute, -1)
+    ends = starts + pd.to_numeric(jobs['duration'], errors='coerce').fillna(60).to_numpy(np.int64)
+    valid = (ordinals >= 0) & (starts >= 0) & (ends <= 24 * 60)
+    return ordinals, starts, ends, valid
+
+
+def availability_matrix(jobs: pd.DataFrame, employee_ids: np.ndarray, model) -> np.ndarray:
+    """jobs × employees: whose weekly availability covers the whole visit.
+
+    Employees the model does not know (inactive) are never available; jobs
+    without a usable date or time count as available for everyone.
+    """
+    ordinals, starts, ends, valid = job_intervals(jobs)
+    columns = pd.Index(model.employee_ids).get_indexer(employee_ids)
+    result = np.ones((len(jobs), len(employee_ids)), dtype=bool)
+    covered = model.coverage(ordinals[valid], starts[valid], ends[valid])
+    known = columns >= 0
+    block = np.zeros((int(valid.sum()), len(employee_ids)), dtype=bool)
+    block[:, known] = covered[:, columns[known]]
+    result[valid] = block
+    return result
+
+
+def _area(location) -> int:
+    """First two digits of a German postcode (the Leitregion), or -1"""
+    match = _POSTCODE.search(str(location))
+    return int(match.group(1)[:2]) if match else -1
+
+
+def _has_coordinates(frame: pd.DataFrame, prefix: str = '') -> bool:
+    return frame is not None and {f'{prefix}latitude', f'{prefix}longitude'} <= set(frame.columns)
+
+
+def _postcode_travel(jobs: pd.DataFrame, employee_ids: np.ndarray, assigned: pd.DataFrame) -> np.ndarray:
+    """Same postcode area as the employee's other jobs that day: 0; elsewhere: 1; unknown: 0.5"""
+    result = np.full((len(jobs), len(employee_ids)), 0.5, dtype=np.float32)
+    if assigned.empty:
+        return result
+    job_days = _by_distinct(jobs['scheduled_date'], _ordinal, -1)
+    job_areas = _by_distinct(jobs['location'], _area, -1)
+    busy_days = _by_distinct(assigned['scheduled_date'], _ordinal, -1)
+    busy_areas = _by_distinct(assigned['location'], _area, -1)
+    columns = pd.Index(employee_ids).get_indexer(assigned['employee_id'])
+
+    # Incidence of day and day+area keys per employee, then one fancy index per job
+    job_spots = np.where((job_days >= 0) & (job_areas >= 0), job_days * 100 + job_areas, -1)
+    busy_spots = np.where((busy_days >= 0) & (busy_areas >= 0), busy_days * 100 + busy_areas, -1)
+    for job_keys, busy_keys, value in ((job_days, busy_days, 1.0), (job_spots, busy_spots, 0.0)):
+        usable = (busy_keys >= 0) & (columns >= 0)
+        keys = pd.Index(np.unique(busy_keys[usable]))
+        incidence = np.zeros((len(keys) + 1, len(employee_ids)), dtype=bool)  # last row: no key
+        incidence[keys.get_indexer(busy_keys[usable]), columns[usable]] = True
+        result[incidence[keys.get_indexer(job_keys)]] = value
+    return result
+
+
+def travel_matrix(jobs: pd.DataFrame, employee_ids: np.ndarray, assigned: pd.DataFrame,
+                  homes: pd.DataFrame = None) -> np.ndarray:
+    """jobs × employees travel cost 0..1 from where each employee already works that day.
+
+    With coordinates (jobs.latitude/longitude), it is the road km the job
+    adds to the employee's route that day (routing.insertion_km), starting
+    from their home or the depot, over Config.ROUTING_MAX_DETOUR_KM. Jobs
+    without coordinates fall back to postcodes: 0 when the employee has a
+    job in the same postcode area on that date, 1 when their jobs that day
+    are all elsewhere, 0.5 when it is unknown. ``homes`` holds
+    home_latitude/home_longitude per employee, in employee_ids order.
+    """
+    result = _postcode_travel(jobs, employee_ids, assigned)
+    if not (_has_coordinates(jobs) and _has_coordinates(assigned) and 'scheduled_time' in assigned.columns):
+        return result
+    ordinals, starts, _, valid = job_intervals(jobs)
+    job_lat = pd.to_numeric(jobs['latitude'], errors='coerce').to_numpy(np.float64)
+    job_lon = pd.to_numeric(jobs['longitude'], errors='coerce').to_numpy(np.float64)
+    rows = np.flatnonzero(valid & ~np.isnan(job_lat) & ~np.isnan(job_lon))
+    if not len(rows):
+        return result
+
+    home_lat = np.full(len(employee_ids), Config.ROUTING_DEPOT_LAT)
+    home_lon = np.full(len(employee_ids), Config.ROUTING_DEPOT_LON)
+    if _has_coordinates(homes, 'home_'):
+        lat = pd.to_numeric(homes['home_latitude'], errors='coerce').to_numpy(np.float64)
+        lon = pd.to_numeric(homes['home_longitude'], errors='coerce').to_numpy(np.float64)
+        known = ~np.isnan(lat) & ~np.isnan(lon)
+        home_lat[known], home_lon[known] = lat[known], lon[known]
+
+    stop_days = _by_distinct(assigned['scheduled_date'], _ordinal, -1)
+    stop_starts = _by_distinct(assigned['scheduled_time'], _minute, -1)
+    stop_lat = pd.to_numeric(assigned['latitude'], errors='coerce').to_numpy(np.float64)
+    stop_lon = pd.to_numeric(assigned['longitude'], errors='coerce').to_numpy(np.float64)
+    stop_columns = pd.Index(employee_ids).get_indexer(assigned['employee_id'])
+    usable = (stop_days >= 0) & (stop_starts >= 0) & ~np.isnan(stop_lat) & ~np.isnan(stop_lon) & (stop_columns >= 0)
+
+    detour = insertion_km(ordinals[rows], starts[rows], job_lat[rows], job_lon[rows], home_lat, home_lon,
+                          stop_columns[usable], stop_days[usable], stop_starts[usable],
+                          stop_lat[usable], stop_lon[usable])
+    result[rows] = np.clip(detour / Config.ROUTING_MAX_DETOUR_KM, 0, 1)
+    return result
+
+
+@dataclass
+class ScoreMatrix:
+    """Scores of every job (rows) against every employee (columns)"""
+    job_ids: np.ndarray
+    employee_ids: np.ndarray
+    scores: np.ndarray
+    available: np.ndarray
+    skill: np.ndarray
+
+    def __post_init__(self):
+        self._row = {int(job_id): row for row, job_id in enumerate(self.job_ids)}
+
+    def top_k(self, k: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Column indexes and scores of the k best employees per job, best first.
+
+        argpartition finds the k largest per row without sorting the rest;
+        only those k are then ordered. Excluded pairs score -inf.
+        """
+        k = min(k or Config.ASSIGNMENT_SUGGESTIONS, self.scores.shape[1])
+        if k == 0:
+            return np.empty((len(self.scores), 0), np.int64), np.empty((len(self.scores), 0), np.float32)
+        best = np.argpartition(-self.scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(self.scores, best, axis=1), axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        return best, np.take_along_axis(self.scores, best, axis=1)
+
+    def suggestions(self, k: int = None) -> Dict[int, List[Tuple[int, float]]]:
+        """job id -> [(employee id, score), ...] best first, excluded employees left out"""
+        best, scores = self.top_k(k)
+        ids = np.where(np.isfinite(scores), self.employee_ids[best], -1).tolist()
+        scores = scores.tolist()
+        return {
+            job_id: [(e, s) for e, s in zip(ids[row], scores[row]) if e != -1]
+            for row, job_id in enumerate(self.job_ids.tolist())
+        }
+
+    def is_available(self, job_id: int, employee_id: int) -> bool:
+        column = np.flatnonzero(self.employee_ids == employee_id)
+        return bool(column.size) and bool(self.available[self._row[int(job_id)], column[0]])
+
+
+def score_assignments(jobs: pd.DataFrame, employees: pd.DataFrame, weights: ScoringWeights = None,
+                      model=None, assigned: pd.DataFrame = None) -> ScoreMatrix:
+    """Score every job against every employee.
+
+    ``jobs`` needs id, service_type, scheduled_date, scheduled_time,
+    duration and location; ``employees`` needs id, skills, total_minutes and
+    hourly_rate. ``model`` is an AvailabilityModel and ``assigned`` the
+    already assigned jobs (employee_id, scheduled_date, scheduled_time,
+    location); without them availability and travel are left neutral.
+    Latitude/longitude on jobs and assigned, and home_latitude/
+    home_longitude on employees, switch travel to route km.
+    """
+    weights = weights or ScoringWeights.from_config()
+    employee_ids = employees['id'].to_numpy(np.int64)
+
+    skill = skill_matrix(jobs['service_type'], employees['skills'])
+    scores = weights.skill * skill
+    # Per-employee terms broadcast across the job rows
+    scores += weights.load * (1 - _normalized(employees['total_minutes']))
+    scores += weights.cost * (1 - _normalized(employees['hourly_rate']))
+    if assigned is not None and weights.travel:
+        scores += weights.travel * (1 - travel_matrix(jobs, employee_ids, assigned, homes=employees))
+    else:
+        scores += weights.travel * 0.5
+
+    if model is not None:
+        available = availability_matrix(jobs, employee_ids, model)
+        np.subtract(scores, weights.availability, out=scores, where=~available)
+    else:
+        available = np.ones(scores.shape, dtype=bool)
+    return ScoreMatrix(jobs['id'].to_numpy(np.int64), employee_ids, scores, available, skill)
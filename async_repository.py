@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Asyncio data access for Aufraumenbee
+Typed repository for API and worker processes, backed by one writer thread and a bounded reader pool
+"""
+
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, List, Optional, TypeVar
+
+from config import Config
+from db_pool import configure_connection
+from db_rows import Booking, Customer, Job, Service, Slot, from_row
+from query_metrics import InstrumentedConnection
+
+T = TypeVar('T')
+
+
+# ---------------------------------------------------------------------------
+# Executor plumbing
+# ---------------------------------------------------------------------------
+
+class _Call:
+    """One unit of work handed to a worker thread.
+
+    Cancelling a call that has not started skips it. Cancelling a running
+    read interrupts its SQLite statement; writes are never interrupted once
+    started, and a write that outlives its timeout is awaited to the end
+    (see AsyncRepository._submit), so a timeout never leaves a half-known
+    outcome.
+    """
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, interruptible: bool):
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.interruptible = interruptible
+        self.conn: Optional[sqlite3.Connection] = None
+        self.started = False
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def run(self, conn: Optional[sqlite3.Connection] = None):
+        with self.lock:
+            if self.cancelled:
+                return None
+            self.started = True
+            self.conn = conn
+        try:
+            if conn is None:
+                return self.fn(*self.args, **self.kwargs)
+            return self.fn(conn, *self.args, **self.kwargs)
+        finally:
+            with self.lock:
+                self.conn = None
+
+    def cancel(self) -> bool:
+        """Skip or interrupt the call; False when it is a write that already started"""
+        with self.lock:
+            if self.started and not self.interruptible:
+                return False
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+            return True
+
+
+def _discard(future: asyncio.Future):
+    """Retrieve the outcome of work nobody awaits any more (an interrupted read raises)"""
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncRepository:
+    """Non-blocking access to customers, services, slots, bookings and jobs.
+
+    Reads run on ``readers`` threads, each holding one read-only connection.
+    Writes go through a single writer thread that calls the same service
+    functions the portals use (reservations, bulk_jobs), so writes from this
+    process are serialized before they ever reach SQLite's write lock. At most
+    ``max_pending`` calls are queued or running at once; further callers wait
+    on a semaphore instead of piling work onto the executors.
+
+    Use as ``async with AsyncRepository(path) as repo: ...``.
+    """
+
+    def __init__(self, db_path: str = None, readers: int = None, max_pending: int = None,
+                 timeout: float = None):
+        self.db_path = db_path or Config.DATABASE_NAME
+        if self.db_path == ':memory:':
+            raise ValueError("AsyncRepository needs a database file shared by its reader threads")
+        self.readers = readers or Config.DB_ASYNC_READERS
+        self.max_pending = max_pending or Config.DB_ASYNC_MAX_PENDING
+        self.timeout = timeout if timeout is not None else Config.DB_ASYNC_TIMEOUT
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._reader: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+
+    async def start(self):
+        """Bring the schema up to date and spin up the executors"""
+        if self._reader is not None:
+            return
+        self._reader = ThreadPoolExecutor(self.readers, thread_name_prefix='aufraumenbee-db-read',
+                                          initializer=self._open_reader)
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='aufraumenbee-db-write')
+        self._pending = asyncio.Semaphore(self.max_pending)
+        try:
+            from migrations import ensure_schema
+            await self.write(ensure_schema, self.db_path)
+        except BaseException:
+            # __aexit__ never runs when __aenter__ fails: release the executors here
+            await self.close()
+            raise
+
+    async def close(self):
+        """Finish running calls, drop queued ones and close every connection"""
+        for executor in (self._reader, self._writer):
+            if executor is not None:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda e=executor: e.shutdown(wait=True, cancel_futures=True)
+                )
+        self._reader = self._writer = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    async def __aenter__(self) -> 'AsyncRepository':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    def _open_reader(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=InstrumentedConnection)
+        configure_connection(conn)
+        conn.execute("PRAGMA query_only = ON")
+        conn.row_factory = sqlite3.Row
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+
+    def _run_read(self, call: _Call):
+        return call.run(self._local.conn)
+
+    async def _submit(self, executor: ThreadPoolExecutor, job: Callable, call: _Call,
+                      timeout: Optional[float]):
+        if executor is None:
+            raise RuntimeError("AsyncRepository is not started; use 'async with' or await start()")
+        timeout = self.timeout if timeout is None else timeout
+        async with self._pending:
+            future = asyncio.get_running_loop().run_in_executor(executor, job, call)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout or None)
+            except asyncio.TimeoutError:
+                if call.cancel():
+                    future.add_done_callback(_discard)
+                    raise
+                # A write already running will commit or fail: report which, late
+                return await future
+            except BaseException:
+                # Caller cancellation: skip or interrupt the work too
+                call.cancel()
+                future.add_done_callback(_discard)
+                raise
+
+    async def read(self, fn: Callable[..., T], *args, timeout: float = None, **kwargs) -> T:
+        """Run ``fn(conn, *args)`` on a reader connection"""
+        return await self._submit(self._reader, self._run_read, _Call(fn, args, kwargs, True), timeout)
+
+    async def write(self, fn: Callable[..., T], *args, timeout: float = None, **kwargs) -> T:
+        """Run ``fn(*args)`` on the writer thread; ``fn`` opens its own transaction.
+
+        ``timeout`` only bounds the wait for the writer thread: TimeoutError
+        means the write never ran, and a write that started is awaited.
+        """
+        return await self._submit(self._writer, _Call.run, _Call(fn, args, kwargs, False), timeout)
+
+    # -----------------------------------------------------------------------
+    # Customers
+    # -----------------------------------------------------------------------
+
+    async def get_customer(self, customer_id: int) -> Optional[Customer]:
+        return await self.read(lambda conn: from_row(Customer, conn.execute(
+            "SELECT * FROM customers WHERE id = ?", (customer_id,)
+        ).fetchone()))
+
+    async def get_customer_by_email(self, email: str) -> Optional[Customer]:
+        """Lookup on the normalized-email index, ignoring case and stray spaces"""
+        return await self.read(lambda conn: from_row(Customer, conn.execute(
+            "SELECT * FROM customers WHERE lower(trim(email)) = lower(trim(?)) ORDER BY id LIMIT 1", (email,)
+        ).fetchone()))
+
+    async def list_customers(self, search: str = None, after: Customer = None,
+                             limit: int = 50) -> List[Customer]:
+        """Newest-first customers; pass the last row of a page as ``after``"""
+        from search_index import fts_query, matching_ids_sql
+
+        where, params = [], []
+        query = fts_query(search) if search else None
+        if search and query is None:
+            return []
+        if query:
+            where.append(f"id IN ({matching_ids_sql('customer')})")
+            params.append(query)
+        if after is not None:
+            created_at = after.created_at or ''
+            where.append("IFNULL(created_at, '') <= ? AND (IFNULL(created_at, '') < ? OR id < ?)")
+            params += [created_at, created_at, after.id]
+        sql = f'''
+            SELECT * FROM customers
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY IFNULL(created_at, '') DESC, id DESC
+            LIMIT {int(limit)}
+        '''
+        return await self.read(lambda conn: [from_row(Customer, row)
+                                             for row in conn.execute(sql, params).fetchall()])
+
+    # -----------------------------------------------------------------------
+    # Services and slots
+    # -----------------------------------------------------------------------
+
+    async def list_services(self, active_only: bool = True) -> List[Service]:
+        sql = "SELECT * FROM service_types" + (" WHERE active = TRUE" if active_only else "") + " ORDER BY name"
+        return await self.read(lambda conn: [from_row(Service, row) for row in conn.execute(sql).fetchall()])
+
+    async def get_service(self, service_id: int) -> Optional[Service]:
+        return await self.read(lambda conn: from_row(Service, conn.execute(
+            "SELECT * FROM service_types WHERE id = ?", (service_id,)
+        ).fetchone()))
+
+    async def list_open_slots(self, date_from: date, date_to: date, limit: int = 500) -> List[Slot]:
+        """Slots in the window that still have capacity, in time order"""
+        return await self.read(lambda conn: [from_row(Slot, row) for row in conn.execute(f'''
+            SELECT * FROM time_slots
+            WHERE date BETWEEN ? AND ? AND available = TRUE AND current_bookings < max_bookings
+            ORDER BY date, start_time
+            LIMIT {int(limit)}
+        ''', (date_from.isoformat(), date_to.isoformat())).fetchall()])
+
+    # -----------------------------------------------------------------------
+    # Bookings
+    # -----------------------------------------------------------------------
+
+    async def get_booking(self, booking_id: int) -> Optional[Booking]:
+        return await self.read(lambda conn: from_row(Booking, conn.execute(
+            "SELECT * FROM customer_bookings WHERE id = ?", (booking_id,)
+        ).fetchone()))
+
+    async def list_customer_bookings(self, customer_user_id: int, limit: int = 100) -> List[Booking]:
+        return await self.read(lambda conn: [from_row(Booking, row) for row in conn.execute(f'''
+            SELECT * FROM customer_bookings
+            WHERE customer_user_id = ?
+            ORDER BY date DESC, start_time DESC
+            LIMIT {int(limit)}
+        ''', (customer_user_id,)).fetchall()])
+
+    async def reserve_slot(self, slot_id: int, customer_user_id: int, service_type_id: int,
+                           address: str, total_price: float, special_instructions: str = None):
+        """Atomic reservation; returns a reservations.ReservationResult"""
+        from reservations import reserve_slot
+        return await self.write(reserve_slot, slot_id, customer_user_id, service_type_id, address,
+                                total_price, special_instructions, db_path=self.db_path)
+
+    async def cancel_booking(self, booking_id: int) -> bool:
+        from reservations import release_slot
+        return await self.write(release_slot, booking_id, db_path=self.db_path)
+
+    # -----------------------------------------------------------------------
+    # Jobs
+    # -----------------------------------------------------------------------
+
+    async def get_job(self, job_id: int) -> Optional[Job]:
+        return await self.read(lambda conn: from_row(Job, conn.execute('''
+            SELECT j.*, c.name AS customer_name, e.name AS employee_name
+            FROM jobs j
+            LEFT JOIN customers c ON j.customer_id = c.id
+            LEFT JOIN employees e ON j.employee_id = e.id
+            WHERE j.id = ?
+        ''', (job_id,)).fetchone()))
+
+    async def list_jobs(self, date_from: date, date_to: date, status: str = None,
+                        limit: int = 500) -> List[Job]:
+        """Jobs in schedule order within a date window"""
+        where, params = ["j.scheduled_date BETWEEN ? AND ?"], [date_from.isoformat(), date_to.isoformat()]
+        if status:
+            where.append("j.status = ?")
+            params.append(status)
+        sql = f'''
+            SELECT j.*, c.name AS customer_name, e.name AS employee_name
+            FROM jobs j
+            LEFT JOIN customers c ON j.customer_id = c.id
+            LEFT JOIN employees e ON j.employee_id = e.id
+            WHERE {' AND '.join(where)}
+            ORDER BY j.scheduled_date, IFNULL(j.scheduled_time, ''), j.id
+            LIMIT {int(limit)}
+        '''
+        return await self.read(lambda conn: [from_row(Job, row) for row in conn.execute(sql, params).fetchall()])
+
+    async def set_job_status(self, job_ids: List[int], new_status: str, performed_by: str = None):
+        """Set-based status change; returns a bulk_jobs.BulkResult"""
+        from bulk_jobs import bulk_set_status
+        return await self.write(bulk_set_status, list(job_ids), new_status, performed_by, self.db_path)
+
+    async def assign_jobs(self, job_ids: List[int], employee_id: int, performed_by: str = None):
+        """Conflict-checked assignment; returns a bulk_jobs.BulkResult"""
+        from bulk_jobs import bulk_assign
+        return await self.write(bulk_assign, list(job_ids), employee_id, 'assigned', performed_by, self.db_path)
+
+
+async def _smoke_test(db_path: str, requests: int):
+    async with AsyncRepository(db_path) as repo:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            repo.list_services() if i % 2 else repo.list_customers(limit=20) for i in range(requests)
+        ))
+        elapsed = time.perf_counter() - started
+    print(f"✅ {len(results):,} concurrent reads in {elapsed * 1000:.0f} ms "
+          f"on {repo.readers} reader threads")
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_NAME
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(_smoke_test(target, count))
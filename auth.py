@@ -7,6 +7,8 @@ import bcrypt
 import sqlite3
 from typing import Optional, Dict
 
+from db_pool import get_connection
+
 class AuthManager:
     def __init__(self, db_path: str = "aufraumenbee.db"):
         self.db_path = db_path
@@ -21,7 +23,7 @@ class AuthManager:
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
         """Authenticate a user and return user info if successful"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.execute(
             "SELECT id, password_hash, role, full_name, email FROM users WHERE username = ?", 
             (username,)
@@ -42,8 +44,8 @@ class AuthManager:
     def create_user(self, username: str, password: str, role: str, 
                    full_name: str = "", email: str = "", phone: str = "") -> bool:
         """Create a new user"""
+        conn = get_connection(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             password_hash = self.hash_password(password)
             
             conn.execute('''
@@ -52,10 +54,11 @@ class AuthManager:
             ''', (username, password_hash, role, full_name, email, phone))
             
             conn.commit()
-            conn.close()
             return True
         except sqlite3.IntegrityError:
             return False
+        finally:
+            conn.close()
     
     def change_password(self, username: str, old_password: str, new_password: str) -> bool:
         """Change user password"""
@@ -63,7 +66,7 @@ class AuthManager:
         if not user:
             return False
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         new_hash = self.hash_password(new_password)
         
         conn.execute(
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Automatic job assignment for Aufraumenbee
+Assigns every approved, unassigned job in a date range at once as a min-cost assignment
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from assignment_scoring import ScoringWeights, job_intervals, score_assignments
+from availability_model import get_availability_model
+from bulk_jobs import CLOSED_STATUSES, DEFAULT_JOB_MINUTES, BulkResult, bulk_assign_plan
+from config import Config
+from db_pool import get_connection
+from interval_index import EmployeeDay
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Cost of a forbidden pair inside the assignment matrix; real costs stay far below
+_FORBIDDEN = 1e9
+
+# Why a job stayed unassigned
+NO_SCHEDULE = 'no usable date or time'
+NOBODY_AVAILABLE = 'nobody available'
+NOBODY_QUALIFIED = 'nobody with the skills'
+NOBODY_FREE = 'everyone suitable is booked or at max hours'
+
+
+def hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and columns of a min-cost assignment for a rectangular matrix.
+
+    Shortest augmenting paths with row/column potentials (the O(n²m)
+    Hungarian method), the inner scan over columns vectorized. Uses SciPy's
+    implementation when it is installed.
+    """
+    if SCIPY_AVAILABLE:
+        return linear_sum_assignment(cost)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # row (1-based) holding each column; column 0 is the root
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        shortest = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            reduced = cost[owner[column] - 1] - u[owner[column]] - v[1:]
+            improved = ~used[1:] & (reduced < shortest[1:])
+            shortest[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(used[1:], np.inf, shortest[1:])
+            nearest = int(np.argmin(candidates)) + 1
+            delta = candidates[nearest - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            shortest[~used] -= delta
+            column = nearest
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    columns = np.flatnonzero(owner[1:])
+    rows = owner[1:][columns] - 1
+    order = np.argsort(rows)
+    rows, columns = rows[order], columns[order]
+    return (columns, rows) if transposed else (rows, columns)
+
+
+@dataclass
+class PlannedAssignment:
+    """One job the plan gives to one employee"""
+    job_id: int
+    employee_id: int
+    day: date
+    start: int
+    end: int
+    cost: float
+    score: float
+
+
+@dataclass
+class AssignmentPlan:
+    """What auto-assign would do for a date range, before anything is written"""
+    date_from: date
+    date_to: date
+    assignments: List[PlannedAssignment] = field(default_factory=list)
+    unassigned: Dict[int, str] = field(default_factory=dict)
+    employee_names: Dict[int, str] = field(default_factory=dict)
+    capacity_minutes: Dict[int, int] = field(default_factory=dict)
+    booked_minutes: Dict[int, int] = field(default_factory=dict)
+    solver: str = 'hungarian'
+    seconds: float = 0.0
+
+    @property
+    def total_cost(self) -> float:
+        """Labor cost of the new assignments at each employee's hourly rate"""
+        return sum(a.cost for a in self.assignments)
+
+    @property
+    def utilization(self) -> Dict[int, float]:
+        """Share of each employee's available time booked once the plan is applied"""
+        return {employee_id: self.booked_minutes.get(employee_id, 0) / capacity
+                for employee_id, capacity in self.capacity_minutes.items() if capacity}
+
+    @property
+    def overall_utilization(self) -> float:
+        capacity = sum(self.capacity_minutes.values())
+        return sum(self.booked_minutes.values()) / capacity if capacity else 0.0
+
+    def mapping(self) -> Dict[int, int]:
+        return {a.job_id: a.employee_id for a in self.assignments}
+
+    def describe(self) -> str:
+        return (f"{self.date_from} → {self.date_to}: {len(self.assignments)} jobs assigned, "
+                f"{len(self.unassigned)} left, labor cost {self.total_cost:.2f}, "
+                f"utilization {self.overall_utilization:.0%} ({self.solver}, {self.seconds:.2f} s)")
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{
+            'job_id': a.job_id,
+            'employee': self.employee_names.get(a.employee_id, a.employee_id),
+            'date': a.day.isoformat(),
+            'start': f"{a.start // 60:02d}:{a.start % 60:02d}",
+            'end': f"{a.end // 60:02d}:{a.end % 60:02d}",
+            'cost': round(a.cost, 2),
+            'score': round(a.score, 2),
+        } for a in self.assignments])
+
+
+def _load(conn, date_from: date, date_to: date) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Jobs to place, active employees with their open workload, and work already booked"""
+    params = (date_from.isoformat(), date_to.isoformat())
+    jobs = pd.read_sql_query('''
+        SELECT id, service_type, scheduled_date, scheduled_time, duration, location, latitude, longitude, price
+        FROM jobs
+        WHERE status = 'approved' AND employee_id IS NULL AND scheduled_date BETWEEN ? AND ?
+        ORDER BY scheduled_date, scheduled_time, id
+    ''', conn, params=params)
+    closed = ', '.join('?' for _ in CLOSED_STATUSES)
+    employees = pd.read_sql_query('''
+        SELECT e.id, e.name, e.skills, e.hourly_rate, e.home_latitude, e.home_longitude,
+               COALESCE(SUM(j.duration), 0) AS total_minutes
+        FROM employees e
+        LEFT JOIN jobs j ON j.employee_id = e.id AND j.status IN ('assigned', 'in_progress')
+        WHERE COALESCE(e.status, 'active') = 'active'
+        GROUP BY e.id
+        ORDER BY e.id
+    ''', conn)
+    booked = pd.read_sql_query(f'''
+        SELECT employee_id, scheduled_date, scheduled_time, duration, location, latitude, longitude
+        FROM jobs
+        WHERE employee_id IS NOT NULL AND status NOT IN ({closed}) AND scheduled_date BETWEEN ? AND ?
+    ''', conn, params=CLOSED_STATUSES + params)
+    return jobs, employees, booked
+
+
+class _DayState:
+    """Intervals and minutes already booked per employee column on one day"""
+
+    def __init__(self, employees: int):
+        self.intervals: Dict[int, EmployeeDay] = {}
+        self.minutes = np.zeros(employees, dtype=np.int64)
+
+    def book(self, column: int, start: int, end: int):
+        day = self.intervals.setdefault(column, EmployeeDay())
+        day.add(len(day), start, end)
+        self.minutes[column] += end - start
+
+    def free(self, column: int, start: int, end: int, limit: int) -> bool:
+        if self.minutes[column] + end - start > limit:
+            return False
+        day = self.intervals.get(column)
+        return not (day and day.overlaps(start, end))
+
+    def blocked(self, starts: np.ndarray, ends: np.ndarray, limit: int) -> np.ndarray:
+        """(jobs, employees) pairs ruled out by an overlap or the daily hours cap"""
+        blocked = self.minutes[None, :] + (ends - starts)[:, None] > limit
+        if self.intervals:
+            columns = [column for column, day in self.intervals.items() for _ in range(len(day))]
+            spans = np.array([span for day in self.intervals.values() for span in zip(day.starts, day.ends)])
+            overlap = (starts[:, None] < spans[None, :, 1]) & (spans[None, :, 0] < ends[:, None])
+            owners = np.zeros((len(columns), len(self.minutes)), dtype=np.float32)
+            owners[np.arange(len(columns)), columns] = 1
+            blocked |= (overlap.astype(np.float32) @ owners) > 0
+        return blocked
+
+
+def _solve_day(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray, cost: np.ndarray,
+               state: _DayState, limit: int, exact: bool) -> Dict[int, int]:
+    """Job row -> employee column for one day.
+
+    Exact mode solves repeated rounds: a min-cost matching gives each
+    employee at most one more job, the day state is updated, and the jobs
+    left over go into the next round. Greedy mode takes the cheapest
+    feasible pairs first in a single pass.
+    """
+    placed: Dict[int, int] = {}
+    if exact:
+        remaining = np.arange(len(rows))
+        while len(remaining):
+            round_cost = np.where(state.blocked(starts[remaining], ends[remaining], limit),
+                                  _FORBIDDEN, cost[remaining])
+            # Only jobs and employees with at least one allowed pair enter the matching
+            allowed = round_cost < _FORBIDDEN
+            remaining = remaining[allowed.any(axis=1)]
+            columns = np.flatnonzero(allowed.any(axis=0))
+            if not len(remaining):
+                break
+            round_cost = round_cost[allowed.any(axis=1)][:, columns]
+            picked_rows, picked_columns = hungarian(round_cost)
+            keep = round_cost[picked_rows, picked_columns] < _FORBIDDEN
+            for local, column in zip(picked_rows[keep].tolist(), columns[picked_columns[keep]].tolist()):
+                index = int(remaining[local])
+                state.book(column, int(starts[index]), int(ends[index]))
+                placed[int(rows[index])] = column
+            remaining = np.delete(remaining, picked_rows[keep])
+        return placed
+
+    flat = np.argsort(cost, axis=None, kind='stable')
+    flat = flat[cost.ravel()[flat] < _FORBIDDEN]
+    for index, column in zip(*np.unravel_index(flat, cost.shape)):
+        index, column = int(index), int(column)
+        row = int(rows[index])
+        if row in placed or not state.free(column, int(starts[index]), int(ends[index]), limit):
+            continue
+        state.book(column, int(starts[index]), int(ends[index]))
+        placed[row] = column
+        if len(placed) == len(rows):
+            break
+    return placed
+
+
+def plan_assignments(date_from: date, date_to: date, db_path: str = None, weights: ScoringWeights = None,
+                     exact_max_cells: int = None) -> AssignmentPlan:
+    """Plan assignments for every approved, unassigned job from date_from to date_to.
+
+    Costs are the negated assignment_scoring scores. Hard constraints:
+    weekly availability, the skills the job asks for (when anyone has
+    them), no overlap with the employee's other jobs and at most
+    Config.MAX_HOURS_PER_DAY per employee per day. Days whose job ×
+    employee matrix is larger than ``exact_max_cells`` use the greedy
+    solver. Nothing is written; pass the plan to apply_plan.
+    """
+    started = time.perf_counter()
+    exact_max_cells = exact_max_cells if exact_max_cells is not None else Config.AUTO_ASSIGN_EXACT_MAX_CELLS
+    limit = int(Config.MAX_HOURS_PER_DAY * 60)
+    conn = get_connection(db_path)
+    try:
+        jobs, employees, booked = _load(conn, date_from, date_to)
+    finally:
+        conn.close()
+    for frame in (jobs, booked):
+        frame['duration'] = frame['duration'].fillna(DEFAULT_JOB_MINUTES)
+    model = get_availability_model(db_path)
+
+    plan = AssignmentPlan(date_from, date_to, employee_names=dict(zip(employees['id'].tolist(), employees['name'])))
+    employee_ids = employees['id'].to_numpy(np.int64)
+    for day in (date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)):
+        free = model.day_matrix(day).sum(axis=1) * 15
+        for employee_id, minutes in zip(model.employee_ids.tolist(), np.minimum(free, limit).tolist()):
+            plan.capacity_minutes[employee_id] = plan.capacity_minutes.get(employee_id, 0) + minutes
+    if jobs.empty or employees.empty:
+        plan.unassigned = {job_id: NOBODY_AVAILABLE for job_id in jobs['id'].tolist()}
+        plan.seconds = time.perf_counter() - started
+        return plan
+
+    scores = score_assignments(jobs, employees, weights, model=model, assigned=booked)
+    ordinals, starts, ends, valid = job_intervals(jobs)
+    qualified = scores.skill > 0
+    if Config.AUTO_ASSIGN_REQUIRE_SKILLS:
+        # A service nobody lists as a skill can go to anyone
+        qualified |= ~qualified.any(axis=1, keepdims=True)
+    else:
+        qualified[:] = True
+    allowed = scores.available & qualified & valid[:, None]
+    cost = np.where(allowed, -scores.scores, _FORBIDDEN)
+
+    # Work already on the books counts toward overlaps and daily hours
+    booked_days, booked_starts, booked_ends, booked_valid = job_intervals(booked)
+    booked_columns = pd.Index(employee_ids).get_indexer(booked['employee_id'])
+    rates = pd.to_numeric(employees['hourly_rate'], errors='coerce').fillna(0).to_numpy()
+
+    solvers = set()
+    for ordinal in np.unique(ordinals[valid]):
+        rows = np.flatnonzero(valid & (ordinals == ordinal))
+        state = _DayState(len(employee_ids))
+        mine = (booked_days == ordinal) & booked_valid & (booked_columns >= 0)
+        for column, start, end in zip(booked_columns[mine].tolist(), booked_starts[mine].tolist(),
+                                      booked_ends[mine].tolist()):
+            state.book(column, start, end)
+        exact = len(rows) * len(employee_ids) <= exact_max_cells
+        solvers.add('hungarian' if exact else 'greedy')
+        placed = _solve_day(rows, starts[rows], ends[rows], cost[rows], state, limit, exact)
+        day = date.fromordinal(int(ordinal))
+        for row, column in placed.items():
+            plan.assignments.append(PlannedAssignment(
+                int(scores.job_ids[row]), int(employee_ids[column]), day, int(starts[row]), int(ends[row]),
+                float(rates[column] * (ends[row] - starts[row]) / 60), float(scores.scores[row, column])))
+
+    # Reasons for what is left, most fundamental first
+    done = {a.job_id for a in plan.assignments}
+    for row, job_id in enumerate(scores.job_ids.tolist()):
+        if job_id in done:
+            continue
+        if not valid[row]:
+            plan.unassigned[job_id] = NO_SCHEDULE
+        elif not scores.available[row].any():
+            plan.unassigned[job_id] = NOBODY_AVAILABLE
+        elif not (scores.available[row] & qualified[row]).any():
+            plan.unassigned[job_id] = NOBODY_QUALIFIED
+        else:
+            plan.unassigned[job_id] = NOBODY_FREE
+
+    for column, start, end in zip(booked_columns[booked_valid & (booked_columns >= 0)].tolist(),
+                                  booked_starts[booked_valid & (booked_columns >= 0)].tolist(),
+                                  booked_ends[booked_valid & (booked_columns >= 0)].tolist()):
+        employee_id = int(employee_ids[column])
+        plan.booked_minutes[employee_id] = plan.booked_minutes.get(employee_id, 0) + end - start
+    for a in plan.assignments:
+        plan.booked_minutes[a.employee_id] = plan.booked_minutes.get(a.employee_id, 0) + a.end - a.start
+    plan.assignments.sort(key=lambda a: (a.day, a.start, a.job_id))
+    plan.solver = ' + '.join(sorted(solvers)) or plan.solver
+    plan.seconds = time.perf_counter() - started
+    return plan
+
+
+def apply_plan(plan: AssignmentPlan, performed_by: str = None, db_path: str = None) -> BulkResult:
+    """Write the whole plan in one transaction.
+
+    Each job is re-checked as it is written: jobs assigned by someone else
+    or overlapping work booked since the preview are reported, not forced.
+    """
+    return bulk_assign_plan(plan.mapping(), performed_by=performed_by, db_path=db_path, action='auto_assign',
+                            parameters={'date_from': plan.date_from.isoformat(), 'date_to': plan.date_to.isoformat(),
+                                        'solver': plan.solver, 'total_cost': round(plan.total_cost, 2)})
+
+
+if __name__ == "__main__":
+    # python auto_assign.py [days] [--apply]
+    days = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 7
+    first = date.today()
+    plan = plan_assignments(first, first + timedelta(days=days - 1))
+    print(f"🤖 {plan.describe()}")
+    for job_id, reason in sorted(plan.unassigned.items()):
+        print(f"   ⚠️ job {job_id}: {reason}")
+    if '--apply' in sys.argv[1:]:
+        from bulk_jobs import describe
+        print(f"✅ {describe(apply_plan(plan, performed_by='auto_assign'))}")
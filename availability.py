@@ -0,0 +1,175 @@
+"""
+Multi-day slot availability for Aufraumenbee
+Free capacity for a whole date range in one grouped query, cached until a slot in the range changes
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from db_pool import get_connection
+
+
+@dataclass(frozen=True)
+class Availability:
+    """Per-day free capacity from ``start`` for ``len(free)`` days"""
+    start: date
+    free: Tuple[int, ...]
+    open_slots: Tuple[int, ...]
+
+    @property
+    def days(self) -> List[date]:
+        return [self.start + timedelta(days=i) for i in range(len(self.free))]
+
+    @property
+    def bitmap(self) -> int:
+        """Bit i is set when start + i days still has a bookable slot"""
+        return sum(1 << i for i, slots in enumerate(self.open_slots) if slots)
+
+    def is_bookable(self, day: date) -> bool:
+        offset = (day - self.start).days
+        return 0 <= offset < len(self.open_slots) and self.open_slots[offset] > 0
+
+    def bookable_days(self) -> List[date]:
+        return [day for day, slots in zip(self.days, self.open_slots) if slots]
+
+
+class _RangeCache:
+    """Availability results for one database file.
+
+    A hit costs one ``PRAGMA data_version`` when nothing has been committed
+    since; after a commit the range's slot_day_versions are summed, which only
+    moves when a slot on one of those days was written.
+    """
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[int, int, Availability]]" = OrderedDict()
+
+    def fingerprint(self, first: str, last: str) -> int:
+        return self.conn.execute(
+            "SELECT IFNULL(SUM(version), 0) FROM slot_day_versions WHERE date BETWEEN ? AND ?",
+            (first, last)
+        ).fetchone()[0]
+
+    def lookup(self, key: Tuple[str, str]) -> Tuple[Optional[Availability], int, int]:
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == data_version:
+            self.entries.move_to_end(key)
+            return entry[2], data_version, entry[1]
+        fingerprint = self.fingerprint(*key)
+        if entry is not None and entry[1] == fingerprint:
+            # Someone committed, but not to these days
+            self.entries[key] = (data_version, fingerprint, entry[2])
+            self.entries.move_to_end(key)
+            return entry[2], data_version, fingerprint
+        return None, data_version, fingerprint
+
+    def store(self, key: Tuple[str, str], data_version: int, fingerprint: int, result: Availability):
+        self.entries[key] = (data_version, fingerprint, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+_caches: Dict[str, _RangeCache] = {}
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _query(start: date, end: date, db_path: str = None) -> Availability:
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT date, SUM(max_bookings - current_bookings), COUNT(*)
+            FROM time_slots
+            WHERE date BETWEEN ? AND ? AND available = TRUE AND current_bookings < max_bookings
+            GROUP BY date
+        ''', (start.isoformat(), end.isoformat())).fetchall()
+    finally:
+        conn.close()
+    by_day = {day: (free, slots) for day, free, slots in rows}
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    return Availability(
+        start,
+        tuple(by_day.get(day, (0, 0))[0] for day in days),
+        tuple(by_day.get(day, (0, 0))[1] for day in days),
+    )
+
+
+def get_availability(start: date, end: date, db_path: str = None) -> Availability:
+    """Free capacity for every day from start to end inclusive"""
+    if end < start:
+        raise ValueError(f"end {end} is before start {start}")
+    path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    key = (start.isoformat(), end.isoformat())
+    with _lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = _RangeCache(path, Config.AVAILABILITY_CACHE_ENTRIES)
+        try:
+            result, data_version, fingerprint = cache.lookup(key)
+        except sqlite3.OperationalError:
+            # slot_day_versions not migrated yet: always query
+            result, data_version, fingerprint = None, None, None
+        if result is not None:
+            _stats['hits'] += 1
+            return result
+        _stats['misses'] += 1
+
+    # Versions are read before the query, so a racing write can only cause a refetch
+    result = _query(start, end, db_path)
+    if fingerprint is not None:
+        with _lock:
+            cache.store(key, data_version, fingerprint, result)
+    return result
+
+
+def has_slots(start: date, end: date, db_path: str = None) -> bool:
+    """Whether any slot exists in the range, booked or not.
+
+    Tells "fully booked" apart from "never provisioned" when
+    get_availability finds no bookable day.
+    """
+    conn = get_connection(db_path)
+    try:
+        return conn.execute("SELECT 1 FROM time_slots WHERE date BETWEEN ? AND ? LIMIT 1",
+                            (start.isoformat(), end.isoformat())).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def availability_stats() -> Dict[str, int]:
+    """Cache hit/miss counters for this process"""
+    with _lock:
+        return dict(_stats, entries=sum(len(cache.entries) for cache in _caches.values()))
+
+
+def availability_strip_html(availability: Availability, selected: date = None,
+                            labels: Dict[str, str] = None) -> str:
+    """One cell per day; fully booked days are grayed out"""
+    labels = labels or {}
+    cells = []
+    for day, free in zip(availability.days, availability.free):
+        if free:
+            style = 'background:#e8f5e9;color:#1b5e20;'
+            title = f"{free} {labels.get('free', 'free')}"
+        else:
+            style = 'background:#eeeeee;color:#9e9e9e;text-decoration:line-through;'
+            title = labels.get('full', 'fully booked')
+        if day == selected:
+            style += 'outline:2px solid #2e7d32;'
+        cells.append(
+            f"<span title='{day.isoformat()}: {title}' style='{style}display:inline-block;"
+            f"width:2.4em;margin:1px;padding:2px 0;text-align:center;border-radius:4px;"
+            f"font-size:0.8em'>{day.day}</span>"
+        )
+    return f"<div style='line-height:1.8'>{''.join(cells)}</div>"
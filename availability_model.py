@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Weekly employee availability for Aufraumenbee
+Compiles free-text availability plus dated overrides into 15-minute weekly bitmasks
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import Config
+from db_pool import get_connection
+
+QUARTERS_PER_DAY = 96
+DAYS_PER_WEEK = 7
+MASK_BYTES = DAYS_PER_WEEK * QUARTERS_PER_DAY // 8
+
+WEEKDAYS = [0, 1, 2, 3, 4]
+WEEKEND = [5, 6]
+EVERY_DAY = list(range(DAYS_PER_WEEK))
+
+# English and German day names; the short German forms only as whole words
+_DAY_NAMES = {
+    'monday': 0, 'mon': 0, 'montag': 0, 'mo': 0,
+    'tuesday': 1, 'tues': 1, 'tue': 1, 'dienstag': 1, 'di': 1,
+    'wednesday': 2, 'wed': 2, 'mittwoch': 2, 'mi': 2,
+    'thursday': 3, 'thurs': 3, 'thu': 3, 'donnerstag': 3, 'do': 3,
+    'friday': 4, 'fri': 4, 'freitag': 4, 'fr': 4,
+    'saturday': 5, 'sat': 5, 'samstag': 5, 'sa': 5,
+    'sunday': 6, 'sun': 6, 'sonntag': 6, 'so': 6,
+}
+# Also English words, so only read as days next to another day ("Mi, Do", "Sa-So")
+# or capitalised right before a time range ("Do 9-12")
+_AMBIGUOUS_DAYS = {'do', 'so'}
+_DAY = '(' + '|'.join(sorted(_DAY_NAMES, key=len, reverse=True)) + r')\.?'
+_CLOCK = r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|uhr)?'
+
+# Alternatives are tried left to right at each position
+_TOKEN = re.compile(
+    rf'(?P<days>\b{_DAY}\s*(?:-|–|to|bis)\s*{_DAY}(?!\w))'
+    rf'|(?P<time>{_CLOCK}\s*(?:-|–|to|bis)\s*{_CLOCK})'
+    rf'|(?P<day>\b{_DAY}(?!\w))'
+    r'|(?P<keyword>weekdays?|werktags|weekends?|wochenendes?|daily|every\s*day|täglich|taeglich|'
+    r'flexible|flexibel|any\s*time|full[\s-]*time|vollzeit|part[\s-]*time|teilzeit|'
+    r'mornings?|vormittags?|afternoons?|nachmittags?|evenings?|abends?|'
+    r'unavailable|not\s+available|nicht\s+verfügbar)',
+    re.IGNORECASE,
+)
+
+# (days or None to keep the current days, hours or None for the default)
+_KEYWORDS: Dict[str, Tuple[Optional[List[int]], Optional[str]]] = {
+    'weekday': (WEEKDAYS, None), 'werktags': (WEEKDAYS, None),
+    'weekend': (WEEKEND, None), 'wochenende': (WEEKEND, None),
+    'daily': (EVERY_DAY, None), 'everyday': (EVERY_DAY, None), 'täglich': (EVERY_DAY, None),
+    'taeglich': (EVERY_DAY, None),
+    'fulltime': (WEEKDAYS, 'full'), 'vollzeit': (WEEKDAYS, 'full'),
+    'parttime': (WEEKDAYS, 'part'), 'teilzeit': (WEEKDAYS, 'part'),
+    'morning': (None, '08:00-12:00'), 'vormittag': (None, '08:00-12:00'),
+    'afternoon': (None, '12:00-18:00'), 'nachmittag': (None, '12:00-18:00'),
+    'evening': (None, '17:00-21:00'), 'abend': (None, '17:00-21:00'),
+}
+
+
+def _quarter(minutes: int, round_up: bool = False) -> int:
+    return min(QUARTERS_PER_DAY, -(-minutes // 15) if round_up else minutes // 15)
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _window(hours: str) -> Tuple[int, int]:
+    """'08:00-17:00' -> quarter indexes [start, end)"""
+    start, end = hours.split('-')
+    return _quarter(_minutes(start), round_up=True), _quarter(_minutes(end))
+
+
+def _clock(hour: str, minute: Optional[str], suffix: Optional[str]) -> int:
+    hours = int(hour) % 24
+    if suffix == 'pm' and hours < 12:
+        hours += 12
+    elif suffix == 'am' and hours == 12:
+        hours = 0
+    return hours * 60 + int(minute or 0)
+
+
+def _time_range(groups: Tuple[str, ...]) -> Tuple[int, int]:
+    h1, m1, s1, h2, m2, s2 = (g.lower() if g else g for g in groups)
+    # "8-6pm": the end's am/pm carries over to the start unless that inverts the range
+    if s1 is None and s2 in ('am', 'pm'):
+        carried = _clock(h1, m1, s2)
+        s1 = s2 if carried < _clock(h2, m2, s2) else 'am'
+    start, end = _clock(h1, m1, s1), _clock(h2, m2, s2)
+    if end == 0 and start > 0:
+        end = 24 * 60
+    # "9-5" without am/pm: on a 12-hour clock the end is in the afternoon
+    if end <= start and end < 12 * 60 and not {s1, s2} & {'am', 'pm'}:
+        end += 12 * 60
+    return _quarter(start, round_up=True), _quarter(end)
+
+
+@dataclass
+class CompiledAvailability:
+    """A weekly mask plus whether the text was understood"""
+    mask: np.ndarray  # bool, (7, 96)
+    parsed: bool
+
+    def to_blob(self) -> bytes:
+        return np.packbits(self.mask.ravel()).tobytes()
+
+    def hours_per_week(self) -> float:
+        return float(self.mask.sum()) / 4
+
+
+def blob_to_mask(blob: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(blob, dtype=np.uint8))[:DAYS_PER_WEEK * QUARTERS_PER_DAY] \
+        .astype(bool).reshape(DAYS_PER_WEEK, QUARTERS_PER_DAY)
+
+
+def _fill(mask: np.ndarray, days: List[int], window: Tuple[int, int]):
+    start, end = window
+    if end > start:
+        mask[days, start:end] = True
+
+
+def compile_availability(text: Optional[str]) -> CompiledAvailability:
+    """Compile strings like "Mon-Fri 8AM-6PM; Sat 9-13", "Flexible" or "Weekends only".
+
+    A time range applies to the days named since the previous one (weekdays
+    if none were); days left without a range get the default hours. Text
+    with nothing recognisable is treated as flexible and flagged as
+    unparsed, so a typo never hides someone from scheduling; so is a time
+    range that still comes out empty, whose days fall back to flexible.
+    """
+    default = _window(Config.AVAILABILITY_DEFAULT_HOURS)
+    flexible = _window(Config.AVAILABILITY_FLEXIBLE_HOURS)
+    mask = np.zeros((DAYS_PER_WEEK, QUARTERS_PER_DAY), dtype=bool)
+    pending: List[int] = []
+    recognised = False
+    understood = True
+
+    tokens = list(_TOKEN.finditer(text or ''))
+    is_day = [bool(match.group('days') or match.group('day')) for match in tokens]
+    for i, match in enumerate(tokens):
+        name = match.group('day')
+        if name and name.lower().rstrip('.') in _AMBIGUOUS_DAYS:
+            beside_day = i > 0 and is_day[i - 1] or i + 1 < len(tokens) and is_day[i + 1]
+            before_time = name[0].isupper() and i + 1 < len(tokens) and tokens[i + 1].group('time')
+            if not (beside_day or before_time):
+                continue
+        recognised = True
+        if match.group('days'):
+            first, last = (_DAY_NAMES[name.lower()] for name in re.findall(_DAY, match.group('days'), re.I)[:2])
+            pending += [(first + i) % 7 for i in range((last - first) % 7 + 1)]
+        elif match.group('day'):
+            pending.append(_DAY_NAMES[match.group('day').lower().rstrip('.')])
+        elif match.group('time'):
+            window = _time_range(match.groups()[4:10])
+            if window[1] <= window[0]:
+                window, understood = flexible, False
+            _fill(mask, pending or WEEKDAYS, window)
+            pending = []
+        else:
+            word = re.sub(r'[\s-]+', '', match.group('keyword').lower()).rstrip('s')
+            if word in ('flexible', 'flexibel', 'anytime'):
+                _fill(mask, pending or EVERY_DAY, flexible)
+                pending = []
+            elif word in ('unavailable', 'notavailable', 'nichtverfügbar'):
+                return CompiledAvailability(np.zeros_like(mask), True)
+            else:
+                days, hours = _KEYWORDS.get(word, _KEYWORDS.get(word + 's', (None, None)))
+                if hours is None:
+                    pending += days or []
+                else:
+                    window = _window({'full': Config.AVAILABILITY_DEFAULT_HOURS,
+                                      'part': Config.AVAILABILITY_PART_TIME_HOURS}.get(hours, hours))
+                    _fill(mask, pending or days or WEEKDAYS, window)
+                    pending = []
+
+    if pending:
+        _fill(mask, pending, default)
+    if not recognised:
+        _fill(mask, EVERY_DAY, flexible)
+    return CompiledAvailability(mask, recognised and understood)
+
+
+def compile_employees(conn: sqlite3.Connection, employee_ids: List[int] = None) -> int:
+    """Store masks for employees whose availability text changed; returns rows written"""
+    where = ''
+    params: list = []
+    if employee_ids is not None:
+        where = f"AND e.id IN ({', '.join('?' * len(employee_ids))})"
+        params = list(employee_ids)
+    stale = conn.execute(f'''
+        SELECT e.id, e.availability FROM employees e
+        LEFT JOIN employee_availability ea ON ea.employee_id = e.id
+        WHERE (ea.employee_id IS NULL OR ea.source IS NOT e.availability) {where}
+    ''', params).fetchall()
+    rows = []
+    for employee_id, text in stale:
+        compiled = compile_availability(text)
+        rows.append((employee_id, text, compiled.to_blob(), compiled.parsed))
+    conn.executemany('''
+        INSERT INTO employee_availability (employee_id, source, mask, parsed, compiled_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (employee_id) DO UPDATE SET
+            source = excluded.source, mask = excluded.mask,
+            parsed = excluded.parsed, compiled_at = excluded.compiled_at
+    ''', rows)
+    return len(rows)
+
+
+class AvailabilityModel:
+    """Weekly masks of every active employee as one (n, 7, 96) boolean array"""
+
+    def __init__(self, employee_ids: np.ndarray, weekly: np.ndarray, overrides: np.ndarray):
+        self.employee_ids = employee_ids
+        self.weekly = weekly
+        self._row = {int(employee_id): row for row, employee_id in enumerate(employee_ids)}
+        # Structured array, oldest first so later overrides win
+        self.overrides = overrides
+        self._weekly_totals: Optional[np.ndarray] = None
+
+    def _active_overrides(self, day: date) -> np.ndarray:
+        key = day.toordinal()
+        return self.overrides[(self.overrides['first'] <= key) & (self.overrides['last'] >= key)]
+
+    def day_matrix(self, day: date) -> np.ndarray:
+        """(n, 96) availability on a date, overrides applied"""
+        matrix = self.weekly[:, day.weekday(), :].copy()
+        if len(self.overrides):
+            active = self._active_overrides(day)
+            for row, start, end, available in zip(active['row'], active['start'], active['end'],
+                                                  active['available']):
+                matrix[row, start:end] = available
+        return matrix
+
+    def _running_totals(self, day: date) -> np.ndarray:
+        """(n, 97) free quarters before each quarter boundary on a date"""
+        if len(self.overrides) == 0 or len(self._active_overrides(day)) == 0:
+            # Plain weekdays share one precomputed table
+            if self._weekly_totals is None:
+                totals = np.zeros((len(self.employee_ids), DAYS_PER_WEEK, QUARTERS_PER_DAY + 1), dtype=np.int16)
+                np.cumsum(self.weekly, axis=2, out=totals[:, :, 1:])
+                self._weekly_totals = totals
+            return self._weekly_totals[:, day.weekday(), :]
+        totals = np.zeros((len(self.employee_ids), QUARTERS_PER_DAY + 1), dtype=np.int16)
+        np.cumsum(self.day_matrix(day), axis=1, out=totals[:, 1:])
+        return totals
+
+    def available_mask(self, day: date, start: str, end: str) -> np.ndarray:
+        """Boolean per employee: working for the whole of [start, end) on day"""
+        first, last = _minutes(start) // 15, _quarter(_minutes(end), round_up=True)
+        if last <= first:
+            raise ValueError(f"Interval {start}-{end} is empty or crosses midnight")
+        return self.day_matrix(day)[:, first:last].all(axis=1)
+
+    def available_for(self, day: date, start: str, end: str) -> List[int]:
+        """Ids of every employee free to work the whole interval"""
+        return self.employee_ids[self.available_mask(day, start, end)].tolist()
+
+    def coverage(self, days: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """(len(days), n) bools for many intervals at once.
+
+        ``days`` are date ordinals, ``starts``/``ends`` minutes of the day.
+        Running totals of free quarters turn "free for the whole interval"
+        into one subtraction per (interval, employee).
+        """
+        days = np.asarray(days, dtype=np.int64)
+        first = np.asarray(starts, dtype=np.int64) // 15
+        last = np.minimum(-(-np.asarray(ends, dtype=np.int64) // 15), QUARTERS_PER_DAY)
+        result = np.zeros((len(days), len(self.employee_ids)), dtype=bool)
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique_days) + 1))
+        for i, day in enumerate(unique_days):
+            rows = order[bounds[i]:bounds[i + 1]]
+            totals = self._running_totals(date.fromordinal(int(day)))
+            result[rows] = ((totals[:, last[rows]] - totals[:, first[rows]]) == (last[rows] - first[rows])).T
+        return result
+
+    def is_available(self, employee_id: int, day: date, start: str, end: str) -> bool:
+        row = self._row.get(int(employee_id))
+        return row is not None and bool(self.available_mask(day, start, end)[row])
+
+    def available_for_job(self, scheduled_date, scheduled_time, duration) -> Optional[Set[int]]:
+        """Ids free for a job's whole visit; None when the job has no usable date/time"""
+        try:
+            day = date.fromisoformat(str(scheduled_date)[:10])
+            start = _minutes(str(scheduled_time))
+            end = start + int(duration or 60)
+        except (TypeError, ValueError):
+            return None
+        if end > 24 * 60:
+            return None
+        return set(self.available_for(day, f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+
+
+_OVERRIDE_DTYPE = np.dtype([('row', np.int32), ('first', np.int32), ('last', np.int32),
+                            ('start', np.int16), ('end', np.int16), ('available', bool)])
+
+
+def _load_model(conn: sqlite3.Connection) -> AvailabilityModel:
+    rows = conn.execute('''
+        SELECT e.id, e.availability, ea.source, ea.mask
+        FROM employees e
+        LEFT JOIN employee_availability ea ON ea.employee_id = e.id
+        WHERE COALESCE(e.status, 'active') = 'active'
+        ORDER BY e.id
+    ''').fetchall()
+    employee_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    weekly = np.zeros((len(rows), DAYS_PER_WEEK, QUARTERS_PER_DAY), dtype=bool)
+    for i, (_, text, source, blob) in enumerate(rows):
+        # Not compiled yet (or edited since): compile in memory, never write from a read
+        weekly[i] = blob_to_mask(blob) if blob is not None and source == text else compile_availability(text).mask
+
+    row_of = {employee_id: i for i, employee_id in enumerate(employee_ids.tolist())}
+    overrides = []
+    for employee_id, first, last, start, end, available in conn.execute('''
+        SELECT employee_id, date_from, IFNULL(date_to, date_from), start_time, end_time, available
+        FROM availability_overrides
+        WHERE IFNULL(date_to, date_from) >= ?
+        ORDER BY id
+    ''', (date.today().isoformat(),)):
+        if employee_id in row_of:
+            overrides.append((row_of[employee_id],
+                              date.fromisoformat(first[:10]).toordinal(), date.fromisoformat(last[:10]).toordinal(),
+                              _quarter(_minutes(start)) if start else 0,
+                              _quarter(_minutes(end), round_up=True) if end else QUARTERS_PER_DAY,
+                              bool(available)))
+    return AvailabilityModel(employee_ids, weekly, np.array(overrides, dtype=_OVERRIDE_DTYPE))
+
+
+_WATCHED_TABLES = ('employees', 'employee_availability', 'availability_overrides')
+
+
+class _ModelCache:
+    """The model for one database, rebuilt only when a watched table was written"""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        self.data_version = None
+        self.versions = None
+        self.built_on = None
+        self.model: Optional[AvailabilityModel] = None
+
+    def get(self, db_path: str) -> AvailabilityModel:
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        # Overrides that ended yesterday drop out at midnight
+        if data_version != self.data_version or self.built_on != date.today():
+            versions = self.conn.execute(f'''
+                SELECT table_name, version FROM table_versions
+                WHERE table_name IN ({', '.join('?' * len(_WATCHED_TABLES))})
+            ''', _WATCHED_TABLES).fetchall()
+            if self.model is None or sorted(versions) != self.versions or self.built_on != date.today():
+                conn = get_connection(db_path)
+                try:
+                    self.model = _load_model(conn)
+                finally:
+                    conn.close()
+                self.versions = sorted(versions)
+                self.built_on = date.today()
+            self.data_version = data_version
+        return self.model
+
+
+_caches: Dict[str, _ModelCache] = {}
+_lock = threading.Lock()
+
+
+def get_availability_model(db_path: str = None) -> AvailabilityModel:
+    """Cached model; a hit costs one PRAGMA data_version"""
+    path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    with _lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = _ModelCache(path)
+        return cache.get(db_path)
+
+
+def add_override(employee_id: int, date_from: date, date_to: date = None, start_time: str = None,
+                 end_time: str = None, available: bool = False, reason: str = None,
+                 db_path: str = None) -> int:
+    """Dated exception: time off (available=False) or an extra shift (True)"""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.execute('''
+            INSERT INTO availability_overrides
+            (employee_id, date_from, date_to, start_time, end_time, available, reason)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (employee_id, date_from.isoformat(), date_to.isoformat() if date_to else None,
+              start_time, end_time, available, reason))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'compile'
+
+    if command == 'compile':
+        conn = get_connection()
+        try:
+            written = compile_employees(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"✅ Compiled availability for {written} employees")
+    elif command == 'parse' and len(sys.argv) > 2:
+        compiled = compile_availability(' '.join(sys.argv[2:]))
+        names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        print(f"{'✅' if compiled.parsed else '⚠️ not understood, treated as flexible:'} "
+              f"{compiled.hours_per_week():g} h/week")
+        for day, row in zip(names, compiled.mask):
+            print(f"   {day} {''.join('█' if bit else '·' for bit in row[24:88])}  (06:00-22:00)")
+    elif command == 'who':
+        # python availability_model.py who 2025-06-02 09:00 12:00
+        model = get_availability_model()
+        day = datetime.strptime(sys.argv[2], '%Y-%m-%d').date()
+        print(f"👥 {model.available_for(day, sys.argv[3], sys.argv[4])}")
+    else:
+        print("Usage: python availability_model.py compile | parse <text> | who YYYY-MM-DD HH:MM HH:MM")
+        sys.exit(2)
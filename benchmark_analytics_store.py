@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the columnar analytics store
+Compares the report queries on SQLite against the same aggregates over the Parquet export
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+SERVICES = ['Basic Cleaning', 'Deep Cleaning', 'Window Cleaning', 'Office Cleaning', 'Move-out Cleaning']
+STATUSES = ['completed'] * 6 + ['pending', 'approved', 'assigned', 'cancelled']
+
+
+def setup_database(db_path: str, jobs: int):
+    """A year of jobs with one invoice each, spread evenly over the last 365 days"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name, email) VALUES ('Bench Customer', 'bench@example.com')")
+    rng = random.Random(14)
+    start = date.today() - timedelta(days=365)
+    job_rows, invoice_rows = [], []
+    for i in range(1, jobs + 1):
+        day = (start + timedelta(days=i * 365 // jobs)).isoformat()
+        status = rng.choice(STATUSES)
+        price = round(rng.uniform(60, 400), 2)
+        job_rows.append((f"Job {i}", day, f"{8 + i % 10:02d}:00", status, rng.choice(SERVICES), price, f"{day} 09:00:00"))
+        invoice_rows.append((i, price, 'paid' if status == 'completed' else 'pending',
+                             day if status == 'completed' else None, day, f"{day} 09:00:00"))
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, title, scheduled_date, scheduled_time, status, service_type, price, created_at)
+        VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+    ''', job_rows)
+    conn.executemany('''
+        INSERT INTO invoices (job_id, customer_id, total_amount, status, paid_date, issued_date, created_at)
+        VALUES (?, 1, ?, ?, ?, ?, ?)
+    ''', invoice_rows)
+    conn.commit()
+    conn.close()
+
+
+SQL_REPORTS = {
+    'monthly revenue': '''
+        SELECT strftime('%Y-%m', created_at) as month, SUM(price) as revenue
+        FROM jobs WHERE status = 'completed'
+        GROUP BY strftime('%Y-%m', created_at) ORDER BY month
+    ''',
+    'job status': "SELECT status, COUNT(*) as count FROM jobs GROUP BY status",
+    'jobs by service': "SELECT service_type, COUNT(*) as count FROM jobs GROUP BY service_type ORDER BY count DESC",
+    'paid revenue (12 months)': '''
+        SELECT strftime('%Y-%m', paid_date) as month, SUM(total_amount) as revenue
+        FROM invoices WHERE status = 'paid' AND paid_date >= date('now', '-12 months')
+        GROUP BY strftime('%Y-%m', paid_date) ORDER BY month
+    ''',
+}
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import analytics_store
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"🔧 Creating {args.jobs:,} jobs and invoices...")
+    setup_database(db_path, args.jobs)
+
+    started = time.perf_counter()
+    analytics_store.export_changes(db_path)
+    print(f"📦 Initial export: {(time.perf_counter() - started) * 1000:,.0f} ms")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE jobs SET status = 'completed' WHERE id % 1000 = 0")
+    conn.commit()
+    started = time.perf_counter()
+    counts = analytics_store.export_changes(db_path)
+    print(f"📦 Incremental export ({counts['jobs']:,} changed jobs): {(time.perf_counter() - started) * 1000:,.0f} ms")
+
+    store_reports = {
+        'monthly revenue': lambda: analytics_store.monthly_revenue(db_path=db_path),
+        'job status': lambda: analytics_store.job_status_counts(db_path=db_path),
+        'jobs by service': lambda: analytics_store.jobs_by_service(db_path),
+        'paid revenue (12 months)': lambda: analytics_store.paid_revenue_by_month(12, db_path),
+    }
+
+    print("🧪 Report aggregates (best of {})".format(args.repeat))
+    print(f"   {'report':<26} {'SQLite':>10} {'store cold':>11} {'store warm':>11}")
+    for name, sql in SQL_REPORTS.items():
+        sql_time = best_of(lambda: pd.read_sql_query(sql, conn), args.repeat)
+        analytics_store._frames.clear()
+        cold_time = best_of(lambda: (analytics_store._frames.clear(), store_reports[name]()), args.repeat)
+        warm_time = best_of(store_reports[name], args.repeat)
+        print(f"   {name:<26} {sql_time * 1000:>8.1f}ms {cold_time * 1000:>9.1f}ms {warm_time * 1000:>9.1f}ms")
+
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for assignment scoring
+Scores thousands of unassigned jobs against hundreds of employees, per-job loop vs one matrix
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+SERVICES = ['Regular Cleaning', 'Deep Cleaning', 'Window Cleaning', 'Carpet Cleaning',
+            'Move-out Cleaning', 'Office Cleaning', 'Post-construction Cleaning']
+SKILLS = ['deep cleaning', 'window cleaning', 'carpet', 'office', 'move-out', 'post-construction',
+          'regular cleaning', 'ironing', 'laundry']
+AVAILABILITY = ['Mon-Fri 8AM-6PM', 'Flexible', 'Weekends only', 'Full-time', 'Teilzeit',
+                'Mo-Fr 7-15 Uhr', 'Tue, Thu 9am to 5pm', 'Mon-Sat 10:00-19:00']
+
+
+def make_frames(jobs: int, employees: int, days: int):
+    rng = random.Random(22)
+    first = date.today() + timedelta(days=1)
+    job_rows = [{
+        'id': i + 1,
+        'service_type': rng.choice(SERVICES),
+        'scheduled_date': (first + timedelta(days=rng.randrange(days))).isoformat(),
+        'scheduled_time': f"{rng.randrange(7, 17):02d}:{rng.choice(['00', '15', '30', '45'])}",
+        'duration': rng.choice([60, 90, 120, 180, 240]),
+        'location': f"Straße {i}, {rng.randrange(10, 99)}{rng.randrange(1000):03d} Stadt",
+    } for i in range(jobs)]
+    employee_rows = [{
+        'id': i + 1,
+        'name': f"Employee {i + 1}",
+        'skills': ', '.join(rng.sample(SKILLS, rng.randrange(1, 4))),
+        'current_jobs': rng.randrange(0, 12),
+        'total_minutes': rng.randrange(0, 2400),
+        'hourly_rate': rng.choice([15.0, 18.5, 22.0, 25.0, None]),
+        'availability': rng.choice(AVAILABILITY),
+    } for i in range(employees)]
+    assigned_rows = [{
+        'employee_id': rng.randrange(1, employees + 1),
+        'scheduled_date': (first + timedelta(days=rng.randrange(days))).isoformat(),
+        'location': f"Weg {i}, {rng.randrange(10, 99)}{rng.randrange(1000):03d} Stadt",
+    } for i in range(jobs)]
+    return pd.DataFrame(job_rows), pd.DataFrame(employee_rows), pd.DataFrame(assigned_rows)
+
+
+def loop_suggestions(jobs: pd.DataFrame, employees: pd.DataFrame, k: int):
+    """What show_employee_assignment_interface used to do for every job on every rerun"""
+    result = {}
+    for _, job in jobs.iterrows():
+        job_skills = job['service_type'].lower() if job['service_type'] else ""
+        suitable = []
+        for _, emp in employees.iterrows():
+            emp_skills = emp['skills'].lower() if emp['skills'] else ""
+            skill_match = any(skill in emp_skills for skill in job_skills.split())
+            suitable.append({'id': emp['id'], 'score': (5 if skill_match else 0) + max(0, 10 - emp['current_jobs'])})
+        suitable.sort(key=lambda x: x['score'], reverse=True)
+        result[job['id']] = suitable[:k]
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--loop-jobs', type=int, default=100,
+                        help="jobs timed with the old per-job loop (extrapolated to --jobs)")
+    args = parser.parse_args()
+
+    from assignment_scoring import ScoringWeights, score_assignments
+    from availability_model import AvailabilityModel, _OVERRIDE_DTYPE, compile_availability
+
+    jobs, employees, assigned = make_frames(args.jobs, args.employees, args.days)
+    model = AvailabilityModel(
+        employees['id'].to_numpy(np.int64),
+        np.stack([compile_availability(text).mask for text in employees['availability']]),
+        np.array([], dtype=_OVERRIDE_DTYPE),
+    )
+    weights = ScoringWeights()
+    print(f"🔧 {args.jobs:,} jobs × {args.employees:,} employees, top {args.k}")
+
+    sample = jobs.head(args.loop_jobs)
+    started = time.perf_counter()
+    loop_suggestions(sample, employees, args.k)
+    loop_ms = (time.perf_counter() - started) * 1000 * args.jobs / len(sample)
+    print(f"🐢 Per-job iterrows loop: {loop_ms:,.0f} ms (extrapolated from {len(sample)} jobs)")
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        matrix = score_assignments(jobs, employees, weights, model=model, assigned=assigned)
+        indexes, scores = matrix.top_k(args.k)
+        best = min(best, time.perf_counter() - started)
+    print(f"⚡ Score matrix + top-k:  {best * 1000:,.1f} ms (best of {args.repeat})")
+
+    started = time.perf_counter()
+    suggestions = matrix.suggestions(args.k)
+    print(f"📋 Suggestion dict for every job: {(time.perf_counter() - started) * 1000:,.1f} ms")
+
+    # Suggestions must be the true k best and never someone who is off
+    full = np.sort(matrix.scores, axis=1)[:, ::-1][:, :args.k]
+    assert np.array_equal(np.sort(scores, axis=1)[:, ::-1], full)
+    assert all(matrix.is_available(job_id, employee_id)
+               for job_id, picks in suggestions.items() for employee_id, _ in picks)
+    unstaffed = sum(1 for picks in suggestions.values() if not picks)
+    print(f"✅ Top-k verified against a full sort; {unstaffed} jobs have nobody available")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for auto-assignment
+Plans a synthetic week of approved jobs with the Hungarian rounds and the greedy fallback, then applies one plan
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+SERVICES = ['Regular Cleaning', 'Deep Cleaning', 'Window Cleaning', 'Carpet Cleaning',
+            'Move-out Cleaning', 'Office Cleaning']
+SKILLS = ['deep cleaning', 'window cleaning', 'carpet', 'office', 'move-out', 'regular cleaning', 'ironing']
+AVAILABILITY = ['Mon-Fri 8AM-6PM', 'Flexible', 'Weekends only', 'Full-time', 'Teilzeit',
+                'Mo-Fr 7-15 Uhr', 'Mon-Sat 10:00-19:00', 'Tue-Sat 9-17']
+
+
+def setup_database(db_path: str, jobs: int, employees: int, days: int, booked_share: float):
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    rng = random.Random(23)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name) VALUES ('Benchmark customer')")
+    conn.executemany('''
+        INSERT INTO employees (name, skills, hourly_rate, availability) VALUES (?, ?, ?, ?)
+    ''', [(f"Employee {i + 1}", ', '.join(rng.sample(SKILLS, rng.randrange(1, 4))),
+           rng.choice([15.0, 18.5, 22.0, 25.0]), rng.choice(AVAILABILITY)) for i in range(employees)])
+    first = date.today() + timedelta(days=1)
+    rows = []
+    for i in range(jobs):
+        booked = rng.random() < booked_share
+        rows.append((
+            rng.randrange(1, employees + 1) if booked else None,
+            'assigned' if booked else 'approved',
+            f"Job {i + 1}",
+            (first + timedelta(days=rng.randrange(days))).isoformat(),
+            f"{rng.randrange(7, 17):02d}:{rng.choice(['00', '15', '30', '45'])}",
+            rng.choice([60, 90, 120, 180]),
+            rng.choice(SERVICES),
+            f"Straße {i}, {rng.randrange(10, 99)}{rng.randrange(1000):03d} Stadt",
+            rng.choice([60.0, 90.0, 120.0, 180.0]),
+        ))
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, employee_id, status, title, scheduled_date, scheduled_time, duration,
+                          service_type, location, price)
+        VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+    from availability_model import compile_employees
+    conn = sqlite3.connect(db_path)
+    compile_employees(conn)
+    conn.commit()
+    conn.close()
+    return first, first + timedelta(days=days - 1)
+
+
+def check_plan(plan, limit_minutes: int):
+    """No employee double-booked or over the daily cap within the plan itself"""
+    by_day = defaultdict(list)
+    for a in plan.assignments:
+        by_day[(a.employee_id, a.day)].append((a.start, a.end))
+    for spans in by_day.values():
+        spans.sort()
+        assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:])), spans
+        assert sum(end - start for start, end in spans) <= limit_minutes, spans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--booked-share', type=float, default=0.1,
+                        help="share of the jobs already assigned before planning")
+    args = parser.parse_args()
+
+    from auto_assign import SCIPY_AVAILABLE, apply_plan, plan_assignments
+    from bulk_jobs import describe
+    from config import Config
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"🔧 {args.jobs:,} jobs ({args.booked_share:.0%} already booked), {args.employees} employees, "
+          f"{args.days} days")
+    first, last = setup_database(db_path, args.jobs, args.employees, args.days, args.booked_share)
+
+    print(f"🧮 Hungarian rounds use {'SciPy' if SCIPY_AVAILABLE else 'the NumPy implementation'}")
+    plans = {}
+    for name, cells in (('hungarian', 10 ** 12), ('greedy', 0)):
+        plan = plan_assignments(first, last, db_path=db_path, exact_max_cells=cells)
+        check_plan(plan, int(Config.MAX_HOURS_PER_DAY * 60))
+        plans[name] = plan
+        score = sum(a.score for a in plan.assignments)
+        print(f"   {name:>9}: {plan.seconds:6.2f} s  {len(plan.assignments):,} assigned, "
+              f"{len(plan.unassigned):,} left, score {score:,.0f}, labor {plan.total_cost:,.0f}, "
+              f"utilization {plan.overall_utilization:.0%}")
+
+    plan = plans['hungarian']
+    started = time.perf_counter()
+    result = apply_plan(plan, performed_by='benchmark', db_path=db_path)
+    elapsed = time.perf_counter() - started
+    print(f"💾 Applied in one transaction in {elapsed * 1000:,.0f} ms: {describe(result)}")
+
+    # Applying the same plan again must not move anything
+    again = apply_plan(plan, performed_by='benchmark', db_path=db_path)
+    assert not again.updated, describe(again)
+    print(f"🔁 Re-applying the plan: {describe(again)}")
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for set-based bulk job operations
+Compares bulk_jobs against the per-job UPDATE loop the dashboards used to run
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def setup_database(db_path: str, jobs: int, employees: int):
+    """Fresh schema with `jobs` approved, unassigned jobs spread over the coming weeks"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name, email) VALUES ('Bench Customer', 'bench@example.com')")
+    conn.executemany("INSERT INTO employees (name, email, hourly_rate) VALUES (?, ?, 25)",
+                     [(f"Employee {i}", f"employee{i}@example.com") for i in range(employees)])
+    start = date.today() + timedelta(days=1)
+    rows = []
+    for i in range(jobs):
+        # Four 2h jobs a day per "lane" keeps most of a batch conflict-free
+        day, slot = divmod(i, 4)
+        rows.append((f"Job {i}", (start + timedelta(days=day)).isoformat(), f"{8 + slot * 2:02d}:00", 120, 80.0))
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, title, scheduled_date, scheduled_time, duration, price, status)
+        VALUES (1, ?, ?, ?, ?, ?, 'approved')
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def legacy_assign(db_path: str, job_ids, employee_id: int):
+    conn = sqlite3.connect(db_path)
+    for job_id in job_ids:
+        conn.execute("UPDATE jobs SET employee_id = ?, status = 'assigned' WHERE id = ?", (employee_id, job_id))
+    conn.commit()
+    conn.close()
+
+
+def legacy_status(db_path: str, job_ids, new_status: str):
+    conn = sqlite3.connect(db_path)
+    for job_id in job_ids:
+        conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (new_status, job_id))
+    conn.commit()
+    conn.close()
+
+
+def timed(label: str, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    print(f"   {label:<34} {elapsed * 1000:>9.1f} ms")
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=10_000)
+    parser.add_argument('--employees', type=int, default=20)
+    args = parser.parse_args()
+
+    from bulk_jobs import bulk_assign, bulk_set_status, describe
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    template = os.path.join(workdir, 'template.db')
+    print(f"🔧 Creating {args.jobs:,} jobs...")
+    setup_database(template, args.jobs, args.employees)
+    job_ids = list(range(1, args.jobs + 1))
+
+    def fresh(name: str) -> str:
+        # backup() rather than a file copy: the template may still be in WAL mode
+        path = os.path.join(workdir, name)
+        source, target = sqlite3.connect(template), sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        target.close()
+        return path
+
+    print("🧪 Assign every job to one employee")
+    legacy_time, _ = timed("per-job UPDATE loop", legacy_assign, fresh('legacy_assign.db'), job_ids, 1)
+    bulk_time, result = timed("bulk_assign (with conflict checks)", bulk_assign, job_ids, 1, 'assigned',
+                              'benchmark', fresh('bulk_assign.db'))
+    print(f"      {describe(result)} | {legacy_time / bulk_time:.1f}x")
+
+    print("🧪 Move every job to in_progress")
+    legacy_db, bulk_db = fresh('legacy_status.db'), fresh('bulk_status.db')
+    legacy_time, _ = timed("per-job UPDATE loop", legacy_status, legacy_db, job_ids, 'in_progress')
+    bulk_time, result = timed("bulk_set_status", bulk_set_status, job_ids, 'in_progress', 'benchmark', bulk_db)
+    print(f"      {describe(result)} | {legacy_time / bulk_time:.1f}x")
+
+    print("🧪 Complete every job")
+    legacy_time, _ = timed("per-job UPDATE loop", legacy_status, legacy_db, job_ids, 'completed')
+    bulk_time, result = timed("bulk_set_status", bulk_set_status, job_ids, 'completed', 'benchmark', bulk_db)
+    print(f"      {describe(result)} | {legacy_time / bulk_time:.1f}x")
+
+    shutil.rmtree(workdir, ignore_errors=True)
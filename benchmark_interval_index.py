@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the employee schedule interval index
+Overlap checks through the index vs the per-check SQL scan, incremental refresh, and a month-wide conflict scan
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def setup_database(db_path: str, jobs: int, employees: int, days: int):
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    rng = random.Random(24)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name) VALUES ('Benchmark customer')")
+    conn.executemany("INSERT INTO employees (name) VALUES (?)", [(f"Employee {i + 1}",) for i in range(employees)])
+    first = date(date.today().year, date.today().month, 1)
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, employee_id, status, title, scheduled_date, scheduled_time, duration)
+        VALUES (1, ?, ?, ?, ?, ?, ?)
+    ''', [(rng.randrange(1, employees + 1), rng.choice(['assigned', 'confirmed', 'completed']), f"Job {i + 1}",
+           (first + timedelta(days=rng.randrange(days))).isoformat(),
+           f"{rng.randrange(7, 18):02d}:{rng.choice(['00', '30'])}", rng.choice([60, 90, 120, None]))
+          for i in range(jobs)])
+    conn.commit()
+    conn.close()
+    return first, first + timedelta(days=days - 1)
+
+
+def sql_conflicts(conn, employee_id: int, scheduled_date: str, start: int, end: int):
+    """The correlated check bulk_assign ran before the index"""
+    from bulk_jobs import CLOSED_STATUSES, DEFAULT_JOB_MINUTES, _minutes
+
+    return [row[0] for row in conn.execute(f'''
+        SELECT o.id FROM jobs o
+        WHERE o.employee_id = ? AND o.scheduled_date = ?
+          AND o.status NOT IN ({', '.join('?' for _ in CLOSED_STATUSES)})
+          AND {_minutes('o')} < ? AND ? < {_minutes('o')} + IFNULL(o.duration, {DEFAULT_JOB_MINUTES})
+    ''', (employee_id, scheduled_date, *CLOSED_STATUSES, end, start))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=100_000)
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--days', type=int, default=28)
+    parser.add_argument('--queries', type=int, default=20_000)
+    args = parser.parse_args()
+
+    from interval_index import IntervalIndex, get_interval_index, scan_conflicts
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"🔧 {args.jobs:,} jobs, {args.employees} employees, {args.days} days")
+    first, last = setup_database(db_path, args.jobs, args.employees, args.days)
+
+    started = time.perf_counter()
+    index = get_interval_index(db_path)
+    print(f"🏗️ Index built in {(time.perf_counter() - started) * 1000:,.0f} ms "
+          f"({len(index.placed):,} open jobs in {len(index.days):,} employee-days)")
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.queries):
+        start = rng.randrange(7 * 60, 18 * 60, 15)
+        queries.append((rng.randrange(1, args.employees + 1),
+                        (first + timedelta(days=rng.randrange(args.days))).isoformat(), start, start + 90))
+
+    conn = sqlite3.connect(db_path)
+    started = time.perf_counter()
+    expected = [sorted(sql_conflicts(conn, *query)) for query in queries]
+    sql_time = time.perf_counter() - started
+    started = time.perf_counter()
+    found = [sorted(index.conflicts(*query)) for query in queries]
+    index_time = time.perf_counter() - started
+    assert found == expected
+    print(f"   SQL scan per check:  {sql_time / len(queries) * 1e6:8.1f} µs")
+    print(f"   index per check:     {index_time / len(queries) * 1e6:8.1f} µs  "
+          f"({sql_time / index_time:,.0f}x, results identical)")
+
+    # One reassignment committed elsewhere, then the next check catches up
+    conn.execute("UPDATE jobs SET employee_id = 1, scheduled_time = '08:00' WHERE id = 1")
+    conn.commit()
+    started = time.perf_counter()
+    index = get_interval_index(db_path)
+    print(f"🔄 Incremental refresh after one update: {(time.perf_counter() - started) * 1000:,.2f} ms")
+    fresh = IntervalIndex(db_path)
+    fresh.refresh()
+    assert index.placed == fresh.placed
+
+    started = time.perf_counter()
+    conflicts = scan_conflicts(first, last, db_path=db_path)
+    print(f"📅 Month scan: {len(conflicts):,} double bookings in {(time.perf_counter() - started) * 1000:,.0f} ms")
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stress benchmark for atomic slot reservations
+Hammers a scratch database from many processes and checks nothing is overbooked
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def setup_database(db_path: str, slots: int, max_bookings: int):
+    """Fresh schema, one customer and `slots` empty time slots"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        INSERT INTO customer_users (email, password_hash, first_name, last_name)
+        VALUES ('bench@example.com', 'x', 'Bench', 'Customer')
+    ''')
+    start = date.today() + timedelta(days=1)
+    rows = []
+    for i in range(slots):
+        hour = 8 + (i % 5) * 2
+        rows.append(((start + timedelta(days=i // 5)).isoformat(),
+                     f"{hour:02d}:00", f"{hour + 2:02d}:00", max_bookings))
+    conn.executemany('''
+        INSERT INTO time_slots (date, start_time, end_time, available, max_bookings)
+        VALUES (?, ?, ?, TRUE, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def client(db_path: str, slot_ids, attempts: int, start_event, results):
+    """One customer process: keep trying random slots"""
+    from reservations import reserve_slot, ReservationStatus
+
+    customer_id = 1
+    reserved = full = errors = 0
+    start_event.wait()
+    for _ in range(attempts):
+        try:
+            result = reserve_slot(random.choice(slot_ids), customer_id, 1,
+                                  'Benchmarkstraße 1', 80.0, db_path=db_path)
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        if result.status is ReservationStatus.RESERVED:
+            reserved += 1
+        else:
+            full += 1
+    results.put((reserved, full, errors))
+
+
+def verify(db_path: str) -> int:
+    """Number of slots that are overbooked or whose counter disagrees with the bookings"""
+    conn = sqlite3.connect(db_path)
+    bad = conn.execute('''
+        SELECT COUNT(*) FROM time_slots ts
+        WHERE ts.current_bookings > ts.max_bookings
+           OR ts.current_bookings <> (SELECT COUNT(*) FROM customer_bookings cb WHERE cb.slot_id = ts.id)
+    ''').fetchone()[0]
+    conn.close()
+    return bad
+
+
+def run(clients: int, slots: int, max_bookings: int, oversubscribe: float):
+    """Run one round and print throughput"""
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    try:
+        setup_database(db_path, slots, max_bookings)
+
+        capacity = slots * max_bookings
+        attempts = max(1, int(capacity * oversubscribe / clients))
+        slot_ids = list(range(1, slots + 1))
+
+        start_event = mp.Event()
+        results = mp.Queue()
+        procs = [mp.Process(target=client, args=(db_path, slot_ids, attempts, start_event, results))
+                 for _ in range(clients)]
+        for proc in procs:
+            proc.start()
+
+        started = time.perf_counter()
+        start_event.set()
+        totals = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - started
+        for proc in procs:
+            proc.join()
+
+        reserved = sum(r[0] for r in totals)
+        full = sum(r[1] for r in totals)
+        errors = sum(r[2] for r in totals)
+        bad_slots = verify(db_path)
+
+        print(f"{clients:>4} clients | {reserved:>6} booked / {capacity} capacity | "
+              f"{full:>6} slot full | {errors:>4} errors | "
+              f"{reserved / elapsed:>8.1f} bookings/s | "
+              f"{'✅ no overbooking' if bad_slots == 0 and reserved <= capacity else f'❌ {bad_slots} bad slots'}")
+        return bad_slots
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--slots', type=int, default=250)
+    parser.add_argument('--max-bookings', type=int, default=2)
+    parser.add_argument('--oversubscribe', type=float, default=2.0,
+                        help='attempts per unit of capacity across all clients')
+    args = parser.parse_args()
+
+    print("🧪 Slot reservation stress benchmark")
+    failures = sum(run(n, args.slots, args.max_bookings, args.oversubscribe) for n in args.clients)
+    raise SystemExit(1 if failures else 0)
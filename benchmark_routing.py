@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark for route sequencing
+All-pairs distances for 300 stops (Python loop vs NumPy), one 300-stop route, a 300-job day from the database, and route-aware scoring
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Stops are scattered around the depot, roughly the size of a city
+DEPOT = (52.5200, 13.4050)
+
+
+def loop_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """What utils.calculate_distance computed, one pair at a time"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) * math.sin(dlat / 2) + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
+         * math.sin(dlon / 2) * math.sin(dlon / 2))
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def best_of(repeat: int, fn, *args):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def setup_database(db_path: str, jobs: int, employees: int, rng: random.Random) -> date:
+    """One day with `jobs` located jobs, each employee's visits spaced so they can all be reached"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name) VALUES ('Benchmark customer')")
+    conn.executemany("INSERT INTO employees (name, home_latitude, home_longitude) VALUES (?, ?, ?)", [
+        (f"Employee {i + 1}", DEPOT[0] + rng.gauss(0, 0.05), DEPOT[1] + rng.gauss(0, 0.08)) if i % 2 else
+        (f"Employee {i + 1}", None, None)  # half start at the depot
+        for i in range(employees)])
+    day = date.today() + timedelta(days=1)
+    rows = []
+    for i in range(jobs):
+        employee = i % employees + 1
+        slot = i // employees
+        timed = rng.random() < 0.7
+        rows.append((employee, f"Job {i + 1}", day.isoformat(),
+                     f"{8 + slot * 2:02d}:{rng.choice(['00', '15'])}" if timed else None, 90,
+                     DEPOT[0] + rng.gauss(0, 0.06), DEPOT[1] + rng.gauss(0, 0.1)))
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, employee_id, status, title, scheduled_date, scheduled_time, duration,
+                          latitude, longitude)
+        VALUES (1, ?, 'assigned', ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+    return day
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stops', type=int, default=300)
+    parser.add_argument('--employees', type=int, default=40)
+    parser.add_argument('--jobs', type=int, default=2000, help="unassigned jobs for the scoring step")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from config import Config
+    Config.ROUTING_DEPOT_LAT, Config.ROUTING_DEPOT_LON = DEPOT
+
+    from routing import distance_matrix, plan_routes, road_km, sequence_route, _nearest_neighbour, drive_minutes
+
+    rng = random.Random(25)
+    lat = np.array([DEPOT[0]] + [DEPOT[0] + rng.gauss(0, 0.06) for _ in range(args.stops)])
+    lon = np.array([DEPOT[1]] + [DEPOT[1] + rng.gauss(0, 0.1) for _ in range(args.stops)])
+    print(f"🔧 {args.stops} stops around ({DEPOT[0]}, {DEPOT[1]})")
+
+    started = time.perf_counter()
+    loop = [[loop_distance(a, b, c, d) for c, d in zip(lat, lon)] for a, b in zip(lat, lon)]
+    loop_ms = (time.perf_counter() - started) * 1000
+    numpy_ms, km = best_of(args.repeat, distance_matrix, lat, lon)
+    assert np.allclose(km, loop, atol=1e-3)
+    print(f"📏 All-pairs distances: Python loop {loop_ms:,.1f} ms, NumPy {numpy_ms:,.2f} ms "
+          f"({loop_ms / numpy_ms:,.0f}x, identical to 1 m)")
+
+    # One long route with no fixed times: nearest neighbour, then 2-opt
+    earliest = np.full(args.stops + 1, 8 * 60.0)
+    earliest[0] = -np.inf
+    latest = np.full(args.stops + 1, np.inf)
+    service = np.full(args.stops + 1, 30.0)
+    service[0] = 0
+    route_ms, (order, begin, late) = best_of(args.repeat, sequence_route, lat, lon, earliest, latest, service)
+    roads = road_km(km)
+    nearest = _nearest_neighbour(drive_minutes(roads), earliest, latest, service)
+    path = np.concatenate(([0], order, [0]))
+    print(f"🧭 {args.stops}-stop route in {route_ms:,.1f} ms: nearest neighbour "
+          f"{roads[nearest[:-1], nearest[1:]].sum():,.1f} km → 2-opt {roads[path[:-1], path[1:]].sum():,.1f} km")
+    assert sorted(order.tolist()) == list(range(1, args.stops + 1))
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    day = setup_database(db_path, args.stops, args.employees, rng)
+    day_ms, routes = best_of(args.repeat, plan_routes, day, db_path)
+    total_km = sum(r.km for r in routes.values())
+    total_late = sum(r.late_minutes for r in routes.values())
+    print(f"🗓️ {args.stops} jobs for {len(routes)} employees routed from the database in {day_ms:,.1f} ms: "
+          f"{total_km:,.0f} km, {total_late:.0f} min late")
+
+    # The order the schedule page used to list them in: by time, untimed jobs last
+    conn = sqlite3.connect(db_path)
+    listed = 0.0
+    for employee_id, route in routes.items():
+        home = conn.execute("SELECT home_latitude, home_longitude FROM employees WHERE id = ?", (employee_id,)).fetchone()
+        points = [home if home[0] is not None else DEPOT] + conn.execute('''
+            SELECT latitude, longitude FROM jobs WHERE employee_id = ?
+            ORDER BY scheduled_time IS NULL, scheduled_time, id
+        ''', (employee_id,)).fetchall()
+        points.append(points[0])
+        listed += sum(road_km(loop_distance(*a, *b)) for a, b in zip(points, points[1:]))
+        assert sorted(route.job_ids) == sorted(r[0] for r in conn.execute(
+            "SELECT id FROM jobs WHERE employee_id = ?", (employee_id,)))
+    conn.close()
+    print(f"   listed by time instead: {listed:,.0f} km")
+
+    # Route-aware travel term for scoring: km each job adds to each employee's day
+    from assignment_scoring import travel_matrix
+
+    conn = sqlite3.connect(db_path)
+    assigned = pd.read_sql_query("SELECT employee_id, scheduled_date, scheduled_time, location, latitude, longitude "
+                                 "FROM jobs", conn)
+    employees = pd.read_sql_query("SELECT id, home_latitude, home_longitude FROM employees ORDER BY id", conn)
+    conn.close()
+    jobs = pd.DataFrame({
+        'scheduled_date': day.isoformat(),
+        'scheduled_time': [f"{rng.randrange(8, 17):02d}:00" for _ in range(args.jobs)],
+        'duration': 90,
+        'location': None,
+        'latitude': [DEPOT[0] + rng.gauss(0, 0.06) for _ in range(args.jobs)],
+        'longitude': [DEPOT[1] + rng.gauss(0, 0.1) for _ in range(args.jobs)],
+    })
+    travel_ms, travel = best_of(args.repeat, travel_matrix, jobs, employees['id'].to_numpy(np.int64), assigned,
+                                employees)
+    print(f"🎯 Travel term for {args.jobs:,} jobs × {args.employees} employees: {travel_ms:,.1f} ms "
+          f"(median cost {np.median(travel):.2f})")
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Lookup benchmark for the full-text search index
+Fills a scratch database with synthetic German customers and times ranked searches
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+FIRST_NAMES = ['Anna', 'Jürgen', 'Sören', 'Lena', 'Matthias', 'Özlem', 'Paul', 'Käthe',
+               'Lukas', 'Marie', 'Hans', 'Greta', 'Felix', 'Zoë', 'Björn', 'Ingrid',
+               'Jörg', 'Ute', 'Tobias', 'Süleyman', 'Frauke', 'Till', 'Hülya', 'Malte']
+# Surnames are built from syllables so the data has the spread of a real customer base
+NAME_HEADS = ['Kön', 'Müll', 'Schröd', 'Strau', 'Weiß', 'Schmi', 'Beck', 'Hoff', 'Lüden', 'Fuch',
+              'Krüg', 'Wag', 'Böh', 'Neu', 'Groß', 'Köhl', 'Berg', 'Lind', 'Wald', 'Kirch',
+              'Stein', 'Brand', 'Rosen', 'Eich', 'Sonn', 'Feld', 'Ober', 'Brück', 'Mühl', 'Schwarz']
+NAME_MIDS = ['', 'en', 'el', 'er', 'ig', 'ing', 'and', 'ow', 'itz', 'ach', 'au', 'ers', 'ström',
+             'ha', 'li', 'mo', 'ri', 'sa', 'to', 'vö']
+NAME_TAILS = ['mann', 'er', 'berg', 'meier', 'huber', 'bauer', 'ner', 'inger', 'ke', 'stein',
+              'feld', 'hausen', 'dorf', 'ß', 'wald', 'bach', 'ler', 'scheidt', 'rich', 'sen']
+STREETS = ['Hauptstraße', 'Bahnhofstraße', 'Gartenweg', 'Schillerplatz', 'Lindenallee', 'Mühlweg']
+CITIES = ['Köln', 'München', 'Düsseldorf', 'Berlin', 'Hamburg', 'Nürnberg', 'Lübeck']
+# Single common words match a large share of all rows; ranking cost grows with the match count
+BROAD_QUERIES = ['anna', 'köln', 'hauptstr', 'berg']
+
+
+def _surname(rng: random.Random) -> str:
+    return rng.choice(NAME_HEADS) + rng.choice(NAME_MIDS) + rng.choice(NAME_TAILS)
+
+
+def _sample_queries(db_path: str, count: int = 12):
+    """Lookups a user would type for customers that exist: names, emails, phones"""
+    rng = random.Random(7)
+    conn = sqlite3.connect(db_path)
+    top = conn.execute("SELECT MAX(id) FROM customers").fetchone()[0]
+    queries = []
+    for _ in range(count):
+        name, email, phone = conn.execute(
+            "SELECT name, email, phone FROM customers WHERE id = ?", (rng.randint(1, top),)).fetchone()
+        first, last = name.split(' ', 1)
+        queries += [last, f"{first} {last[:4]}", email.split('@')[0], phone[-6:]]
+    conn.close()
+    return queries
+
+
+def setup_database(db_path: str, rows: int, batch: int = 50000):
+    """Fresh schema with `rows` customers; the sync triggers fill the index"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    for offset in range(0, rows, batch):
+        values = []
+        for i in range(offset, min(rows, offset + batch)):
+            first, last = rng.choice(FIRST_NAMES), _surname(rng)
+            values.append((
+                f"{first} {last}",
+                f"{first[0].lower()}.{last.lower()}{i}@example.de",
+                f"0171 {rng.randint(100000, 999999)}",
+                f"{rng.choice(STREETS)} {rng.randint(1, 120)}, {rng.choice(CITIES)}",
+            ))
+        conn.executemany("INSERT INTO customers (name, email, phone, address) VALUES (?, ?, ?, ?)", values)
+        conn.commit()
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+
+def run(db_path: str, queries, repeat: int, limit: int):
+    """Time every query and return the per-query median latencies in ms"""
+    from search_index import search
+
+    conn = sqlite3.connect(db_path)
+    medians = []
+    for text in queries:
+        search(conn, text, limit=limit)  # warm the page cache
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = search(conn, text, limit=limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(timings)
+        medians.append(median)
+        print(f"   {text!r:<18} {len(hits):>3} hits | median {median:7.3f} ms | max {max(timings):7.3f} ms")
+    conn.close()
+    return medians
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', help='reuse an existing benchmark database')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='aufraumenbee_bench_'), 'search.db')
+    if not args.db:
+        print(f"🔧 Indexing {args.rows:,} customers into {db_path}...")
+        started = time.perf_counter()
+        setup_database(db_path, args.rows)
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+
+    print("🧪 Ranked lookups for existing customers")
+    medians = sorted(run(db_path, _sample_queries(db_path), args.repeat, args.limit))
+    print("🧪 Broad single-word queries (for reference)")
+    run(db_path, BROAD_QUERIES, args.repeat, args.limit)
+    typical, p95 = statistics.median(medians), medians[int(len(medians) * 0.95)]
+    print(f"\n{'✅' if typical < 1.0 else '❌'} median lookup {typical:.3f} ms, p95 {p95:.3f} ms")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for duration-aware slot fitting
+Fits jobs of several lengths into a month of nearly fully booked employee calendars
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+DURATIONS = [60, 120, 240, 360]
+
+
+def setup_database(db_path: str, employees: int, days: int, slot_minutes: int, free_ratio: float):
+    """15-minute (by default) slots from 07:00 to 19:00, all but ``free_ratio`` of them booked"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO employees (name) VALUES (?)", [(f"Employee {i}",) for i in range(employees)])
+    rng = random.Random(20)
+    start = date.today() + timedelta(days=1)
+    rows = []
+    for employee_id in range(1, employees + 1):
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            for minute in range(7 * 60, 19 * 60, slot_minutes):
+                booked = rng.random() >= free_ratio
+                rows.append((day, f"{minute // 60:02d}:{minute % 60:02d}",
+                             f"{(minute + slot_minutes) // 60:02d}:{(minute + slot_minutes) % 60:02d}",
+                             employee_id, 1 if booked else 0))
+    conn.executemany('''
+        INSERT INTO time_slots (date, start_time, end_time, employee_id, max_bookings, current_bookings)
+        VALUES (?, ?, ?, ?, 1, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+    return start, len(rows)
+
+
+def linear_fits(slots, duration):
+    """The obvious approach: from every free slot, walk forward until the job fits or a gap appears"""
+    found = []
+    for i, (_, start, end) in enumerate(slots):
+        covered, j = end, i
+        while covered - start < duration and j + 1 < len(slots) and slots[j + 1][1] == covered:
+            j += 1
+            covered = slots[j][2]
+        if covered - start >= duration:
+            found.append(start)
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=40)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--slot-minutes', type=int, default=15)
+    parser.add_argument('--free-ratio', type=float, default=0.15,
+                        help="share of slots left free (the rest are booked)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from slot_fitting import load_schedules
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"🔧 Creating {args.employees} employees × {args.days} days of {args.slot_minutes}-minute slots...")
+    first_day, total = setup_database(db_path, args.employees, args.days, args.slot_minutes, args.free_ratio)
+    last_day = first_day + timedelta(days=args.days - 1)
+    conn = sqlite3.connect(db_path)
+
+    started = time.perf_counter()
+    schedules = load_schedules(conn, first_day, last_day)
+    load_ms = (time.perf_counter() - started) * 1000
+    free = sum(len(schedule) for schedule in schedules.values())
+    print(f"📦 Loaded {free:,} free of {total:,} slots into {len(schedules):,} employee-days in {load_ms:.0f} ms")
+
+    # Same free slots as plain sorted lists for the linear scan
+    raw = {key: sorted(zip(schedule._ids, schedule._starts, schedule._ends), key=lambda slot: slot[1])
+           for key, schedule in schedules.items()}
+
+    print(f"🧪 All start times for every employee-day (best of {args.repeat})")
+    print(f"   {'duration':>8} {'fits':>8} {'linear':>10} {'indexed':>10}")
+    for duration in DURATIONS:
+        linear_best = indexed_best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            linear = sum(len(linear_fits(slots, duration)) for slots in raw.values())
+            linear_best = min(linear_best, time.perf_counter() - started)
+            started = time.perf_counter()
+            indexed = sum(len(schedule.fits(duration)) for schedule in schedules.values())
+            indexed_best = min(indexed_best, time.perf_counter() - started)
+        assert linear == indexed, (duration, linear, indexed)
+        print(f"   {duration:>6}min {indexed:>8,} {linear_best * 1000:>8.1f}ms {indexed_best * 1000:>8.1f}ms")
+
+    # Point queries: "does a job of this length fit at this start?"
+    rng = random.Random(7)
+    keys = list(schedules)
+    queries = [(schedules[rng.choice(keys)], rng.randrange(7 * 60, 19 * 60, args.slot_minutes),
+                rng.choice(DURATIONS)) for _ in range(100_000)]
+    started = time.perf_counter()
+    hits = sum(1 for schedule, start, duration in queries if schedule.fit_at(start, duration))
+    elapsed = time.perf_counter() - started
+    print(f"🎯 {len(queries):,} point queries: {elapsed / len(queries) * 1e6:.2f} µs each ({hits:,} fit)")
+
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark for typed DataFrame loading
+Compares memory and latency of plain read_sql_query against the typed_frames schema on a large jobs table
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+SERVICES = ['Basic Cleaning', 'Deep Cleaning', 'Window Cleaning', 'Office Cleaning', 'Move-out Cleaning']
+STATUSES = ['completed'] * 6 + ['pending', 'confirmed', 'assigned', 'in_progress', 'cancelled']
+
+JOBS_QUERY = '''
+    SELECT id, customer_id, employee_id, title, scheduled_date, scheduled_time, duration,
+           status, service_type, price, created_at, completed_at
+    FROM jobs
+'''
+
+
+def setup_database(db_path: str, jobs: int):
+    """Two years of jobs for 50 employees; a fifth are still unassigned"""
+    from migrations import ensure_schema
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO customers (name, email) VALUES ('Bench Customer', 'bench@example.com')")
+    conn.executemany("INSERT INTO employees (name, employment_type) VALUES (?, ?)",
+                     [(f"Employee {i}", 'permanent' if i % 3 else 'contract') for i in range(1, 51)])
+    rng = random.Random(17)
+    start = date.today() - timedelta(days=730)
+    rows = []
+    for i in range(1, jobs + 1):
+        day = (start + timedelta(days=i * 730 // jobs)).isoformat()
+        status = rng.choice(STATUSES)
+        rows.append((
+            None if i % 5 == 0 else rng.randint(1, 50),
+            f"Job {i}", day, f"{8 + i % 10:02d}:{(i % 4) * 15:02d}", rng.choice([60, 120, 180]),
+            status, rng.choice(SERVICES), round(rng.uniform(60, 400), 2), f"{day} 09:00:00",
+            f"{day} 17:00:00" if status == 'completed' else None,
+        ))
+    conn.executemany('''
+        INSERT INTO jobs (customer_id, employee_id, title, scheduled_date, scheduled_time, duration,
+                          status, service_type, price, created_at, completed_at)
+        VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def best_of(fn, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def filter_plain(df: pd.DataFrame, month_start: date, month_end: date) -> int:
+    """What the portals do today: string status match, dates re-parsed per filter"""
+    scheduled = pd.to_datetime(df['scheduled_date'])
+    mask = ((df['status'] == 'completed')
+            & (scheduled >= pd.Timestamp(month_start)) & (scheduled < pd.Timestamp(month_end)))
+    return int(mask.sum())
+
+
+def filter_typed(df: pd.DataFrame, month_start: date, month_end: date) -> int:
+    mask = ((df['status'] == 'completed')
+            & (df['scheduled_date'] >= pd.Timestamp(month_start))
+            & (df['scheduled_date'] < pd.Timestamp(month_end)))
+    return int(mask.sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    from typed_frames import concat_typed, iter_sql_typed, memory_bytes, read_sql_typed
+
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_bench_')
+    db_path = os.path.join(workdir, 'bench.db')
+    print(f"🔧 Creating {args.jobs:,} jobs...")
+    setup_database(db_path, args.jobs)
+    conn = sqlite3.connect(db_path)
+
+    loaders = {
+        'read_sql_query': lambda: pd.read_sql_query(JOBS_QUERY, conn),
+        'read_sql_typed': lambda: read_sql_typed(JOBS_QUERY, conn),
+        'iter_sql_typed': lambda: concat_typed(iter_sql_typed(JOBS_QUERY, conn, chunksize=args.chunksize)),
+    }
+    frames = {}
+    print(f"🧪 Loading (best of {args.repeat})")
+    print(f"   {'loader':<16} {'time':>9} {'memory':>10}")
+    for name, load in loaders.items():
+        elapsed, frames[name] = best_of(load, args.repeat)
+        print(f"   {name:<16} {elapsed * 1000:>7.0f}ms {memory_bytes(frames[name]) / 2**20:>8.1f}MB")
+
+    plain, typed = frames['read_sql_query'], frames['read_sql_typed']
+    print("📊 Per-column memory (MB)")
+    for column in plain.columns:
+        before = plain[column].memory_usage(index=False, deep=True) / 2**20
+        after = typed[column].memory_usage(index=False, deep=True) / 2**20
+        print(f"   {column:<16} {before:>8.1f} → {after:>6.1f}  ({typed[column].dtype})")
+
+    month_start = date.today().replace(day=1) - timedelta(days=60)
+    month_start = month_start.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1)
+    plain_time, plain_count = best_of(lambda: filter_plain(plain, month_start, month_end), args.repeat)
+    typed_time, typed_count = best_of(lambda: filter_typed(typed, month_start, month_end), args.repeat)
+    assert plain_count == typed_count, (plain_count, typed_count)
+    print(f"🔎 Completed jobs in {month_start:%Y-%m} ({typed_count:,} rows)")
+    print(f"   plain filter {plain_time * 1000:>8.1f}ms")
+    print(f"   typed filter {typed_time * 1000:>8.1f}ms")
+
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,344 @@
+"""
+Set-based bulk job operations for Aufraumenbee
+Validates and applies assign/status/cancel/reschedule batches in one write transaction with an audit row
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from db_pool import get_connection
+
+# Job lifecycle: status -> statuses it may move to. Covers both the admin
+# dashboard (approved/assigned) and the multilingual portal (confirmed).
+JOB_TRANSITIONS: Dict[str, tuple] = {
+    'pending': ('approved', 'confirmed', 'assigned', 'in_progress', 'cancelled'),
+    'approved': ('assigned', 'in_progress', 'cancelled'),
+    'confirmed': ('assigned', 'in_progress', 'completed', 'cancelled'),
+    'assigned': ('in_progress', 'completed', 'cancelled'),
+    'in_progress': ('completed', 'cancelled'),
+    'completed': (),
+    'cancelled': ('pending',),
+}
+
+# Jobs in these states hold no employee time and cannot be (re)assigned
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+# Assumed length of a job without a duration, as on the job creation form
+DEFAULT_JOB_MINUTES = 120
+
+
+class JobOutcome(Enum):
+    """What a bulk operation did to one job"""
+    UPDATED = 'updated'
+    UNCHANGED = 'unchanged'
+    NOT_FOUND = 'not_found'
+    INVALID_TRANSITION = 'invalid_transition'
+    SCHEDULE_CONFLICT = 'schedule_conflict'
+    EMPLOYEE_UNAVAILABLE = 'employee_unavailable'
+    ALREADY_ASSIGNED = 'already_assigned'
+
+
+@dataclass
+class BulkResult:
+    """Per-job outcomes of one batch plus its audit row id"""
+    action: str
+    outcomes: Dict[int, JobOutcome] = field(default_factory=dict)
+    audit_id: Optional[int] = None
+
+    @property
+    def updated(self) -> List[int]:
+        return [job_id for job_id, outcome in self.outcomes.items() if outcome is JobOutcome.UPDATED]
+
+    @property
+    def rejected(self) -> Dict[int, JobOutcome]:
+        return {job_id: outcome for job_id, outcome in self.outcomes.items()
+                if outcome not in (JobOutcome.UPDATED, JobOutcome.UNCHANGED)}
+
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(outcome.value for outcome in self.outcomes.values()))
+
+
+def _minutes(alias: str) -> str:
+    """Start of a job as minutes after midnight (scheduled_time is HH:MM)"""
+    return (f"(CAST(substr({alias}.scheduled_time, 1, 2) AS INTEGER) * 60"
+            f" + CAST(substr({alias}.scheduled_time, 4, 2) AS INTEGER))")
+
+
+def _transitions_cte() -> Tuple[str, list]:
+    """JOB_TRANSITIONS as a VALUES table so the check runs inside the UPDATE"""
+    pairs = [(src, dst) for src, targets in JOB_TRANSITIONS.items() for dst in targets]
+    values = ', '.join('(?, ?)' for _ in pairs)
+    return f"transitions (from_status, to_status) AS (VALUES {values})", [v for pair in pairs for v in pair]
+
+
+def _stage(conn, job_ids: List[int]):
+    """Load the batch into TEMP tables with each job's current state and schedule"""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_job_ids (job_id INTEGER PRIMARY KEY)")
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS bulk_job_plan (
+            job_id INTEGER PRIMARY KEY,
+            status TEXT,
+            employee_id INTEGER,
+            scheduled_date TEXT,
+            start_minute INTEGER,
+            end_minute INTEGER,
+            outcome TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_bulk_job_plan_date ON bulk_job_plan (scheduled_date)")
+    conn.execute("DELETE FROM bulk_job_ids")
+    conn.execute("DELETE FROM bulk_job_plan")
+    conn.executemany("INSERT OR IGNORE INTO bulk_job_ids (job_id) VALUES (?)", [(int(i),) for i in job_ids])
+    conn.execute(f'''
+        INSERT INTO bulk_job_plan (job_id, status, employee_id, scheduled_date, start_minute, end_minute, outcome)
+        SELECT b.job_id, j.status, j.employee_id, j.scheduled_date,
+               {_minutes('j')}, {_minutes('j')} + IFNULL(j.duration, {DEFAULT_JOB_MINUTES}),
+               CASE WHEN j.id IS NULL THEN '{JobOutcome.NOT_FOUND.value}' END
+        FROM bulk_job_ids b
+        LEFT JOIN jobs j ON j.id = b.job_id
+    ''')
+
+
+def _reject_conflicts(conn, db_path: Optional[str], target_of: Callable[[int], Optional[int]]):
+    """Mark jobs that would overlap their target employee's other work that day.
+
+    Open jobs outside the batch come from the interval index (one bisect per
+    job instead of a correlated scan of jobs); within the batch, a job loses
+    to any overlapping lower-id job still in the running.
+    """
+    from interval_index import EmployeeDay, get_interval_index
+
+    rows = conn.execute('''
+        SELECT job_id, scheduled_date, start_minute, end_minute FROM bulk_job_plan
+        WHERE outcome IS NULL ORDER BY job_id
+    ''').fetchall()
+    # Index reads see the committed state, which our write lock keeps still.
+    # A job only ever ignores its own current slot: batch jobs that end up
+    # rejected stay where they are, so their slots keep blocking others.
+    index = get_interval_index(db_path)
+    batch: Dict[tuple, EmployeeDay] = {}
+    rejected = []
+    for job_id, scheduled_date, start, end in rows:
+        target = target_of(job_id)
+        if scheduled_date is None or start is None or target is None:
+            continue
+        key = (target, str(scheduled_date)[:10])
+        day = batch.get(key)
+        if index.conflicts(*key, start, end, ignore=(job_id,)) or (day and day.overlaps(start, end)):
+            rejected.append((job_id,))
+        else:
+            batch.setdefault(key, EmployeeDay()).add(job_id, start, end)
+    conn.executemany(f"UPDATE bulk_job_plan SET outcome = '{JobOutcome.SCHEDULE_CONFLICT.value}' "
+                     "WHERE job_id = ?", rejected)
+
+
+def _apply(conn, action: str, parameters: dict, set_clause: str, set_params: list,
+           performed_by: Optional[str]) -> BulkResult:
+    """Update every job still marked for update, write the audit row, collect outcomes"""
+    conn.execute(f"UPDATE bulk_job_plan SET outcome = '{JobOutcome.UPDATED.value}' WHERE outcome IS NULL")
+    conn.execute(f'''
+        UPDATE jobs SET {set_clause}
+        WHERE id IN (SELECT job_id FROM bulk_job_plan WHERE outcome = '{JobOutcome.UPDATED.value}')
+    ''', set_params)
+
+    result = BulkResult(action, {
+        job_id: JobOutcome(outcome)
+        for job_id, outcome in conn.execute("SELECT job_id, outcome FROM bulk_job_plan").fetchall()
+    })
+    counts = result.counts()
+    result.audit_id = conn.execute('''
+        INSERT INTO job_bulk_audit (action, parameters, requested, updated, rejected, outcomes, job_ids, performed_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (action, json.dumps(parameters), len(result.outcomes), len(result.updated), len(result.rejected),
+          json.dumps(counts), json.dumps(sorted(result.outcomes)), performed_by)).lastrowid
+    return result
+
+
+def _run(job_ids: Iterable[int], db_path: Optional[str], plan):
+    """Stage the batch and run ``plan(conn)`` inside one IMMEDIATE transaction"""
+    job_ids = list(dict.fromkeys(int(i) for i in job_ids))
+    # Own connection: the thread-shared one may hold a caller's open transaction
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _stage(conn, job_ids)
+        result = plan(conn)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _has_column(conn, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})").fetchall())
+
+
+def bulk_set_status(job_ids: Iterable[int], new_status: str, performed_by: str = None,
+                    db_path: str = None, action: str = 'status') -> BulkResult:
+    """Move every job whose current status allows it to ``new_status``.
+
+    Jobs already in ``new_status`` are reported UNCHANGED; completing a job
+    stamps completed_at where the schema has it.
+    """
+    if new_status not in JOB_TRANSITIONS:
+        raise ValueError(f"Unknown job status: {new_status}")
+
+    def plan(conn):
+        conn.execute(f"UPDATE bulk_job_plan SET outcome = '{JobOutcome.UNCHANGED.value}' "
+                     "WHERE outcome IS NULL AND status = ?", (new_status,))
+        cte, cte_params = _transitions_cte()
+        conn.execute(f'''
+            WITH {cte}
+            UPDATE bulk_job_plan SET outcome = '{JobOutcome.INVALID_TRANSITION.value}'
+            WHERE outcome IS NULL AND NOT EXISTS (
+                SELECT 1 FROM transitions t
+                WHERE t.from_status = IFNULL(bulk_job_plan.status, 'pending') AND t.to_status = ?
+            )
+        ''', cte_params + [new_status])
+        set_clause, set_params = "status = ?", [new_status]
+        if _has_column(conn, 'jobs', 'completed_at'):
+            set_clause += ", completed_at = CASE WHEN ? = 'completed' THEN CURRENT_TIMESTAMP ELSE completed_at END"
+            set_params.append(new_status)
+        return _apply(conn, action, {'status': new_status}, set_clause, set_params, performed_by)
+
+    return _run(job_ids, db_path, plan)
+
+
+def bulk_cancel(job_ids: Iterable[int], performed_by: str = None, db_path: str = None) -> BulkResult:
+    """Cancel every open job in the batch"""
+    return bulk_set_status(job_ids, 'cancelled', performed_by, db_path, action='cancel')
+
+
+def bulk_assign(job_ids: Iterable[int], employee_id: int, set_status: Optional[str] = 'assigned',
+                performed_by: str = None, db_path: str = None) -> BulkResult:
+    """Assign open jobs to one employee without double-booking them.
+
+    ``set_status`` moves assigned jobs to that status when their lifecycle
+    allows it (pass None to keep each job's status). Closed jobs are
+    INVALID_TRANSITION, jobs overlapping the employee's other work are
+    SCHEDULE_CONFLICT, and every job is EMPLOYEE_UNAVAILABLE when the
+    employee does not exist or is inactive.
+    """
+    def plan(conn):
+        active = conn.execute(
+            "SELECT 1 FROM employees WHERE id = ? AND COALESCE(status, 'active') = 'active'", (employee_id,)
+        ).fetchone()
+        if not active:
+            conn.execute(f"UPDATE bulk_job_plan SET outcome = '{JobOutcome.EMPLOYEE_UNAVAILABLE.value}' "
+                         "WHERE outcome IS NULL")
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET outcome = '{JobOutcome.INVALID_TRANSITION.value}'
+            WHERE outcome IS NULL AND status IN ({', '.join('?' for _ in CLOSED_STATUSES)})
+        ''', CLOSED_STATUSES)
+        conn.execute(f"UPDATE bulk_job_plan SET outcome = '{JobOutcome.UNCHANGED.value}' "
+                     "WHERE outcome IS NULL AND employee_id IS ? AND (? IS NULL OR status = ?)",
+                     (employee_id, set_status, set_status))
+        _reject_conflicts(conn, db_path, lambda job_id: employee_id)
+
+        set_clause, set_params = "employee_id = ?", [employee_id]
+        if set_status:
+            # Only move statuses forward where the lifecycle allows it
+            allowed = [src for src, targets in JOB_TRANSITIONS.items() if set_status in targets]
+            set_clause += (f", status = CASE WHEN IFNULL(status, 'pending') IN "
+                           f"({', '.join('?' for _ in allowed)}) THEN ? ELSE status END")
+            set_params += allowed + [set_status]
+        return _apply(conn, 'assign', {'employee_id': employee_id, 'status': set_status},
+                      set_clause, set_params, performed_by)
+
+    return _run(job_ids, db_path, plan)
+
+
+def bulk_assign_plan(assignments: Dict[int, int], set_status: Optional[str] = 'assigned',
+                     performed_by: str = None, db_path: str = None, action: str = 'auto_assign',
+                     parameters: dict = None) -> BulkResult:
+    """Assign each job to its own employee in one transaction (auto-assign plans).
+
+    Jobs given to someone else since the plan was made are ALREADY_ASSIGNED
+    rather than taken away from them; otherwise the checks match
+    bulk_assign, per target employee.
+    """
+    def plan(conn):
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_job_targets (job_id INTEGER PRIMARY KEY, employee_id INTEGER)")
+        conn.execute("DELETE FROM bulk_job_targets")
+        conn.executemany("INSERT OR REPLACE INTO bulk_job_targets (job_id, employee_id) VALUES (?, ?)",
+                         [(int(job_id), int(employee_id)) for job_id, employee_id in assignments.items()])
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET outcome = '{JobOutcome.EMPLOYEE_UNAVAILABLE.value}'
+            WHERE outcome IS NULL AND NOT EXISTS (
+                SELECT 1 FROM bulk_job_targets t
+                JOIN employees e ON e.id = t.employee_id AND COALESCE(e.status, 'active') = 'active'
+                WHERE t.job_id = bulk_job_plan.job_id
+            )
+        ''')
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET outcome = '{JobOutcome.INVALID_TRANSITION.value}'
+            WHERE outcome IS NULL AND status IN ({', '.join('?' for _ in CLOSED_STATUSES)})
+        ''', CLOSED_STATUSES)
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET outcome = CASE
+                WHEN employee_id = (SELECT employee_id FROM bulk_job_targets t WHERE t.job_id = bulk_job_plan.job_id)
+                THEN '{JobOutcome.UNCHANGED.value}' ELSE '{JobOutcome.ALREADY_ASSIGNED.value}' END
+            WHERE outcome IS NULL AND employee_id IS NOT NULL
+        ''')
+
+        targets = {int(job_id): int(employee_id) for job_id, employee_id in assignments.items()}
+        _reject_conflicts(conn, db_path, targets.__getitem__)
+
+        set_clause = "employee_id = (SELECT employee_id FROM bulk_job_targets t WHERE t.job_id = jobs.id)"
+        set_params: list = []
+        if set_status:
+            allowed = [src for src, targets in JOB_TRANSITIONS.items() if set_status in targets]
+            set_clause += (f", status = CASE WHEN IFNULL(status, 'pending') IN "
+                           f"({', '.join('?' for _ in allowed)}) THEN ? ELSE status END")
+            set_params += allowed + [set_status]
+        return _apply(conn, action, dict(parameters or {}, status=set_status), set_clause, set_params, performed_by)
+
+    return _run(assignments.keys(), db_path, plan)
+
+
+def bulk_reschedule(job_ids: Iterable[int], scheduled_date: str, scheduled_time: str,
+                    performed_by: str = None, db_path: str = None) -> BulkResult:
+    """Move jobs to a new date and HH:MM start without double-booking their employee.
+
+    Jobs already in that slot are UNCHANGED; an assigned open job whose new
+    window overlaps its employee's other work (or a lower-id job moved in
+    the same batch) is SCHEDULE_CONFLICT and keeps its old slot.
+    """
+    hours, minutes = scheduled_time.split(':')[:2]
+    start = int(hours) * 60 + int(minutes)
+
+    def plan(conn):
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET outcome = '{JobOutcome.UNCHANGED.value}'
+            WHERE outcome IS NULL AND job_id IN (
+                SELECT id FROM jobs WHERE scheduled_date = ? AND substr(scheduled_time, 1, 5) = ?
+            )
+        ''', (scheduled_date, scheduled_time[:5]))
+        # Stage the new window; unassigned and closed jobs hold no employee time
+        conn.execute(f'''
+            UPDATE bulk_job_plan SET
+                scheduled_date = ?,
+                start_minute = CASE WHEN employee_id IS NULL
+                                      OR IFNULL(status, 'pending') IN ({', '.join('?' for _ in CLOSED_STATUSES)})
+                                    THEN NULL ELSE ? END,
+                end_minute = ? + IFNULL((SELECT duration FROM jobs WHERE jobs.id = bulk_job_plan.job_id),
+                                        {DEFAULT_JOB_MINUTES})
+            WHERE outcome IS NULL
+        ''', (scheduled_date, *CLOSED_STATUSES, start, start))
+        owners = dict(conn.execute("SELECT job_id, employee_id FROM bulk_job_plan WHERE outcome IS NULL").fetchall())
+        _reject_conflicts(conn, db_path, owners.get)
+        return _apply(conn, 'reschedule', {'scheduled_date': scheduled_date, 'scheduled_time': scheduled_time},
+                      "scheduled_date = ?, scheduled_time = ?", [scheduled_date, scheduled_time], performed_by)
+
+    return _run(job_ids, db_path, plan)
+
+
+def describe(result: BulkResult) -> str:
+    """Short human summary such as '8 updated, 2 schedule conflict'"""
+    return ', '.join(f"{count} {outcome.replace('_', ' ')}" for outcome, count in sorted(result.counts().items()))
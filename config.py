@@ -10,6 +10,76 @@ class Config:
     
     # Database settings
     DATABASE_NAME = os.getenv('DB_NAME', 'aufraumenbee.db')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '20000'))
+    DB_FOREIGN_KEYS = os.getenv('DB_FOREIGN_KEYS', 'True').lower() == 'true'
+    MIGRATION_CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', '5000'))
+    QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    DB_READ_CHUNK_SIZE = int(os.getenv('DB_READ_CHUNK_SIZE', '50000'))
+    DB_ASYNC_READERS = int(os.getenv('DB_ASYNC_READERS', '4'))
+    DB_ASYNC_MAX_PENDING = int(os.getenv('DB_ASYNC_MAX_PENDING', '1000'))
+    DB_ASYNC_TIMEOUT = float(os.getenv('DB_ASYNC_TIMEOUT', '10'))
+    # SQLAlchemy engine; any SQLAlchemy URL, e.g. postgresql+psycopg://user:pw@host/db
+    DATABASE_URL = os.getenv('DATABASE_URL', f"sqlite:///{DATABASE_NAME}")
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '0'))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '500'))
+    DB_ECHO_SQL = os.getenv('DB_ECHO_SQL', 'False').lower() == 'true'
+    # Analytics pages read a periodically refreshed snapshot of the database
+    ANALYTICS_REPLICA_ENABLED = os.getenv('ANALYTICS_REPLICA_ENABLED', 'True').lower() == 'true'
+    ANALYTICS_REPLICA_DIR = os.getenv('ANALYTICS_REPLICA_DIR', '')
+    ANALYTICS_REPLICA_INTERVAL_MINUTES = float(os.getenv('ANALYTICS_REPLICA_INTERVAL_MINUTES', '5'))
+    ANALYTICS_BACKUP_PAGES = int(os.getenv('ANALYTICS_BACKUP_PAGES', '0'))
+    ANALYTICS_BACKUP_SLEEP_MS = float(os.getenv('ANALYTICS_BACKUP_SLEEP_MS', '5'))
+    # Columnar (Parquet) copy of jobs, invoices and bookings, exported after each snapshot
+    ANALYTICS_STORE_ENABLED = os.getenv('ANALYTICS_STORE_ENABLED', 'True').lower() == 'true'
+    ANALYTICS_STORE_DIR = os.getenv('ANALYTICS_STORE_DIR', '')
+    ANALYTICS_STORE_COMPRESSION = os.getenv('ANALYTICS_STORE_COMPRESSION', 'zstd')
+    # Opt-in query timing; stats land in query_stats and slow_query_log
+    DB_QUERY_METRICS_ENABLED = os.getenv('DB_QUERY_METRICS_ENABLED', 'False').lower() == 'true'
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '100'))
+    DB_QUERY_METRICS_FLUSH_SECONDS = float(os.getenv('DB_QUERY_METRICS_FLUSH_SECONDS', '30'))
+    DB_SLOW_QUERY_LOG_MAX_ROWS = int(os.getenv('DB_SLOW_QUERY_LOG_MAX_ROWS', '10000'))
+    # Monthly archive files for old jobs, bookings, slots and logs (archive.py)
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', '')
+    ARCHIVE_RETENTION_DAYS = int(os.getenv('ARCHIVE_RETENTION_DAYS', '365'))
+    ARCHIVE_LOG_RETENTION_DAYS = int(os.getenv('ARCHIVE_LOG_RETENTION_DAYS', '30'))
+    ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', '2000'))
+    ARCHIVE_VACUUM = os.getenv('ARCHIVE_VACUUM', 'incremental')
+    ARCHIVE_HISTORY_MONTHS = int(os.getenv('ARCHIVE_HISTORY_MONTHS', '9'))
+    # Bookable slots are materialized ahead of time from slot_templates (slot_provisioning.py)
+    SLOT_HORIZON_DAYS = int(os.getenv('SLOT_HORIZON_DAYS', '90'))
+    SLOT_PROVISION_BATCH_DAYS = int(os.getenv('SLOT_PROVISION_BATCH_DAYS', '14'))
+    SLOT_PROVISION_INTERVAL_HOURS = float(os.getenv('SLOT_PROVISION_INTERVAL_HOURS', '6'))
+    AVAILABILITY_CACHE_ENTRIES = int(os.getenv('AVAILABILITY_CACHE_ENTRIES', '256'))
+
+    # Hours assumed when employees.availability names days but no times (availability_model.py)
+    AVAILABILITY_DEFAULT_HOURS = os.getenv('AVAILABILITY_DEFAULT_HOURS', '08:00-17:00')
+    AVAILABILITY_FLEXIBLE_HOURS = os.getenv('AVAILABILITY_FLEXIBLE_HOURS', '07:00-20:00')
+    AVAILABILITY_PART_TIME_HOURS = os.getenv('AVAILABILITY_PART_TIME_HOURS', '08:00-13:00')
+
+    # Assignment suggestion weights (assignment_scoring.py); inf never suggests someone who is off
+    ASSIGNMENT_WEIGHT_SKILL = float(os.getenv('ASSIGNMENT_WEIGHT_SKILL', '5'))
+    ASSIGNMENT_WEIGHT_LOAD = float(os.getenv('ASSIGNMENT_WEIGHT_LOAD', '3'))
+    ASSIGNMENT_WEIGHT_COST = float(os.getenv('ASSIGNMENT_WEIGHT_COST', '1'))
+    ASSIGNMENT_WEIGHT_TRAVEL = float(os.getenv('ASSIGNMENT_WEIGHT_TRAVEL', '2'))
+    ASSIGNMENT_WEIGHT_AVAILABILITY = float(os.getenv('ASSIGNMENT_WEIGHT_AVAILABILITY', 'inf'))
+    ASSIGNMENT_SUGGESTIONS = int(os.getenv('ASSIGNMENT_SUGGESTIONS', '3'))
+
+    # Auto-assignment (auto_assign.py); bigger days fall back to the greedy solver
+    MAX_HOURS_PER_DAY = float(os.getenv('MAX_HOURS_PER_DAY', '8'))
+    AUTO_ASSIGN_EXACT_MAX_CELLS = int(os.getenv('AUTO_ASSIGN_EXACT_MAX_CELLS', '250000'))
+    AUTO_ASSIGN_REQUIRE_SKILLS = os.getenv('AUTO_ASSIGN_REQUIRE_SKILLS', 'True').lower() == 'true'
+
+    # Route sequencing (routing.py); the depot is where employees without a home location start
+    ROUTING_DEPOT_LAT = float(os.getenv('ROUTING_DEPOT_LAT', os.getenv('MAP_DEFAULT_LAT', '40.7128')))
+    ROUTING_DEPOT_LON = float(os.getenv('ROUTING_DEPOT_LON', os.getenv('MAP_DEFAULT_LON', '-74.0060')))
+    ROUTING_SPEED_KMH = float(os.getenv('ROUTING_SPEED_KMH', '30'))
+    ROUTING_DETOUR_FACTOR = float(os.getenv('ROUTING_DETOUR_FACTOR', '1.3'))  # road km per straight-line km
+    ROUTING_LATE_TOLERANCE_MINUTES = int(os.getenv('ROUTING_LATE_TOLERANCE_MINUTES', '15'))
+    ROUTING_MAX_DETOUR_KM = float(os.getenv('ROUTING_MAX_DETOUR_KM', '30'))
     
     # Application settings
     APP_NAME = os.getenv('APP_NAME', 'Aufraumenbee')
@@ -80,7 +150,7 @@ class Config:
         'textColor': '#262730'
     }
     
-    # Map settings (for future GPS integration)
+    # Map settings (routing.py falls back to this point as the depot)
     MAP_DEFAULT_LAT = float(os.getenv('MAP_DEFAULT_LAT', '40.7128'))
     MAP_DEFAULT_LON = float(os.getenv('MAP_DEFAULT_LON', '-74.0060'))
     MAP_DEFAULT_ZOOM = int(os.getenv('MAP_DEFAULT_ZOOM', '10'))
@@ -11,6 +11,14 @@ from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 import re
 
+from db_pool import get_connection
+from reservations import reserve_slots, ReservationStatus
+from migrations import ensure_schema
+from archive import history_connection
+from slot_provisioning import start_slot_provisioner
+from availability import get_availability, has_slots, availability_strip_html
+from slot_fitting import fitting_slots
+
 # Import real-time logging system
 try:
     from realtime_logger import get_realtime_logger, log_user_action, log_error, log_database_operation
@@ -129,93 +137,9 @@ st.markdown("""
 @st.cache_resource
 def init_database():
     """Initialize database connection"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
-    
-    # Create customer users table if not exists
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            verified BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    # Create service types table if not exists
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS service_types (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            base_price REAL NOT NULL,
-            duration_minutes INTEGER NOT NULL,
-            category TEXT,
-            active BOOLEAN DEFAULT TRUE
-        )
-    ''')
-    
-    # Create time slots table if not exists
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS time_slots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date DATE NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL,
-            available BOOLEAN DEFAULT TRUE,
-            employee_id INTEGER,
-            max_bookings INTEGER DEFAULT 1,
-            current_bookings INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create customer bookings table if not exists
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_user_id INTEGER NOT NULL,
-            service_type_id INTEGER NOT NULL,
-            slot_id INTEGER NOT NULL,
-            date DATE NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL,
-            address TEXT NOT NULL,
-            special_instructions TEXT,
-            total_price REAL NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_user_id) REFERENCES customer_users (id),
-            FOREIGN KEY (service_type_id) REFERENCES service_types (id),
-            FOREIGN KEY (slot_id) REFERENCES time_slots (id)
-        )
-    ''')
-    
-    # Insert default service types if table is empty
-    cursor = conn.execute("SELECT COUNT(*) FROM service_types")
-    if cursor.fetchone()[0] == 0:
-        default_services = [
-            ("Regular Cleaning", "Standard house cleaning including dusting, vacuuming, mopping, and bathroom cleaning", 80.0, 120, "Residential"),
-            ("Deep Cleaning", "Thorough cleaning including inside appliances, baseboards, and detailed cleaning", 150.0, 240, "Residential"), 
-            ("Move-in/Move-out Cleaning", "Complete cleaning for moving situations including inside cabinets and appliances", 200.0, 300, "Residential"),
-            ("Office Cleaning", "Professional office space cleaning including desks, meeting rooms, and common areas", 100.0, 180, "Commercial"),
-            ("Post-Construction Cleaning", "Specialized cleaning after construction or renovation work", 250.0, 360, "Specialty"),
-            ("Carpet Cleaning", "Professional carpet cleaning and stain removal", 120.0, 150, "Specialty"),
-            ("Window Cleaning", "Interior and exterior window cleaning service", 80.0, 90, "Specialty")
-        ]
-        
-        for service in default_services:
-            conn.execute('''
-                INSERT INTO service_types (name, description, base_price, duration_minutes, category)
-                VALUES (?, ?, ?, ?, ?)
-            ''', service)
-    
-    conn.commit()
-    return conn
+    ensure_schema()
+    start_slot_provisioner()
+    return get_connection()
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -246,7 +170,7 @@ def register_customer(email: str, password: str, first_name: str, last_name: str
             'last_name': last_name
         })
         
-        conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Check if email already exists
@@ -270,12 +194,8 @@ def register_customer(email: str, password: str, first_name: str, last_name: str
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (email, password_hash, first_name, last_name, phone, address))
         
-        # Also insert into customers table (for admin management)
-        full_name = f"{first_name} {last_name}".strip()
-        cursor.execute('''
-            INSERT INTO customers (name, email, phone, address, preferences)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (full_name, email, phone, address, "Registered via customer portal"))
+        # The customer record for admin management is linked (or created)
+        # by the customer_users insert trigger
         
         conn.commit()
         
@@ -314,7 +234,7 @@ def register_customer(email: str, password: str, first_name: str, last_name: str
 
 def authenticate_customer(email: str, password: str) -> Optional[Dict]:
     """Authenticate customer login"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+    conn = get_connection()
     cursor = conn.execute('''
         SELECT id, password_hash, first_name, last_name, phone, address
         FROM customer_users WHERE email = ?
@@ -335,7 +255,7 @@ def authenticate_customer(email: str, password: str) -> Optional[Dict]:
 
 def get_service_types() -> List[Dict]:
     """Get all active service types"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+    conn = get_connection()
     cursor = conn.execute('''
         SELECT id, name, description, base_price, duration_minutes, category
         FROM service_types WHERE active = TRUE
@@ -356,107 +276,45 @@ def get_service_types() -> List[Dict]:
     return services
 
 def get_available_slots(selected_date: date, service_duration: int) -> List[Dict]:
-    """Get available time slots for a specific date"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
-    
-    # First, get existing slots for the date
-    cursor = conn.execute('''
-        SELECT id, start_time, end_time, current_bookings, max_bookings
-        FROM time_slots 
-        WHERE date = ? AND available = TRUE
-        ORDER BY start_time
-    ''', (selected_date.strftime('%Y-%m-%d'),))
-    
-    existing_slots = cursor.fetchall()
-    
-    # If no slots exist for this date, generate default slots
-    if not existing_slots:
-        generate_default_slots(selected_date)
-        # Re-fetch after generating
-        cursor = conn.execute('''
-            SELECT id, start_time, end_time, current_bookings, max_bookings
-            FROM time_slots 
-            WHERE date = ? AND available = TRUE
-            ORDER BY start_time
-        ''', (selected_date.strftime('%Y-%m-%d'),))
-        existing_slots = cursor.fetchall()
-    
-    available_slots = []
-    for slot in existing_slots:
-        if slot[3] < slot[4]:  # current_bookings < max_bookings
-            available_slots.append({
-                'id': slot[0],
-                'start_time': slot[1],
-                'end_time': slot[2],
-                'display_time': f"{slot[1]} - {slot[2]}"
-            })
-    
-    conn.close()
-    return available_slots
+    """Start times on a date where a service of service_duration minutes fits.
 
-def generate_default_slots(selected_date: date):
-    """Generate default time slots for a date"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
-    
-    # Generate slots from 8 AM to 6 PM, 2-hour intervals
-    time_slots = [
-        ("08:00", "10:00"),
-        ("10:00", "12:00"),
-        ("12:00", "14:00"),
-        ("14:00", "16:00"),
-        ("16:00", "18:00")
-    ]
-    
-    for start_time, end_time in time_slots:
-        try:
-            conn.execute('''
-                INSERT INTO time_slots (date, start_time, end_time, available, max_bookings)
-                VALUES (?, ?, ?, TRUE, 2)
-            ''', (selected_date.strftime('%Y-%m-%d'), start_time, end_time))
-        except sqlite3.IntegrityError:
-            # Slot already exists, skip
-            pass
-    
-    conn.commit()
-    conn.close()
+    Read-only: slots are materialized ahead of time by slot_provisioning.
+    Long services span several back-to-back slots.
+    """
+    return [{
+        'id': fit.slot_ids[0],
+        'slot_ids': list(fit.slot_ids),
+        'start_time': fit.start_time,
+        'end_time': fit.end_time,
+        'display_time': f"{fit.start_time} - {fit.end_time}"
+    } for fit in fitting_slots(selected_date, service_duration)]
 
-def create_booking(customer_id: int, service_id: int, slot_id: int, booking_date: date, 
+def create_booking(customer_id: int, service_id: int, slot_ids: List[int], booking_date: date, 
                   start_time: str, end_time: str, address: str, special_instructions: str, 
                   total_price: float) -> bool:
-    """Create a new booking"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+    """Create a new booking, atomically claiming every slot it spans"""
     try:
-        # Insert booking
-        conn.execute('''
-            INSERT INTO customer_bookings 
-            (customer_user_id, service_type_id, slot_id, date, start_time, end_time, 
-             address, special_instructions, total_price)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (customer_id, service_id, slot_id, booking_date.strftime('%Y-%m-%d'),
-              start_time, end_time, address, special_instructions, total_price))
-        
-        # Update slot booking count
-        conn.execute('''
-            UPDATE time_slots 
-            SET current_bookings = current_bookings + 1
-            WHERE id = ?
-        ''', (slot_id,))
-        
-        conn.commit()
-        return True
+        result = reserve_slots(slot_ids, customer_id, service_id, address,
+                               total_price, special_instructions, end_time=end_time)
     except Exception as e:
         st.error(f"Error creating booking: {e}")
         return False
-    finally:
-        conn.close()
+    
+    if result.status is ReservationStatus.SLOT_FULL:
+        st.error("Sorry, this time slot was just booked by someone else. Please choose another time.")
+        return False
+    if result.status is ReservationStatus.SLOT_NOT_FOUND:
+        st.error("This time slot is no longer available. Please choose another time.")
+        return False
+    return True
 
 def get_customer_bookings(customer_id: int) -> List[Dict]:
-    """Get all bookings for a customer"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+    """Get all bookings for a customer, including the last ARCHIVE_HISTORY_MONTHS of archives"""
+    conn = history_connection(tables=['customer_bookings'])
     cursor = conn.execute('''
         SELECT cb.id, st.name, cb.date, cb.start_time, cb.end_time, 
                cb.address, cb.total_price, cb.status, cb.created_at
-        FROM customer_bookings cb
+        FROM customer_bookings_history cb
         JOIN service_types st ON cb.service_type_id = st.id
         WHERE cb.customer_user_id = ?
         ORDER BY cb.date DESC, cb.start_time DESC
@@ -482,7 +340,7 @@ def get_customer_bookings(customer_id: int) -> List[Dict]:
 def check_email_exists(email: str) -> bool:
     """Check if an email address already exists in the customer database"""
     try:
-        conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Check if email already exists in customer_users table
@@ -1005,14 +863,27 @@ def show_booking_form():
         min_date = date.today() + timedelta(days=1)  # Tomorrow
         max_date = date.today() + timedelta(days=30)  # 30 days ahead
         
-        selected_date = st.date_input(
-            "Preferred Date",
-            min_value=min_date,
-            max_value=max_date,
-            value=min_date
-        )
+        # One grouped query for the whole range; fully booked days are never offered
+        availability = get_availability(min_date, max_date)
+        bookable_days = availability.bookable_days()
+        selected_date = None
+        if bookable_days:
+            selected_date = st.selectbox(
+                "Preferred Date",
+                bookable_days,
+                format_func=lambda d: f"{d.strftime('%a, %B %d')} · {availability.free[(d - min_date).days]} places free"
+            )
+        st.markdown(availability_strip_html(availability, selected_date), unsafe_allow_html=True)
         
-        if selected_date:
+        if not bookable_days and not has_slots(min_date, max_date):
+            # Nothing provisioned is a setup problem, not a full calendar
+            log_error('customer_portal', 'No time slots provisioned', {
+                'from': min_date.isoformat(), 'to': max_date.isoformat()
+            })
+            st.info("Online booking is not open for these dates yet. Please contact us to arrange an appointment.")
+        elif not bookable_days:
+            st.warning("All dates in the next 30 days are fully booked. Please check back later.")
+        elif selected_date:
             # Get available slots
             available_slots = get_available_slots(selected_date, service['duration_minutes'])
             
@@ -1045,7 +916,7 @@ def show_booking_form():
                                 del st.session_state.booking_step
                             st.rerun()
             else:
-                st.warning("No available slots for this date. Please choose another date.")
+                st.warning("No free time on this date is long enough for this service. Please choose another date.")
     
     # Step 2: Booking Details
     elif st.session_state.get('booking_step') == 'details':
@@ -1093,7 +964,7 @@ def show_booking_form():
                         if create_booking(
                             st.session_state.customer_user['id'],
                             service['id'],
-                            selected_slot['id'],
+                            selected_slot['slot_ids'],
                             selected_date,
                             selected_slot['start_time'],
                             selected_slot['end_time'],
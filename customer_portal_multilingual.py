@@ -4,12 +4,12 @@ Production-ready version with internationalization support
 """
 
 import streamlit as st
-import sqlite3
 import bcrypt
 import pandas as pd
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 import re
+import sys
 import random
 import string
 import hashlib
@@ -18,6 +18,13 @@ import random
 import string
 import hashlib
 
+from db_pool import get_connection
+from migrations import ensure_schema
+from availability import get_availability, has_slots, availability_strip_html
+from reservations import reserve_slots
+from slot_fitting import fitting_slots
+from slot_provisioning import start_slot_provisioner
+
 # Import translation system
 from translations import t, init_language_selector, get_current_language, format_currency, format_date, format_time
 
@@ -82,100 +89,10 @@ st.markdown("""
 
 def init_database():
     """Initialize the database"""
-    conn = sqlite3.connect('aufraumenbee.db', check_same_thread=False)
-    
-    # Customer users table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            verified BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    # Customers table (for admin compatibility)
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            address TEXT,
-            preferences TEXT,
-            rating REAL DEFAULT 0,
-            total_jobs INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Service types with multilingual support
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS service_types (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name_en TEXT NOT NULL,
-            name_de TEXT NOT NULL,
-            description_en TEXT,
-            description_de TEXT,
-            base_price REAL,
-            duration_hours INTEGER DEFAULT 2
-        )
-    ''')
-    
-    # Customer bookings
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_user_id INTEGER,
-            service_type TEXT NOT NULL,
-            service_date DATE NOT NULL,
-            service_time TEXT NOT NULL,
-            address TEXT NOT NULL,
-            special_instructions TEXT,
-            status TEXT DEFAULT 'pending',
-            total_price REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_user_id) REFERENCES customer_users (id)
-        )
-    ''')
-    
-    # Password reset codes table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS password_reset_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT NOT NULL,
-            reset_code TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            used BOOLEAN DEFAULT FALSE
-        )
-    ''')
-    
-    # Insert default service types if they don't exist
-    default_services = [
-        ('Basic Cleaning', 'Grundreinigung', 'Standard home cleaning service', 'Standard-Hausreinigungsservice', 45.0, 2),
-        ('Deep Cleaning', 'Tiefenreinigung', 'Thorough deep cleaning service', 'Gründlicher Tiefenreinigungsservice', 75.0, 4),
-        ('Office Cleaning', 'Büroreinigung', 'Professional office cleaning', 'Professionelle Büroreinigung', 55.0, 3),
-        ('Window Cleaning', 'Fensterreinigung', 'Interior and exterior window cleaning', 'Innen- und Außenfensterreinigung', 35.0, 1),
-        ('Carpet Cleaning', 'Teppichreinigung', 'Professional carpet and upholstery cleaning', 'Professionelle Teppich- und Polsterreinigung', 65.0, 2),
-        ('Move-in/Move-out', 'Ein-/Auszugsreinigung', 'Complete cleaning for moving', 'Komplette Reinigung für Umzug', 95.0, 5)
-    ]
-    
-    for service in default_services:
-        try:
-            conn.execute('''INSERT OR IGNORE INTO service_types 
-                           (name_en, name_de, description_en, description_de, base_price, duration_hours) 
-                           VALUES (?, ?, ?, ?, ?, ?)''', service)
-        except:
-            pass
-    
-    conn.commit()
-    return conn
+    # Migrations run once per process; later calls only check out a connection
+    ensure_schema()
+    start_slot_provisioner()
+    return get_connection()
 
 def hash_password(password: str) -> bytes:
     """Hash a password"""
@@ -211,12 +128,8 @@ def register_customer(email: str, password: str, first_name: str, last_name: str
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (email, password_hash, first_name, last_name, phone, address))
         
-        # Also insert into customers table (for admin management)
-        full_name = f"{first_name} {last_name}".strip()
-        cursor.execute('''
-            INSERT INTO customers (name, email, phone, address, preferences)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (full_name, email, phone, address, "Registered via customer portal"))
+        # The customer record for admin management is linked (or created)
+        # by the customer_users insert trigger
         
         conn.commit()
         conn.close()
@@ -457,20 +370,42 @@ def show_services_booking():
         st.markdown("---")
         st.subheader(f"📅 {t('booking_details', current_lang) if 'booking_details' in st.session_state.get('translations', {}) else 'Booking Details'}")
         
+        # Free capacity for the whole window in one query; full days are grayed out
+        first_day, last_day = date.today(), date.today() + timedelta(days=30)
+        availability = get_availability(first_day, last_day)
+        bookable_days = availability.bookable_days()
+        st.markdown(availability_strip_html(availability, labels={
+            'free': t('places_free', current_lang), 'full': t('fully_booked', current_lang)
+        }), unsafe_allow_html=True)
+        if not bookable_days:
+            if has_slots(first_day, last_day):
+                st.warning(t('no_free_dates', current_lang))
+            else:
+                # Nothing provisioned is a setup problem, not a full calendar
+                print(f"⚠️ No time slots between {first_day} and {last_day}; "
+                      f"run python slot_provisioning.py provision", file=sys.stderr)
+                st.info(t('no_slots_provisioned', current_lang))
+            return
+        
+        # Outside the form so the start times follow the chosen date
+        col1, col2 = st.columns(2)
+        with col1:
+            service_date = st.selectbox(
+                t('choose_date', current_lang),
+                bookable_days,
+                format_func=lambda d: f"{format_date(d, current_lang)} · {availability.free[(d - first_day).days]} {t('places_free', current_lang)}"
+            )
+        fits = {fit.start_time: fit for fit in fitting_slots(service_date, int(service.get('duration', 2) * 60))}
+        if not fits:
+            st.warning(t('no_fitting_time', current_lang))
+            return
+        with col2:
+            service_time = st.selectbox(
+                t('choose_time', current_lang), list(fits),
+                format_func=lambda start: f"{start} - {fits[start].end_time}"
+            )
+        
         with st.form("booking_form"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                service_date = st.date_input(
-                    t('choose_date', current_lang),
-                    min_value=date.today(),
-                    max_value=date.today() + timedelta(days=30)
-                )
-            
-            with col2:
-                time_slots = ["09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00"]
-                service_time = st.selectbox(t('choose_time', current_lang), time_slots)
-            
             booking_address = st.text_area(
                 f"🏠 {t('address', current_lang)}*",
                 value=st.session_state.customer_data.get('address', ''),
@@ -496,35 +431,21 @@ def show_services_booking():
                     st.error(t('address_required', current_lang) if 'address_required' in st.session_state.get('translations', {}) else "Address is required")
                     return
                 
-                # Save booking
+                # Claim every slot the service spans in one transaction
+                fit = fits[service_time]
                 try:
-                    conn = init_database()
-                    cursor = conn.cursor()
-                    
-                    # Calculate end time based on service duration
-                    start_dt = datetime.strptime(service_time, '%H:%M')
-                    duration_hours = service.get('duration', 2)  # Default 2 hours
-                    end_dt = start_dt + timedelta(hours=duration_hours)
-                    end_time = end_dt.strftime('%H:%M')
-                    
-                    cursor.execute('''
-                        INSERT INTO customer_bookings 
-                        (customer_user_id, service_type_id, date, start_time, end_time, address, special_instructions, total_price, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                    result = reserve_slots(
+                        list(fit.slot_ids),
                         st.session_state.customer_data['id'],
-                        service['id'],  # Use service ID instead of name
-                        service_date.isoformat(),
-                        service_time,
-                        end_time,
+                        service['id'],
                         booking_address,
-                        special_instructions,
                         service['price'],
-                        'pending'  # Set initial status
-                    ))
-                    
-                    conn.commit()
-                    conn.close()
+                        special_instructions,
+                        end_time=fit.end_time
+                    )
+                    if not result.ok:
+                        st.error(t('slot_taken', current_lang))
+                        return
                     
                     st.success(t('booking_success', current_lang))
                     st.balloons()
@@ -99,12 +99,14 @@ def register_customer(email: str, password: str, first_name: str, last_name: str
         ''', (email.strip(), password_hash, first_name.strip(), last_name.strip(), 
               phone.strip(), address.strip()))
         
-        # Also insert into main customers table (for admin portal visibility)
+        # Also insert into main customers table (for admin portal visibility),
+        # unless the shared schema's identity trigger already linked a record
         cursor.execute('''
             INSERT INTO customers (email, first_name, last_name, phone, address, registration_source)
-            VALUES (?, ?, ?, ?, ?, ?)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM customers WHERE lower(trim(email)) = lower(trim(?)))
         ''', (email.strip(), first_name.strip(), last_name.strip(), 
-              phone.strip(), address.strip(), 'portal'))
+              phone.strip(), address.strip(), 'portal', email))
         
         conn.commit()
         return True
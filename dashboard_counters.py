@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Trigger-maintained dashboard counters for Aufraumenbee
+Keeps running totals in dashboard_counters so dashboards never scan base tables
+"""
+
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from config import Config
+from db_pool import get_connection
+
+# table -> (columns whose UPDATE matters, [(key expr, delta expr, condition)])
+# {r} is replaced by NEW/OLD in triggers and by the table alias when rebuilding.
+COUNTER_RULES: Dict[str, Tuple[List[str], List[Tuple[str, str, str]]]] = {
+    'customers': (['customer_user_id'], [
+        ("'customers:total'", "1", "1"),
+        ("'customers:portal'", "1", "{r}.customer_user_id IS NOT NULL"),
+    ]),
+    'employees': (['status'], [
+        ("'employees:total'", "1", "1"),
+        ("'employees:active'", "1", "{r}.status = 'active'"),
+    ]),
+    'jobs': (['status', 'scheduled_date', 'price', 'created_at'], [
+        ("'jobs:status:' || {r}.status", "1", "{r}.status IS NOT NULL"),
+        ("'jobs:day:' || {r}.scheduled_date", "1",
+         "{r}.status IN ('approved', 'assigned', 'in_progress') AND {r}.scheduled_date IS NOT NULL"),
+        ("'revenue:completed:' || strftime('%Y-%m', {r}.created_at)", "IFNULL({r}.price, 0)",
+         "{r}.status = 'completed' AND {r}.created_at IS NOT NULL"),
+    ]),
+    'invoices': (['status', 'paid_date', 'total_amount'], [
+        ("'revenue:paid:' || strftime('%Y-%m', {r}.paid_date)", "IFNULL({r}.total_amount, 0)",
+         "{r}.status = 'paid' AND {r}.paid_date IS NOT NULL"),
+    ]),
+    'inventory': (['quantity', 'minimum_stock'], [
+        ("'inventory:low_stock'", "1", "{r}.quantity <= {r}.minimum_stock"),
+    ]),
+}
+
+_COLUMN_REF = re.compile(r'\{r\}\.(\w+)')
+
+COUNTERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS dashboard_counters (
+        key TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    )
+'''
+
+
+def _upsert(row: str, sign: str, rules: List[Tuple[str, str, str]]) -> str:
+    """Trigger body statements applying ``sign`` * delta for one row image"""
+    statements = []
+    for key, delta, condition in rules:
+        statements.append(f'''
+                    INSERT INTO dashboard_counters (key, value)
+                    SELECT {key.format(r=row)}, {sign}({delta.format(r=row)})
+                    WHERE {condition.format(r=row)}
+                    ON CONFLICT(key) DO UPDATE SET value = value + excluded.value;''')
+    return ''.join(statements)
+
+
+def _installable_rules(conn: sqlite3.Connection):
+    """COUNTER_RULES minus rules on columns the schema does not have yet.
+
+    Older migrations install the counters before later ones add columns;
+    the migration that adds a column reinstalls them.
+    """
+    for table, (update_columns, rules) in COUNTER_RULES.items():
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        yield table, (
+            [column for column in update_columns if column in columns],
+            [rule for rule in rules
+             if all(column in columns for part in rule for column in _COLUMN_REF.findall(part))],
+        )
+
+
+def install_counters(conn: sqlite3.Connection):
+    """Create the counters table and its triggers, then fill it from scratch"""
+    conn.execute(COUNTERS_TABLE)
+    for table, (update_columns, rules) in _installable_rules(conn):
+        for name in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_counters_{name}")
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_counters_insert AFTER INSERT ON {table}
+            BEGIN{_upsert('NEW', '+', rules)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_counters_delete AFTER DELETE ON {table}
+            BEGIN{_upsert('OLD', '-', rules)}
+            END
+        ''')
+        if update_columns:
+            conn.execute(f'''
+                CREATE TRIGGER trg_{table}_counters_update
+                AFTER UPDATE OF {', '.join(update_columns)} ON {table}
+                BEGIN{_upsert('OLD', '-', rules)}{_upsert('NEW', '+', rules)}
+                END
+            ''')
+    _rebuild(conn)
+
+
+def _expected(conn: sqlite3.Connection) -> Dict[str, float]:
+    """Counter values recomputed from the base tables"""
+    expected: Dict[str, float] = {}
+    for table, (_, rules) in _installable_rules(conn):
+        for key, delta, condition in rules:
+            rows = conn.execute(f'''
+                SELECT {key.format(r='t')}, SUM({delta.format(r='t')})
+                FROM {table} t
+                WHERE {condition.format(r='t')}
+                GROUP BY 1
+            ''').fetchall()
+            for counter_key, value in rows:
+                if value:
+                    expected[counter_key] = expected.get(counter_key, 0) + value
+    return expected
+
+
+def _rebuild(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM dashboard_counters")
+    conn.executemany("INSERT INTO dashboard_counters (key, value) VALUES (?, ?)",
+                     _expected(conn).items())
+
+
+def get_counters(conn: sqlite3.Connection, keys: Iterable[str]) -> Dict[str, float]:
+    """Primary-key lookups for the given counters (missing ones read as 0)"""
+    keys = list(keys)
+    placeholders = ', '.join('?' for _ in keys)
+    found = dict(conn.execute(
+        f"SELECT key, value FROM dashboard_counters WHERE key IN ({placeholders})", keys
+    ).fetchall())
+    return {key: found.get(key, 0) for key in keys}
+
+
+def get_dashboard_counters(conn: sqlite3.Connection) -> Dict:
+    """Standard dashboard metrics for today (UTC, like date('now'))"""
+    now = datetime.now(timezone.utc)
+    today, month = now.strftime('%Y-%m-%d'), now.strftime('%Y-%m')
+    counters = get_counters(conn, [
+        'customers:total', 'customers:portal', 'employees:total', 'employees:active',
+        'jobs:status:pending', f'jobs:day:{today}', f'revenue:completed:{month}',
+        f'revenue:paid:{month}', 'inventory:low_stock',
+    ])
+    return {
+        'total_customers': int(counters['customers:total']),
+        'portal_customers': int(counters['customers:portal']),
+        'total_employees': int(counters['employees:total']),
+        'active_employees': int(counters['employees:active']),
+        'pending_jobs': int(counters['jobs:status:pending']),
+        'today_jobs': int(counters[f'jobs:day:{today}']),
+        'monthly_revenue': counters[f'revenue:completed:{month}'],
+        'monthly_paid_revenue': counters[f'revenue:paid:{month}'],
+        'low_stock_items': int(counters['inventory:low_stock']),
+    }
+
+
+def verify_counters(db_path: str = None) -> Dict[str, Tuple[float, float]]:
+    """Return {key: (stored, expected)} for every counter that has drifted"""
+    conn = get_connection(db_path)
+    try:
+        stored = {key: value for key, value in conn.execute(
+            "SELECT key, value FROM dashboard_counters").fetchall() if value}
+        expected = _expected(conn)
+    finally:
+        conn.close()
+    return {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in set(stored) | set(expected)
+        if abs(stored.get(key, 0) - expected.get(key, 0)) > 1e-6
+    }
+
+
+def rebuild_counters(db_path: str = None):
+    """Recompute every counter from the base tables in one write transaction"""
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _rebuild(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    from migrations import ensure_schema
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'verify'
+    target = sys.argv[2] if len(sys.argv) > 2 else Config.DATABASE_NAME
+    ensure_schema(target)
+
+    if command == 'rebuild':
+        rebuild_counters(target)
+        print("✅ Dashboard counters rebuilt")
+    elif command == 'verify':
+        drift = verify_counters(target)
+        if drift:
+            print(f"❌ {len(drift)} counters differ from the base tables:")
+            for key, (stored, expected) in sorted(drift.items()):
+                print(f"   {key}: stored {stored}, expected {expected}")
+            sys.exit(1)
+        print("✅ Dashboard counters match the base tables")
+    else:
+        print("Usage: python dashboard_counters.py [verify|rebuild] [db_path]")
+        sys.exit(2)
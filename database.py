@@ -2,11 +2,15 @@
 Database utilities for Aufraumenbee cleaning service management system
 """
 
-import sqlite3
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from db_pool import get_pool
+from dashboard_counters import get_dashboard_counters
+from migrations import ensure_schema
+from query_cache import read_sql_cached
+
 class DatabaseManager:
     def __init__(self, db_path: str = "aufraumenbee.db"):
         self.db_path = db_path
@@ -14,132 +18,11 @@ class DatabaseManager:
     
     def get_connection(self):
         """Get database connection"""
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        return get_pool(self.db_path).get_connection()
     
     def init_database(self):
         """Initialize database with all tables"""
-        conn = self.get_connection()
-        
-        # Users table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL,
-                full_name TEXT,
-                email TEXT,
-                phone TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Customers table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                address TEXT,
-                preferences TEXT,
-                rating REAL DEFAULT 0,
-                total_jobs INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Employees table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                skills TEXT,
-                hourly_rate REAL,
-                employment_type TEXT,
-                availability TEXT,
-                background_check BOOLEAN DEFAULT FALSE,
-                rating REAL DEFAULT 0,
-                total_jobs INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Jobs table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER,
-                employee_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT,
-                scheduled_date DATE,
-                scheduled_time TEXT,
-                duration INTEGER,
-                status TEXT DEFAULT 'pending',
-                service_type TEXT,
-                location TEXT,
-                price REAL,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id),
-                FOREIGN KEY (employee_id) REFERENCES employees (id)
-            )
-        ''')
-        
-        # Invoices table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS invoices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id INTEGER,
-                customer_id INTEGER,
-                amount REAL,
-                tax_amount REAL,
-                discount REAL DEFAULT 0,
-                total_amount REAL,
-                status TEXT DEFAULT 'pending',
-                due_date DATE,
-                paid_date DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (job_id) REFERENCES jobs (id),
-                FOREIGN KEY (customer_id) REFERENCES customers (id)
-            )
-        ''')
-        
-        # Inventory table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_name TEXT NOT NULL,
-                category TEXT,
-                quantity INTEGER,
-                unit_price REAL,
-                minimum_stock INTEGER DEFAULT 10,
-                supplier TEXT,
-                last_restocked DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Job feedback table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS job_feedback (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id INTEGER,
-                customer_id INTEGER,
-                rating INTEGER,
-                comments TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (job_id) REFERENCES jobs (id),
-                FOREIGN KEY (customer_id) REFERENCES customers (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        ensure_schema(self.db_path)
     
     def add_sample_data(self):
         """Add sample data for testing"""
@@ -191,14 +74,14 @@ class DatabaseManager:
     def get_customers(self) -> pd.DataFrame:
         """Get all customers"""
         conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM customers ORDER BY created_at DESC", conn)
+        df = read_sql_cached("SELECT * FROM customers ORDER BY created_at DESC", conn)
         conn.close()
         return df
     
     def get_employees(self) -> pd.DataFrame:
         """Get all employees"""
         conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM employees ORDER BY created_at DESC", conn)
+        df = read_sql_cached("SELECT * FROM employees ORDER BY created_at DESC", conn)
         conn.close()
         return df
     
@@ -214,7 +97,7 @@ class DatabaseManager:
                 WHERE j.status = ?
                 ORDER BY j.scheduled_date, j.scheduled_time
             '''
-            df = pd.read_sql_query(query, conn, params=[status])
+            df = read_sql_cached(query, conn, params=[status])
         else:
             query = '''
                 SELECT j.*, c.name as customer_name, e.name as employee_name
@@ -223,39 +106,21 @@ class DatabaseManager:
                 LEFT JOIN employees e ON j.employee_id = e.id
                 ORDER BY j.created_at DESC
             '''
-            df = pd.read_sql_query(query, conn)
+            df = read_sql_cached(query, conn)
         conn.close()
         return df
     
     def get_dashboard_stats(self) -> Dict:
         """Get dashboard statistics"""
         conn = self.get_connection()
+        counters = get_dashboard_counters(conn)
+        conn.close()
         
         stats = {}
-        
-        # Total customers
-        stats['total_customers'] = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
-        
-        # Total employees
-        stats['total_employees'] = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
-        
-        # Pending jobs
-        stats['pending_jobs'] = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
-        
-        # Today's jobs
-        stats['today_jobs'] = conn.execute(
-            "SELECT COUNT(*) FROM jobs WHERE scheduled_date = date('now') AND status IN ('approved', 'assigned', 'in_progress')"
-        ).fetchone()[0]
-        
-        # This month's revenue
-        stats['monthly_revenue'] = conn.execute(
-            "SELECT COALESCE(SUM(price), 0) FROM jobs WHERE status = 'completed' AND strftime('%Y-%m', created_at) = strftime('%Y-%m', 'now')"
-        ).fetchone()[0]
-        
-        # Low stock items
-        stats['low_stock_items'] = conn.execute(
-            "SELECT COUNT(*) FROM inventory WHERE quantity <= minimum_stock"
-        ).fetchone()[0]
-        
-        conn.close()
+        stats['total_customers'] = counters['total_customers']
+        stats['total_employees'] = counters['total_employees']
+        stats['pending_jobs'] = counters['pending_jobs']
+        stats['today_jobs'] = counters['today_jobs']
+        stats['monthly_revenue'] = counters['monthly_revenue']
+        stats['low_stock_items'] = counters['low_stock_items']
         return stats
@@ -0,0 +1,240 @@
+"""
+Pooled SQLite connection manager for Aufraumenbee
+Hands out pre-configured, thread-local connections shared by every portal
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import Config
+from query_metrics import InstrumentedConnection, instrument
+
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply the standard PRAGMA set to a freshly opened connection"""
+    conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+    if conn.execute("PRAGMA database_list").fetchone()[2]:
+        # WAL only makes sense for file databases; ':memory:' reports an empty path
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size = -{int(Config.DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if Config.DB_FOREIGN_KEYS else 'OFF'}")
+    instrument(conn)
+    return conn
+
+
+class PooledConnection(InstrumentedConnection):
+    """sqlite3 connection whose close() hands it back to the owning pool.
+
+    Subclassing keeps isinstance(conn, sqlite3.Connection) true, so pandas and
+    every existing ``conn = ...; ...; conn.close()`` call site work unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool: Optional["ConnectionPool"] = None
+        self.db_path: Optional[str] = None
+        self._checkouts = 0
+
+    def close(self):
+        """Return the connection to its pool instead of closing it"""
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_physical(self):
+        """Really close the underlying SQLite handle"""
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of configured connections with per-thread reuse"""
+
+    def __init__(self, db_path: str, max_connections: int = None, timeout: float = None):
+        self.db_path = db_path
+        self.max_connections = max_connections or Config.DB_POOL_SIZE
+        self.timeout = timeout if timeout is not None else Config.DB_POOL_TIMEOUT
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def _connect(self) -> PooledConnection:
+        """Open and configure a new physical connection"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=PooledConnection)
+        configure_connection(conn)
+        conn.pool = self
+        conn.db_path = self.db_path
+        return conn
+
+    def get_connection(self, exclusive: bool = False) -> PooledConnection:
+        """Check out a connection; repeated calls on one thread share it.
+
+        exclusive=True skips the per-thread sharing, for writers such as the
+        log sink that must never commit someone else's open transaction.
+        """
+        conn = None if exclusive else getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn._checkouts += 1
+            with self._lock:
+                self._stats['hits'] += 1
+            return conn
+
+        conn = None
+        create = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.max_connections:
+                    self._created += 1
+                    create = True
+
+        if conn is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+        elif create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._stats['misses'] += 1
+        else:
+            started = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"Timed out after {self.timeout}s waiting for a connection to {self.db_path}"
+                )
+            waited_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['waits'] += 1
+                self._stats['total_wait_ms'] += waited_ms
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], waited_ms)
+
+        conn._checkouts = 1
+        if not exclusive:
+            self._local.conn = conn
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Give a connection back; it returns to the idle queue on last release"""
+        if conn._checkouts <= 0:
+            # Already released (a second close()): queueing it again would hand it to two threads
+            return
+        conn._checkouts -= 1
+        if conn._checkouts > 0:
+            return
+
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        with self._lock:
+            self._in_use -= 1
+
+        try:
+            if conn.in_transaction:
+                # Callers that close without committing expect their changes dropped
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close_physical()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def connection(self):
+        """Context manager form: ``with pool.connection() as conn:``"""
+        return _Checkout(self)
+
+    def stats(self) -> Dict:
+        """Pool hit/miss and wait-time counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['created'] = self._created
+            stats['in_use'] = self._in_use
+        stats['idle'] = self._idle.qsize()
+        stats['max_connections'] = self.max_connections
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close_physical()
+            with self._lock:
+                self._created -= 1
+
+
+class _Checkout:
+    """Context manager that commits on success and always releases"""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self) -> PooledConnection:
+        self.conn = self.pool.get_connection()
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+        return False
+
+
+# Global pool registry, one pool per database file
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = None) -> ConnectionPool:
+    """Get the shared pool for a database file"""
+    db_path = db_path or Config.DATABASE_NAME
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_path)
+                _pools[key] = pool
+    return pool
+
+
+def get_connection(db_path: str = None, exclusive: bool = False) -> PooledConnection:
+    """Check out a pooled connection; call close() to hand it back"""
+    return get_pool(db_path).get_connection(exclusive=exclusive)
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """Counters for every pool in this process"""
+    return {path: pool.stats() for path, pool in list(_pools.items())}
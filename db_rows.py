@@ -0,0 +1,94 @@
+"""
+Typed row objects for Aufraumenbee
+Plain dataclasses returned by the repository layers instead of DataFrames
+"""
+
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional, Type, TypeVar
+
+T = TypeVar('T')
+
+
+def from_row(cls: Type[T], row: Optional[Mapping]) -> Optional[T]:
+    """Build a row dataclass from the columns it declares, ignoring the rest.
+
+    ``row`` is anything with keys() and item access: a sqlite3.Row or a
+    SQLAlchemy RowMapping.
+    """
+    if row is None:
+        return None
+    keys = row.keys()
+    return cls(**{f.name: row[f.name] for f in fields(cls) if f.name in keys})
+
+
+@dataclass
+class Customer:
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    preferences: Optional[str] = None
+    rating: Optional[float] = None
+    total_jobs: Optional[int] = None
+    customer_user_id: Optional[int] = None
+    created_at: Optional[str] = None
+
+
+@dataclass
+class Service:
+    id: int
+    name: str
+    description: Optional[str] = None
+    base_price: float = 0.0
+    duration_minutes: int = 0
+    category: Optional[str] = None
+    active: bool = True
+
+
+@dataclass
+class Slot:
+    id: int
+    date: str
+    start_time: str
+    end_time: str
+    employee_id: Optional[int] = None
+    max_bookings: int = 1
+    current_bookings: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_bookings - self.current_bookings)
+
+
+@dataclass
+class Booking:
+    id: int
+    customer_user_id: int
+    service_type_id: int
+    slot_id: Optional[int]
+    date: str
+    start_time: str
+    end_time: str
+    address: str
+    special_instructions: Optional[str] = None
+    total_price: float = 0.0
+    status: str = 'pending'
+    created_at: Optional[str] = None
+
+
+@dataclass
+class Job:
+    id: int
+    customer_id: Optional[int]
+    employee_id: Optional[int]
+    title: str
+    scheduled_date: Optional[str] = None
+    scheduled_time: Optional[str] = None
+    duration: Optional[int] = None
+    status: Optional[str] = None
+    service_type: Optional[str] = None
+    location: Optional[str] = None
+    price: Optional[float] = None
+    customer_name: Optional[str] = None
+    employee_name: Optional[str] = None
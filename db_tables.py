@@ -0,0 +1,269 @@
+"""
+SQLAlchemy Core table definitions for Aufraumenbee
+Static mirror of the schema built by migrations.py, so engines never pay for reflection
+"""
+
+from sqlalchemy import (Boolean, CheckConstraint, Column, Float, ForeignKey, Index, Integer, LargeBinary,
+                        MetaData, String, Table, Text, UniqueConstraint, func, text)
+
+metadata = MetaData()
+
+# Dates and timestamps stay ISO-8601 text, exactly as every other module
+# writes and reads them through sqlite3
+IsoText = String(26)
+
+# Column defaults mirror the SQL defaults so create_all() on a server
+# database produces the same behaviour as the SQLite migrations
+def _created_at() -> Column:
+    return Column('created_at', IsoText, server_default=func.current_timestamp())
+
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(100), nullable=False, unique=True),
+    Column('password_hash', Text, nullable=False),
+    Column('role', String(20), nullable=False),
+    Column('full_name', String(200)),
+    Column('email', String(255)),
+    Column('phone', String(50)),
+    _created_at(),
+)
+
+customer_users = Table(
+    'customer_users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('email', String(255), nullable=False, unique=True),
+    Column('password_hash', Text, nullable=False),
+    Column('first_name', String(100), nullable=False),
+    Column('last_name', String(100), nullable=False),
+    Column('phone', String(50)),
+    Column('address', Text),
+    _created_at(),
+    Column('verified', Boolean, server_default=text('FALSE')),
+)
+
+customers = Table(
+    'customers', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('email', String(255)),
+    Column('phone', String(50)),
+    Column('address', Text),
+    Column('preferences', Text),
+    Column('rating', Float, server_default=text('0')),
+    Column('total_jobs', Integer, server_default=text('0')),
+    _created_at(),
+    Column('first_name', String(100)),
+    Column('last_name', String(100)),
+    Column('registration_source', String(20), server_default=text("'admin'")),
+    Column('notes', Text),
+    Column('customer_user_id', Integer, ForeignKey('customer_users.id', ondelete='SET NULL'), unique=True),
+)
+# Index names match migrations.py
+Index('idx_customers_email_norm', func.lower(func.trim(customers.c.email)))
+
+employees = Table(
+    'employees', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('email', String(255)),
+    Column('phone', String(50)),
+    Column('skills', Text),
+    Column('hourly_rate', Float),
+    Column('employment_type', String(20)),
+    Column('availability', Text),
+    Column('background_check', Boolean, server_default=text('FALSE')),
+    Column('rating', Float, server_default=text('0')),
+    Column('total_jobs', Integer, server_default=text('0')),
+    _created_at(),
+    Column('status', String(20), server_default=text("'active'")),
+    Column('specialties', Text),
+    Column('first_name', String(100)),
+    Column('last_name', String(100)),
+    Column('position', String(100)),
+    Column('hire_date', IsoText),
+    Column('home_latitude', Float),
+    Column('home_longitude', Float),
+)
+
+jobs = Table(
+    'jobs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('customer_id', Integer, ForeignKey('customers.id')),
+    Column('employee_id', Integer, ForeignKey('employees.id')),
+    Column('title', String(200), nullable=False),
+    Column('description', Text),
+    Column('scheduled_date', IsoText),
+    Column('scheduled_time', String(5)),
+    Column('duration', Integer),
+    Column('status', String(20), server_default=text("'pending'")),
+    Column('service_type', String(100)),
+    Column('location', Text),
+    Column('price', Float),
+    Column('notes', Text),
+    _created_at(),
+    Column('completed_at', IsoText),
+    Column('duration_hours', Integer, server_default=text('2')),
+    Column('hourly_rate', Float),
+    Column('total_amount', Float),
+    Column('updated_at', IsoText),
+    Column('latitude', Float),
+    Column('longitude', Float),
+)
+Index('idx_jobs_status_date', jobs.c.status, jobs.c.scheduled_date, jobs.c.scheduled_time)
+Index('idx_jobs_date', jobs.c.scheduled_date, jobs.c.scheduled_time)
+Index('idx_jobs_employee_date', jobs.c.employee_id, jobs.c.scheduled_date)
+Index('idx_jobs_customer', jobs.c.customer_id)
+Index('idx_jobs_updated_at', jobs.c.updated_at)
+
+invoices = Table(
+    'invoices', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('job_id', Integer, ForeignKey('jobs.id')),
+    Column('customer_id', Integer, ForeignKey('customers.id')),
+    Column('amount', Float),
+    Column('tax_amount', Float),
+    Column('discount', Float, server_default=text('0')),
+    Column('total_amount', Float),
+    Column('status', String(20), server_default=text("'pending'")),
+    Column('due_date', IsoText),
+    Column('paid_date', IsoText),
+    _created_at(),
+    Column('invoice_number', String(50)),
+    Column('issued_date', IsoText),
+    Column('updated_at', IsoText),
+)
+Index('idx_invoices_updated_at', invoices.c.updated_at)
+
+inventory = Table(
+    'inventory', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('item_name', String(200), nullable=False),
+    Column('category', String(100)),
+    Column('quantity', Integer),
+    Column('unit_price', Float),
+    Column('minimum_stock', Integer, server_default=text('10')),
+    Column('supplier', String(200)),
+    Column('last_restocked', IsoText),
+    _created_at(),
+)
+
+job_feedback = Table(
+    'job_feedback', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('job_id', Integer, ForeignKey('jobs.id')),
+    Column('customer_id', Integer, ForeignKey('customers.id')),
+    Column('rating', Integer),
+    Column('comments', Text),
+    _created_at(),
+)
+
+service_types = Table(
+    'service_types', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('description', Text),
+    Column('base_price', Float, nullable=False),
+    Column('duration_minutes', Integer, nullable=False),
+    Column('category', String(100)),
+    Column('active', Boolean, server_default=text('TRUE')),
+    Column('name_en', String(200)),
+    Column('name_de', String(200)),
+    Column('description_en', Text),
+    Column('description_de', Text),
+    Column('duration_hours', Integer, server_default=text('2')),
+)
+
+time_slots = Table(
+    'time_slots', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('date', IsoText, nullable=False),
+    Column('start_time', String(5), nullable=False),
+    Column('end_time', String(5), nullable=False),
+    Column('available', Boolean, server_default=text('TRUE')),
+    Column('employee_id', Integer),
+    Column('max_bookings', Integer, server_default=text('1')),
+    Column('current_bookings', Integer, server_default=text('0')),
+    _created_at(),
+)
+Index('idx_time_slots_unique', time_slots.c.date, time_slots.c.start_time, time_slots.c.end_time,
+      func.coalesce(time_slots.c.employee_id, 0), unique=True)
+
+slot_templates = Table(
+    'slot_templates', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('weekday', Integer, nullable=False),
+    Column('start_time', String(5), nullable=False),
+    Column('end_time', String(5), nullable=False),
+    Column('max_bookings', Integer, nullable=False, server_default=text('2')),
+    Column('active', Boolean, nullable=False, server_default=text('TRUE')),
+    UniqueConstraint('weekday', 'start_time', 'end_time'),
+    CheckConstraint('weekday BETWEEN 0 AND 6'),
+)
+
+slot_holidays = Table(
+    'slot_holidays', metadata,
+    Column('date', IsoText, primary_key=True),
+    Column('name', String(200)),
+)
+
+customer_bookings = Table(
+    'customer_bookings', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('customer_user_id', Integer, ForeignKey('customer_users.id'), nullable=False),
+    Column('service_type_id', Integer, ForeignKey('service_types.id'), nullable=False),
+    Column('slot_id', Integer, ForeignKey('time_slots.id'), nullable=False),
+    Column('date', IsoText, nullable=False),
+    Column('start_time', String(5), nullable=False),
+    Column('end_time', String(5), nullable=False),
+    Column('address', Text, nullable=False),
+    Column('special_instructions', Text),
+    Column('total_price', Float, nullable=False),
+    Column('status', String(20), server_default=text("'pending'")),
+    _created_at(),
+    Column('updated_at', IsoText),
+)
+Index('idx_customer_bookings_customer', customer_bookings.c.customer_user_id, customer_bookings.c.date,
+      customer_bookings.c.start_time)
+Index('idx_customer_bookings_slot', customer_bookings.c.slot_id)
+Index('idx_customer_bookings_updated_at', customer_bookings.c.updated_at)
+
+booking_slots = Table(
+    'booking_slots', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('booking_id', Integer, ForeignKey('customer_bookings.id', ondelete='CASCADE'), nullable=False),
+    Column('slot_id', Integer, ForeignKey('time_slots.id'), nullable=False),
+    UniqueConstraint('booking_id', 'slot_id'),
+)
+Index('idx_booking_slots_slot', booking_slots.c.slot_id)
+
+employee_availability = Table(
+    'employee_availability', metadata,
+    Column('employee_id', Integer, ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+    Column('source', Text),
+    Column('mask', LargeBinary, nullable=False),
+    Column('parsed', Boolean, nullable=False, server_default=text('TRUE')),
+    Column('compiled_at', IsoText, server_default=func.current_timestamp()),
+)
+
+availability_overrides = Table(
+    'availability_overrides', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('employee_id', Integer, ForeignKey('employees.id', ondelete='CASCADE'), nullable=False),
+    Column('date_from', IsoText, nullable=False),
+    Column('date_to', IsoText),
+    Column('start_time', String(5)),
+    Column('end_time', String(5)),
+    Column('available', Boolean, nullable=False, server_default=text('FALSE')),
+    Column('reason', Text),
+    _created_at(),
+)
+Index('idx_availability_overrides_dates', availability_overrides.c.date_to, availability_overrides.c.date_from)
+
+analytics_deletions = Table(
+    'analytics_deletions', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('table_name', String(50), nullable=False),
+    Column('row_id', Integer, nullable=False),
+    Column('deleted_at', IsoText, nullable=False),
+)
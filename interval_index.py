@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Employee schedule interval index for Aufraumenbee
+Per employee-day sorted job intervals that answer overlap queries with one bisect
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bulk_jobs import CLOSED_STATUSES, DEFAULT_JOB_MINUTES
+from config import Config
+from db_pool import get_connection
+
+DayKey = Tuple[int, str]
+
+
+def to_window(scheduled_time, duration) -> Optional[Tuple[int, int]]:
+    """(start, end) minutes for an HH:MM start and a duration, or None"""
+    try:
+        hours, minutes = str(scheduled_time).split(':')[:2]
+        start = int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return None
+    try:
+        length = int(duration) if duration is not None else DEFAULT_JOB_MINUTES
+    except (TypeError, ValueError):
+        length = DEFAULT_JOB_MINUTES
+    return start, start + max(length, 1)
+
+
+class EmployeeDay:
+    """Jobs of one employee on one day, sorted by start.
+
+    ``reach[i]`` is the latest end among jobs 0..i, so whether anything
+    overlaps [start, end) is one bisect for the last job starting before
+    ``end`` and one comparison with its reach. Listing the overlaps walks
+    back only while that reach still passes ``start``.
+    """
+
+    __slots__ = ('starts', 'ends', 'job_ids', 'reach')
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.job_ids: List[int] = []
+        self.reach: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def _rebuild_reach(self, first: int):
+        latest = self.reach[first - 1] if first else 0
+        for i in range(first, len(self.ends)):
+            latest = max(latest, self.ends[i])
+            self.reach[i] = latest
+
+    def add(self, job_id: int, start: int, end: int):
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.job_ids.insert(index, job_id)
+        self.reach.insert(index, 0)
+        self._rebuild_reach(index)
+
+    def remove(self, job_id: int):
+        index = self.job_ids.index(job_id)
+        for column in (self.starts, self.ends, self.job_ids, self.reach):
+            del column[index]
+        self._rebuild_reach(index)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        index = bisect_left(self.starts, end)
+        return index > 0 and self.reach[index - 1] > start
+
+    def conflicts(self, start: int, end: int, ignore: Iterable[int] = ()) -> List[int]:
+        """Ids of jobs overlapping [start, end), latest start first"""
+        found = []
+        index = bisect_left(self.starts, end) - 1
+        while index >= 0 and self.reach[index] > start:
+            if self.ends[index] > start and self.job_ids[index] not in ignore:
+                found.append(self.job_ids[index])
+            index -= 1
+        return found
+
+
+@dataclass
+class Conflict:
+    """Two open jobs of one employee that overlap"""
+    employee_id: int
+    day: str
+    job_id: int
+    other_job_id: int
+    minutes: int
+
+
+class IntervalIndex:
+    """Open, scheduled jobs of every employee by (employee_id, date).
+
+    Kept current incrementally: after a commit, jobs with a higher id or a
+    newer updated_at and the deletion log (the analytics change tracking)
+    are re-placed. Databases without change tracking, like the admin
+    portal's jobs view, are reloaded instead.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        self.days: Dict[DayKey, EmployeeDay] = {}
+        self.placed: Dict[int, Tuple[DayKey, int, int]] = {}
+        self.data_version = None
+        self.incremental = None
+        self.max_id = 0
+        self.last_stamp = ''
+        self.last_deletion = 0
+
+    def place(self, job_id: int, employee_id, scheduled_date, scheduled_time, duration, status):
+        """Put a job where it belongs now, or take it out when it holds no time"""
+        previous = self.placed.pop(job_id, None)
+        if previous is not None:
+            self.days[previous[0]].remove(job_id)
+        window = to_window(scheduled_time, duration)
+        if employee_id is None or not scheduled_date or window is None or status in CLOSED_STATUSES:
+            return
+        key = (int(employee_id), str(scheduled_date)[:10])
+        self.days.setdefault(key, EmployeeDay()).add(job_id, *window)
+        self.placed[job_id] = (key, *window)
+
+    def _tracked(self) -> bool:
+        is_table = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs'").fetchone()
+        has_log = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics_deletions'").fetchone()
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)").fetchall()}
+        return bool(is_table and has_log and 'updated_at' in columns)
+
+    def _load(self):
+        self.days.clear()
+        self.placed.clear()
+        closed = ', '.join('?' for _ in CLOSED_STATUSES)
+        for row in self.conn.execute(f'''
+            SELECT id, employee_id, scheduled_date, scheduled_time, duration, status
+            FROM jobs
+            WHERE employee_id IS NOT NULL AND scheduled_date IS NOT NULL
+              AND IFNULL(status, 'pending') NOT IN ({closed})
+        ''', CLOSED_STATUSES):
+            self.place(*row)
+        if self.incremental:
+            self.max_id, self.last_stamp = self.conn.execute(
+                "SELECT IFNULL(MAX(id), 0), IFNULL(MAX(updated_at), '') FROM jobs").fetchone()
+            self.last_deletion = self.conn.execute(
+                "SELECT IFNULL(MAX(id), 0) FROM analytics_deletions").fetchone()[0]
+
+    def _catch_up(self):
+        """Re-place jobs inserted, updated or deleted since the last refresh.
+
+        archive.py drops its deletions from the log, but it only moves
+        closed jobs, which are never in the index.
+        """
+        # Stamps are read with >= so a commit landing in the same millisecond is not skipped
+        for row in self.conn.execute('''
+            SELECT id, employee_id, scheduled_date, scheduled_time, duration, status, updated_at
+            FROM jobs WHERE id > ? OR updated_at >= ?
+        ''', (self.max_id, self.last_stamp)):
+            self.place(*row[:6])
+            self.max_id = max(self.max_id, row[0])
+            if row[6] and row[6] > self.last_stamp:
+                self.last_stamp = row[6]
+        for deletion_id, job_id in self.conn.execute('''
+            SELECT id, row_id FROM analytics_deletions WHERE table_name = 'jobs' AND id > ?
+        ''', (self.last_deletion,)).fetchall():
+            self.place(job_id, None, None, None, None, None)
+            self.last_deletion = deletion_id
+
+    def refresh(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        if self.incremental is None:
+            self.incremental = self._tracked()
+            self._load()
+        elif self.incremental:
+            self._catch_up()
+        else:
+            self._load()
+        self.data_version = data_version
+
+    def conflicts(self, employee_id: int, scheduled_date, start: int, end: int,
+                  ignore: Iterable[int] = ()) -> List[int]:
+        day = self.days.get((int(employee_id), str(scheduled_date)[:10]))
+        return day.conflicts(start, end, ignore) if day else []
+
+
+_indexes: Dict[str, IntervalIndex] = {}
+_lock = threading.Lock()
+
+
+def get_interval_index(db_path: str = None) -> IntervalIndex:
+    """The process-wide index for a database, brought up to date.
+
+    Hold the returned index only while holding the write lock (or for a
+    best-effort read); it changes under the next refresh.
+    """
+    path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    with _lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = IntervalIndex(path)
+        index.refresh()
+        return index
+
+
+def find_conflicts(employee_id: int, scheduled_date, scheduled_time, duration, ignore: Iterable[int] = (),
+                   db_path: str = None) -> List[int]:
+    """Open jobs of the employee overlapping a proposed visit"""
+    window = to_window(scheduled_time, duration)
+    if window is None or not scheduled_date:
+        return []
+    return get_interval_index(db_path).conflicts(employee_id, scheduled_date, *window, ignore=ignore)
+
+
+def scan_conflicts(date_from: date, date_to: date, db_path: str = None) -> List[Conflict]:
+    """Every pair of overlapping open jobs in the range, from one indexed read.
+
+    A sweep per employee-day: jobs come sorted by start, and each one is
+    compared only with the earlier jobs still running when it begins.
+    """
+    closed = ', '.join('?' for _ in CLOSED_STATUSES)
+    conn = get_connection(db_path)
+    try:
+        rows = conn.execute(f'''
+            SELECT id, employee_id, scheduled_date, scheduled_time, duration
+            FROM jobs
+            WHERE employee_id IS NOT NULL AND scheduled_date BETWEEN ? AND ?
+              AND IFNULL(status, 'pending') NOT IN ({closed})
+            ORDER BY employee_id, scheduled_date
+        ''', (date_from.isoformat(), date_to.isoformat(), *CLOSED_STATUSES)).fetchall()
+    finally:
+        conn.close()
+
+    days: Dict[DayKey, List[Tuple[int, int, int]]] = {}
+    for job_id, employee_id, scheduled_date, scheduled_time, duration in rows:
+        window = to_window(scheduled_time, duration)
+        if window is not None:
+            days.setdefault((employee_id, str(scheduled_date)[:10]), []).append((*window, job_id))
+
+    found = []
+    for (employee_id, day), jobs in days.items():
+        running: List[Tuple[int, int, int]] = []  # (end, start, job_id), sorted by end
+        for start, end, job_id in sorted(jobs):
+            del running[:bisect_left(running, (start + 1,))]
+            # Everything left ends after this start, so it overlaps
+            for other_end, _, other_id in running:
+                found.append(Conflict(employee_id, day, other_id, job_id, min(end, other_end) - start))
+            insort(running, (end, start, job_id))
+    return found
+
+
+if __name__ == "__main__":
+    # python interval_index.py scan [YYYY-MM]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'scan'
+    if command == 'scan':
+        month = date.fromisoformat(f"{sys.argv[2]}-01") if len(sys.argv) > 2 else date.today().replace(day=1)
+        last = (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        conflicts = scan_conflicts(month, last)
+        print(f"{'⚠️' if conflicts else '✅'} {len(conflicts)} double bookings from {month} to {last}")
+        for c in conflicts:
+            print(f"   employee {c.employee_id} on {c.day}: jobs {c.job_id} and {c.other_job_id} "
+                  f"overlap by {c.minutes} min")
+    else:
+        print("Usage: python interval_index.py scan [YYYY-MM]")
+        sys.exit(2)
@@ -0,0 +1,169 @@
+"""
+Keyset-paginated listings for Aufraumenbee
+Customer and job lists fetched one page at a time with server-side filters and counts
+"""
+
+import base64
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+import pandas as pd
+
+from config import Config
+from dashboard_counters import get_counters
+from query_cache import read_sql_cached
+from search_index import entity_filter, fts_query, matching_ids_sql
+
+
+@dataclass
+class Page:
+    """One page of a listing plus what the UI needs to navigate"""
+    rows: pd.DataFrame
+    total: int
+    page_size: int
+    next_cursor: Optional[str] = None
+    summary: Optional[dict] = None
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+
+def encode_cursor(values: List) -> str:
+    """Opaque, URL-safe cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> List:
+    """Inverse of encode_cursor; raises ValueError on tampered input"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid page cursor")
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Customers: one row per person, portal accounts linked via customer_user_id
+# ---------------------------------------------------------------------------
+
+def list_customers(conn: sqlite3.Connection, search: str = None, cursor: str = None,
+                   page_size: int = None) -> Page:
+    """Newest-first customers, one page at a time.
+
+    ``search`` is matched by word prefix against names, emails, phones and
+    addresses through the full-text index, ignoring case and umlauts.
+    """
+    page_size = page_size or Config.ITEMS_PER_PAGE
+    query = fts_query(search)
+    where, params = [], []
+    if query:
+        where.append(f"id IN ({matching_ids_sql('customer')})")
+        params.append(query)
+    if cursor:
+        created_at, cursor_id = decode_cursor(cursor)
+        # Spelled out (not a row value) so SQLite seeks the keyset index
+        where.append("IFNULL(created_at, '') <= ? AND (IFNULL(created_at, '') < ? OR id < ?)")
+        params += [created_at, created_at, cursor_id]
+
+    rows = read_sql_cached(f'''
+        SELECT id, COALESCE(name, TRIM(IFNULL(first_name, '') || ' ' || IFNULL(last_name, ''))) AS name,
+               email, phone, address, preferences, rating, total_jobs, created_at,
+               CASE WHEN customer_user_id IS NULL THEN 'Manual' ELSE 'Portal Registration' END AS source,
+               IFNULL(created_at, '') AS sort_key
+        FROM customers
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY IFNULL(created_at, '') DESC, id DESC
+        LIMIT {page_size + 1}
+    ''', conn, params=params)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        next_cursor = encode_cursor([last['sort_key'], int(last['id'])])
+
+    return Page(rows.drop(columns=['sort_key']).reset_index(drop=True),
+                count_customers(conn, search), page_size, next_cursor)
+
+
+def count_customers(conn: sqlite3.Connection, search: str = None) -> int:
+    """Total matching customers; the unfiltered total comes from dashboard_counters"""
+    query = fts_query(search)
+    if not query:
+        return int(get_counters(conn, ['customers:total'])['customers:total'])
+    return conn.execute(
+        f"SELECT COUNT(*) FROM search_index WHERE search_index MATCH ? AND {entity_filter(['customer'])}",
+        (query,)
+    ).fetchone()[0]
+
+
+# ---------------------------------------------------------------------------
+# Jobs: schedule order within a date window
+# ---------------------------------------------------------------------------
+
+def _job_filters(date_from: date, date_to: date, status: str = None, employee_name: str = None):
+    where = ["j.scheduled_date BETWEEN ? AND ?"]
+    params = [date_from.strftime('%Y-%m-%d'), date_to.strftime('%Y-%m-%d')]
+    if status:
+        where.append("j.status = ?")
+        params.append(status)
+    if employee_name:
+        where.append("e.name = ?")
+        params.append(employee_name)
+    return where, params
+
+
+def list_jobs(conn: sqlite3.Connection, date_from: date, date_to: date, status: str = None,
+              employee_name: str = None, cursor: str = None, page_size: int = None) -> Page:
+    """Jobs in schedule order, keyed on (scheduled_date, scheduled_time, id)"""
+    page_size = page_size or Config.ITEMS_PER_PAGE
+    where, params = _job_filters(date_from, date_to, status, employee_name)
+    if cursor:
+        after = decode_cursor(cursor)
+        # The leading scheduled_date bound lets SQLite start the index range at the cursor
+        where.append("j.scheduled_date >= ? AND (j.scheduled_date, IFNULL(j.scheduled_time, ''), j.id) > (?, ?, ?)")
+        params += [after[0]] + after
+
+    rows = read_sql_cached(f'''
+        SELECT j.*, c.name as customer_name, c.phone as customer_phone,
+               e.name as employee_name, e.hourly_rate as employee_rate
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        LEFT JOIN employees e ON j.employee_id = e.id
+        WHERE {' AND '.join(where)}
+        ORDER BY j.scheduled_date, IFNULL(j.scheduled_time, ''), j.id
+        LIMIT {page_size + 1}
+    ''', conn, params=params)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        scheduled_time = '' if pd.isna(last['scheduled_time']) else last['scheduled_time']
+        next_cursor = encode_cursor([last['scheduled_date'], scheduled_time, int(last['id'])])
+
+    summary = summarize_jobs(conn, date_from, date_to, status, employee_name)
+    return Page(rows.reset_index(drop=True), summary['total'], page_size, next_cursor, summary)
+
+
+def summarize_jobs(conn: sqlite3.Connection, date_from: date, date_to: date, status: str = None,
+                   employee_name: str = None) -> dict:
+    """Counts and value over every job matching the filters, not just one page"""
+    where, params = _job_filters(date_from, date_to, status, employee_name)
+    total, unassigned, in_progress, value = conn.execute(f'''
+        SELECT COUNT(*),
+               IFNULL(SUM(j.employee_id IS NULL), 0),
+               IFNULL(SUM(j.status = 'in_progress'), 0),
+               IFNULL(SUM(j.price), 0)
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        LEFT JOIN employees e ON j.employee_id = e.id
+        WHERE {' AND '.join(where)}
+    ''', params).fetchone()
+    return {'total': total, 'unassigned': unassigned, 'in_progress': in_progress, 'total_value': value}
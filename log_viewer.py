@@ -6,7 +6,6 @@ Monitor frontend and backend logs in real-time
 
 import streamlit as st
 import pandas as pd
-import sqlite3
 import json
 import time
 from datetime import datetime, timedelta
@@ -14,6 +13,10 @@ from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
 
+from config import Config
+from db_pool import get_connection
+from query_metrics import slow_queries, top_queries
+
 # Try to import auto-refresh, fallback if not available
 try:
     from streamlit_autorefresh import st_autorefresh
@@ -100,7 +103,7 @@ def read_log_file(filename, max_lines=100):
 def get_database_logs(table_name, limit=50):
     """Get logs from database"""
     try:
-        conn = sqlite3.connect('aufraumenbee.db')
+        conn = get_connection()
         
         if table_name == 'activity_logs':
             query = """
@@ -144,7 +147,7 @@ def get_database_logs(table_name, limit=50):
 def display_log_metrics():
     """Display log metrics dashboard"""
     try:
-        conn = sqlite3.connect('aufraumenbee.db')
+        conn = get_connection()
         
         # Get activity counts
         activity_count = pd.read_sql_query(
@@ -218,7 +221,7 @@ def display_log_metrics():
 def display_activity_timeline():
     """Display activity timeline chart"""
     try:
-        conn = sqlite3.connect('aufraumenbee.db')
+        conn = get_connection()
         
         # Get activity timeline data
         query = """
@@ -270,6 +273,71 @@ def format_log_entry(entry, log_type="file"):
         # Database log entry formatting
         return f'<div class="log-entry log-info">{entry}</div>'
 
+def display_database_performance():
+    """Top queries by total time, p95 and call count, plus the slow-query log"""
+    if not Config.DB_QUERY_METRICS_ENABLED:
+        st.info("Query timing is off. Set DB_QUERY_METRICS_ENABLED=true for the portals to record it.")
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        order_labels = {
+            "Total time": "total_ms",
+            "p95 latency": "p95_ms",
+            "Call count": "calls",
+            "Slowest call": "max_ms",
+        }
+        order_label = st.selectbox("Rank queries by:", list(order_labels), key="db_perf_order")
+    with col2:
+        top_n = st.slider("Top N queries:", 5, 100, 20, key="db_perf_top_n")
+    
+    try:
+        conn = get_connection()
+        queries = top_queries(conn, order_labels[order_label], top_n)
+        slow = slow_queries(conn, 100)
+        conn.close()
+    except Exception as e:
+        st.error(f"Error reading query metrics: {e}")
+        return
+    
+    if queries.empty:
+        st.info("No query statistics recorded yet")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Queries shown", f"{queries['calls'].sum():,} calls")
+    with col2:
+        st.metric("Total time", f"{queries['total_ms'].sum() / 1000:,.1f} s")
+    with col3:
+        st.metric("Worst p95", f"{queries['p95_ms'].max():,.1f} ms")
+    
+    # Short labels for the chart; the table keeps the full fingerprint
+    chart = queries.copy()
+    chart['query'] = chart['caller'] + ': ' + chart['fingerprint'].str.slice(0, 60)
+    fig = px.bar(
+        chart.iloc[::-1],
+        x=order_labels[order_label],
+        y='query',
+        orientation='h',
+        hover_data=['calls', 'avg_ms', 'p95_ms', 'max_ms'],
+        title=f"🐢 Top {len(chart)} queries by {order_label.lower()}"
+    )
+    fig.update_layout(height=max(400, 25 * len(chart)), yaxis_title=None)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(
+        queries.round({'total_ms': 1, 'avg_ms': 2, 'p95_ms': 2, 'max_ms': 2,
+                       'rows_per_call': 1, 'statements_per_call': 1}),
+        use_container_width=True,
+        height=400
+    )
+    
+    st.markdown(f"#### 🐌 Slow Queries (≥ {Config.DB_SLOW_QUERY_MS:.0f} ms)")
+    if slow.empty:
+        st.info("No slow queries logged")
+    else:
+        st.dataframe(slow, use_container_width=True, height=300)
+
 def main():
     """Main application"""
     st.title("🔍 Aufraumenbee - Real-Time Log Monitor")
@@ -289,8 +357,9 @@ def main():
     st.markdown("### 📈 Activity Timeline")
     display_activity_timeline()
     
-    # Main log viewer
-    st.markdown("### 📋 Real-Time Logs")
+    logs_tab, performance_tab = st.tabs(["📋 Real-Time Logs", "🗄️ Database Performance"])
+    with performance_tab:
+        display_database_performance()
     
     # Sidebar for log configuration
     with st.sidebar:
@@ -333,8 +402,8 @@ def main():
         if st.button("🔄 Manual Refresh"):
             st.rerun()
     
-    # Main content area
-    col1, col2 = st.columns([2, 1])
+    # Main log viewer
+    col1, col2 = logs_tab.columns([2, 1])
     
     with col1:
         if log_source == "File Logs" and selected_file:
@@ -434,7 +503,7 @@ def main():
         st.markdown("---")
         st.markdown("**Database Status:**")
         try:
-            conn = sqlite3.connect('aufraumenbee.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             tables = ['activity_logs', 'error_logs', 'db_operation_logs', 'api_logs']
@@ -467,7 +536,7 @@ def main():
         if st.button("📊 Export Logs"):
             try:
                 # Export database logs to CSV
-                conn = sqlite3.connect('aufraumenbee.db')
+                conn = get_connection()
                 df = pd.read_sql_query("SELECT * FROM activity_logs ORDER BY timestamp DESC LIMIT 1000", conn)
                 csv = df.to_csv(index=False)
                 st.download_button(
@@ -0,0 +1,1204 @@
+"""
+Versioned schema migrations for Aufraumenbee
+Numbered, forward-only migrations tracked in a schema_version table
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import bcrypt
+
+from config import Config
+from db_pool import get_connection
+
+
+@dataclass
+class Migration:
+    """One numbered schema change.
+
+    ``statements`` and ``apply`` run inside a single BEGIN IMMEDIATE
+    transaction. ``backfill`` runs afterwards and commits in chunks so large
+    data copies never hold the write lock for long; it must be idempotent
+    because the version is only recorded once it has finished.
+    """
+    version: int
+    name: str
+    statements: List[str] = field(default_factory=list)
+    apply: Optional[Callable[[sqlite3.Connection], None]] = None
+    backfill: Optional[Callable[[sqlite3.Connection, int], None]] = None
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Column names of a table (empty if it does not exist)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _add_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]):
+    """ALTER TABLE ADD COLUMN for every column the table is missing"""
+    existing = _columns(conn, table)
+    for column, definition in columns.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _chunked_update(conn: sqlite3.Connection, table: str, sql: str, chunk_size: int):
+    """Run an UPDATE over rowid ranges, committing after each chunk.
+
+    ``sql`` must contain ``rowid >= ? AND rowid < ?`` placeholders.
+    """
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+    for start in range(0, max_rowid + 1, chunk_size):
+        conn.execute(sql, (start, start + chunk_size))
+        conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# Main database (aufraumenbee.db)
+# ---------------------------------------------------------------------------
+
+BASELINE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL,
+        full_name TEXT,
+        email TEXT,
+        phone TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS customers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        address TEXT,
+        preferences TEXT,
+        rating REAL DEFAULT 0,
+        total_jobs INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        skills TEXT,
+        hourly_rate REAL,
+        employment_type TEXT, -- 'permanent' or 'contract'
+        availability TEXT,
+        background_check BOOLEAN DEFAULT FALSE,
+        rating REAL DEFAULT 0,
+        total_jobs INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        employee_id INTEGER,
+        title TEXT NOT NULL,
+        description TEXT,
+        scheduled_date DATE,
+        scheduled_time TEXT,
+        duration INTEGER, -- in minutes
+        status TEXT DEFAULT 'pending', -- pending, approved, assigned, in_progress, completed, cancelled
+        service_type TEXT,
+        location TEXT,
+        price REAL,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        FOREIGN KEY (customer_id) REFERENCES customers (id),
+        FOREIGN KEY (employee_id) REFERENCES employees (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS invoices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER,
+        customer_id INTEGER,
+        amount REAL,
+        tax_amount REAL,
+        discount REAL DEFAULT 0,
+        total_amount REAL,
+        status TEXT DEFAULT 'pending', -- pending, paid, overdue
+        due_date DATE,
+        paid_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES jobs (id),
+        FOREIGN KEY (customer_id) REFERENCES customers (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS inventory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_name TEXT NOT NULL,
+        category TEXT,
+        quantity INTEGER,
+        unit_price REAL,
+        minimum_stock INTEGER DEFAULT 10,
+        supplier TEXT,
+        last_restocked DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS job_feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER,
+        customer_id INTEGER,
+        rating INTEGER,
+        comments TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES jobs (id),
+        FOREIGN KEY (customer_id) REFERENCES customers (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS customer_users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT,
+        address TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        verified BOOLEAN DEFAULT FALSE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS service_types (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        base_price REAL NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        category TEXT,
+        active BOOLEAN DEFAULT TRUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS time_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date DATE NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        available BOOLEAN DEFAULT TRUE,
+        employee_id INTEGER,
+        max_bookings INTEGER DEFAULT 1,
+        current_bookings INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS customer_bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_user_id INTEGER NOT NULL,
+        service_type_id INTEGER NOT NULL,
+        slot_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        address TEXT NOT NULL,
+        special_instructions TEXT,
+        total_price REAL NOT NULL,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (customer_user_id) REFERENCES customer_users (id),
+        FOREIGN KEY (service_type_id) REFERENCES service_types (id),
+        FOREIGN KEY (slot_id) REFERENCES time_slots (id)
+    )
+    ''',
+]
+
+DEFAULT_SERVICES = [
+    ("Regular Cleaning", "Standard house cleaning including dusting, vacuuming, mopping, and bathroom cleaning", 80.0, 120, "Residential"),
+    ("Deep Cleaning", "Thorough cleaning including inside appliances, baseboards, and detailed cleaning", 150.0, 240, "Residential"),
+    ("Move-in/Move-out Cleaning", "Complete cleaning for moving situations including inside cabinets and appliances", 200.0, 300, "Residential"),
+    ("Office Cleaning", "Professional office space cleaning including desks, meeting rooms, and common areas", 100.0, 180, "Commercial"),
+    ("Post-Construction Cleaning", "Specialized cleaning after construction or renovation work", 250.0, 360, "Specialty"),
+    ("Carpet Cleaning", "Professional carpet cleaning and stain removal", 120.0, 150, "Specialty"),
+    ("Window Cleaning", "Interior and exterior window cleaning service", 80.0, 90, "Specialty")
+]
+
+SERVICE_NAME_TRANSLATIONS = {
+    'Regular Cleaning': 'Grundreinigung',
+    'Deep Cleaning': 'Tiefenreinigung',
+    'Move-in/Move-out Cleaning': 'Ein-/Auszugsreinigung',
+    'Office Cleaning': 'Büroreinigung',
+    'Post-Construction Cleaning': 'Baureinigung',
+    'Window Cleaning': 'Fensterreinigung',
+    'Carpet Cleaning': 'Teppichreinigung'
+}
+
+SERVICE_DESCRIPTION_TRANSLATIONS = {
+    'Standard house cleaning including dusting, vacuuming, mopping, and bathroom cleaning':
+        'Standard-Hausreinigung einschließlich Abstauben, Staubsaugen, Wischen und Badezimmerreinigung',
+    'Thorough cleaning including inside appliances, baseboards, and detailed cleaning':
+        'Gründliche Reinigung einschließlich Geräte, Sockelleisten und Detailreinigung',
+    'Complete cleaning for moving situations including inside cabinets and appliances':
+        'Komplette Reinigung für Umzugssituationen einschließlich Schränke und Geräte'
+}
+
+
+def _seed_baseline(conn: sqlite3.Connection):
+    """Default admin user and service catalogue"""
+    admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
+    conn.execute('''
+        INSERT OR IGNORE INTO users (username, password_hash, role, full_name, email)
+        VALUES (?, ?, ?, ?, ?)
+    ''', ("admin", admin_password.decode('utf-8'), "admin", "System Administrator", "admin@aufraumenbee.com"))
+
+    if conn.execute("SELECT COUNT(*) FROM service_types").fetchone()[0] == 0:
+        conn.executemany('''
+            INSERT INTO service_types (name, description, base_price, duration_minutes, category)
+            VALUES (?, ?, ?, ?, ?)
+        ''', DEFAULT_SERVICES)
+
+
+def _employee_columns(conn: sqlite3.Connection):
+    """Columns the admin portals expect on employees"""
+    _add_columns(conn, 'employees', {
+        'status': "TEXT DEFAULT 'active'",
+        'specialties': 'TEXT',
+        'hourly_rate': 'REAL',
+    })
+
+
+def _backfill_employees(conn: sqlite3.Connection, chunk_size: int):
+    """Copy skills into specialties and default status, one rowid range at a time"""
+    columns = _columns(conn, 'employees')
+    if 'skills' in columns:
+        _chunked_update(conn, 'employees', '''
+            UPDATE employees
+            SET specialties = skills
+            WHERE rowid >= ? AND rowid < ?
+              AND (specialties IS NULL OR specialties = '') AND skills IS NOT NULL
+        ''', chunk_size)
+    _chunked_update(conn, 'employees', '''
+        UPDATE employees
+        SET status = 'active'
+        WHERE rowid >= ? AND rowid < ? AND (status IS NULL OR status = '')
+    ''', chunk_size)
+
+
+def _multilingual_services(conn: sqlite3.Connection):
+    """name/description columns per language plus whole-hour durations"""
+    _add_columns(conn, 'service_types', {
+        'name_en': 'TEXT',
+        'name_de': 'TEXT',
+        'description_en': 'TEXT',
+        'description_de': 'TEXT',
+        'duration_hours': 'INTEGER DEFAULT 2',
+    })
+    conn.execute('''
+        UPDATE service_types
+        SET name_en = name, description_en = description
+        WHERE name_en IS NULL OR name_en = ''
+    ''')
+    conn.executemany('''
+        UPDATE service_types SET name_de = ?
+        WHERE name = ? AND (name_de IS NULL OR name_de = '')
+    ''', [(de, en) for en, de in SERVICE_NAME_TRANSLATIONS.items()])
+    conn.executemany('''
+        UPDATE service_types SET description_de = ?
+        WHERE description = ? AND (description_de IS NULL OR description_de = '')
+    ''', [(de, en) for en, de in SERVICE_DESCRIPTION_TRANSLATIONS.items()])
+    conn.execute('''
+        UPDATE service_types
+        SET name_de = name
+        WHERE name_de IS NULL OR name_de = ''
+    ''')
+    conn.execute('''
+        UPDATE service_types
+        SET duration_hours = CAST((duration_minutes + 30) / 60 AS INTEGER)
+        WHERE duration_minutes IS NOT NULL
+    ''')
+
+
+def _production_columns(conn: sqlite3.Connection):
+    """Nullable columns used by app_production's split-name schema"""
+    _add_columns(conn, 'customers', {
+        'name': 'TEXT',
+        'first_name': 'TEXT',
+        'last_name': 'TEXT',
+        'registration_source': "TEXT DEFAULT 'admin'",
+        'notes': 'TEXT',
+    })
+    _add_columns(conn, 'employees', {
+        'name': 'TEXT',
+        'first_name': 'TEXT',
+        'last_name': 'TEXT',
+        'position': 'TEXT',
+        'hire_date': 'DATE',
+    })
+    _add_columns(conn, 'jobs', {
+        'title': 'TEXT',
+        'notes': 'TEXT',
+        'completed_at': 'TIMESTAMP',
+        'duration_hours': 'INTEGER DEFAULT 2',
+        'hourly_rate': 'REAL',
+        'total_amount': 'REAL',
+    })
+    _add_columns(conn, 'invoices', {
+        'total_amount': 'REAL',
+        'paid_date': 'DATE',
+        'invoice_number': 'TEXT',
+        'issued_date': 'DATE',
+    })
+    _add_columns(conn, 'inventory', {
+        'category': 'TEXT',
+        'last_restocked': 'DATE',
+    })
+    _add_columns(conn, 'users', {
+        'full_name': 'TEXT',
+        'email': 'TEXT',
+        'phone': 'TEXT',
+    })
+
+
+LOG_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS activity_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        component TEXT,
+        action TEXT,
+        user_info TEXT,
+        details TEXT,
+        caller TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS error_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        component TEXT,
+        error_type TEXT,
+        error_message TEXT,
+        traceback TEXT,
+        context TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS db_operation_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        operation TEXT,
+        table_name TEXT,
+        details TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS api_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        endpoint TEXT,
+        method TEXT,
+        user_info TEXT,
+        request_data TEXT,
+        response_status INTEGER
+    )
+    ''',
+]
+
+PASSWORD_RESET_TABLE = '''
+    CREATE TABLE IF NOT EXISTS password_reset_codes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL,
+        reset_code TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NOT NULL,
+        used BOOLEAN DEFAULT FALSE
+    )
+'''
+
+
+HOT_PATH_INDEXES = [
+    # Jobs dashboard / job board: status + date window, ordered by schedule
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_date ON jobs (status, scheduled_date, scheduled_time)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_date ON jobs (scheduled_date, scheduled_time)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_employee_date ON jobs (employee_id, scheduled_date)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_customer ON jobs (customer_id)",
+    # Customer portal: "my bookings" and slot cancellations
+    "CREATE INDEX IF NOT EXISTS idx_customer_bookings_customer ON customer_bookings (customer_user_id, date, start_time)",
+    "CREATE INDEX IF NOT EXISTS idx_customer_bookings_slot ON customer_bookings (slot_id)",
+    # One slot per date/time/employee; also serves the per-date slot listing.
+    # NULL employee ids never collide in a plain UNIQUE, hence IFNULL.
+    '''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_time_slots_unique
+    ON time_slots (date, start_time, end_time, IFNULL(employee_id, 0))
+    ''',
+    # Log viewer time windows
+    "CREATE INDEX IF NOT EXISTS idx_activity_logs_timestamp ON activity_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_error_logs_timestamp ON error_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_db_operation_logs_timestamp ON db_operation_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_api_logs_timestamp ON api_logs (timestamp)",
+]
+
+
+def _dedupe_time_slots(conn: sqlite3.Connection):
+    """Merge duplicate slots into the oldest row so the UNIQUE index can build"""
+    conn.execute('''
+        CREATE TEMP TABLE slot_duplicates AS
+        SELECT ts.id AS duplicate_id, keep.keep_id
+        FROM time_slots ts
+        JOIN (
+            SELECT MIN(id) AS keep_id, date, start_time, end_time, IFNULL(employee_id, 0) AS employee_key
+            FROM time_slots
+            GROUP BY date, start_time, end_time, IFNULL(employee_id, 0)
+            HAVING COUNT(*) > 1
+        ) keep ON ts.date = keep.date
+              AND ts.start_time = keep.start_time
+              AND ts.end_time = keep.end_time
+              AND IFNULL(ts.employee_id, 0) = keep.employee_key
+              AND ts.id <> keep.keep_id
+    ''')
+    conn.execute('''
+        UPDATE time_slots
+        SET current_bookings = current_bookings + (
+                SELECT IFNULL(SUM(dup.current_bookings), 0)
+                FROM slot_duplicates d JOIN time_slots dup ON dup.id = d.duplicate_id
+                WHERE d.keep_id = time_slots.id
+            ),
+            max_bookings = MAX(max_bookings, (
+                SELECT IFNULL(MAX(dup.max_bookings), 0)
+                FROM slot_duplicates d JOIN time_slots dup ON dup.id = d.duplicate_id
+                WHERE d.keep_id = time_slots.id
+            ))
+        WHERE id IN (SELECT keep_id FROM slot_duplicates)
+    ''')
+    conn.execute('''
+        UPDATE customer_bookings
+        SET slot_id = (SELECT keep_id FROM slot_duplicates WHERE duplicate_id = customer_bookings.slot_id)
+        WHERE slot_id IN (SELECT duplicate_id FROM slot_duplicates)
+    ''')
+    conn.execute("DELETE FROM time_slots WHERE id IN (SELECT duplicate_id FROM slot_duplicates)")
+    conn.execute("DROP TABLE temp.slot_duplicates")
+
+
+def _hot_path_indexes(conn: sqlite3.Connection):
+    """Curated secondary indexes for the dashboard, portal and log viewer"""
+    _dedupe_time_slots(conn)
+    for statement in HOT_PATH_INDEXES:
+        conn.execute(statement)
+
+    # customer_users.email is UNIQUE (and so indexed) in every schema we ship,
+    # but hand-made databases may lack the constraint
+    email_indexed = any(
+        conn.execute(f"PRAGMA index_info('{index[1]}')").fetchone()[2] == 'email'
+        for index in conn.execute("PRAGMA index_list(customer_users)").fetchall()
+    )
+    if not email_indexed:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_users_email ON customer_users (email)")
+    conn.execute("ANALYZE")
+
+
+# Tables whose writes bump table_versions; read by query_cache for invalidation
+VERSIONED_TABLES = [
+    'users', 'customers', 'employees', 'jobs', 'invoices', 'inventory', 'job_feedback',
+    'customer_users', 'service_types', 'time_slots', 'customer_bookings',
+]
+
+
+def _version_triggers(conn: sqlite3.Connection, tables: List[str]):
+    """Per-table write counters kept current by AFTER triggers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in tables:
+        conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+
+# Match the ORDER BY expressions used by listings.py exactly
+KEYSET_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_customers_keyset ON customers (IFNULL(created_at, ''), id)",
+    "CREATE INDEX IF NOT EXISTS idx_customer_users_keyset ON customer_users (IFNULL(created_at, ''), id)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_schedule_keyset ON jobs (scheduled_date, IFNULL(scheduled_time, ''), id)",
+]
+
+
+def _dashboard_counters(conn: sqlite3.Connection):
+    """Trigger-maintained totals read by the dashboards"""
+    from dashboard_counters import install_counters
+    install_counters(conn)
+
+
+JOB_BULK_AUDIT_TABLE = '''
+    CREATE TABLE IF NOT EXISTS job_bulk_audit (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        action TEXT NOT NULL,
+        parameters TEXT,
+        requested INTEGER NOT NULL,
+        updated INTEGER NOT NULL,
+        rejected INTEGER NOT NULL,
+        outcomes TEXT,
+        job_ids TEXT,
+        performed_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+QUERY_METRICS_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS query_stats (
+        db_name TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        caller TEXT NOT NULL,
+        calls INTEGER NOT NULL,
+        total_ms REAL NOT NULL,
+        max_ms REAL NOT NULL,
+        p95_ms REAL NOT NULL,
+        row_count INTEGER NOT NULL,
+        statements INTEGER NOT NULL,
+        histogram TEXT NOT NULL,
+        last_seen TIMESTAMP,
+        PRIMARY KEY (db_name, fingerprint, caller)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS slow_query_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fingerprint TEXT NOT NULL,
+        sql_text TEXT NOT NULL,
+        caller TEXT,
+        db_name TEXT,
+        elapsed_ms REAL NOT NULL,
+        row_count INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+
+ARCHIVE_CATALOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS archive_catalog (
+        month TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, table_name)
+    )
+'''
+
+
+SLOT_PROVISIONING_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS slot_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        weekday INTEGER NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        max_bookings INTEGER NOT NULL DEFAULT 2,
+        active BOOLEAN NOT NULL DEFAULT TRUE,
+        UNIQUE (weekday, start_time, end_time)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS slot_holidays (
+        date TEXT PRIMARY KEY,
+        name TEXT
+    )
+    ''',
+]
+
+# The windows get_available_slots used to create on first view, every day of the week
+DEFAULT_SLOT_WINDOWS = [("08:00", "10:00"), ("10:00", "12:00"), ("12:00", "14:00"),
+                        ("14:00", "16:00"), ("16:00", "18:00")]
+
+
+def _seed_slot_templates(conn: sqlite3.Connection):
+    """Templates reproducing the old on-demand default slots"""
+    if conn.execute("SELECT COUNT(*) FROM slot_templates").fetchone()[0] == 0:
+        conn.executemany('''
+            INSERT INTO slot_templates (weekday, start_time, end_time, max_bookings)
+            VALUES (?, ?, ?, 2)
+        ''', [(weekday, start, end) for weekday in range(7) for start, end in DEFAULT_SLOT_WINDOWS])
+
+
+
+def _slot_day_versions(conn: sqlite3.Connection):
+    """Per-day write counters for time_slots; availability.py caches ranges on them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS slot_day_versions (
+            date TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    bump = '''
+        INSERT INTO slot_day_versions (date, version) VALUES ({row}.date, 1)
+        ON CONFLICT (date) DO UPDATE SET version = version + 1;
+    '''
+    for event, rows in (('INSERT', ['NEW']), ('DELETE', ['OLD']), ('UPDATE', ['OLD', 'NEW'])):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_time_slots_day_version_{event.lower()}
+            AFTER {event} ON time_slots
+            BEGIN
+                {''.join(bump.format(row=row) for row in rows)}
+            END
+        ''')
+
+
+# Every slot a booking holds; customer_bookings.slot_id stays the first one
+BOOKING_SLOTS_TABLE = [
+    '''
+    CREATE TABLE IF NOT EXISTS booking_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        booking_id INTEGER NOT NULL,
+        slot_id INTEGER NOT NULL,
+        UNIQUE (booking_id, slot_id),
+        FOREIGN KEY (booking_id) REFERENCES customer_bookings (id) ON DELETE CASCADE,
+        FOREIGN KEY (slot_id) REFERENCES time_slots (id)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_booking_slots_slot ON booking_slots (slot_id)",
+]
+
+
+# Compiled employees.availability plus dated exceptions; see availability_model.py
+EMPLOYEE_AVAILABILITY_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS employee_availability (
+        employee_id INTEGER PRIMARY KEY,
+        source TEXT,
+        mask BLOB NOT NULL,
+        parsed BOOLEAN NOT NULL DEFAULT TRUE,
+        compiled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (employee_id) REFERENCES employees (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS availability_overrides (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL,
+        date_from DATE NOT NULL,
+        date_to DATE,
+        start_time TEXT,
+        end_time TEXT,
+        available BOOLEAN NOT NULL DEFAULT FALSE,
+        reason TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (employee_id) REFERENCES employees (id) ON DELETE CASCADE
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_availability_overrides_dates ON availability_overrides (date_to, date_from)",
+]
+
+
+def _backfill_employee_availability(conn: sqlite3.Connection, chunk_size: int):
+    """Compile every employee's availability text, one id range per commit"""
+    from availability_model import compile_employees
+
+    last = conn.execute("SELECT IFNULL(MAX(id), 0) FROM employees").fetchone()[0]
+    for low in range(0, last + 1, chunk_size):
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM employees WHERE id >= ? AND id < ?", (low, low + chunk_size))]
+        if ids:
+            compile_employees(conn, ids)
+            conn.commit()
+
+
+def _search_index(conn: sqlite3.Connection):
+    """FTS5 index over people, contact details and booking notes"""
+    from search_index import install_search_index
+    install_search_index(conn)
+
+
+def _analytics_change_tracking(conn: sqlite3.Connection):
+    """updated_at stamps and a deletion log for the columnar analytics export"""
+    from analytics_store import install_change_tracking
+    install_change_tracking(conn)
+
+
+def _normalized_email(alias: str) -> str:
+    return f"lower(trim({alias}.email))"
+
+
+def _coordinates(conn: sqlite3.Connection):
+    """Where each job takes place and where each employee starts the day (routing.py)"""
+    _add_columns(conn, 'jobs', {'latitude': 'REAL', 'longitude': 'REAL'})
+    _add_columns(conn, 'employees', {'home_latitude': 'REAL', 'home_longitude': 'REAL'})
+
+
+def _customer_identity(conn: sqlite3.Connection):
+    """Link portal accounts to customer records instead of writing both tables"""
+    from dashboard_counters import install_counters
+    from search_index import install_search_index
+
+    _add_columns(conn, 'customers', {
+        'customer_user_id': 'INTEGER REFERENCES customer_users (id) ON DELETE SET NULL',
+    })
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_email_norm ON customers (lower(trim(email)))")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_users_email_norm ON customer_users (lower(trim(email)))")
+
+    # A new portal account claims the oldest unlinked record with its email,
+    # or gets a fresh one; profile edits flow to the linked record
+    conn.execute("DROP TRIGGER IF EXISTS trg_customer_users_identity_insert")
+    conn.execute("DROP TRIGGER IF EXISTS trg_customer_users_identity_update")
+    conn.execute(f'''
+        CREATE TRIGGER trg_customer_users_identity_insert AFTER INSERT ON customer_users
+        BEGIN
+            UPDATE customers
+            SET customer_user_id = NEW.id,
+                phone = COALESCE(NULLIF(phone, ''), NEW.phone),
+                address = COALESCE(NULLIF(address, ''), NEW.address)
+            WHERE id = (
+                SELECT MIN(c.id) FROM customers c
+                WHERE {_normalized_email('c')} = lower(trim(NEW.email)) AND c.customer_user_id IS NULL
+            );
+            INSERT INTO customers (name, first_name, last_name, email, phone, address, preferences,
+                                   registration_source, customer_user_id)
+            SELECT TRIM(IFNULL(NEW.first_name, '') || ' ' || IFNULL(NEW.last_name, '')),
+                   NEW.first_name, NEW.last_name, NEW.email, NEW.phone, NEW.address,
+                   'Registered via customer portal', 'portal', NEW.id
+            WHERE NOT EXISTS (SELECT 1 FROM customers WHERE customer_user_id = NEW.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER trg_customer_users_identity_update
+        AFTER UPDATE OF email, first_name, last_name, phone, address ON customer_users
+        BEGIN
+            UPDATE customers
+            SET name = TRIM(IFNULL(NEW.first_name, '') || ' ' || IFNULL(NEW.last_name, '')),
+                first_name = NEW.first_name,
+                last_name = NEW.last_name,
+                email = NEW.email,
+                phone = NEW.phone,
+                address = NEW.address
+            WHERE customer_user_id = NEW.id;
+        END
+    ''')
+
+    # Portal accounts are now counted through customers.customer_user_id
+    for event in ('insert', 'update', 'delete'):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_customer_users_counters_{event}")
+    install_counters(conn)
+    # Customer names now fall back to first/last name for split-name rows
+    install_search_index(conn)
+
+
+# Tables whose customer_id points at customers.id
+CUSTOMER_REFERENCES = [('jobs', 'customer_id'), ('invoices', 'customer_id'), ('job_feedback', 'customer_id')]
+
+
+def _backfill_customer_identity(conn: sqlite3.Connection, chunk_size: int):
+    """Merge customers sharing a normalized email, then link every portal account.
+
+    Both passes walk id ranges and commit per chunk. Duplicates fold into the
+    oldest record and their jobs, invoices and feedback move with them.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS customer_merge (dup_id INTEGER PRIMARY KEY, keep_id INTEGER)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS customer_link (customer_user_id INTEGER PRIMARY KEY, customer_id INTEGER)")
+    references = [(table, column) for table, column in CUSTOMER_REFERENCES if column in _columns(conn, table)]
+
+    max_id = conn.execute("SELECT MAX(id) FROM customers").fetchone()[0] or 0
+    for start in range(0, max_id + 1, chunk_size):
+        conn.execute("DELETE FROM customer_merge")
+        conn.execute(f'''
+            INSERT INTO customer_merge (dup_id, keep_id)
+            SELECT c.id, (SELECT MIN(k.id) FROM customers k WHERE {_normalized_email('k')} = {_normalized_email('c')})
+            FROM customers c
+            WHERE c.id >= ? AND c.id < ? AND trim(IFNULL(c.email, '')) <> ''
+        ''', (start, start + chunk_size))
+        conn.execute("DELETE FROM customer_merge WHERE keep_id = dup_id")
+        conn.execute('''
+            UPDATE customers
+            SET customer_user_id = (
+                SELECT d.customer_user_id FROM customer_merge m JOIN customers d ON d.id = m.dup_id
+                WHERE m.keep_id = customers.id AND d.customer_user_id IS NOT NULL
+                ORDER BY d.id LIMIT 1
+            )
+            WHERE customer_user_id IS NULL AND id IN (SELECT keep_id FROM customer_merge)
+        ''')
+        for table, column in references:
+            conn.execute(f'''
+                UPDATE {table}
+                SET {column} = (SELECT keep_id FROM customer_merge WHERE dup_id = {table}.{column})
+                WHERE {column} IN (SELECT dup_id FROM customer_merge)
+            ''')
+        conn.execute("DELETE FROM customers WHERE id IN (SELECT dup_id FROM customer_merge)")
+        conn.commit()
+
+    max_id = conn.execute("SELECT MAX(id) FROM customer_users").fetchone()[0] or 0
+    for start in range(0, max_id + 1, chunk_size):
+        conn.execute("DELETE FROM customer_link")
+        conn.execute(f'''
+            INSERT INTO customer_link (customer_user_id, customer_id)
+            SELECT cu.id, (
+                SELECT MIN(c.id) FROM customers c
+                WHERE {_normalized_email('c')} = {_normalized_email('cu')} AND c.customer_user_id IS NULL
+            )
+            FROM customer_users cu
+            WHERE cu.id >= ? AND cu.id < ?
+              AND NOT EXISTS (SELECT 1 FROM customers x WHERE x.customer_user_id = cu.id)
+        ''', (start, start + chunk_size))
+        conn.execute('''
+            UPDATE customers
+            SET customer_user_id = (SELECT MIN(l.customer_user_id) FROM customer_link l WHERE l.customer_id = customers.id)
+            WHERE customer_user_id IS NULL AND id IN (SELECT customer_id FROM customer_link)
+        ''')
+        conn.execute('''
+            INSERT INTO customers (name, first_name, last_name, email, phone, address, preferences,
+                                   registration_source, customer_user_id, created_at)
+            SELECT TRIM(IFNULL(cu.first_name, '') || ' ' || IFNULL(cu.last_name, '')),
+                   cu.first_name, cu.last_name, cu.email, cu.phone, cu.address,
+                   'Registered via customer portal', 'portal', cu.id, cu.created_at
+            FROM customer_link l JOIN customer_users cu ON cu.id = l.customer_user_id
+            WHERE l.customer_id IS NULL
+        ''')
+        conn.commit()
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_customer_user ON customers (customer_user_id)")
+    conn.commit()
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'baseline schema', statements=BASELINE_TABLES, apply=_seed_baseline),
+    Migration(2, 'employee status and specialties', apply=_employee_columns, backfill=_backfill_employees),
+    Migration(3, 'multilingual service types', apply=_multilingual_services),
+    Migration(4, 'production portal columns', apply=_production_columns),
+    Migration(5, 'log and password reset tables', statements=LOG_TABLES + [PASSWORD_RESET_TABLE]),
+    Migration(6, 'hot path indexes', apply=_hot_path_indexes),
+    Migration(7, 'table version counters', apply=lambda conn: _version_triggers(conn, VERSIONED_TABLES)),
+    Migration(8, 'dashboard counters', apply=_dashboard_counters),
+    Migration(9, 'listing keyset indexes', statements=KEYSET_INDEXES),
+    Migration(10, 'full-text search index', apply=_search_index),
+    Migration(11, 'bulk job audit', statements=[JOB_BULK_AUDIT_TABLE]),
+    Migration(12, 'customer identity', apply=_customer_identity, backfill=_backfill_customer_identity),
+    Migration(13, 'analytics change tracking', apply=_analytics_change_tracking),
+    Migration(14, 'query metrics', statements=QUERY_METRICS_TABLES),
+    Migration(15, 'archive catalog', statements=[ARCHIVE_CATALOG_TABLE]),
+    Migration(16, 'slot templates', statements=SLOT_PROVISIONING_TABLES, apply=_seed_slot_templates),
+    Migration(17, 'slot day versions', apply=_slot_day_versions),
+    Migration(18, 'booking slots', statements=BOOKING_SLOTS_TABLE),
+    Migration(19, 'employee availability', statements=EMPLOYEE_AVAILABILITY_TABLES,
+              apply=lambda conn: _version_triggers(conn, ['employee_availability', 'availability_overrides']),
+              backfill=_backfill_employee_availability),
+    Migration(20, 'job and employee coordinates', apply=_coordinates),
+    # Masks compiled before "9-5" read as 9 to 17 and empty ranges were flagged
+    Migration(21, 'recompile employee availability', statements=["UPDATE employee_availability SET source = NULL"],
+              backfill=_backfill_employee_availability),
+]
+
+
+# ---------------------------------------------------------------------------
+# React backend database used by admin_portal_multilingual
+# ---------------------------------------------------------------------------
+
+# bookings.estimated_duration is in hours; the view speaks minutes like every other jobs.duration
+ADMIN_JOBS_VIEW = '''
+    CREATE VIEW IF NOT EXISTS jobs AS
+    SELECT
+        b.id,
+        b.user_id as customer_id,
+        b.cleaner_id as employee_id,
+        st.name as title,
+        b.special_instructions as description,
+        b.service_date as scheduled_date,
+        b.service_time as scheduled_time,
+        b.estimated_duration * 60 as duration,
+        b.status,
+        st.name as service_type,
+        b.address as location,
+        b.total_price as price,
+        b.created_at
+    FROM bookings b
+    LEFT JOIN service_types st ON b.service_type_id = st.id
+    LEFT JOIN users u ON b.user_id = u.id
+'''
+
+
+def _admin_backend_baseline(conn: sqlite3.Connection):
+    """Admin tables plus jobs/customers views over the React bookings tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT DEFAULT 'admin',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS customer_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            verified BOOLEAN DEFAULT FALSE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            hourly_rate REAL,
+            specialties TEXT,
+            availability TEXT,
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _add_columns(conn, 'employees', {'status': "TEXT DEFAULT 'active'", 'specialties': 'TEXT'})
+    conn.execute("UPDATE employees SET status = 'active' WHERE status IS NULL OR status = ''")
+
+    has_backend = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('bookings', 'users')"
+    ).fetchone()[0] == 2
+    if has_backend:
+        # Expose React bookings/users in the admin portal's jobs/customers shape
+        conn.execute(ADMIN_JOBS_VIEW)
+        conn.execute('''
+            CREATE VIEW IF NOT EXISTS customers AS
+            SELECT
+                u.id,
+                (u.first_name || ' ' || u.last_name) as name,
+                u.email,
+                u.phone,
+                u.address,
+                '' as preferences,
+                0 as rating,
+                (SELECT COUNT(*) FROM bookings WHERE user_id = u.id) as total_jobs,
+                u.created_at
+            FROM users u
+            WHERE u.role = 'customer'
+        ''')
+    else:
+        # React backend not initialised yet: fall back to plain tables
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                customer_id INTEGER,
+                employee_id INTEGER,
+                title TEXT NOT NULL,
+                description TEXT,
+                scheduled_date DATE,
+                scheduled_time TEXT,
+                duration INTEGER,
+                status TEXT DEFAULT 'pending',
+                service_type TEXT,
+                location TEXT,
+                price REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS customers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT,
+                phone TEXT,
+                address TEXT,
+                preferences TEXT,
+                rating REAL DEFAULT 0,
+                total_jobs INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    password_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt())
+    conn.execute('INSERT OR IGNORE INTO admin_users (username, password_hash) VALUES (?, ?)',
+                 ('admin', password_hash))
+
+
+def _admin_backend_job_writes(conn: sqlite3.Connection):
+    """Bulk audit table, and writable jobs when it is a view over bookings"""
+    conn.execute(JOB_BULK_AUDIT_TABLE)
+    is_view = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'view' AND name = 'jobs'"
+    ).fetchone()[0]
+    if not is_view:
+        return
+    conn.execute("DROP TRIGGER IF EXISTS trg_jobs_view_update")
+    conn.execute("DROP TRIGGER IF EXISTS trg_jobs_view_delete")
+    conn.execute('''
+        CREATE TRIGGER trg_jobs_view_update INSTEAD OF UPDATE ON jobs
+        BEGIN
+            UPDATE bookings SET
+                cleaner_id = NEW.employee_id,
+                special_instructions = NEW.description,
+                service_date = NEW.scheduled_date,
+                service_time = NEW.scheduled_time,
+                estimated_duration = NEW.duration / 60.0,
+                status = NEW.status,
+                address = NEW.location,
+                total_price = NEW.price,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER trg_jobs_view_delete INSTEAD OF DELETE ON jobs
+        BEGIN
+            DELETE FROM bookings WHERE id = OLD.id;
+        END
+    ''')
+
+
+def _admin_backend_minutes(conn: sqlite3.Connection):
+    """Rebuild the jobs view (and its write triggers) with durations in minutes"""
+    is_view = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'view' AND name = 'jobs'"
+    ).fetchone()[0]
+    if not is_view:
+        return
+    conn.execute("DROP VIEW jobs")
+    conn.execute(ADMIN_JOBS_VIEW)
+    _admin_backend_job_writes(conn)
+
+
+ADMIN_BACKEND_MIGRATIONS: List[Migration] = [
+    Migration(1, 'admin portal baseline', apply=_admin_backend_baseline),
+    Migration(2, 'job writes and bulk audit', apply=_admin_backend_job_writes),
+    Migration(3, 'job durations in minutes', apply=_admin_backend_minutes),
+]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Highest applied migration, 0 for a database that was never migrated"""
+    try:
+        return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def migrate(db_path: str = None, migrations: List[Migration] = None,
+            chunk_size: int = None, verbose: bool = False) -> int:
+    """Apply every pending migration and return the resulting version.
+
+    Each migration runs under BEGIN IMMEDIATE and re-reads the version once it
+    holds the write lock, so concurrent processes never apply one twice.
+    """
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        return migrate_connection(conn, migrations, chunk_size, verbose)
+    finally:
+        conn.close()
+
+
+def migrate_connection(conn: sqlite3.Connection, migrations: List[Migration] = None,
+                       chunk_size: int = None, verbose: bool = False) -> int:
+    """``migrate`` on an already open connection, e.g. a shared in-memory database"""
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+    chunk_size = chunk_size or Config.MIGRATION_CHUNK_SIZE
+    conn.execute(SCHEMA_VERSION_TABLE)
+    conn.commit()
+    current = get_schema_version(conn)
+
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = get_schema_version(conn)
+            if migration.version <= current:
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(statement)
+            if migration.apply:
+                migration.apply(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if migration.backfill:
+            migration.backfill(conn, chunk_size)
+
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_version (version, name) VALUES (?, ?)",
+            (migration.version, migration.name)
+        )
+        conn.commit()
+        current = migration.version
+        if verbose:
+            print(f"✅ Applied migration {migration.version}: {migration.name}")
+
+    return current
+
+
+# Databases already verified by this process, keyed by absolute path
+_checked: Dict[str, int] = {}
+_checked_lock = threading.Lock()
+
+
+def ensure_schema(db_path: str = None, migrations: List[Migration] = None) -> int:
+    """Bring a database up to date once per process.
+
+    After the first call for a path this is a dict lookup; the first call
+    itself costs a single ``SELECT MAX(version)`` when the schema is current.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    migrations = migrations or MIGRATIONS
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    version = _checked.get(key)
+    if version is not None:
+        return version
+
+    with _checked_lock:
+        version = _checked.get(key)
+        if version is not None:
+            return version
+
+        latest = max(m.version for m in migrations)
+        conn = get_connection(db_path, exclusive=True)
+        try:
+            version = get_schema_version(conn)
+        finally:
+            conn.close()
+        if version < latest:
+            version = migrate(db_path, migrations)
+        _checked[key] = version
+        return version
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_NAME
+    print(f"🔧 Migrating {target}...")
+    version = migrate(target, verbose=True)
+    print(f"✅ Schema is at version {version}")
@@ -0,0 +1,167 @@
+"""
+Table-versioned DataFrame cache for Aufraumenbee
+Serves repeated read_sql_query calls from memory until a table they read changes
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from config import Config
+from typed_frames import read_sql_typed
+
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)', re.IGNORECASE)
+# Results that depend on the clock cannot be keyed on table versions alone
+_TIME_DEPENDENT = re.compile(r"'now'", re.IGNORECASE)
+# Sentinel dependency for tables without a version counter
+_DATA_VERSION = '__data_version__'
+
+
+class _VersionWatcher:
+    """Cheap change detection for one database file.
+
+    ``PRAGMA data_version`` on a private connection changes whenever any other
+    connection commits, so the table_versions snapshot is only re-read after
+    an actual write.
+    """
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}")
+        self.data_version = None
+        self.versions: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, int]:
+        """Current table versions (plus the raw data_version)"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            try:
+                self.versions = dict(self.conn.execute(
+                    "SELECT table_name, version FROM table_versions"
+                ).fetchall())
+            except sqlite3.OperationalError:
+                # Schema not migrated yet: only the global version is usable
+                self.versions = {}
+            self.versions[_DATA_VERSION] = data_version
+            self.data_version = data_version
+        return self.versions
+
+
+class QueryCache:
+    """Byte-bounded LRU of query results, invalidated per table"""
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else Config.QUERY_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[Tuple, Tuple[pd.DataFrame, Dict[str, int], int]]" = OrderedDict()
+        self._watchers: Dict[str, _VersionWatcher] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _watcher(self, db_path: str) -> _VersionWatcher:
+        watcher = self._watchers.get(db_path)
+        if watcher is None:
+            watcher = _VersionWatcher(db_path)
+            self._watchers[db_path] = watcher
+        return watcher
+
+    @staticmethod
+    def _dependencies(sql: str, versions: Dict[str, int]) -> Dict[str, int]:
+        """Versions of the tables a query reads, at the time it is run"""
+        tables = {name.lower() for name in _TABLE_REF.findall(sql)}
+        deps = {}
+        for table in tables:
+            if table in versions:
+                deps[table] = versions[table]
+            else:
+                deps[_DATA_VERSION] = versions[_DATA_VERSION]
+        return deps or {_DATA_VERSION: versions[_DATA_VERSION]}
+
+    def read_sql(self, sql: str, conn: sqlite3.Connection, params=None,
+                 db_path: str = None, typed: bool = False) -> pd.DataFrame:
+        """pd.read_sql_query with caching; falls back to a plain read when unsafe.
+
+        typed=True applies the typed_frames schema; the typed frame is what gets
+        cached, so hits skip the conversion as well as the query.
+        """
+        read = read_sql_typed if typed else pd.read_sql_query
+        db_path = db_path or getattr(conn, 'db_path', None)
+        if (db_path is None or db_path == ':memory:' or conn.in_transaction
+                or _TIME_DEPENDENT.search(sql) or self.max_bytes <= 0):
+            # Unknown file, uncommitted writes of our own, or clock-dependent SQL
+            with self._lock:
+                self._stats['bypassed'] += 1
+            return read(sql, conn, params=params)
+
+        key = (os.path.abspath(db_path), sql, tuple(params) if params is not None else None, typed)
+        with self._lock:
+            versions = self._watcher(key[0]).snapshot()
+            entry = self._entries.get(key)
+            if entry is not None:
+                df, deps, size = entry
+                if all(versions.get(table) == version for table, version in deps.items()):
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return df.copy()
+                self._drop(key)
+                self._stats['invalidations'] += 1
+            self._stats['misses'] += 1
+            # Taken before the read so a concurrent write can only make us refetch
+            deps = self._dependencies(sql, versions)
+
+        df = read(sql, conn, params=params)
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size <= self.max_bytes:
+            with self._lock:
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (df, deps, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self._stats['evictions'] += 1
+        return df.copy()
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Forget every cached result"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['max_bytes'] = self.max_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Global cache instance
+_query_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Get the process-wide query cache"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryCache()
+    return _query_cache
+
+
+def read_sql_cached(sql: str, conn: sqlite3.Connection, params=None,
+                    typed: bool = False) -> pd.DataFrame:
+    """Drop-in replacement for pd.read_sql_query on pooled connections"""
+    return get_query_cache().read_sql(sql, conn, params=params, typed=typed)
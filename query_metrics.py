@@ -0,0 +1,431 @@
+"""
+Query timing instrumentation for Aufraumenbee
+Opt-in per-query latency histograms and a slow-query log for every data-layer connection
+"""
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import Config
+
+# Upper bounds (ms) of the latency buckets: 10 µs doubling up to ~80 s
+BUCKET_BOUNDS_MS = [0.01 * 2 ** i for i in range(24)]
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Frames in these modules are plumbing, not the code that asked for the query
+_PLUMBING = {'query_metrics.py', 'db_pool.py', 'query_cache.py'}
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUE_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """Normalized SQL: literals become ?, IN lists and VALUES rows collapse, whitespace folds"""
+    text = _COMMENTS.sub(' ', sql)
+    text = _STRINGS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _VALUE_ROWS.sub(r'\1, ...', text)
+    text = _IN_LISTS.sub('(?, ...)', text)
+    return _SPACES.sub(' ', text).strip().rstrip(';').strip()
+
+
+def _caller() -> str:
+    """module.function of the first application frame outside the data-layer plumbing"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_REPO_DIR) and os.path.basename(filename) not in _PLUMBING:
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+@dataclass
+class QueryStats:
+    """Latency histogram and totals for one (fingerprint, caller) pair"""
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    statements: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKET_BOUNDS_MS) + 1))
+
+    def add(self, elapsed_ms: float, rows: int, statements: int):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+        self.statements += statements
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+
+    def merge(self, other: 'QueryStats'):
+        self.calls += other.calls
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.rows += other.rows
+        self.statements += other.statements
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls"""
+        return percentile(self.buckets, fraction, self.max_ms)
+
+
+def percentile(buckets: List[int], fraction: float, max_ms: float) -> float:
+    """Percentile estimate from histogram buckets, capped at the slowest call seen"""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    wanted = fraction * total
+    running = 0
+    for index, count in enumerate(buckets):
+        running += count
+        if running >= wanted:
+            bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else max_ms
+            return min(bound, max_ms)
+    return max_ms
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    sql: str
+    caller: str
+    database: str
+    elapsed_ms: float
+    rows: int
+    created_at: str
+
+
+class _Registry:
+    """Process-wide stats collected since the last flush"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: Dict[Tuple[str, str, str], QueryStats] = {}
+        self.slow: deque = deque(maxlen=1000)
+        self.flusher: Optional[threading.Thread] = None
+
+    def record(self, sql: str, caller: str, database: str, elapsed_ms: float, rows: int, statements: int):
+        key = (database, fingerprint(sql), caller)
+        with self.lock:
+            stats = self.pending.get(key)
+            if stats is None:
+                stats = self.pending[key] = QueryStats()
+            stats.add(elapsed_ms, rows, statements)
+            if elapsed_ms >= Config.DB_SLOW_QUERY_MS:
+                self.slow.append(SlowQuery(key[1], sql[:2000], caller, database, round(elapsed_ms, 3),
+                                           rows, datetime.now().isoformat(sep=' ', timespec='seconds')))
+
+    def take(self) -> Tuple[Dict[Tuple[str, str, str], QueryStats], List[SlowQuery]]:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            slow = list(self.slow)
+            self.slow.clear()
+        return pending, slow
+
+
+_registry = _Registry()
+
+
+def record(sql: str, elapsed_ms: float, rows: int = -1, statements: int = 1,
+           caller: str = None, database: str = ''):
+    """Add one timed query; for callers that time queries themselves"""
+    _registry.record(sql, caller or _caller(), database, elapsed_ms, rows, statements)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execute and fetch calls and counts returned rows.
+
+    A query is recorded once its results are exhausted, the cursor runs its
+    next statement, or the cursor is closed or collected; time the caller
+    spends between fetches is not counted.
+    """
+
+    _sql = None
+
+    def _begin(self, sql: str):
+        self._finish()
+        self._sql = sql
+        self._elapsed = 0.0
+        self._rows = 0
+        self._caller = _caller()
+        self._traced_from = self.connection._metrics_traced
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        statements = self.connection._metrics_traced - self._traced_from
+        _registry.record(sql, self._caller, self.connection._metrics_database,
+                         self._elapsed * 1000, self._rows, statements)
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql)
+        try:
+            self._timed(super().execute, sql, parameters)
+        except Exception:
+            self._finish()
+            raise
+        if self.description is None:
+            self._rows = self.rowcount
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql)
+        try:
+            self._timed(super().executemany, sql, seq_of_parameters)
+            self._rows = self.rowcount
+        finally:
+            self._finish()
+        return self
+
+    def executescript(self, sql_script):
+        self._begin(sql_script)
+        try:
+            self._timed(super().executescript, sql_script)
+        finally:
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection that hands out InstrumentedCursors once instrument() is called.
+
+    Until then it behaves exactly like sqlite3.Connection, so the class can
+    be used unconditionally as a connect() factory.
+    """
+
+    _metrics = False
+    _metrics_traced = 0
+    _metrics_database = ''
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = InstrumentedCursor if self._metrics else sqlite3.Cursor
+        return super().cursor(factory)
+
+    # The C shortcuts skip a cursor subclass's execute(), so route them through it
+    def execute(self, sql, parameters=()):
+        if not self._metrics:
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not self._metrics:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        if not self._metrics:
+            return super().executescript(sql_script)
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        if not self._metrics or not self.in_transaction:
+            return super().commit()
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _registry.record('COMMIT', _caller(), self._metrics_database,
+                             (time.perf_counter() - started) * 1000, -1, 1)
+
+    def _trace(self, statement: str):
+        # Fires for every statement SQLite runs, including each executemany
+        # row and the statements inside triggers
+        self._metrics_traced += 1
+
+
+def instrument(conn: sqlite3.Connection) -> bool:
+    """Switch on timing for a connection when DB_QUERY_METRICS_ENABLED is set"""
+    if not Config.DB_QUERY_METRICS_ENABLED or not isinstance(conn, InstrumentedConnection):
+        return False
+    conn._metrics_database = os.path.basename(conn.execute("PRAGMA database_list").fetchone()[2] or ':memory:')
+    conn.set_trace_callback(conn._trace)
+    conn._metrics = True
+    _start_flusher()
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Persistence, so the log viewer process can read every process's numbers
+# ---------------------------------------------------------------------------
+
+def flush(db_path: str = None) -> int:
+    """Merge the collected stats into query_stats and slow_query_log; returns keys written.
+
+    Every process writes to the main database (Config.DATABASE_NAME), which
+    is where the log viewer reads; db_name tells the sources apart.
+    """
+    pending, slow = _registry.take()
+    if not pending and not slow:
+        return 0
+    db_path = db_path or Config.DATABASE_NAME
+    try:
+        # A plain connection, so the flush itself stays out of the stats; mode=rw
+        # never creates a database that was not there
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=rw", uri=True,
+                               timeout=Config.DB_BUSY_TIMEOUT_MS / 1000)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not flush query metrics to {db_path}: {e}", file=sys.stderr)
+        return 0
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for (database, query, caller), stats in pending.items():
+            row = conn.execute('''
+                SELECT calls, total_ms, max_ms, row_count, statements, histogram
+                FROM query_stats WHERE db_name = ? AND fingerprint = ? AND caller = ?
+            ''', (database, query, caller)).fetchone()
+            if row is not None:
+                stats.merge(QueryStats(row[0], row[1], row[2], row[3], row[4], json.loads(row[5])))
+            conn.execute('''
+                INSERT OR REPLACE INTO query_stats
+                    (db_name, fingerprint, caller, calls, total_ms, max_ms, row_count, statements,
+                     histogram, p95_ms, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (database, query, caller, stats.calls, stats.total_ms, stats.max_ms, stats.rows,
+                  stats.statements, json.dumps(stats.buckets), stats.percentile(0.95)))
+        conn.executemany('''
+            INSERT INTO slow_query_log (fingerprint, sql_text, caller, db_name, elapsed_ms, row_count, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(s.fingerprint, s.sql, s.caller, s.database, s.elapsed_ms, s.rows, s.created_at) for s in slow])
+        conn.execute('''
+            DELETE FROM slow_query_log
+            WHERE id <= (SELECT MAX(id) FROM slow_query_log) - ?
+        ''', (Config.DB_SLOW_QUERY_LOG_MAX_ROWS,))
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"⚠️ Could not flush query metrics to {db_path}: {e}", file=sys.stderr)
+        return 0
+    finally:
+        conn.close()
+    return len(pending)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(Config.DB_QUERY_METRICS_FLUSH_SECONDS)
+        flush()
+
+
+def _start_flusher():
+    with _registry.lock:
+        if _registry.flusher is not None:
+            return
+        _registry.flusher = threading.Thread(target=_flush_loop, name='aufraumenbee-query-metrics',
+                                             daemon=True)
+        _registry.flusher.start()
+    atexit.register(flush)
+
+
+def top_queries(conn: sqlite3.Connection, order_by: str = 'total_ms', limit: int = 20) -> pd.DataFrame:
+    """Heaviest query fingerprints across all processes, for the log viewer"""
+    if order_by not in ('total_ms', 'p95_ms', 'calls', 'max_ms'):
+        raise ValueError(f"Cannot order query stats by {order_by!r}")
+    return pd.read_sql_query(f'''
+        SELECT fingerprint, caller, db_name, calls, total_ms,
+               total_ms / calls AS avg_ms, p95_ms, max_ms,
+               CAST(row_count AS REAL) / calls AS rows_per_call,
+               CAST(statements AS REAL) / calls AS statements_per_call, last_seen
+        FROM query_stats
+        ORDER BY {order_by} DESC
+        LIMIT ?
+    ''', conn, params=(limit,))
+
+
+def slow_queries(conn: sqlite3.Connection, limit: int = 100) -> pd.DataFrame:
+    """Most recent slow-query log entries"""
+    return pd.read_sql_query('''
+        SELECT created_at, elapsed_ms, caller, db_name, row_count, sql_text
+        FROM slow_query_log
+        ORDER BY id DESC
+        LIMIT ?
+    ''', conn, params=(limit,))
+
+
+def reset(conn: sqlite3.Connection):
+    """Forget collected stats, in this process and in the database"""
+    _registry.take()
+    conn.execute("DELETE FROM query_stats")
+    conn.execute("DELETE FROM slow_query_log")
+    conn.commit()
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_NAME
+    conn = sqlite3.connect(target)
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_colwidth', 80)
+    print("🐢 Top queries by total time")
+    print(top_queries(conn, limit=15)[['calls', 'total_ms', 'p95_ms', 'caller', 'fingerprint']].to_string(index=False))
+    conn.close()
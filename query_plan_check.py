@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for Aufraumenbee
+Runs EXPLAIN QUERY PLAN over the registered hot queries and fails on table scans
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+from config import Config
+from db_pool import configure_connection
+from migrations import migrate_connection
+
+# name -> (sql, sample params). Keep these in sync with the call sites they mirror.
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    'jobs_dashboard_by_status': ('''
+        SELECT j.*, c.name as customer_name, c.phone as customer_phone,
+               e.name as employee_name, e.hourly_rate as employee_rate
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        LEFT JOIN employees e ON j.employee_id = e.id
+        WHERE j.scheduled_date BETWEEN ? AND ? AND j.status = ?
+        ORDER BY j.scheduled_date, j.scheduled_time
+    ''', ('2025-01-01', '2025-01-14', 'pending')),
+    'jobs_dashboard_all': ('''
+        SELECT j.*, c.name as customer_name, c.phone as customer_phone,
+               e.name as employee_name, e.hourly_rate as employee_rate
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        LEFT JOIN employees e ON j.employee_id = e.id
+        WHERE j.scheduled_date BETWEEN ? AND ?
+        ORDER BY j.scheduled_date, j.scheduled_time
+    ''', ('2025-01-01', '2025-01-14')),
+    'job_board_by_status': ('''
+        SELECT j.*, c.name as customer_name, e.name as employee_name
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        LEFT JOIN employees e ON j.employee_id = e.id
+        WHERE j.status = ? AND j.scheduled_date >= date('now', '-7 days')
+        ORDER BY j.scheduled_date, j.scheduled_time
+    ''', ('assigned',)),
+    'customers_page_keyset': ('''
+        SELECT id, name, email, created_at
+        FROM customers
+        WHERE IFNULL(created_at, '') <= ? AND (IFNULL(created_at, '') < ? OR id < ?)
+        ORDER BY IFNULL(created_at, '') DESC, id DESC
+        LIMIT 11
+    ''', ('2025-01-01 00:00:00', '2025-01-01 00:00:00', 100)),
+    'jobs_page_keyset': ('''
+        SELECT j.*, c.name as customer_name
+        FROM jobs j
+        JOIN customers c ON j.customer_id = c.id
+        WHERE j.scheduled_date BETWEEN ? AND ?
+          AND j.scheduled_date >= ? AND (j.scheduled_date, IFNULL(j.scheduled_time, ''), j.id) > (?, ?, ?)
+        ORDER BY j.scheduled_date, IFNULL(j.scheduled_time, ''), j.id
+        LIMIT 11
+    ''', ('2025-01-01', '2025-01-14', '2025-01-03', '2025-01-03', '10:00', 42)),
+    'customer_search': ('''
+        SELECT id, name, email, created_at
+        FROM customers
+        WHERE id IN (SELECT rowid / 4 FROM search_index WHERE search_index MATCH ? AND rowid % 4 = 0)
+        ORDER BY IFNULL(created_at, '') DESC, id DESC
+        LIMIT 11
+    ''', ('"konig"*',)),
+    'customer_by_email': ('''
+        SELECT id, customer_user_id FROM customers WHERE lower(trim(email)) = lower(trim(?))
+    ''', ('Anna@Example.de',)),
+    'customer_by_portal_account': ('''
+        SELECT id FROM customers WHERE customer_user_id = ?
+    ''', (1,)),
+    'customer_bookings': ('''
+        SELECT cb.id, st.name, cb.date, cb.start_time, cb.end_time,
+               cb.address, cb.total_price, cb.status, cb.created_at
+        FROM customer_bookings cb
+        JOIN service_types st ON cb.service_type_id = st.id
+        WHERE cb.customer_user_id = ?
+        ORDER BY cb.date DESC, cb.start_time DESC
+    ''', (1,)),
+    'available_slots': ('''
+        SELECT id, start_time, end_time
+        FROM time_slots
+        WHERE date = ? AND available = TRUE AND current_bookings < max_bookings
+        ORDER BY start_time
+    ''', ('2025-01-01',)),
+    'customer_login': ('''
+        SELECT id, password_hash, first_name, last_name, phone, address
+        FROM customer_users WHERE email = ?
+    ''', ('someone@example.com',)),
+    'activity_logs_last_hour': (
+        "SELECT COUNT(*) as count FROM activity_logs WHERE timestamp > datetime('now', '-1 hour')", ()),
+    'error_logs_last_hour': (
+        "SELECT COUNT(*) as count FROM error_logs WHERE timestamp > datetime('now', '-1 hour')", ()),
+    'db_operation_logs_last_hour': (
+        "SELECT COUNT(*) as count FROM db_operation_logs WHERE timestamp > datetime('now', '-1 hour')", ()),
+    'api_logs_last_hour': (
+        "SELECT COUNT(*) as count FROM api_logs WHERE timestamp > datetime('now', '-1 hour')", ()),
+}
+
+# "SCAN jobs" / "SCAN j" without a following USING ... INDEX is a full table scan;
+# FTS5 lookups show as "SCAN x VIRTUAL TABLE INDEX n:M..." and are index driven
+_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW|SUBQUERY)(\S+)(?!\S)(?!.*USING (COVERING )?INDEX)(?! VIRTUAL TABLE INDEX \d+:M)')
+
+
+def explain(conn, sql: str, params: tuple) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for one query"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def find_table_scans(plan: List[str]) -> List[str]:
+    """Plan lines that scan a whole table"""
+    return [line for line in plan if _FULL_SCAN.match(line)]
+
+
+def check_query_plans(db_path: str = None, queries: Dict[str, Tuple[str, tuple]] = None,
+                      verbose: bool = False) -> Dict[str, List[str]]:
+    """Return {query name: offending plan lines} for every hot query that scans.
+
+    The database is never written: plans come from a temporary copy (with
+    its sqlite_stat1 statistics) brought up to the current schema. Raises
+    FileNotFoundError when ``db_path`` does not exist.
+    """
+    db_path = db_path or Config.DATABASE_NAME
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"No database at {db_path}")
+    workdir = tempfile.mkdtemp(prefix='aufraumenbee_plans_')
+    failures = {}
+    try:
+        source = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        conn = sqlite3.connect(os.path.join(workdir, 'plans.db'))
+        try:
+            source.backup(conn)
+            source.close()
+            configure_connection(conn)
+            migrate_connection(conn)
+            for name, (sql, params) in (queries or HOT_QUERIES).items():
+                plan = explain(conn, sql, params)
+                scans = find_table_scans(plan)
+                if verbose:
+                    print(f"{'❌' if scans else '✅'} {name}")
+                    for line in plan:
+                        print(f"      {line}")
+                if scans:
+                    failures[name] = scans
+        finally:
+            source.close()
+            conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return failures
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_NAME
+    if not os.path.isfile(target):
+        print(f"❌ No database at {target}; pass the path of an existing database")
+        sys.exit(2)
+    print(f"🔍 Checking query plans against a migrated copy of {target}...")
+    failures = check_query_plans(target, verbose=True)
+    if failures:
+        print(f"\n❌ {len(failures)} hot queries fall back to a table scan:")
+        for name, scans in failures.items():
+            print(f"   {name}: {'; '.join(scans)}")
+        sys.exit(1)
+    print(f"\n✅ All {len(HOT_QUERIES)} hot queries use an index")
@@ -14,10 +14,12 @@ import threading
 import queue
 import json
 from typing import Dict, Any, Optional
-import sqlite3
 import inspect
 import traceback
 
+from db_pool import get_connection
+from migrations import ensure_schema
+
 class RealtimeLogger:
     """Enhanced logging system with real-time monitoring capabilities"""
     
@@ -147,24 +149,13 @@ class RealtimeLogger:
     
     def _store_to_database(self, log_data: Dict[str, Any], table: str = 'activity_logs'):
         """Store log data to database for analytics"""
+        conn = None
         try:
-            conn = sqlite3.connect('aufraumenbee.db')
+            ensure_schema()
+            conn = get_connection(exclusive=True)
             cursor = conn.cursor()
             
-            # Create table if not exists
             if table == 'activity_logs':
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS activity_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        component TEXT,
-                        action TEXT,
-                        user_info TEXT,
-                        details TEXT,
-                        caller TEXT
-                    )
-                ''')
-                
                 cursor.execute('''
                     INSERT INTO activity_logs (component, action, user_info, details, caller)
                     VALUES (?, ?, ?, ?, ?)
@@ -177,18 +168,6 @@ class RealtimeLogger:
                 ))
             
             elif table == 'error_logs':
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS error_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        component TEXT,
-                        error_type TEXT,
-                        error_message TEXT,
-                        traceback TEXT,
-                        context TEXT
-                    )
-                ''')
-                
                 cursor.execute('''
                     INSERT INTO error_logs (component, error_type, error_message, traceback, context)
                     VALUES (?, ?, ?, ?, ?)
@@ -201,16 +180,6 @@ class RealtimeLogger:
                 ))
             
             elif table == 'db_operation_logs':
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS db_operation_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        operation TEXT,
-                        table_name TEXT,
-                        details TEXT
-                    )
-                ''')
-                
                 cursor.execute('''
                     INSERT INTO db_operation_logs (operation, table_name, details)
                     VALUES (?, ?, ?)
@@ -221,18 +190,6 @@ class RealtimeLogger:
                 ))
             
             elif table == 'api_logs':
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS api_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        endpoint TEXT,
-                        method TEXT,
-                        user_info TEXT,
-                        request_data TEXT,
-                        response_status INTEGER
-                    )
-                ''')
-                
                 cursor.execute('''
                     INSERT INTO api_logs (endpoint, method, user_info, request_data, response_status)
                     VALUES (?, ?, ?, ?, ?)
@@ -245,11 +202,13 @@ class RealtimeLogger:
                 ))
             
             conn.commit()
-            conn.close()
             
         except Exception as e:
             # Fallback to console logging if database fails
             print(f"Failed to store log to database: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
     
     def _monitor_logs(self):
         """Background thread to monitor logs in real-time"""
@@ -0,0 +1,146 @@
+"""
+Atomic time slot reservations for Aufraumenbee
+Claims slot capacity and records the booking in one write transaction
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Optional
+
+from db_pool import get_connection
+
+
+class ReservationStatus(Enum):
+    """Outcome of a reservation attempt"""
+    RESERVED = 'reserved'
+    SLOT_FULL = 'slot_full'
+    SLOT_NOT_FOUND = 'slot_not_found'
+
+
+@dataclass
+class ReservationResult:
+    """Typed result returned by reserve_slot"""
+    status: ReservationStatus
+    booking_id: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status is ReservationStatus.RESERVED
+
+
+def reserve_slot(slot_id: int, customer_user_id: int, service_type_id: int, address: str,
+                 total_price: float, special_instructions: str = None,
+                 db_path: str = None) -> ReservationResult:
+    """Claim one unit of slot capacity and insert the booking.
+
+    BEGIN IMMEDIATE takes the write lock up front, and the capacity check
+    lives in the UPDATE's WHERE clause, so two customers racing for the last
+    place can never both see it free. The booking row is only inserted when
+    the claim succeeded; otherwise the transaction is rolled back.
+    """
+    return reserve_slots([slot_id], customer_user_id, service_type_id, address,
+                         total_price, special_instructions, db_path=db_path)
+
+
+def reserve_slots(slot_ids: List[int], customer_user_id: int, service_type_id: int, address: str,
+                  total_price: float, special_instructions: str = None, end_time: str = None,
+                  db_path: str = None) -> ReservationResult:
+    """Claim back-to-back slots for one booking, all or nothing.
+
+    Same locking as reserve_slot; every slot is claimed in the one
+    transaction and the booking keeps the list in booking_slots so
+    release_slot can give all of them back. ``end_time`` is the job's own
+    end when it finishes before the last slot does (see slot_fitting).
+    Raises ValueError if the slots are not contiguous on one employee-day.
+    """
+    if not slot_ids:
+        raise ValueError("No slots to reserve")
+    # Own connection: the thread-shared one may hold a caller's open transaction
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for slot_id in slot_ids:
+            claimed = conn.execute('''
+                UPDATE time_slots
+                SET current_bookings = current_bookings + 1
+                WHERE id = ? AND available = TRUE AND current_bookings < max_bookings
+            ''', (slot_id,)).rowcount
+            if not claimed:
+                exists = conn.execute("SELECT 1 FROM time_slots WHERE id = ?", (slot_id,)).fetchone()
+                conn.rollback()
+                return ReservationResult(
+                    ReservationStatus.SLOT_FULL if exists else ReservationStatus.SLOT_NOT_FOUND
+                )
+
+        slots = conn.execute(f'''
+            SELECT date, start_time, end_time, IFNULL(employee_id, 0) FROM time_slots
+            WHERE id IN ({', '.join('?' * len(slot_ids))}) ORDER BY start_time
+        ''', list(slot_ids)).fetchall()
+        contiguous = len(slots) == len(set(slot_ids)) and all(
+            later[0] == earlier[0] and later[3] == earlier[3] and later[1] == earlier[2]
+            for earlier, later in zip(slots, slots[1:])
+        )
+        if not contiguous:
+            conn.rollback()
+            raise ValueError(f"Slots {list(slot_ids)} are not back-to-back on one day")
+
+        slot_date, start_time = slots[0][0], slots[0][1]
+        cursor = conn.execute('''
+            INSERT INTO customer_bookings
+            (customer_user_id, service_type_id, slot_id, date, start_time, end_time,
+             address, special_instructions, total_price)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (customer_user_id, service_type_id, slot_ids[0], slot_date, start_time,
+              end_time or slots[-1][2], address, special_instructions, total_price))
+        conn.executemany("INSERT INTO booking_slots (booking_id, slot_id) VALUES (?, ?)",
+                         [(cursor.lastrowid, slot_id) for slot_id in slot_ids])
+        conn.commit()
+        return ReservationResult(ReservationStatus.RESERVED, cursor.lastrowid)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def release_slot(booking_id: int, delete: bool = False, db_path: str = None) -> bool:
+    """Cancel (or delete) a booking and give its capacity back.
+
+    Capacity is only returned while the booking still holds it, so cancelling
+    and then deleting the same booking frees the slot exactly once.
+    Returns False if the booking does not exist.
+    """
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT slot_id, status FROM customer_bookings WHERE id = ?", (booking_id,)
+        ).fetchone()
+        if row is None:
+            conn.rollback()
+            return False
+
+        slot_id, status = row
+        if status != 'cancelled':
+            # Multi-slot bookings list every slot; older ones only have slot_id
+            slot_ids = [row[0] for row in conn.execute(
+                "SELECT slot_id FROM booking_slots WHERE booking_id = ?", (booking_id,)
+            )] or [slot_id]
+            conn.executemany('''
+                UPDATE time_slots
+                SET current_bookings = current_bookings - 1
+                WHERE id = ? AND current_bookings > 0
+            ''', [(held,) for held in slot_ids])
+
+        if delete:
+            conn.execute("DELETE FROM booking_slots WHERE booking_id = ?", (booking_id,))
+            conn.execute("DELETE FROM customer_bookings WHERE id = ?", (booking_id,))
+        else:
+            conn.execute("UPDATE customer_bookings SET status = 'cancelled' WHERE id = ?", (booking_id,))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
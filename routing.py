@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Route sequencing for Aufraumenbee
+All-pairs haversine distances with NumPy and a daily visiting order per employee that keeps to scheduled times
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bulk_jobs import CLOSED_STATUSES, DEFAULT_JOB_MINUTES
+from config import Config
+from db_pool import get_connection
+from interval_index import to_window
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle km between coordinates in degrees; arrays broadcast"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def distance_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """(n, n) great-circle km between every pair of points, in one broadcast"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    a = (np.sin((lat[None, :] - lat[:, None]) / 2) ** 2
+         + np.outer(cos_lat, cos_lat) * np.sin((lon[None, :] - lon[:, None]) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def road_km(km):
+    """Straight-line km scaled to an estimate of the road distance"""
+    return km * Config.ROUTING_DETOUR_FACTOR
+
+
+def drive_minutes(road):
+    return road / Config.ROUTING_SPEED_KMH * 60
+
+
+def _day_start() -> int:
+    hours, minutes = Config.BUSINESS_HOURS_START.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+# ---------------------------------------------------------------------------
+# Sequencing
+# ---------------------------------------------------------------------------
+
+def _lateness(order: np.ndarray, minutes: np.ndarray, earliest: np.ndarray, latest: np.ndarray,
+              service: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Total minutes past the windows for stops visited in ``order`` (node 0 is the start).
+
+    begin[k] = max(begin[k-1] + service[k-1] + drive[k], earliest[k]) unrolls
+    to a cumulative sum plus a running maximum, so a whole route is
+    simulated without a Python loop.
+    """
+    stops = order[1:-1]
+    drive = minutes[order[:-2], stops]
+    elapsed = np.cumsum(drive) + np.concatenate(([0.0], np.cumsum(service[stops])[:-1]))
+    begin = elapsed + np.maximum.accumulate(earliest[stops] - elapsed)
+    return float(np.maximum(begin - latest[stops], 0).sum()), begin
+
+
+def _nearest_neighbour(minutes: np.ndarray, earliest: np.ndarray, latest: np.ndarray,
+                       service: np.ndarray) -> np.ndarray:
+    """Build a route one stop at a time, never making the most urgent stop late when avoidable.
+
+    A stop is safe when, after it, the stop with the earliest deadline can
+    still be reached in time; among safe stops the one that can begin
+    soonest goes next (the nearest, for stops without a time). With no
+    safe stop, the most urgent one goes next.
+    """
+    n = len(minutes) - 1
+    order = [0]
+    left = np.ones(n + 1, dtype=bool)
+    left[0] = False
+    now = -np.inf
+    for _ in range(n):
+        here = order[-1]
+        candidates = np.flatnonzero(left)
+        begin = np.maximum(now + minutes[here, candidates], earliest[candidates])
+        urgent = candidates[np.argmin(latest[candidates])]
+        if np.isfinite(latest[urgent]):
+            safe = (candidates == urgent) | (begin + service[candidates] + minutes[candidates, urgent] <= latest[urgent])
+        else:
+            safe = np.ones(len(candidates), dtype=bool)
+        if safe.any():
+            # Soonest begin first, then the shortest drive (untimed stops all begin at once)
+            safe = np.flatnonzero(safe)
+            pick = safe[np.lexsort((minutes[here, candidates[safe]], begin[safe]))[0]]
+        else:
+            pick = int(np.flatnonzero(candidates == urgent)[0])
+        node = int(candidates[pick])
+        order.append(node)
+        left[node] = False
+        now = float(begin[pick] + service[node])
+    order.append(0)
+    return np.array(order, dtype=np.int64)
+
+
+def _two_opt(order: np.ndarray, km: np.ndarray, minutes: np.ndarray, earliest: np.ndarray,
+             latest: np.ndarray, service: np.ndarray, max_passes: int = 50) -> np.ndarray:
+    """Reverse route segments while that shortens the route without adding lateness.
+
+    Each pass scores every reversal at once as a km delta matrix, then
+    accepts the best improving reversals first, skipping any that touch a
+    segment already changed in this pass.
+    """
+    m = len(order) - 2
+    if m < 3:
+        return order
+    late, _ = _lateness(order, minutes, earliest, latest, service)
+    upper = np.triu(np.ones((m, m), dtype=bool), 1)
+    for _ in range(max_passes):
+        before, first, after = order[:-2], order[1:-1], order[2:]
+        # Reversing positions i..j swaps edges (i-1, i) and (j, j+1) for (i-1, j) and (i, j+1)
+        delta = (km[np.ix_(before, first)] + km[np.ix_(first, after)]
+                 - km[before, first][:, None] - km[first, after][None, :])
+        delta[~upper] = 0
+        rows, columns = np.nonzero(delta < -1e-9)
+        if not len(rows):
+            break
+        touched = np.zeros(m + 2, dtype=bool)
+        improved = False
+        # The best m reversals are plenty per pass; the next pass rescores the rest
+        best = np.argsort(delta[rows, columns], kind='stable')[:m]
+        for i, j in zip((rows[best] + 1).tolist(), (columns[best] + 1).tolist()):
+            if touched[i - 1:j + 2].any():
+                continue
+            candidate = order.copy()
+            candidate[i:j + 1] = order[i:j + 1][::-1]
+            candidate_late, _ = _lateness(candidate, minutes, earliest, latest, service)
+            if candidate_late <= late + 1e-9:
+                order, late, improved = candidate, candidate_late, True
+                touched[i - 1:j + 2] = True
+        if not improved:
+            break
+    return order
+
+
+def sequence_route(lat: np.ndarray, lon: np.ndarray, earliest: np.ndarray, latest: np.ndarray,
+                   service: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Visiting order for stops 1..n starting and ending at point 0.
+
+    All arrays include the start point at index 0; times are minutes after
+    midnight, with latest = inf for stops that may begin any time. Returns
+    the order of stop indexes without the start point, the minute each
+    visit begins, and the total minutes visits begin late.
+    """
+    km = road_km(distance_matrix(lat, lon))
+    minutes = drive_minutes(km)
+    # Start 2-opt from whichever is less late: nearest neighbour, or the stops in window order
+    by_window = np.concatenate(([0], np.lexsort((latest[1:], earliest[1:])) + 1, [0]))
+    seeds = [_nearest_neighbour(minutes, earliest, latest, service), by_window]
+    seed = min(seeds, key=lambda o: (_lateness(o, minutes, earliest, latest, service)[0],
+                                     km[o[:-1], o[1:]].sum()))
+    order = _two_opt(seed, km, minutes, earliest, latest, service)
+    late, begin = _lateness(order, minutes, earliest, latest, service)
+    return order[1:-1], begin, late
+
+
+# ---------------------------------------------------------------------------
+# Routes from the database
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Route:
+    """One employee's visits on one day, in driving order"""
+    employee_id: int
+    day: date
+    job_ids: List[int] = field(default_factory=list)
+    arrivals: List[str] = field(default_factory=list)
+    km: float = 0.0
+    minutes: float = 0.0
+    late_minutes: float = 0.0
+    # Jobs without coordinates cannot be placed on the route
+    unlocated: List[int] = field(default_factory=list)
+
+
+def _stops(conn, day: date, employee_ids=None) -> List[tuple]:
+    """(id, employee_id, scheduled_time, duration, latitude, longitude, home_latitude, home_longitude)"""
+    closed = ', '.join('?' for _ in CLOSED_STATUSES)
+    query = f'''
+        SELECT j.id, j.employee_id, j.scheduled_time, j.duration, j.latitude, j.longitude,
+               e.home_latitude, e.home_longitude
+        FROM jobs j
+        JOIN employees e ON e.id = j.employee_id
+        WHERE j.scheduled_date = ? AND IFNULL(j.status, 'pending') NOT IN ({closed})
+    '''
+    params = [day.isoformat(), *CLOSED_STATUSES]
+    if employee_ids is not None:
+        employee_ids = [int(i) for i in employee_ids]
+        query += f" AND j.employee_id IN ({', '.join('?' for _ in employee_ids)})"
+        params += employee_ids
+    return conn.execute(query + " ORDER BY j.employee_id, j.scheduled_time, j.id", params).fetchall()
+
+
+def _route(employee_id: int, day: date, stops: List[tuple]) -> Route:
+    route = Route(employee_id, day)
+    route.unlocated = [row[0] for row in stops if row[4] is None or row[5] is None]
+    stops = [row for row in stops if row[4] is not None and row[5] is not None]
+    if not stops:
+        return route
+
+    home_lat, home_lon = stops[0][6], stops[0][7]
+    if home_lat is None or home_lon is None:
+        home_lat, home_lon = Config.ROUTING_DEPOT_LAT, Config.ROUTING_DEPOT_LON
+    windows = [to_window(row[2], row[3]) for row in stops]
+    earliest = np.array([-np.inf] + [w[0] if w else _day_start() for w in windows], dtype=np.float64)
+    latest = np.array([np.inf] + [w[0] + Config.ROUTING_LATE_TOLERANCE_MINUTES if w else np.inf for w in windows],
+                      dtype=np.float64)
+    service = np.array([0] + [w[1] - w[0] if w else DEFAULT_JOB_MINUTES for w in windows], dtype=np.float64)
+    lat = np.array([home_lat] + [row[4] for row in stops], dtype=np.float64)
+    lon = np.array([home_lon] + [row[5] for row in stops], dtype=np.float64)
+
+    order, begin, route.late_minutes = sequence_route(lat, lon, earliest, latest, service)
+    path = np.concatenate(([0], order, [0]))
+    route.km = float(road_km(haversine_km(lat[path[:-1]], lon[path[:-1]], lat[path[1:]], lon[path[1:]])).sum())
+    route.minutes = float(drive_minutes(route.km))
+    route.job_ids = [stops[k - 1][0] for k in order.tolist()]
+    route.arrivals = [f"{int(b) // 60:02d}:{int(b) % 60:02d}" for b in begin.tolist()]
+    return route
+
+
+def plan_routes(day: date, db_path: str = None, employee_ids=None) -> Dict[int, Route]:
+    """Driving order, km and minutes for every employee with open jobs on ``day``"""
+    conn = get_connection(db_path)
+    try:
+        rows = _stops(conn, day, employee_ids)
+    finally:
+        conn.close()
+    by_employee: Dict[int, List[tuple]] = {}
+    for row in rows:
+        by_employee.setdefault(row[1], []).append(row)
+    return {employee_id: _route(employee_id, day, stops) for employee_id, stops in by_employee.items()}
+
+
+def travel_summary(day: date, db_path: str = None) -> pd.DataFrame:
+    """employee_id, stops, travel_km, travel_minutes and late_minutes for ``day``"""
+    routes = plan_routes(day, db_path)
+    return pd.DataFrame([{
+        'employee_id': r.employee_id, 'stops': len(r.job_ids), 'travel_km': r.km,
+        'travel_minutes': r.minutes, 'late_minutes': r.late_minutes, 'unlocated': len(r.unlocated),
+    } for r in routes.values()], columns=['employee_id', 'stops', 'travel_km', 'travel_minutes',
+                                         'late_minutes', 'unlocated'])
+
+
+# ---------------------------------------------------------------------------
+# Travel input for assignment scoring
+# ---------------------------------------------------------------------------
+
+def insertion_km(job_days: np.ndarray, job_starts: np.ndarray, job_lat: np.ndarray, job_lon: np.ndarray,
+                 home_lat: np.ndarray, home_lon: np.ndarray, stop_columns: np.ndarray, stop_days: np.ndarray,
+                 stop_starts: np.ndarray, stop_lat: np.ndarray, stop_lon: np.ndarray) -> np.ndarray:
+    """jobs × employees road km each employee's day grows by when the job is added.
+
+    The job goes between the employee's stops just before and after its
+    start time that day (their home or the depot at either end), so the
+    cost is d(prev, job) + d(job, next) - d(prev, next). Every pair is
+    found with one searchsorted over (employee, day, start) keys.
+    """
+    jobs, employees = len(job_days), len(home_lat)
+    prev_lat = next_lat = np.broadcast_to(home_lat, (jobs, employees))
+    prev_lon = next_lon = np.broadcast_to(home_lon, (jobs, employees))
+    if len(stop_days):
+        base = min(job_days.min(), stop_days.min())
+        span = max(job_days.max(), stop_days.max()) - base + 1
+        keys = (stop_columns * span + (stop_days - base)) * 1440 + stop_starts
+        order = np.argsort(keys, kind='stable')
+        keys, stop_lat, stop_lon = keys[order], stop_lat[order], stop_lon[order]
+
+        groups = np.arange(employees)[None, :] * span + (job_days - base)[:, None]
+        position = np.searchsorted(keys, groups * 1440 + job_starts[:, None])
+        before = np.maximum(position - 1, 0)
+        after = np.minimum(position, len(keys) - 1)
+        has_prev = (position > 0) & (keys[before] // 1440 == groups)
+        has_next = (position < len(keys)) & (keys[after] // 1440 == groups)
+        prev_lat, prev_lon = np.where(has_prev, stop_lat[before], prev_lat), np.where(has_prev, stop_lon[before], prev_lon)
+        next_lat, next_lon = np.where(has_next, stop_lat[after], next_lat), np.where(has_next, stop_lon[after], next_lon)
+
+    lat, lon = job_lat[:, None], job_lon[:, None]
+    return road_km(haversine_km(prev_lat, prev_lon, lat, lon) + haversine_km(lat, lon, next_lat, next_lon)
+                   - haversine_km(prev_lat, prev_lon, next_lat, next_lon))
+
+if __name__ == "__main__":
+    # python routing.py [YYYY-MM-DD]
+    day = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    started = time.perf_counter()
+    routes = plan_routes(day)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🗺️ {len(routes)} routes for {day} in {elapsed:.0f} ms")
+    for route in routes.values():
+        late = f", {route.late_minutes:.0f} min late" if route.late_minutes else ""
+        print(f"   employee {route.employee_id}: {len(route.job_ids)} stops, {route.km:.1f} km, "
+              f"{route.minutes:.0f} min driving{late}")
+        for job_id, arrival in zip(route.job_ids, route.arrivals):
+            print(f"      {arrival}  job {job_id}")
+        if route.unlocated:
+            print(f"      ⚠️ no coordinates: jobs {', '.join(map(str, route.unlocated))}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Full-text search index for Aufraumenbee
+FTS5 index over customers, portal users, employees and bookings kept in sync by triggers
+"""
+
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from config import Config
+from db_pool import get_connection
+
+# rowid = source id * 4 + entity code, so one index serves every entity and
+# a hit maps back to its row without a join
+ENTITY_CODES: Dict[str, int] = {
+    'customer': 0,
+    'customer_user': 1,
+    'employee': 2,
+    'booking': 3,
+}
+ENTITY_NAMES = {code: name for name, code in ENTITY_CODES.items()}
+
+
+def _alt(expr: str) -> str:
+    """SQL expression spelling German umlauts and ß out (König -> Koenig)"""
+    for src, dst in (('ä', 'ae'), ('ö', 'oe'), ('ü', 'ue'), ('Ä', 'Ae'), ('Ö', 'Oe'), ('Ü', 'Ue'), ('ß', 'ss')):
+        expr = f"replace({expr}, '{src}', '{dst}')"
+    return expr
+
+
+# entity -> (table, {column: SQL over {r}}, columns whose UPDATE matters)
+SOURCES = {
+    'customer': ('customers', {
+        'name': "COALESCE({r}.name, TRIM(IFNULL({r}.first_name, '') || ' ' || IFNULL({r}.last_name, '')))",
+        'email': "{r}.email",
+        'phone': "{r}.phone",
+        'address': "{r}.address",
+        'notes': "{r}.preferences",
+    }, ['name', 'first_name', 'last_name', 'email', 'phone', 'address', 'preferences']),
+    'customer_user': ('customer_users', {
+        'name': "TRIM(IFNULL({r}.first_name, '') || ' ' || IFNULL({r}.last_name, ''))",
+        'email': "{r}.email",
+        'phone': "{r}.phone",
+        'address': "{r}.address",
+        'notes': "NULL",
+    }, ['first_name', 'last_name', 'email', 'phone', 'address']),
+    'employee': ('employees', {
+        'name': "{r}.name",
+        'email': "{r}.email",
+        'phone': "{r}.phone",
+        'address': "NULL",
+        'notes': "{r}.specialties",
+    }, ['name', 'email', 'phone', 'specialties']),
+    'booking': ('customer_bookings', {
+        'name': "NULL",
+        'email': "NULL",
+        'phone': "NULL",
+        'address': "{r}.address",
+        'notes': "{r}.special_instructions",
+    }, ['address', 'special_instructions']),
+}
+
+SEARCH_TABLE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        name, email, phone, address, notes, name_alt,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )
+'''
+
+# bm25 column weights: name, email, phone, address, notes, name_alt
+RANK_WEIGHTS = "10.0, 6.0, 4.0, 2.0, 1.0, 8.0"
+
+
+def _row_insert(entity: str, row: str) -> str:
+    table, columns, _ = SOURCES[entity]
+    values = [columns[c].format(r=row) for c in ('name', 'email', 'phone', 'address', 'notes')]
+    return f'''
+        INSERT INTO search_index (rowid, name, email, phone, address, notes, name_alt)
+        VALUES ({row}.id * 4 + {ENTITY_CODES[entity]}, {', '.join(values)}, {_alt(values[0])})'''
+
+
+def _row_delete(entity: str, row: str) -> str:
+    return f'''
+        DELETE FROM search_index WHERE rowid = {row}.id * 4 + {ENTITY_CODES[entity]}'''
+
+
+def _populate(conn: sqlite3.Connection, entity: str):
+    table, columns, _ = SOURCES[entity]
+    values = [columns[c].format(r='t') for c in ('name', 'email', 'phone', 'address', 'notes')]
+    conn.execute(f'''
+        INSERT INTO search_index (rowid, name, email, phone, address, notes, name_alt)
+        SELECT t.id * 4 + {ENTITY_CODES[entity]}, {', '.join(values)}, {_alt(values[0])}
+        FROM {table} t
+    ''')
+
+
+def install_search_index(conn: sqlite3.Connection):
+    """Create the FTS5 table and sync triggers, then index existing rows"""
+    conn.execute(SEARCH_TABLE)
+    for entity, (table, _, update_columns) in SOURCES.items():
+        for name in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_{name}")
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_search_insert AFTER INSERT ON {table}
+            BEGIN{_row_insert(entity, 'NEW')};
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_search_update
+            AFTER UPDATE OF {', '.join(update_columns)} ON {table}
+            BEGIN{_row_delete(entity, 'OLD')};{_row_insert(entity, 'NEW')};
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_search_delete AFTER DELETE ON {table}
+            BEGIN{_row_delete(entity, 'OLD')};
+            END
+        ''')
+    _rebuild(conn)
+
+
+def _rebuild(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM search_index")
+    for entity in SOURCES:
+        _populate(conn, entity)
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def rebuild_search_index(db_path: str = None):
+    """Re-index every source row in one write transaction"""
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _rebuild(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# bm25 has to score every match, so only queries with at most this many
+# matches are ranked by relevance; broader ones come back newest first
+RANK_WINDOW = 200
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 prefix query: every word must match.
+
+    Words are quoted so user input can never inject FTS5 syntax. Single
+    letters (initials, the "a" of "a.koenig@...") are dropped next to longer
+    words, since a one-letter prefix expands to a large part of the vocabulary.
+    Returns None when the text contains nothing searchable.
+    """
+    words = _WORD.findall(text or '')
+    if any(len(word) > 1 for word in words):
+        words = [word for word in words if len(word) > 1]
+    if not words:
+        return None
+    return ' AND '.join(f'"{word}"*' for word in words)
+
+
+def entity_filter(entities: Iterable[str]) -> str:
+    """SQL condition restricting search_index rowids to the given entities"""
+    codes = ', '.join(str(ENTITY_CODES[e]) for e in entities)
+    return f"search_index.rowid % 4 IN ({codes})"
+
+
+def matching_ids_sql(entity: str) -> str:
+    """Subquery yielding the ids of one entity matching a ``fts_query`` parameter"""
+    return (f"SELECT rowid / 4 FROM search_index "
+            f"WHERE search_index MATCH ? AND rowid % 4 = {ENTITY_CODES[entity]}")
+
+
+@dataclass
+class SearchHit:
+    """One ranked search result"""
+    entity: str
+    entity_id: int
+    score: Optional[float] = None
+
+
+def search(conn: sqlite3.Connection, text: str, entities: Iterable[str] = None,
+           limit: int = 20) -> List[SearchHit]:
+    """Best matches for free text, optionally limited to some entities.
+
+    Selective queries are ranked by bm25 with names weighted highest. A
+    query matching more than RANK_WINDOW rows returns its newest matches
+    unscored, which FTS5 can stop reading after RANK_WINDOW + 1 rows.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+    where = "search_index MATCH ?"
+    if entities:
+        where += f" AND {entity_filter(entities)}"
+
+    newest = [row[0] for row in conn.execute(
+        f"SELECT rowid FROM search_index WHERE {where} ORDER BY rowid DESC LIMIT ?",
+        (query, RANK_WINDOW + 1)
+    ).fetchall()]
+    if len(newest) > RANK_WINDOW:
+        return [SearchHit(ENTITY_NAMES[rowid % 4], rowid // 4) for rowid in newest[:limit]]
+
+    rows = conn.execute(f'''
+        SELECT rowid, bm25(search_index, {RANK_WEIGHTS}) AS score
+        FROM search_index
+        WHERE {where}
+        ORDER BY score
+        LIMIT ?
+    ''', (query, int(limit))).fetchall()
+    return [SearchHit(ENTITY_NAMES[rowid % 4], rowid // 4, score) for rowid, score in rows]
+
+
+if __name__ == "__main__":
+    from migrations import ensure_schema
+
+    if len(sys.argv) < 2:
+        print("Usage: python search_index.py rebuild [db_path] | search <text> [db_path]")
+        sys.exit(2)
+
+    if sys.argv[1] == 'rebuild':
+        target = sys.argv[2] if len(sys.argv) > 2 else Config.DATABASE_NAME
+        ensure_schema(target)
+        rebuild_search_index(target)
+        print("✅ Search index rebuilt")
+    elif sys.argv[1] == 'search':
+        target = sys.argv[3] if len(sys.argv) > 3 else Config.DATABASE_NAME
+        ensure_schema(target)
+        conn = get_connection(target)
+        for hit in search(conn, sys.argv[2]):
+            score = '' if hit.score is None else f"{hit.score:.3f}"
+            print(f"   {hit.entity:<14} #{hit.entity_id:<8} {score}")
+        conn.close()
@@ -0,0 +1,141 @@
+"""
+Duration-aware slot fitting for Aufraumenbee
+Finds every start time where a job of a given length fits into one employee-day's free slots
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from db_pool import get_connection
+
+# Shared (unassigned) slots use employee key None
+DayKey = Tuple[str, Optional[int]]
+
+
+def to_minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def to_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@dataclass
+class Fit:
+    """One place a job fits: the slots it occupies and its own start/end"""
+    date: str
+    employee_id: Optional[int]
+    start: int
+    end: int
+    slot_ids: Tuple[int, ...]
+
+    @property
+    def start_time(self) -> str:
+        return to_hhmm(self.start)
+
+    @property
+    def end_time(self) -> str:
+        return to_hhmm(self.end)
+
+
+class DaySchedule:
+    """Free slots of one employee-day as sorted runs of back-to-back slots.
+
+    A run is a maximal chain of free slots where each one ends exactly when
+    the next begins, so a job may span several of them. Runs are also kept
+    sorted by length: finding every start for a duration is a bisect to the
+    first long-enough run plus one bisect per qualifying run, and checking a
+    single start is one bisect.
+    """
+
+    def __init__(self, date: str, employee_id: Optional[int], slots: Iterable[Tuple[int, int, int]]):
+        """``slots`` are (slot_id, start_minute, end_minute) with free capacity"""
+        self.date = date
+        self.employee_id = employee_id
+        ordered = sorted(slots, key=lambda slot: slot[1])
+        self._ids = [slot[0] for slot in ordered]
+        self._starts = [slot[1] for slot in ordered]
+        self._ends = [slot[2] for slot in ordered]
+        # Per slot: end of the run it belongs to
+        self._run_end: List[int] = [0] * len(ordered)
+        runs: List[Tuple[int, int, int]] = []  # (length, first index, last index)
+        first = 0
+        for i in range(len(ordered)):
+            if i + 1 == len(ordered) or self._starts[i + 1] != self._ends[i]:
+                for j in range(first, i + 1):
+                    self._run_end[j] = self._ends[i]
+                runs.append((self._ends[i] - self._starts[first], first, i))
+                first = i + 1
+        runs.sort()
+        self._run_lengths = [run[0] for run in runs]
+        self._runs = [(run[1], run[2]) for run in runs]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _fit(self, index: int, duration: int) -> Fit:
+        start = self._starts[index]
+        last = bisect_left(self._starts, start + duration, lo=index)
+        return Fit(self.date, self.employee_id, start, start + duration, tuple(self._ids[index:last]))
+
+    def fit_at(self, start: int, duration: int) -> Optional[Fit]:
+        """The fit starting exactly at ``start`` (minutes), if there is one"""
+        index = bisect_left(self._starts, start)
+        if index == len(self._starts) or self._starts[index] != start:
+            return None
+        if self._run_end[index] - start < duration:
+            return None
+        return self._fit(index, duration)
+
+    def fits(self, duration: int) -> List[Fit]:
+        """Every slot start from which ``duration`` minutes of free time follow, in order"""
+        found = []
+        # Long-enough runs, put back in time order so the output needs no sort
+        for first, last in sorted(self._runs[bisect_left(self._run_lengths, duration):]):
+            stop = bisect_right(self._starts, self._ends[last] - duration, lo=first, hi=last + 1)
+            covered = first
+            for index in range(first, stop):
+                start = self._starts[index]
+                # Last slot the job touches only moves forward as the start does
+                while covered < last and self._starts[covered + 1] < start + duration:
+                    covered += 1
+                found.append(Fit(self.date, self.employee_id, start, start + duration,
+                                 tuple(self._ids[index:covered + 1])))
+        return found
+
+
+def load_schedules(conn, first_day: date, last_day: date = None) -> Dict[DayKey, DaySchedule]:
+    """One indexed query for the free slots of every employee-day in the range"""
+    last_day = last_day or first_day
+    grouped: Dict[DayKey, List[Tuple[int, int, int]]] = {}
+    for slot_id, day, employee_id, start_time, end_time in conn.execute('''
+        SELECT id, date, employee_id, start_time, end_time
+        FROM time_slots
+        WHERE date BETWEEN ? AND ? AND available = TRUE AND current_bookings < max_bookings
+    ''', (first_day.isoformat(), last_day.isoformat())):
+        grouped.setdefault((day, employee_id), []).append((slot_id, to_minutes(start_time), to_minutes(end_time)))
+    return {key: DaySchedule(key[0], key[1], slots) for key, slots in grouped.items()}
+
+
+def fitting_slots(selected_date: date, duration_minutes: int, db_path: str = None) -> List[Fit]:
+    """Start times on a date where a job of ``duration_minutes`` fits.
+
+    When several employee-days offer the same start, the shared pool wins,
+    then the one needing the fewest slots.
+    """
+    conn = get_connection(db_path)
+    try:
+        schedules = load_schedules(conn, selected_date)
+    finally:
+        conn.close()
+    best: Dict[int, Fit] = {}
+    for schedule in schedules.values():
+        for fit in schedule.fits(duration_minutes):
+            current = best.get(fit.start)
+            rank = (fit.employee_id is not None, len(fit.slot_ids))
+            if current is None or rank < (current.employee_id is not None, len(current.slot_ids)):
+                best[fit.start] = fit
+    return [best[start] for start in sorted(best)]
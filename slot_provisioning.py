@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Slot provisioning for Aufraumenbee
+Materializes bookable time slots for a rolling horizon from weekday templates and holiday exceptions
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from config import Config
+from db_pool import get_connection
+
+
+@dataclass
+class ProvisionResult:
+    """What one provisioning pass did"""
+    first_day: date
+    last_day: date
+    created: int = 0
+    holidays: int = 0
+    closed: int = 0
+
+    def describe(self) -> str:
+        return (f"{self.first_day} → {self.last_day}: {self.created} slots created, "
+                f"{self.holidays} holidays skipped, {self.closed} holiday slots closed")
+
+
+def _templates(conn: sqlite3.Connection) -> Dict[int, List[Tuple[str, str, int]]]:
+    """Active templates grouped by weekday (0 = Monday)"""
+    templates: Dict[int, List[Tuple[str, str, int]]] = {}
+    for weekday, start_time, end_time, max_bookings in conn.execute('''
+        SELECT weekday, start_time, end_time, max_bookings
+        FROM slot_templates WHERE active = TRUE ORDER BY weekday, start_time
+    '''):
+        templates.setdefault(weekday, []).append((start_time, end_time, max_bookings))
+    return templates
+
+
+def provision_slots(db_path: str = None, horizon_days: int = None, today: date = None,
+                    batch_days: int = None) -> ProvisionResult:
+    """Create the template slots for today .. today + horizon_days - 1.
+
+    Each batch of days is one executemany inside BEGIN IMMEDIATE. INSERT OR
+    IGNORE against idx_time_slots_unique makes reruns (and two provisioners
+    racing) no-ops for slots that already exist, so admin edits to capacity
+    or availability are never overwritten.
+    """
+    horizon_days = horizon_days or Config.SLOT_HORIZON_DAYS
+    batch_days = batch_days or Config.SLOT_PROVISION_BATCH_DAYS
+    today = today or date.today()
+    result = ProvisionResult(today, today + timedelta(days=horizon_days - 1))
+
+    # Own connection: the thread-shared one may hold a caller's open transaction
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        templates = _templates(conn)
+        holidays = {row[0] for row in conn.execute(
+            "SELECT date FROM slot_holidays WHERE date BETWEEN ? AND ?",
+            (result.first_day.isoformat(), result.last_day.isoformat())
+        )}
+
+        for batch_start in range(0, horizon_days, batch_days):
+            rows = []
+            for offset in range(batch_start, min(batch_start + batch_days, horizon_days)):
+                day = today + timedelta(days=offset)
+                if day.isoformat() in holidays:
+                    result.holidays += 1
+                    continue
+                rows.extend((day.isoformat(), start_time, end_time, max_bookings)
+                            for start_time, end_time, max_bookings in templates.get(day.weekday(), ()))
+            if not rows:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            result.created += conn.executemany('''
+                INSERT OR IGNORE INTO time_slots (date, start_time, end_time, available, max_bookings)
+                VALUES (?, ?, ?, TRUE, ?)
+            ''', rows).rowcount
+            conn.commit()
+
+        # Holidays declared after their day was provisioned: close the shared
+        # slots nobody has booked yet (booked ones are left for an admin)
+        conn.execute("BEGIN IMMEDIATE")
+        result.closed = conn.execute('''
+            UPDATE time_slots SET available = FALSE
+            WHERE date IN (SELECT date FROM slot_holidays WHERE date >= ?)
+              AND employee_id IS NULL AND available = TRUE AND current_bookings = 0
+        ''', (today.isoformat(),)).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return result
+
+
+def add_holiday(day: date, name: str = None, db_path: str = None) -> int:
+    """Record a closed day and close its unbooked slots; returns slots closed"""
+    conn = get_connection(db_path, exclusive=True)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT OR REPLACE INTO slot_holidays (date, name) VALUES (?, ?)",
+                     (day.isoformat(), name))
+        closed = conn.execute('''
+            UPDATE time_slots SET available = FALSE
+            WHERE date = ? AND employee_id IS NULL AND available = TRUE AND current_bookings = 0
+        ''', (day.isoformat(),)).rowcount
+        conn.commit()
+        return closed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# One provisioner thread per database
+_provisioners: Dict[str, threading.Thread] = {}
+_provisioners_lock = threading.Lock()
+
+
+def _provision_loop(db_path: str, interval: float):
+    while True:
+        try:
+            provision_slots(db_path)
+        except Exception as e:
+            print(f"⚠️ Slot provisioning failed for {db_path}: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def start_slot_provisioner(db_path: str = None, interval_hours: float = None) -> bool:
+    """Start the background provisioner for a database once per process.
+
+    Safe to call on every Streamlit rerun; returns False when it is already
+    running. The first pass runs immediately.
+    """
+    db_path = os.path.abspath(db_path or Config.DATABASE_NAME)
+    interval = (interval_hours or Config.SLOT_PROVISION_INTERVAL_HOURS) * 3600
+    with _provisioners_lock:
+        thread = _provisioners.get(db_path)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=_provision_loop, args=(db_path, interval),
+                                  name='aufraumenbee-slot-provisioner', daemon=True)
+        _provisioners[db_path] = thread
+        thread.start()
+    return True
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'provision'
+
+    if command == 'provision':
+        # Suitable for a daily cron job
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        print(f"✅ {provision_slots(horizon_days=days).describe()}")
+    elif command == 'watch':
+        print(f"🔄 Provisioning {Config.SLOT_HORIZON_DAYS} days ahead every "
+              f"{Config.SLOT_PROVISION_INTERVAL_HOURS} h (Ctrl+C to stop)")
+        _provision_loop(Config.DATABASE_NAME, Config.SLOT_PROVISION_INTERVAL_HOURS * 3600)
+    elif command == 'holiday' and len(sys.argv) > 2:
+        closed = add_holiday(date.fromisoformat(sys.argv[2]), ' '.join(sys.argv[3:]) or None)
+        print(f"🏖️ {sys.argv[2]} marked as holiday, {closed} slots closed")
+    else:
+        print("Usage: python slot_provisioning.py provision [days] | watch | holiday YYYY-MM-DD [name]")
+        sys.exit(2)
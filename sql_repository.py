@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+SQLAlchemy Core repository for Aufraumenbee
+Configurable engine plus pre-built statements over db_tables, portable beyond SQLite
+"""
+
+import sys
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import (Engine, bindparam, create_engine, delete, event, func, insert, or_, select, text,
+                        true, update)
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from config import Config
+from db_pool import configure_connection
+from db_rows import Booking, Customer, Job, Service, Slot, from_row
+from db_tables import (booking_slots, customer_bookings, customers, employees, jobs, metadata,
+                       service_types, time_slots)
+from query_metrics import InstrumentedConnection
+from reservations import ReservationResult, ReservationStatus
+
+
+# InstrumentedConnection lets DB_QUERY_METRICS_ENABLED time engine queries too
+_SQLITE_CONNECT_ARGS = {'check_same_thread': False, 'factory': InstrumentedConnection}
+
+
+def _is_memory(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def create_engine_from_config(url: str = None, **overrides) -> Engine:
+    """Engine for ``url`` (default Config.DATABASE_URL) with pool and cache settings from Config.
+
+    In-memory SQLite gets a StaticPool so every checkout sees the same
+    database; files and server databases get a bounded QueuePool. SQLite
+    connections receive the same PRAGMAs as db_pool's.
+    """
+    url = make_url(url or Config.DATABASE_URL)
+    options = {
+        'echo': Config.DB_ECHO_SQL,
+        'query_cache_size': Config.DB_STATEMENT_CACHE_SIZE,
+    }
+    if _is_memory(url):
+        options.update(poolclass=StaticPool, connect_args=_SQLITE_CONNECT_ARGS)
+    else:
+        options.update(poolclass=QueuePool, pool_size=Config.DB_POOL_SIZE,
+                       max_overflow=Config.DB_MAX_OVERFLOW, pool_timeout=Config.DB_POOL_TIMEOUT)
+        if url.get_backend_name() == 'sqlite':
+            options['connect_args'] = _SQLITE_CONNECT_ARGS
+        else:
+            options['pool_pre_ping'] = True
+    options.update(overrides)
+    engine = create_engine(url, **options)
+
+    if url.get_backend_name() == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def _configure(dbapi_connection, connection_record):
+            configure_connection(dbapi_connection)
+
+    return engine
+
+
+def ensure_tables(engine: Engine):
+    """Bring the schema up to date.
+
+    SQLite always goes through migrations.py, so an in-memory engine gets the
+    same triggers, FTS index and counters as a file. Server databases have no
+    migration history yet and are built from the table definitions.
+    """
+    if engine.dialect.name != 'sqlite':
+        metadata.create_all(engine)
+    elif _is_memory(engine.url):
+        from migrations import migrate_connection
+        with engine.connect() as conn:
+            migrate_connection(conn.connection.dbapi_connection)
+    else:
+        from migrations import ensure_schema
+        ensure_schema(engine.url.database)
+
+
+# One engine per URL, like db_pool's one pool per file
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(url: str = None) -> Engine:
+    """Shared, schema-checked engine for a URL"""
+    url = url or Config.DATABASE_URL
+    engine = _engines.get(url)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = create_engine_from_config(url)
+                ensure_tables(engine)
+                _engines[url] = engine
+    return engine
+
+
+# ---------------------------------------------------------------------------
+# Statements
+#
+# Built once at import. SQLAlchemy caches the compiled SQL per statement
+# shape, so each of these is compiled on first use and then only bound.
+# ---------------------------------------------------------------------------
+
+_CUSTOMER_BY_ID = select(customers).where(customers.c.id == bindparam('p_id'))
+_CUSTOMER_BY_EMAIL = (
+    select(customers)
+    .where(func.lower(func.trim(customers.c.email)) == func.lower(func.trim(bindparam('p_email'))))
+    .order_by(customers.c.id)
+    .limit(1)
+)
+_CUSTOMER_SORT = func.coalesce(customers.c.created_at, '')
+
+_SERVICES = select(service_types).order_by(service_types.c.name)
+_ACTIVE_SERVICES = _SERVICES.where(service_types.c.active == true())
+
+_OPEN_SLOTS = (
+    select(time_slots)
+    .where(time_slots.c.date.between(bindparam('p_from'), bindparam('p_to')),
+           time_slots.c.available == true(),
+           time_slots.c.current_bookings < time_slots.c.max_bookings)
+    .order_by(time_slots.c.date, time_slots.c.start_time)
+    .limit(bindparam('p_limit'))
+)
+_CLAIM_SLOT = (
+    update(time_slots)
+    .where(time_slots.c.id == bindparam('p_slot'),
+           time_slots.c.available == true(),
+           time_slots.c.current_bookings < time_slots.c.max_bookings)
+    .values(current_bookings=time_slots.c.current_bookings + 1)
+)
+_SLOT_BY_ID = select(time_slots).where(time_slots.c.id == bindparam('p_slot'))
+_INSERT_BOOKING = insert(customer_bookings)
+_INSERT_BOOKING_SLOT = insert(booking_slots)
+
+_BOOKING_STATE = (
+    select(customer_bookings.c.slot_id, customer_bookings.c.status)
+    .where(customer_bookings.c.id == bindparam('p_booking'))
+)
+_BOOKING_SLOT_IDS = select(booking_slots.c.slot_id).where(booking_slots.c.booking_id == bindparam('p_booking'))
+_RETURN_SLOT = (
+    update(time_slots)
+    .where(time_slots.c.id == bindparam('p_slot'), time_slots.c.current_bookings > 0)
+    .values(current_bookings=time_slots.c.current_bookings - 1)
+)
+_DELETE_BOOKING_SLOTS = delete(booking_slots).where(booking_slots.c.booking_id == bindparam('p_booking'))
+_DELETE_BOOKING = delete(customer_bookings).where(customer_bookings.c.id == bindparam('p_booking'))
+_CANCEL_BOOKING = (
+    update(customer_bookings)
+    .where(customer_bookings.c.id == bindparam('p_booking'))
+    .values(status='cancelled')
+)
+
+_CUSTOMER_BOOKINGS = (
+    select(customer_bookings)
+    .where(customer_bookings.c.customer_user_id == bindparam('p_user'))
+    .order_by(customer_bookings.c.date.desc(), customer_bookings.c.start_time.desc())
+    .limit(bindparam('p_limit'))
+)
+
+_JOBS = (
+    select(jobs, customers.c.name.label('customer_name'), employees.c.name.label('employee_name'))
+    .select_from(jobs.outerjoin(customers, jobs.c.customer_id == customers.c.id)
+                 .outerjoin(employees, jobs.c.employee_id == employees.c.id))
+)
+_JOBS_IN_WINDOW = (
+    _JOBS.where(jobs.c.scheduled_date.between(bindparam('p_from'), bindparam('p_to')))
+    .order_by(jobs.c.scheduled_date, func.coalesce(jobs.c.scheduled_time, ''), jobs.c.id)
+    .limit(bindparam('p_limit'))
+)
+_JOBS_IN_WINDOW_BY_STATUS = _JOBS_IN_WINDOW.where(jobs.c.status == bindparam('p_status'))
+
+_COUNTER = text("SELECT value FROM dashboard_counters WHERE key = :key")
+_FTS_CUSTOMER_IDS = text("SELECT rowid / 4 FROM search_index WHERE search_index MATCH :query AND rowid % 4 = 0")
+
+
+class SqlRepository:
+    """Customers, services, slots, bookings and jobs through SQLAlchemy Core.
+
+    Returns the same db_rows dataclasses as AsyncRepository. SQLite-only
+    features (FTS5 search, trigger-maintained counters) are used when the
+    engine is SQLite and replaced by portable SQL otherwise.
+    """
+
+    def __init__(self, engine: Engine = None):
+        self.engine = engine or get_engine()
+        self.sqlite = self.engine.dialect.name == 'sqlite'
+
+    # -----------------------------------------------------------------------
+    # Customers
+    # -----------------------------------------------------------------------
+
+    def get_customer(self, customer_id: int) -> Optional[Customer]:
+        with self.engine.connect() as conn:
+            return from_row(Customer, conn.execute(_CUSTOMER_BY_ID, {'p_id': customer_id}).mappings().first())
+
+    def get_customer_by_email(self, email: str) -> Optional[Customer]:
+        """Case- and whitespace-insensitive lookup on the normalized-email index"""
+        with self.engine.connect() as conn:
+            return from_row(Customer, conn.execute(_CUSTOMER_BY_EMAIL, {'p_email': email}).mappings().first())
+
+    def _customer_search(self, search: str):
+        if self.sqlite:
+            from search_index import fts_query
+            query = fts_query(search)
+            if query is None:
+                return None
+            return customers.c.id.in_(_FTS_CUSTOMER_IDS.bindparams(query=query).columns(id=customers.c.id.type))
+        pattern = f"%{search.strip()}%"
+        return or_(customers.c.name.ilike(pattern), customers.c.email.ilike(pattern),
+                   customers.c.phone.ilike(pattern), customers.c.address.ilike(pattern))
+
+    def list_customers(self, search: str = None, after: Customer = None, limit: int = 50) -> List[Customer]:
+        """Newest-first customers; pass the last row of a page as ``after``"""
+        statement = select(customers).order_by(_CUSTOMER_SORT.desc(), customers.c.id.desc()).limit(limit)
+        if search:
+            condition = self._customer_search(search)
+            if condition is None:
+                return []
+            statement = statement.where(condition)
+        if after is not None:
+            created_at = after.created_at or ''
+            statement = statement.where(
+                _CUSTOMER_SORT <= created_at,
+                or_(_CUSTOMER_SORT < created_at, customers.c.id < after.id),
+            )
+        with self.engine.connect() as conn:
+            return [from_row(Customer, row) for row in conn.execute(statement).mappings()]
+
+    def count_customers(self) -> int:
+        with self.engine.connect() as conn:
+            if self.sqlite:
+                value = conn.execute(_COUNTER, {'key': 'customers:total'}).scalar()
+                return int(value or 0)
+            return conn.execute(select(func.count()).select_from(customers)).scalar_one()
+
+    # -----------------------------------------------------------------------
+    # Services, slots and bookings
+    # -----------------------------------------------------------------------
+
+    def list_services(self, active_only: bool = True) -> List[Service]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(_ACTIVE_SERVICES if active_only else _SERVICES).mappings()
+            return [from_row(Service, row) for row in rows]
+
+    def list_open_slots(self, date_from: date, date_to: date, limit: int = 500) -> List[Slot]:
+        params = {'p_from': date_from.isoformat(), 'p_to': date_to.isoformat(), 'p_limit': limit}
+        with self.engine.connect() as conn:
+            return [from_row(Slot, row) for row in conn.execute(_OPEN_SLOTS, params).mappings()]
+
+    def list_customer_bookings(self, customer_user_id: int, limit: int = 100) -> List[Booking]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(_CUSTOMER_BOOKINGS, {'p_user': customer_user_id, 'p_limit': limit}).mappings()
+            return [from_row(Booking, row) for row in rows]
+
+    def reserve_slot(self, slot_id: int, customer_user_id: int, service_type_id: int, address: str,
+                     total_price: float, special_instructions: str = None) -> ReservationResult:
+        """Same contract as reservations.reserve_slot: the capacity check is the UPDATE's WHERE"""
+        with self.engine.begin() as conn:
+            if not conn.execute(_CLAIM_SLOT, {'p_slot': slot_id}).rowcount:
+                exists = conn.execute(_SLOT_BY_ID, {'p_slot': slot_id}).first()
+                return ReservationResult(
+                    ReservationStatus.SLOT_FULL if exists else ReservationStatus.SLOT_NOT_FOUND
+                )
+            slot = conn.execute(_SLOT_BY_ID, {'p_slot': slot_id}).mappings().one()
+            booking_id = conn.execute(_INSERT_BOOKING, {
+                'customer_user_id': customer_user_id, 'service_type_id': service_type_id,
+                'slot_id': slot_id, 'date': slot['date'], 'start_time': slot['start_time'],
+                'end_time': slot['end_time'], 'address': address,
+                'special_instructions': special_instructions, 'total_price': total_price,
+            }).inserted_primary_key[0]
+            conn.execute(_INSERT_BOOKING_SLOT, {'booking_id': booking_id, 'slot_id': slot_id})
+        return ReservationResult(ReservationStatus.RESERVED, booking_id)
+
+    def release_slot(self, booking_id: int, delete: bool = False) -> bool:
+        """Same contract as reservations.release_slot: capacity is returned once"""
+        with self.engine.begin() as conn:
+            row = conn.execute(_BOOKING_STATE, {'p_booking': booking_id}).first()
+            if row is None:
+                return False
+            if row.status != 'cancelled':
+                # Multi-slot bookings list every slot; older ones only have slot_id
+                slot_ids = list(conn.execute(_BOOKING_SLOT_IDS, {'p_booking': booking_id}).scalars()) \
+                    or [row.slot_id]
+                conn.execute(_RETURN_SLOT, [{'p_slot': held} for held in slot_ids])
+            if delete:
+                conn.execute(_DELETE_BOOKING_SLOTS, {'p_booking': booking_id})
+                conn.execute(_DELETE_BOOKING, {'p_booking': booking_id})
+            else:
+                conn.execute(_CANCEL_BOOKING, {'p_booking': booking_id})
+        return True
+
+    # -----------------------------------------------------------------------
+    # Jobs
+    # -----------------------------------------------------------------------
+
+    def list_jobs(self, date_from: date, date_to: date, status: str = None, limit: int = 500) -> List[Job]:
+        """Jobs in schedule order within a date window"""
+        params = {'p_from': date_from.isoformat(), 'p_to': date_to.isoformat(), 'p_limit': limit}
+        statement = _JOBS_IN_WINDOW
+        if status:
+            statement = _JOBS_IN_WINDOW_BY_STATUS
+            params['p_status'] = status
+        with self.engine.connect() as conn:
+            return [from_row(Job, row) for row in conn.execute(statement, params).mappings()]
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_URL
+    repo = SqlRepository(get_engine(target))
+    print(f"🔧 {repo.engine.url.render_as_string(hide_password=True)} ({type(repo.engine.pool).__name__})")
+    for label, call in (('list_services', repo.list_services),
+                        ('list_customers', lambda: repo.list_customers(limit=20)),
+                        ('count_customers', repo.count_customers)):
+        started = time.perf_counter()
+        call()
+        first = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for _ in range(200):
+            call()
+        cached = (time.perf_counter() - started) * 1000 / 200
+        print(f"   {label:<16} first {first:>7.2f} ms | cached statement {cached:>6.3f} ms")
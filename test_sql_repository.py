@@ -0,0 +1,140 @@
+"""
+Tests for the SQLAlchemy Core repository
+Runs SqlRepository against in-memory and file SQLite engines migrated by migrations.py
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from reservations import ReservationStatus, release_slot
+from sql_repository import SqlRepository, create_engine_from_config, ensure_tables
+
+DAY = date.today() + timedelta(days=7)
+
+
+@pytest.fixture(params=['memory', 'file'])
+def repo(request, tmp_path):
+    url = 'sqlite://' if request.param == 'memory' else f"sqlite:///{tmp_path / 'repo.db'}"
+    engine = create_engine_from_config(url)
+    ensure_tables(engine)
+    with engine.begin() as conn:
+        conn.execute(text('''
+            INSERT INTO customer_users (first_name, last_name, email, password_hash)
+            VALUES ('Anna', 'Müller', 'Anna@Example.com', 'x')
+        '''))
+        conn.execute(text("INSERT INTO customers (name, email, created_at) VALUES "
+                          "('Bob Brown', 'bob@example.com', '2025-01-01 10:00:00')"))
+        conn.execute(text('''
+            INSERT INTO service_types (name, base_price, duration_minutes, active)
+            VALUES ('Window cleaning', 40, 60, TRUE), ('Retired service', 10, 30, FALSE)
+        '''))
+        conn.execute(text('''
+            INSERT INTO time_slots (date, start_time, end_time, max_bookings)
+            VALUES (:day, '09:00', '11:00', 1), (:day, '11:00', '13:00', 2)
+        '''), {'day': DAY.isoformat()})
+    yield SqlRepository(engine)
+    engine.dispose()
+
+
+def _ids(conn, sql: str, **params):
+    return [row[0] for row in conn.execute(text(sql), params)]
+
+
+def _slot_bookings(repo, slot_id: int) -> int:
+    with repo.engine.connect() as conn:
+        return conn.execute(text("SELECT current_bookings FROM time_slots WHERE id = :id"), {'id': slot_id}).scalar()
+
+
+def _customer_user_id(repo) -> int:
+    with repo.engine.connect() as conn:
+        return conn.execute(text("SELECT id FROM customer_users")).scalar()
+
+
+def _service_id(repo) -> int:
+    with repo.engine.connect() as conn:
+        return conn.execute(text("SELECT id FROM service_types WHERE active")).scalar()
+
+
+def test_customers_include_linked_portal_accounts(repo):
+    names = [customer.name for customer in repo.list_customers()]
+    assert sorted(names) == ['Anna Müller', 'Bob Brown']
+    assert repo.count_customers() == 2
+    assert repo.get_customer_by_email('  anna@example.COM ').name == 'Anna Müller'
+    assert [customer.name for customer in repo.list_customers(search='mull')] == ['Anna Müller']
+
+
+def test_customer_pages_do_not_overlap(repo):
+    first = repo.list_customers(limit=1)
+    second = repo.list_customers(after=first[-1], limit=1)
+    assert len(first) == len(second) == 1
+    assert first[0].id != second[0].id
+    assert repo.list_customers(after=second[-1], limit=1) == []
+
+
+def test_services_and_open_slots(repo):
+    # The migrations seed their own catalogue next to ours
+    active = [service.name for service in repo.list_services()]
+    assert 'Window cleaning' in active and 'Retired service' not in active
+    assert 'Retired service' in [service.name for service in repo.list_services(active_only=False)]
+    slots = repo.list_open_slots(DAY, DAY)
+    assert [slot.start_time for slot in slots] == ['09:00', '11:00']
+
+
+def test_reserve_claims_capacity_and_records_the_slot(repo):
+    slot_id = repo.list_open_slots(DAY, DAY)[0].id
+    result = repo.reserve_slot(slot_id, _customer_user_id(repo), _service_id(repo), 'Hauptstr. 1', 40.0)
+
+    assert result.ok
+    assert _slot_bookings(repo, slot_id) == 1
+    with repo.engine.connect() as conn:
+        assert _ids(conn, "SELECT slot_id FROM booking_slots WHERE booking_id = :b", b=result.booking_id) == [slot_id]
+    assert [booking.id for booking in repo.list_customer_bookings(_customer_user_id(repo))] == [result.booking_id]
+
+    # The only place is taken now
+    again = repo.reserve_slot(slot_id, _customer_user_id(repo), _service_id(repo), 'Hauptstr. 1', 40.0)
+    assert again.status is ReservationStatus.SLOT_FULL
+    assert repo.reserve_slot(9999, _customer_user_id(repo), _service_id(repo), 'x', 1.0).status \
+        is ReservationStatus.SLOT_NOT_FOUND
+    assert [slot.start_time for slot in repo.list_open_slots(DAY, DAY)] == ['11:00']
+
+
+def test_release_returns_capacity_exactly_once(repo):
+    slot_id = repo.list_open_slots(DAY, DAY)[1].id
+    booking_id = repo.reserve_slot(slot_id, _customer_user_id(repo), _service_id(repo), 'x', 40.0).booking_id
+    assert _slot_bookings(repo, slot_id) == 1
+
+    assert repo.release_slot(booking_id)
+    assert _slot_bookings(repo, slot_id) == 0
+    # Deleting the cancelled booking must not free the place a second time
+    assert repo.release_slot(booking_id, delete=True)
+    assert _slot_bookings(repo, slot_id) == 0
+    with repo.engine.connect() as conn:
+        assert _ids(conn, "SELECT id FROM customer_bookings") == []
+        assert _ids(conn, "SELECT id FROM booking_slots") == []
+    assert not repo.release_slot(booking_id)
+
+
+def test_bookings_interoperate_with_the_sqlite_service(repo):
+    if repo.engine.url.database in (None, '', ':memory:'):
+        pytest.skip("reservations.py opens the database file itself")
+    slot_id = repo.list_open_slots(DAY, DAY)[0].id
+    booking_id = repo.reserve_slot(slot_id, _customer_user_id(repo), _service_id(repo), 'x', 40.0).booking_id
+
+    assert release_slot(booking_id, db_path=repo.engine.url.database)
+    assert _slot_bookings(repo, slot_id) == 0
+
+
+def test_jobs_in_window(repo):
+    with repo.engine.begin() as conn:
+        customer_id = conn.execute(text("SELECT id FROM customers WHERE name = 'Bob Brown'")).scalar()
+        conn.execute(text('''
+            INSERT INTO jobs (customer_id, title, status, scheduled_date, scheduled_time)
+            VALUES (:c, 'Late', 'pending', :day, '15:00'), (:c, 'Early', 'assigned', :day, '08:00'),
+                   (:c, 'Other week', 'pending', :later, '08:00')
+        '''), {'c': customer_id, 'day': DAY.isoformat(), 'later': (DAY + timedelta(days=7)).isoformat()})
+
+    assert [job.title for job in repo.list_jobs(DAY, DAY)] == ['Early', 'Late']
+    assert [job.title for job in repo.list_jobs(DAY, DAY, status='pending')] == ['Late']
+    assert repo.list_jobs(DAY, DAY)[0].customer_name == 'Bob Brown'
@@ -74,6 +74,12 @@ class TranslationManager:
                 'required_field': 'Required field',
                 'optional_field': 'Optional field',
                 'choose_date': 'Choose Date',
+                'places_free': 'free',
+                'no_fitting_time': 'No free time on this date is long enough for this service. Please choose another date.',
+                'slot_taken': 'Sorry, this time was just booked by someone else. Please choose another time.',
+                'fully_booked': 'fully booked',
+                'no_free_dates': 'All dates in the next 30 days are fully booked. Please check back later.',
+                'no_slots_provisioned': 'Online booking is not open for these dates yet. Please contact us to arrange an appointment.',
                 'choose_time': 'Choose Time',
                 'service_type': 'Service Type',
                 'special_instructions': 'Special Instructions',
@@ -356,6 +362,12 @@ class TranslationManager:
                 'required_field': 'Pflichtfeld',
                 'optional_field': 'Optionales Feld',
                 'choose_date': 'Datum wählen',
+                'places_free': 'frei',
+                'no_fitting_time': 'An diesem Tag ist keine freie Zeit lang genug für diesen Service. Bitte wählen Sie ein anderes Datum.',
+                'slot_taken': 'Dieser Termin wurde gerade vergeben. Bitte wählen Sie eine andere Uhrzeit.',
+                'fully_booked': 'ausgebucht',
+                'no_free_dates': 'Alle Termine der nächsten 30 Tage sind ausgebucht. Bitte schauen Sie später wieder vorbei.',
+                'no_slots_provisioned': 'Die Online-Buchung ist für diese Termine noch nicht freigeschaltet. Bitte kontaktieren Sie uns für einen Termin.',
                 'choose_time': 'Uhrzeit wählen',
                 'service_type': 'Service-Art',
                 'special_instructions': 'Besondere Anweisungen',
@@ -638,6 +650,8 @@ class TranslationManager:
                 'new_price': 'Neuer Preis',
                 'update_prices': 'Preise aktualisieren',
                 'prices_updated_successfully': 'Preise erfolgreich aktualisiert',
+                'some_jobs_skipped': 'Einige Aufträge wurden übersprungen',
+                'employee_double_booked': 'Mitarbeiter ist zu dieser Zeit bereits eingeplant',
                 'percentage_change': 'Prozentuale Änderung',
                 'no_jobs_available_for_bulk_operations': 'Keine Aufträge für Massenoperationen verfügbar',
                 'key_performance_indicators': 'Wichtige Leistungsindikatoren',
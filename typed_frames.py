@@ -0,0 +1,192 @@
+"""
+Typed DataFrame loading for Aufraumenbee
+Applies a per-table dtype schema to read_sql_query results: categoricals, datetime64, nullable ints
+"""
+
+import re
+import sqlite3
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)', re.IGNORECASE)
+
+# Column kinds; a list means a categorical with those categories known up front
+CATEGORY = 'category'
+DATETIME = 'datetime'
+INT = 'int'
+FLOAT32 = 'float32'
+BOOL = 'bool'
+
+JOB_STATUSES = ['pending', 'confirmed', 'approved', 'assigned', 'in_progress', 'completed', 'cancelled']
+BOOKING_STATUSES = ['pending', 'confirmed', 'completed', 'cancelled']
+INVOICE_STATUSES = ['pending', 'paid', 'overdue', 'cancelled']
+EMPLOYEE_STATUSES = ['active', 'inactive']
+EMPLOYMENT_TYPES = ['permanent', 'contract']
+
+# Money (price, amounts, hourly_rate) deliberately stays float64; float32 only
+# holds ~7 significant digits, so sums over a year of invoices would drift
+TABLE_SCHEMAS: Dict[str, Dict[str, Union[str, List[str]]]] = {
+    'jobs': {
+        'id': INT, 'customer_id': INT, 'employee_id': INT,
+        'scheduled_date': DATETIME, 'scheduled_time': CATEGORY, 'duration': INT,
+        'status': JOB_STATUSES, 'service_type': CATEGORY,
+        'created_at': DATETIME, 'completed_at': DATETIME, 'updated_at': DATETIME,
+        'duration_hours': INT,
+    },
+    'invoices': {
+        'id': INT, 'job_id': INT, 'customer_id': INT, 'status': INVOICE_STATUSES,
+        'due_date': DATETIME, 'paid_date': DATETIME, 'issued_date': DATETIME,
+        'created_at': DATETIME, 'updated_at': DATETIME,
+    },
+    'customers': {
+        'id': INT, 'rating': FLOAT32, 'total_jobs': INT, 'created_at': DATETIME,
+        'registration_source': CATEGORY, 'customer_user_id': INT,
+    },
+    'customer_users': {
+        'id': INT, 'created_at': DATETIME, 'verified': BOOL,
+    },
+    'users': {
+        'id': INT, 'role': CATEGORY, 'created_at': DATETIME,
+    },
+    'employees': {
+        'id': INT, 'employment_type': EMPLOYMENT_TYPES, 'background_check': BOOL,
+        'rating': FLOAT32, 'total_jobs': INT, 'status': EMPLOYEE_STATUSES,
+        'position': CATEGORY, 'created_at': DATETIME,
+    },
+    'customer_bookings': {
+        'id': INT, 'customer_user_id': INT, 'service_type_id': INT, 'slot_id': INT,
+        'date': DATETIME, 'start_time': CATEGORY, 'end_time': CATEGORY,
+        'status': BOOKING_STATUSES, 'created_at': DATETIME, 'updated_at': DATETIME,
+    },
+    'time_slots': {
+        'id': INT, 'date': DATETIME, 'start_time': CATEGORY, 'end_time': CATEGORY,
+        'available': BOOL, 'employee_id': INT, 'max_bookings': INT, 'current_bookings': INT,
+        'created_at': DATETIME,
+    },
+    'service_types': {
+        'id': INT, 'duration_minutes': INT, 'category': CATEGORY, 'active': BOOL,
+        'duration_hours': INT, 'created_at': DATETIME,
+    },
+    'job_feedback': {
+        'id': INT, 'job_id': INT, 'customer_id': INT, 'rating': INT, 'created_at': DATETIME,
+    },
+    'inventory': {
+        'id': INT, 'category': CATEGORY, 'quantity': INT, 'minimum_stock': INT,
+        'created_at': DATETIME,
+    },
+}
+
+_INT32_MIN, _INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def tables_in(sql: str) -> List[str]:
+    """Tables named after FROM/JOIN, in order of appearance"""
+    return list(dict.fromkeys(name.lower() for name in _TABLE_REF.findall(sql)))
+
+
+def schema_for(tables: Iterable[str]) -> Dict[str, Union[str, List[str]]]:
+    """Merged column schema; the first table to define a column wins"""
+    merged: Dict[str, Union[str, List[str]]] = {}
+    for table in tables:
+        for column, kind in TABLE_SCHEMAS.get(table, {}).items():
+            merged.setdefault(column, kind)
+    return merged
+
+
+def _to_category(series: pd.Series, known: Optional[List[str]]) -> pd.Series:
+    values = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    if not known:
+        return values
+    # Unknown values extend the categories instead of silently becoming NaN
+    extra = [value for value in values.cat.categories if value not in known]
+    return values.cat.set_categories(list(known) + extra)
+
+
+def _to_datetime(series: pd.Series) -> pd.Series:
+    # Dates repeat heavily (a year of jobs has ~365 distinct days), so parse
+    # each distinct string once and broadcast the result
+    codes, uniques = pd.factorize(series)
+    # The trailing None gives missing values (code -1) a NaT to take
+    parsed = pd.to_datetime(pd.Series([*uniques, None], dtype=object), format='ISO8601', errors='coerce')
+    values = parsed.to_numpy().take(codes)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _to_int(series: pd.Series) -> pd.Series:
+    numbers = pd.to_numeric(series, errors='coerce')
+    low, high = numbers.min(), numbers.max()
+    fits = pd.isna(low) or (low >= _INT32_MIN and high <= _INT32_MAX)
+    return numbers.astype('Int32' if fits else 'Int64')
+
+
+def _convert(series: pd.Series, kind: Union[str, List[str]]) -> pd.Series:
+    if isinstance(kind, list) or kind == CATEGORY:
+        return _to_category(series, kind if isinstance(kind, list) else None)
+    if kind == DATETIME:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return _to_datetime(series)
+    if kind == INT:
+        return _to_int(series)
+    if kind == FLOAT32:
+        return pd.to_numeric(series, errors='coerce').astype('float32')
+    if kind == BOOL:
+        return pd.to_numeric(series, errors='coerce').astype('boolean')
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def apply_schema(df: pd.DataFrame, tables: Iterable[str]) -> pd.DataFrame:
+    """Convert the columns of df that the tables' schemas know about, in place"""
+    schema = schema_for(tables)
+    for column in df.columns:
+        kind = schema.get(column)
+        if kind is None or not isinstance(column, str):
+            continue
+        try:
+            df[column] = _convert(df[column], kind)
+        except (TypeError, ValueError):
+            # Expression columns aliased to a schema name (e.g. a formatted
+            # string) keep whatever read_sql_query gave them
+            continue
+    return df
+
+
+def read_sql_typed(sql: str, conn: sqlite3.Connection, params=None,
+                   tables: Sequence[str] = None) -> pd.DataFrame:
+    """pd.read_sql_query with the schemas of the tables the query reads applied"""
+    df = pd.read_sql_query(sql, conn, params=params)
+    return apply_schema(df, tables if tables is not None else tables_in(sql))
+
+
+def iter_sql_typed(sql: str, conn: sqlite3.Connection, params=None, tables: Sequence[str] = None,
+                   chunksize: int = None) -> Iterator[pd.DataFrame]:
+    """Typed chunks of a large result; combine them with concat_typed()"""
+    tables = tables if tables is not None else tables_in(sql)
+    for chunk in pd.read_sql_query(sql, conn, params=params,
+                                   chunksize=chunksize or Config.DB_READ_CHUNK_SIZE):
+        yield apply_schema(chunk, tables)
+
+
+def concat_typed(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps categoricals when chunks saw different categories"""
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    for column in frames[0].columns:
+        if not isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            continue
+        categories = list(dict.fromkeys(chain.from_iterable(
+            frame[column].cat.categories for frame in frames)))
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Deep memory footprint of a frame, including string payloads"""
+    return int(df.memory_usage(index=True, deep=True).sum())
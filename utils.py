@@ -73,23 +73,10 @@ def generate_invoice_number() -> str:
     return f"INV-{now.strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two coordinates (simplified)"""
-    # This is a simplified calculation - in production, use proper geolocation API
-    import math
+    """Great-circle distance in km; routing.haversine_km does whole arrays at once"""
+    from routing import haversine_km
     
-    R = 6371  # Earth's radius in kilometers
-    
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-         math.sin(dlon/2) * math.sin(dlon/2))
-    
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    distance = R * c
-    
-    return distance
+    return float(haversine_km(lat1, lon1, lat2, lon2))
 
 def create_revenue_chart(df: pd.DataFrame) -> go.Figure:
     """Create revenue chart"""